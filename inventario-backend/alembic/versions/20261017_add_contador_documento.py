@@ -0,0 +1,30 @@
+"""add contador_documento table for per-series document numbering
+
+Revision ID: 20261017_contador_documento
+Revises: 20261017_venta_daily_rollup
+Create Date: 2026-10-17
+
+Series counters are created on first use, continuing after the highest
+existing number of the series.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_contador_documento'
+down_revision = '20261017_venta_daily_rollup'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'contador_documento',
+        sa.Column('serie', sa.String(length=30), nullable=False),
+        sa.Column('ultimo', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('serie'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('contador_documento')
@@ -0,0 +1,47 @@
+"""add incrementally maintained inventory snapshot tables
+
+Revision ID: 20261017_inventory_snapshot
+Revises: 20261017_keyset_indexes
+Create Date: 2026-10-17
+
+After upgrading, populate the tables with
+``python -m app.scripts.rebuild_inventory_snapshot``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_inventory_snapshot'
+down_revision = '20261017_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'inventory_snapshot',
+        sa.Column('ambito', sa.String(length=20), nullable=False),
+        sa.Column('id_ambito', sa.Integer(), nullable=False),
+        sa.Column('total_productos', sa.Integer(), nullable=False),
+        sa.Column('productos_activos', sa.Integer(), nullable=False),
+        sa.Column('productos_bajo_stock', sa.Integer(), nullable=False),
+        sa.Column('productos_sin_stock', sa.Integer(), nullable=False),
+        sa.Column('stock_total', sa.Integer(), nullable=False),
+        sa.Column('valor_total_inventario', sa.Float(), nullable=False),
+        sa.Column('suma_precio_activos', sa.Float(), nullable=False),
+        sa.Column('actualizado_en', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('ambito', 'id_ambito'),
+    )
+    op.create_table(
+        'inventory_expiry_snapshot',
+        sa.Column('ambito', sa.String(length=20), nullable=False),
+        sa.Column('id_ambito', sa.Integer(), nullable=False),
+        sa.Column('fecha_vencimiento', sa.Date(), nullable=False),
+        sa.Column('lotes', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('ambito', 'id_ambito', 'fecha_vencimiento'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('inventory_expiry_snapshot')
+    op.drop_table('inventory_snapshot')
@@ -0,0 +1,30 @@
+"""add composite (fecha, id) indexes for keyset pagination
+
+Revision ID: 20261017_keyset_indexes
+Revises: 20251028_add_core_indexes, 20251107_add_lockout
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20261017_keyset_indexes'
+down_revision = ('20251028_add_core_indexes', '20251107_add_lockout')
+branch_labels = None
+depends_on = None
+
+_INDEXES = [
+    ('ix_venta_fecha_venta_id_venta', 'venta', ['fecha_venta', 'id_venta']),
+    ('ix_entrada_fecha_entrada_id_entrada', 'entrada', ['fecha_entrada', 'id_entrada']),
+    ('ix_gasto_fecha_gasto_id_gasto', 'gasto', ['fecha_gasto', 'id_gasto']),
+    ('ix_cotizacion_fecha_cotizacion_id_cotizacion', 'cotizacion', ['fecha_cotizacion', 'id_cotizacion']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in _INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(_INDEXES):
+        op.drop_index(name, table_name=table)
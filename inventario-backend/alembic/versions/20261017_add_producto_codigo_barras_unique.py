@@ -0,0 +1,53 @@
+"""add unique constraint on producto.codigo_barras
+
+Revision ID: 20261017_codigo_barras_unique
+Revises: 20261017_contador_documento
+Create Date: 2026-10-17
+
+The bulk product import upserts with ON CONFLICT (codigo_barras), which needs
+a unique constraint on the column (the model declares it, the initial
+migration did not). Existing data is not modified: if two products share a
+barcode (blank ones included) the upgrade fails listing them. Review and clear
+them with ``python -m app.scripts.dedupe_codigo_barras`` and run it again.
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20261017_codigo_barras_unique'
+down_revision = '20261017_contador_documento'
+branch_labels = None
+depends_on = None
+
+# Default PostgreSQL name for the column-level UNIQUE declared in models.py
+_CONSTRAINT = 'producto_codigo_barras_key'
+
+
+def upgrade() -> None:
+    duplicados = op.get_bind().execute(
+        sa.text(
+            """
+            SELECT id_producto, codigo_barras FROM producto
+            WHERE codigo_barras IN (
+                SELECT codigo_barras FROM producto
+                WHERE codigo_barras IS NOT NULL
+                GROUP BY codigo_barras HAVING COUNT(*) > 1
+            )
+            ORDER BY codigo_barras, id_producto
+            """
+        )
+    ).all()
+    if duplicados:
+        detalle = ", ".join(f"{id_producto}={codigo!r}" for id_producto, codigo in duplicados)
+        raise RuntimeError(
+            f"{len(duplicados)} products share a barcode (id_producto=codigo_barras: {detalle}). "
+            "Clear them with `python -m app.scripts.dedupe_codigo_barras --apply` and retry."
+        )
+    with op.batch_alter_table('producto') as batch_op:
+        batch_op.create_unique_constraint(_CONSTRAINT, ['codigo_barras'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('producto') as batch_op:
+        batch_op.drop_constraint(_CONSTRAINT, type_='unique')
@@ -0,0 +1,40 @@
+"""add venta_daily_rollup table and backfill it from venta
+
+Revision ID: 20261017_venta_daily_rollup
+Revises: 20261017_inventory_snapshot
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_venta_daily_rollup'
+down_revision = '20261017_inventory_snapshot'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'venta_daily_rollup',
+        sa.Column('fecha', sa.Date(), nullable=False),
+        sa.Column('metodo_pago', sa.String(length=50), nullable=False),
+        sa.Column('cantidad_ventas', sa.Integer(), nullable=False),
+        sa.Column('total_ventas', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('fecha', 'metodo_pago'),
+    )
+
+    dia = "date(fecha_venta)" if op.get_bind().dialect.name == 'sqlite' else "CAST(fecha_venta AS DATE)"
+    op.execute(
+        f"""
+        INSERT INTO venta_daily_rollup (fecha, metodo_pago, cantidad_ventas, total_ventas)
+        SELECT {dia}, COALESCE(metodo_pago, ''), COUNT(*), COALESCE(SUM(total), 0)
+        FROM venta
+        WHERE estado = 'Activo'
+        GROUP BY {dia}, COALESCE(metodo_pago, '')
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('venta_daily_rollup')
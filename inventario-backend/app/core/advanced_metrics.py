@@ -343,33 +343,29 @@ class HealthCheckCollector:
 
     @staticmethod
     def get_inventory_metrics() -> dict[str, Any]:
-        """Get current inventory metrics."""
-        from sqlalchemy import func
-
+        """Get current inventory metrics (single query) and refresh the Prometheus gauges."""
+        from app.crud.kpis_inventario import calcular_kpis_inventario
         from app.models.database import SessionLocal
-        from app.models.models import Producto
 
         db = SessionLocal()
         try:
-            total_value = (
-                db.query(func.sum(Producto.precio_compra * Producto.stock_actual)).scalar() or 0
-            )
-            low_stock = (
-                db.query(func.count(Producto.id_producto))
-                .filter(Producto.stock_actual <= Producto.stock_minimo)
-                .scalar()
-                or 0
-            )
-            total_products = db.query(func.count(Producto.id_producto)).scalar() or 0
-
-            return {
-                "total_value": float(total_value),
-                "low_stock_count": int(low_stock),
-                "total_products": int(total_products),
-            }
+            kpis = calcular_kpis_inventario(db)
         finally:
             db.close()
 
+        metrics = {
+            "total_value": float(kpis["valor_total_inventario"]),
+            "low_stock_count": kpis["productos_bajo_stock"],
+            "near_expiry_count": kpis["productos_proximos_vencer"],
+            "total_products": kpis["total_productos"],
+        }
+        MetricsCollector.set_inventory_metrics(
+            total_value=metrics["total_value"],
+            low_stock_count=metrics["low_stock_count"],
+            near_expiry_count=metrics["near_expiry_count"],
+        )
+        return metrics
+
     @staticmethod
     def get_performance_metrics() -> dict[str, Any]:
         """Get performance metrics."""
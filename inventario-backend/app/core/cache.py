@@ -1,28 +1,172 @@
 """
 Sistema de caché con Redis para mejorar performance
+
+Con CACHE_L1_ENABLED hay dos niveles: un LRU en proceso (L1, `app.core.cache_l1`) delante de
+Redis (L2). Cada escritura o borrado se publica en CACHE_INVALIDATION_CHANNEL y los demás
+workers expulsan esas claves de su L1; el TTL corto del L1 acota el daño si se pierde un mensaje.
+
+API async (`aget`, `amget`, `aset`, `adelete`, `ainvalidate_tags`) para los endpoints
+`async def`: usa `redis.asyncio` con un pool por event loop y no bloquea el loop; la API sync
+(con su propio pool compartido) queda para jobs del scheduler y endpoints `def`.
+
+Invalidación sin bloquear Redis: cada entrada puede registrarse en etiquetas (sets
+`tag:<nombre>`) e `invalidate_tags` borra sus miembros con UNLINK por lotes; los borrados por
+patrón recorren el keyspace con SCAN incremental en vez de KEYS.
+
+Protección contra estampidas (`get_or_compute` / `aget_or_compute`, y `cache_result`):
+- Single-flight: en un fallo de caché solo quien obtiene el lock `lock:<clave>` (SET NX PX)
+  recalcula; los demás esperan a que aparezca el valor.
+- Refresco anticipado probabilístico (XFetch): cuanto más cerca del vencimiento y más caro
+  el cálculo, más probable que una lectura dispare el recálculo antes de que venza.
+- Stale-while-revalidate: una entrada vencida se sigue sirviendo, marcada como `stale`,
+  durante CACHE_STALE_TTL_SECONDS mientras se recalcula en segundo plano.
 """
 
+import asyncio
+import dataclasses
 import hashlib
 import inspect
 import json
-from collections.abc import Callable
+import math
+import random
+import time as time_mod
+import uuid
+import weakref
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
 from functools import wraps
-from typing import Any, cast
+from typing import Any, NamedTuple, TypeGuard, cast
 
 import redis
+import redis.asyncio as aioredis
+from pydantic import BaseModel
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.exc import NoInspectionAvailable
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
+from app.core.cache_codec import CacheCodec
+from app.core.cache_l1 import CacheLocal
 from app.core.config import settings
 from app.core.logging_config import inventario_logger
+from app.core.metrics import metrics_manager
 
 logger = inventario_logger
 
+# Argumentos que no forman parte de la clave (la sesión no cambia el resultado)
+_OMITIR = object()
+
+# Libera el lock de recálculo solo si sigue siendo nuestro (pudo vencer y tomarlo otro)
+_LIBERAR_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+# Intervalo de sondeo de quienes esperan a que otro termine de recalcular
+_ESPERA_LOCK = 0.05
+
+
+def _ahora() -> float:
+    return time_mod.time()
+
+
+class Lectura(NamedTuple):
+    """Resultado de `get_or_compute`: el valor y su origen (`hit`, `stale` o `miss`)."""
+
+    valor: Any
+    estado: str
+
+    @property
+    def stale(self) -> bool:
+        return self.estado == "stale"
+
+
+def _es_sobre(valor: Any) -> TypeGuard[dict[str, Any]]:
+    return isinstance(valor, dict) and "__swr__" in valor
+
+
+def _debe_refrescar(sobre: dict[str, Any]) -> tuple[bool, bool]:
+    """(vencida, refrescar): XFetch adelanta el recálculo en proporción a lo que cuesta."""
+    ahora = _ahora()
+    if ahora >= sobre["vence"]:
+        return True, True
+    azar = 1.0 - random.random()  # en (0, 1]: log(0) no existe
+    adelanto = -sobre["delta"] * settings.cache_early_refresh_beta * math.log(azar)
+    return False, ahora + adelanto >= sobre["vence"]
+
+
+def _canonico(valor: Any) -> Any:
+    """
+    Forma canónica (JSON determinista) de un argumento para derivar la clave de caché.
+
+    Modelos pydantic y dataclasses se representan con su clase y todos sus campos, así dos
+    filtros distintos nunca comparten clave; las sesiones de SQLAlchemy se omiten.
+    """
+    if isinstance(valor, Session | AsyncSession):
+        return _OMITIR
+    if valor is None or isinstance(valor, bool | int | float | str):
+        return valor
+    if isinstance(valor, BaseModel):
+        return {"__tipo__": type(valor).__qualname__, **valor.model_dump(mode="json")}
+    if dataclasses.is_dataclass(valor) and not isinstance(valor, type):
+        campos = {f.name: _canonico(getattr(valor, f.name)) for f in dataclasses.fields(valor)}
+        return {"__tipo__": type(valor).__qualname__, **campos}
+    if isinstance(valor, Enum):
+        return _canonico(valor.value)
+    if isinstance(valor, datetime | date | time):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, dict):
+        return {str(k): _canonico(v) for k, v in sorted(valor.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(valor, list | tuple):
+        return [_canonico(v) for v in valor]
+    if isinstance(valor, set | frozenset):
+        return sorted((_canonico(v) for v in valor), key=repr)
+    try:
+        estado = sa_inspect(valor)
+    except NoInspectionAvailable:
+        estado = None
+    if estado is not None and getattr(estado, "identity", None) is not None:
+        # Entidad ORM persistida: clase + clave primaria
+        return {"__tipo__": type(valor).__qualname__, "pk": list(estado.identity)}
+    # Objeto sin forma canónica: su repr (con dirección de memoria si no define uno propio)
+    # solo coincide para el mismo objeto, nunca con otro distinto
+    return repr(valor)
+
 
 class CacheManager:
     """Gestor de caché con Redis"""
 
     def __init__(self):
         self.redis_client: redis.Redis | None = None
+        # Un cliente async por event loop (sus conexiones no se pueden usar desde otro loop)
+        self._async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
         self.enabled = False
+        self.codec = CacheCodec(
+            settings.cache_serializer,
+            settings.cache_compression,
+            settings.cache_compression_min_bytes,
+        )
+        self.l1: CacheLocal | None = (
+            CacheLocal(
+                settings.cache_l1_max_entries,
+                settings.cache_l1_max_bytes,
+                settings.cache_l1_ttl_seconds,
+            )
+            if settings.cache_l1_enabled
+            else None
+        )
+        # Identifica a este proceso en los mensajes de invalidación (ignora los propios)
+        self._origen = uuid.uuid4().hex
+        self._pubsub_thread: Any = None
+        self._refresh_executor: ThreadPoolExecutor | None = None
+        # Referencias a los refrescos async en curso (el loop solo guarda referencias débiles)
+        self._refresh_tasks: set[asyncio.Task] = set()
         self._initialize_redis()
 
     def _initialize_redis(self):
@@ -40,92 +184,298 @@ class CacheManager:
 
         try:
             self.redis_client = redis.Redis(
-                host=settings.redis_host,
-                port=settings.redis_port,
-                db=settings.redis_db,
-                password=settings.redis_password,
-                socket_timeout=settings.redis_socket_timeout,
-                socket_connect_timeout=settings.redis_socket_timeout,
-                decode_responses=True,
-                retry_on_timeout=False,  # No reintentar para fallar rápido
-                retry_on_error=[],
+                connection_pool=redis.ConnectionPool(**self._connection_kwargs())
             )
             # Test connection with explicit timeout
             self.redis_client.ping()
             self.enabled = True
             logger.log_info("Redis cache initialized successfully")
+            if self.l1 is not None:
+                self._subscribe_invalidations()
         except Exception as e:
             logger.log_warning(f"Failed to connect to Redis: {e}. Cache disabled.")
             self.redis_client = None
             self.enabled = False
 
-    def _generate_cache_key(self, prefix: str, *args, **kwargs) -> str:
-        """Generar clave de caché única basada en argumentos"""
-        # Crear string único con los argumentos
-        key_parts = [prefix]
+    @staticmethod
+    def _connection_kwargs() -> dict[str, Any]:
+        """Parámetros comunes de los pools sync y async."""
+        return {
+            "host": settings.redis_host,
+            "port": settings.redis_port,
+            "db": settings.redis_db,
+            "password": settings.redis_password,
+            "socket_timeout": settings.redis_socket_timeout,
+            "socket_connect_timeout": settings.redis_socket_timeout,
+            # Valores binarios: los serializa y comprime CacheCodec
+            "decode_responses": False,
+            "retry_on_timeout": False,  # No reintentar para fallar rápido
+            "max_connections": settings.redis_max_connections,
+        }
 
-        # Agregar args
-        for arg in args:
-            if hasattr(arg, '__dict__'):
-                # Para objetos, usar su representación
-                key_parts.append(str(arg.__class__.__name__))
-            else:
-                key_parts.append(str(arg))
+    def _async_client(self) -> Any:
+        """Cliente `redis.asyncio` del event loop actual, creado al primer uso."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            pool = aioredis.ConnectionPool(**self._connection_kwargs())
+            client = self._async_clients[loop] = aioredis.Redis(connection_pool=pool)
+        return client
+
+    def _generate_cache_key(self, prefix: str, /, *args, **kwargs) -> str:
+        """
+        Generar clave de caché `prefijo:hash` a partir de la forma canónica de los argumentos.
+
+        El hash cubre el valor completo de cada argumento (incluidos los campos de filtros
+        pydantic/dataclass); las sesiones de base de datos no participan.
+        """
+        posicionales = [c for c in map(_canonico, args) if c is not _OMITIR]
+        nombrados = {k: c for k, v in kwargs.items() if (c := _canonico(v)) is not _OMITIR}
+        contenido = json.dumps(
+            [posicionales, nombrados], sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        )
+        key_hash = hashlib.sha256(contenido.encode()).hexdigest()[:32]
+        return f"{prefix}:{key_hash}"
+
+    @staticmethod
+    def _bound_arguments(func: Callable, args: tuple, kwargs: dict) -> dict:
+        """Argumentos por nombre con defaults: `f(5)`, `f(x=5)` y `f()` con x=5 dan la misma clave."""
+        try:
+            bound = inspect.signature(func).bind(*args, **kwargs)
+        except (TypeError, ValueError):
+            return {f"_{i}": arg for i, arg in enumerate(args)} | kwargs
+        bound.apply_defaults()
+        return dict(bound.arguments)
+
+    # ---------- Invalidación del L1 entre workers ----------
+
+    def _subscribe_invalidations(self) -> None:
+        """Escuchar el canal de invalidación en un hilo daemon (uno por proceso)."""
+        if not self.redis_client:
+            return
+        pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{settings.cache_invalidation_channel: self._on_invalidation})
+        self._pubsub_thread = pubsub.run_in_thread(
+            sleep_time=1.0, daemon=True, exception_handler=self._on_pubsub_error
+        )
+
+    def _on_pubsub_error(self, error: Exception, pubsub: Any, thread: Any) -> None:
+        # Mientras no hay suscripción se pueden perder invalidaciones: vaciar el L1
+        if self.l1 is not None:
+            self.l1.clear()
+        logger.log_warning(f"Cache invalidation listener error: {error}")
+        time_mod.sleep(1.0)
+
+    def _publish_invalidation(self, **mensaje: Any) -> None:
+        """Avisar a los demás workers: `keys=[...]`, `pattern="..."` o `all=True`."""
+        if self.l1 is None or not self.redis_client:
+            return
+        try:
+            payload = json.dumps({"origin": self._origen, **mensaje})
+            self.redis_client.publish(settings.cache_invalidation_channel, payload)
+        except Exception as e:
+            logger.log_error(e, {"context": "cache_publish_invalidation"})
+
+    async def _apublish_invalidation(self, **mensaje: Any) -> None:
+        if self.l1 is None:
+            return
+        try:
+            payload = json.dumps({"origin": self._origen, **mensaje})
+            await self._async_client().publish(settings.cache_invalidation_channel, payload)
+        except Exception as e:
+            logger.log_error(e, {"context": "cache_publish_invalidation"})
+
+    def _on_invalidation(self, message: dict) -> None:
+        """Aplicar al L1 local un mensaje de invalidación de otro worker."""
+        if self.l1 is None:
+            return
+        try:
+            mensaje = json.loads(message["data"])
+        except (KeyError, TypeError, ValueError):
+            return
+        if mensaje.get("origin") == self._origen:
+            return
+        if mensaje.get("all"):
+            self.l1.clear()
+        if mensaje.get("keys"):
+            self.l1.delete(*mensaje["keys"])
+        if mensaje.get("pattern"):
+            self.l1.delete_pattern(mensaje["pattern"])
+
+    def close(self) -> None:
+        """Detener el hilo de invalidación y los refrescos (shutdown de la aplicación)."""
+        if self._pubsub_thread is not None:
+            self._pubsub_thread.stop()
+            self._pubsub_thread = None
+        if self._refresh_executor is not None:
+            self._refresh_executor.shutdown(wait=False, cancel_futures=True)
+            self._refresh_executor = None
+
+    async def aclose(self) -> None:
+        """Cerrar el cliente async del event loop actual y desconectar su pool."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose(close_connection_pool=True)
 
-        # Agregar kwargs ordenados
-        for k, v in sorted(kwargs.items()):
-            key_parts.append(f"{k}={v}")
+    # ---------- API ----------
 
-        # Crear hash para claves muy largas
-        key_string = ":".join(key_parts)
-        if len(key_string) > 200:
-            key_hash = hashlib.md5(key_string.encode()).hexdigest()
-            return f"{prefix}:{key_hash}"
+    def _from_l1(self, key: str) -> bytes | None:
+        if self.l1 is None:
+            return None
+        local = self.l1.get(key)
+        metrics_manager.record_cache_lookup("l1", local is not None)
+        return local
 
-        return key_string
+    def _from_l2(self, key: str, value: bytes | None) -> Any | None:
+        """Decodificar lo leído de Redis, contarlo y copiarlo al L1."""
+        metrics_manager.record_cache_lookup("l2", bool(value))
+        if not value:
+            logger.log_info(f"Cache MISS: {key}")
+            return None
+        logger.log_info(f"Cache HIT: {key}")
+        if self.l1 is not None:
+            self.l1.set(key, value)
+        return self.codec.decodificar(value)
 
     def get(self, key: str) -> Any | None:
-        """Obtener valor del caché"""
+        """Obtener valor del caché (L1 en proceso y, si falla, Redis)"""
         if not self.enabled or not self.redis_client:
             return None
 
         try:
-            value = cast(str | None, self.redis_client.get(key))
-            if value is not None and value != "":
-                logger.log_info(f"Cache HIT: {key}")
-                try:
-                    return json.loads(value)
-                except Exception:
-                    # Si no es JSON válido, retorna como string
-                    return value
-            logger.log_info(f"Cache MISS: {key}")
-            return None
+            local = self._from_l1(key)
+            if local is not None:
+                metrics_manager.record_cache_key_lookup(key, True)
+                return self.codec.decodificar(local)
+            valor = self._from_l2(key, cast(bytes | None, self.redis_client.get(key)))
+            metrics_manager.record_cache_key_lookup(key, valor is not None)
+            return valor
         except Exception as e:
             logger.log_error(e, {"context": "cache_get", "key": key})
             return None
 
+    async def aget(self, key: str) -> Any | None:
+        """`get` sin bloquear el event loop"""
+        if not self.enabled:
+            return None
+
+        try:
+            local = self._from_l1(key)
+            if local is not None:
+                metrics_manager.record_cache_key_lookup(key, True)
+                return self.codec.decodificar(local)
+            valor = self._from_l2(key, await self._async_client().get(key))
+            metrics_manager.record_cache_key_lookup(key, valor is not None)
+            return valor
+        except Exception as e:
+            logger.log_error(e, {"context": "cache_aget", "key": key})
+            return None
+
+    async def amget(self, keys: list[str]) -> list[Any | None]:
+        """Varios valores en un solo MGET (las claves en el L1 no van a Redis)"""
+        if not self.enabled or not keys:
+            return [None] * len(keys)
+
+        try:
+            locales = {key: self._from_l1(key) for key in keys}
+            pendientes = [key for key, local in locales.items() if local is None]
+            remotos = await self._async_client().mget(pendientes) if pendientes else []
+            leidos = dict(zip(pendientes, remotos, strict=True))
+            valores = [
+                self.codec.decodificar(locales[key])
+                if locales[key] is not None
+                else self._from_l2(key, leidos[key])
+                for key in keys
+            ]
+            for key, valor in zip(keys, valores, strict=True):
+                metrics_manager.record_cache_key_lookup(key, valor is not None)
+            return valores
+        except Exception as e:
+            logger.log_error(e, {"context": "cache_amget", "keys": keys[:10]})
+            return [None] * len(keys)
+
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"tag:{tag}"
+
     def set(
         self,
         key: str,
         value: Any,
         ttl: int | None = None,
+        tags: Iterable[str] = (),
     ) -> bool:
-        """Guardar valor en caché con TTL opcional (en segundos)"""
+        """Guardar valor en caché con TTL opcional (en segundos) y etiquetas de invalidación"""
         if not self.enabled or not self.redis_client:
             return False
 
         try:
-            serialized = json.dumps(value, default=str)
-            if ttl:
-                self.redis_client.setex(key, ttl, serialized)
-            else:
-                self.redis_client.set(key, serialized)
-            logger.log_info(f"Cache SET: {key} (TTL: {ttl}s)")
+            codificado = self.codec.codificar(value)
+            tags = tuple(tags)
+            # Con etiquetas: valor y registro en sus sets en un solo round-trip
+            cliente: Any = (
+                self.redis_client.pipeline(transaction=False) if tags else self.redis_client
+            )
+            self._write(cliente, key, codificado.datos, ttl, tags)
+            if tags:
+                cliente.execute()
+            self._after_write(key, codificado, ttl)
+            self._publish_invalidation(keys=[key])
             return True
         except Exception as e:
             logger.log_error(e, {"context": "cache_set", "key": key})
             return False
 
+    async def aset(
+        self,
+        key: str,
+        value: Any,
+        ttl: int | None = None,
+        tags: Iterable[str] = (),
+    ) -> bool:
+        """`set` sin bloquear el event loop"""
+        if not self.enabled:
+            return False
+
+        try:
+            codificado = self.codec.codificar(value)
+            tags = tuple(tags)
+            client = self._async_client()
+            if tags:
+                async with client.pipeline(transaction=False) as pipe:
+                    self._write(pipe, key, codificado.datos, ttl, tags)
+                    await pipe.execute()
+            else:
+                await self._write(client, key, codificado.datos, ttl, tags)
+            self._after_write(key, codificado, ttl)
+            await self._apublish_invalidation(keys=[key])
+            return True
+        except Exception as e:
+            logger.log_error(e, {"context": "cache_aset", "key": key})
+            return False
+
+    def _write(self, cliente: Any, key: str, datos: bytes, ttl: int | None, tags: tuple) -> Any:
+        """Comandos de escritura de un valor y sus etiquetas (cliente, pipeline o async)."""
+        resultado = cliente.setex(key, ttl, datos) if ttl else cliente.set(key, datos)
+        for tag in tags:
+            cliente.sadd(self._tag_key(tag), key)
+            cliente.expire(self._tag_key(tag), max(ttl or 0, settings.cache_tag_ttl_seconds))
+        return resultado
+
+    def _after_write(self, key: str, codificado: Any, ttl: int | None) -> None:
+        metrics_manager.record_cache_write(
+            key.split(":", 1)[0],
+            codificado.tamaño_serializado,
+            len(codificado.datos),
+            codificado.compresion != "none",
+        )
+        if self.l1 is not None:
+            self.l1.set(key, codificado.datos, ttl)
+        logger.log_info(
+            f"Cache SET: {key} (TTL: {ttl}s, {len(codificado.datos)} bytes, "
+            f"{codificado.compresion})"
+        )
+
     def delete(self, key: str) -> bool:
         """Eliminar clave del caché"""
         if not self.enabled or not self.redis_client:
@@ -133,29 +483,393 @@ class CacheManager:
 
         try:
             self.redis_client.delete(key)
+            if self.l1 is not None:
+                self.l1.delete(key)
+                self._publish_invalidation(keys=[key])
             logger.log_info(f"Cache DELETE: {key}")
             return True
         except Exception as e:
             logger.log_error(e, {"context": "cache_delete", "key": key})
             return False
 
+    async def adelete(self, key: str) -> bool:
+        """`delete` sin bloquear el event loop"""
+        if not self.enabled:
+            return False
+
+        try:
+            await self._async_client().delete(key)
+            if self.l1 is not None:
+                self.l1.delete(key)
+                await self._apublish_invalidation(keys=[key])
+            logger.log_info(f"Cache DELETE: {key}")
+            return True
+        except Exception as e:
+            logger.log_error(e, {"context": "cache_adelete", "key": key})
+            return False
+
+    def _unlink_in_batches(self, keys: Iterable[bytes | str], evict_l1: bool) -> int:
+        """UNLINK (borrado no bloqueante) de `keys` en lotes de CACHE_SCAN_BATCH_SIZE."""
+        redis_client = cast(redis.Redis, self.redis_client)
+        deleted = 0
+        batch: list[str] = []
+
+        def flush() -> int:
+            count = cast(int, redis_client.unlink(*batch))
+            if evict_l1 and self.l1 is not None:
+                self.l1.delete(*batch)
+                self._publish_invalidation(keys=list(batch))
+            batch.clear()
+            return count
+
+        for key in keys:
+            batch.append(key.decode() if isinstance(key, bytes) else key)
+            if len(batch) >= settings.cache_scan_batch_size:
+                deleted += flush()
+        if batch:
+            deleted += flush()
+        return deleted
+
+    async def _aunlink_in_batches(self, keys: AsyncIterator[bytes | str], evict_l1: bool) -> int:
+        """`_unlink_in_batches` con el cliente async."""
+        client = self._async_client()
+        deleted = 0
+        batch: list[str] = []
+
+        async def flush() -> int:
+            count = await client.unlink(*batch)
+            if evict_l1 and self.l1 is not None:
+                self.l1.delete(*batch)
+                await self._apublish_invalidation(keys=list(batch))
+            batch.clear()
+            return count
+
+        async for key in keys:
+            batch.append(key.decode() if isinstance(key, bytes) else key)
+            if len(batch) >= settings.cache_scan_batch_size:
+                deleted += await flush()
+        if batch:
+            deleted += await flush()
+        return deleted
+
     def delete_pattern(self, pattern: str) -> int:
-        """Eliminar todas las claves que coincidan con el patrón"""
+        """Eliminar todas las claves que coincidan con el patrón (SCAN + UNLINK por lotes)"""
         if not self.enabled or not self.redis_client:
             return 0
 
         try:
-            keys = cast(list[str], self.redis_client.keys(pattern))
-            if keys:
-                deleted_raw = self.redis_client.delete(*keys)
-                deleted = deleted_raw if isinstance(deleted_raw, int) else 0
-                logger.log_info(f"Cache DELETE PATTERN: {pattern} ({deleted} keys)")
-                return deleted
-            return 0
+            if self.l1 is not None:
+                self.l1.delete_pattern(pattern)
+                self._publish_invalidation(pattern=pattern)
+            keys = self.redis_client.scan_iter(
+                match=pattern, count=settings.cache_scan_batch_size
+            )
+            deleted = self._unlink_in_batches(keys, evict_l1=False)
+            logger.log_info(f"Cache DELETE PATTERN: {pattern} ({deleted} keys)")
+            return deleted
         except Exception as e:
             logger.log_error(e, {"context": "cache_delete_pattern", "pattern": pattern})
             return 0
 
+    def invalidate_tags(self, *tags: str) -> int:
+        """
+        Eliminar todas las entradas registradas en las etiquetas dadas.
+
+        El set de cada etiqueta se renombra antes de recorrerlo: una entrada que se guarde
+        mientras tanto queda registrada en un set nuevo y no se pierde para la próxima
+        invalidación.
+        """
+        if not self.enabled or not self.redis_client:
+            return 0
+
+        deleted = 0
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            pending = f"{tag_key}:invalidating:{uuid.uuid4().hex}"
+            try:
+                try:
+                    self.redis_client.rename(tag_key, pending)
+                except redis.ResponseError:
+                    continue  # La etiqueta no tiene entradas
+                members = self.redis_client.sscan_iter(
+                    pending, count=settings.cache_scan_batch_size
+                )
+                deleted += self._unlink_in_batches(members, evict_l1=True)
+                self.redis_client.unlink(pending)
+            except Exception as e:
+                logger.log_error(e, {"context": "cache_invalidate_tags", "tag": tag})
+        logger.log_info(f"Cache INVALIDATE TAGS: {', '.join(tags)} ({deleted} keys)")
+        return deleted
+
+    async def adelete_pattern(self, pattern: str) -> int:
+        """`delete_pattern` sin bloquear el event loop"""
+        if not self.enabled:
+            return 0
+
+        try:
+            if self.l1 is not None:
+                self.l1.delete_pattern(pattern)
+                await self._apublish_invalidation(pattern=pattern)
+            keys = self._async_client().scan_iter(
+                match=pattern, count=settings.cache_scan_batch_size
+            )
+            deleted = await self._aunlink_in_batches(keys, evict_l1=False)
+            logger.log_info(f"Cache DELETE PATTERN: {pattern} ({deleted} keys)")
+            return deleted
+        except Exception as e:
+            logger.log_error(e, {"context": "cache_adelete_pattern", "pattern": pattern})
+            return 0
+
+    async def ainvalidate_tags(self, *tags: str) -> int:
+        """`invalidate_tags` sin bloquear el event loop"""
+        if not self.enabled:
+            return 0
+
+        client = self._async_client()
+        deleted = 0
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            pending = f"{tag_key}:invalidating:{uuid.uuid4().hex}"
+            try:
+                try:
+                    await client.rename(tag_key, pending)
+                except redis.ResponseError:
+                    continue  # La etiqueta no tiene entradas
+                members = client.sscan_iter(pending, count=settings.cache_scan_batch_size)
+                deleted += await self._aunlink_in_batches(members, evict_l1=True)
+                await client.unlink(pending)
+            except Exception as e:
+                logger.log_error(e, {"context": "cache_ainvalidate_tags", "tag": tag})
+        logger.log_info(f"Cache INVALIDATE TAGS: {', '.join(tags)} ({deleted} keys)")
+        return deleted
+
+    # ---------- Protección contra estampidas ----------
+
+    @staticmethod
+    def _lock_key(key: str) -> str:
+        return f"lock:{key}"
+
+    def _sobre(self, valor: Any, inicio: float, ttl: int) -> dict:
+        """Valor guardado por `get_or_compute`: vencimiento lógico y coste del cálculo."""
+        return {
+            "__swr__": 1,
+            "valor": self._serialize_result(valor),
+            "vence": _ahora() + ttl,
+            "delta": time_mod.monotonic() - inicio,
+        }
+
+    def _lock(self, key: str) -> str | None:
+        """Token del lock de recálculo, None si lo tiene otro y "" si Redis no responde."""
+        token = uuid.uuid4().hex
+        try:
+            redis_client = cast(redis.Redis, self.redis_client)
+            tomado = redis_client.set(
+                self._lock_key(key),
+                token,
+                nx=True,
+                px=int(settings.cache_lock_timeout_seconds * 1000),
+            )
+            return token if tomado else None
+        except Exception as e:
+            logger.log_error(e, {"context": "cache_lock", "key": key})
+            return ""
+
+    def _unlock(self, key: str, token: str) -> None:
+        if not token:
+            return
+        try:
+            cast(redis.Redis, self.redis_client).eval(_LIBERAR_LOCK, 1, self._lock_key(key), token)
+        except Exception as e:
+            logger.log_error(e, {"context": "cache_unlock", "key": key})
+
+    def _recalcular(
+        self, key: str, compute: Callable[[], Any], ttl: int, tags: Iterable[str], token: str
+    ) -> Any:
+        """Calcular y guardar con el lock tomado; lo libera siempre."""
+        try:
+            inicio = time_mod.monotonic()
+            valor = compute()
+            self.set(
+                key, self._sobre(valor, inicio, ttl), ttl + settings.cache_stale_ttl_seconds, tags
+            )
+            return valor
+        finally:
+            self._unlock(key, token)
+
+    def _refrescar_en_segundo_plano(
+        self, key: str, refresh: Callable[[], Any], ttl: int, tags: Iterable[str], token: str
+    ) -> None:
+        try:
+            self._recalcular(key, refresh, ttl, tags, token)
+        except Exception as e:
+            logger.log_error(e, {"context": "cache_background_refresh", "key": key})
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._refresh_executor is None:
+            self._refresh_executor = ThreadPoolExecutor(
+                max_workers=settings.cache_refresh_workers, thread_name_prefix="cache-refresh"
+            )
+        return self._refresh_executor
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: int,
+        tags: Iterable[str] = (),
+        refresh: Callable[[], Any] | None = None,
+    ) -> Lectura:
+        """
+        Leer `key` o calcularla con `compute`, con un solo recálculo a la vez entre workers.
+
+        `refresh` es la versión de `compute` que puede correr fuera del request (abre su
+        propia sesión de DB): con ella, una entrada vencida o elegida para refresco anticipado
+        se recalcula en un hilo aparte y todos reciben el valor anterior de inmediato. Sin
+        ella, quien obtiene el lock recalcula en línea y el resto recibe el valor anterior.
+        """
+        if not self.enabled or not self.redis_client:
+            return Lectura(compute(), "miss")
+
+        tags = tuple(tags)
+        sobre = self.get(key)
+        if _es_sobre(sobre):
+            vencida, refrescar = _debe_refrescar(sobre)
+            if refrescar and (token := self._lock(key)) is not None:
+                if refresh is None:
+                    return Lectura(self._recalcular(key, compute, ttl, tags, token), "miss")
+                self._executor().submit(
+                    self._refrescar_en_segundo_plano, key, refresh, ttl, tags, token
+                )
+                logger.log_info(f"Cache REFRESH: {key} ({'stale' if vencida else 'early'})")
+            return Lectura(sobre["valor"], "stale" if vencida else "hit")
+
+        # Fallo de caché: calcula quien obtiene el lock, los demás esperan su resultado
+        limite = time_mod.monotonic() + settings.cache_lock_timeout_seconds
+        while (token := self._lock(key)) is None:
+            time_mod.sleep(_ESPERA_LOCK)
+            sobre = self.get(key)
+            if _es_sobre(sobre):
+                return Lectura(sobre["valor"], "hit")
+            if time_mod.monotonic() >= limite:
+                return Lectura(compute(), "miss")
+        # Otro pudo terminar entre nuestra lectura y el lock
+        sobre = self.get(key)
+        if _es_sobre(sobre):
+            self._unlock(key, token)
+            return Lectura(sobre["valor"], "hit")
+        return Lectura(self._recalcular(key, compute, ttl, tags, token), "miss")
+
+    def warm(
+        self, key: str, compute: Callable[[], Any], ttl: int, tags: Iterable[str] = ()
+    ) -> bool:
+        """
+        Recalcular `key` ya, con el mismo formato que `get_or_compute` (precalentado).
+
+        Devuelve False sin calcular si otro proceso tiene el lock: ya la está recalculando.
+        """
+        if not self.enabled or not self.redis_client:
+            return False
+        token = self._lock(key)
+        if token is None:
+            return False
+        self._recalcular(key, compute, ttl, tuple(tags), token)
+        return True
+
+    async def _alock(self, key: str) -> str | None:
+        token = uuid.uuid4().hex
+        try:
+            tomado = await self._async_client().set(
+                self._lock_key(key),
+                token,
+                nx=True,
+                px=int(settings.cache_lock_timeout_seconds * 1000),
+            )
+            return token if tomado else None
+        except Exception as e:
+            logger.log_error(e, {"context": "cache_lock", "key": key})
+            return ""
+
+    async def _aunlock(self, key: str, token: str) -> None:
+        if not token:
+            return
+        try:
+            await self._async_client().eval(_LIBERAR_LOCK, 1, self._lock_key(key), token)
+        except Exception as e:
+            logger.log_error(e, {"context": "cache_unlock", "key": key})
+
+    async def _arecalcular(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: int,
+        tags: Iterable[str],
+        token: str,
+    ) -> Any:
+        try:
+            inicio = time_mod.monotonic()
+            valor = await compute()
+            await self.aset(
+                key, self._sobre(valor, inicio, ttl), ttl + settings.cache_stale_ttl_seconds, tags
+            )
+            return valor
+        finally:
+            await self._aunlock(key, token)
+
+    async def _arefrescar_en_segundo_plano(
+        self,
+        key: str,
+        refresh: Callable[[], Awaitable[Any]],
+        ttl: int,
+        tags: Iterable[str],
+        token: str,
+    ) -> None:
+        try:
+            await self._arecalcular(key, refresh, ttl, tags, token)
+        except Exception as e:
+            logger.log_error(e, {"context": "cache_background_refresh", "key": key})
+
+    async def aget_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: int,
+        tags: Iterable[str] = (),
+        refresh: Callable[[], Awaitable[Any]] | None = None,
+    ) -> Lectura:
+        """`get_or_compute` para corrutinas; el refresco en segundo plano es una tarea."""
+        if not self.enabled:
+            return Lectura(await compute(), "miss")
+
+        tags = tuple(tags)
+        sobre = await self.aget(key)
+        if _es_sobre(sobre):
+            vencida, refrescar = _debe_refrescar(sobre)
+            if refrescar and (token := await self._alock(key)) is not None:
+                if refresh is None:
+                    valor = await self._arecalcular(key, compute, ttl, tags, token)
+                    return Lectura(valor, "miss")
+                tarea = asyncio.create_task(
+                    self._arefrescar_en_segundo_plano(key, refresh, ttl, tags, token)
+                )
+                self._refresh_tasks.add(tarea)
+                tarea.add_done_callback(self._refresh_tasks.discard)
+                logger.log_info(f"Cache REFRESH: {key} ({'stale' if vencida else 'early'})")
+            return Lectura(sobre["valor"], "stale" if vencida else "hit")
+
+        limite = time_mod.monotonic() + settings.cache_lock_timeout_seconds
+        while (token := await self._alock(key)) is None:
+            await asyncio.sleep(_ESPERA_LOCK)
+            sobre = await self.aget(key)
+            if _es_sobre(sobre):
+                return Lectura(sobre["valor"], "hit")
+            if time_mod.monotonic() >= limite:
+                return Lectura(await compute(), "miss")
+        sobre = await self.aget(key)
+        if _es_sobre(sobre):
+            await self._aunlock(key, token)
+            return Lectura(sobre["valor"], "hit")
+        return Lectura(await self._arecalcular(key, compute, ttl, tags, token), "miss")
+
     def clear_all(self) -> bool:
         """Limpiar todo el caché (usar con precaución)"""
         if not self.enabled or not self.redis_client:
@@ -163,6 +877,9 @@ class CacheManager:
 
         try:
             self.redis_client.flushdb()
+            if self.l1 is not None:
+                self.l1.clear()
+                self._publish_invalidation(all=True)
             logger.log_warning("Cache CLEARED: All keys deleted")
             return True
         except Exception as e:
@@ -190,6 +907,14 @@ class CacheManager:
                 "hits": hits,
                 "misses": misses,
                 "hit_rate": hit_rate,
+                "codec": {
+                    "serializer": self.codec.serializador,
+                    "compression": self.codec.compresion or "none",
+                    "compression_min_bytes": self.codec.umbral,
+                },
+                "stored_sizes": metrics_manager.cache_size_summary(),
+                "tiers": metrics_manager.cache_tier_summary(),
+                "l1": self.l1.estado() if self.l1 is not None else {"enabled": False},
             }
         except Exception as e:
             logger.log_error(e, {"context": "cache_stats"})
@@ -218,13 +943,19 @@ class CacheManager:
         except Exception:
             return result
 
-    def cache_result(self, ttl: int = 300, key_prefix: str | None = None):
+    def cache_result(
+        self, ttl: int = 300, key_prefix: str | None = None, tags: Iterable[str] = ()
+    ):
         """
         Decorador para cachear resultados de funciones (sincronas o asíncronas)
 
+        Pasa por `get_or_compute`: un solo recálculo concurrente por clave y, mientras quien
+        tiene el lock recalcula una entrada vencida, los demás reciben el valor anterior.
+
         Args:
             ttl: Tiempo de vida en segundos (default: 5 minutos)
             key_prefix: Prefijo personalizado para la clave de caché
+            tags: Etiquetas en las que se registra cada resultado (ver `invalidate_tags`)
 
         Usage:
             @cache_manager.cache_result(ttl=600, key_prefix="productos")
@@ -242,16 +973,14 @@ class CacheManager:
                         return await func(*args, **kwargs)
 
                     prefix = key_prefix or func.__name__
-                    cache_key = self._generate_cache_key(prefix, *args, **kwargs)
+                    cache_key = self._generate_cache_key(
+                        prefix, **self._bound_arguments(func, args, kwargs)
+                    )
 
-                    cached_value = self.get(cache_key)
-                    if cached_value is not None:
-                        return cached_value
-
-                    result = await func(*args, **kwargs)
-                    serializable_result = self._serialize_result(result)
-                    self.set(cache_key, serializable_result, ttl)
-                    return result
+                    lectura = await self.aget_or_compute(
+                        cache_key, lambda: func(*args, **kwargs), ttl, tags
+                    )
+                    return lectura.valor
 
                 return async_wrapper  # type: ignore[return-value]
             else:
@@ -262,30 +991,47 @@ class CacheManager:
                         return func(*args, **kwargs)
 
                     prefix = key_prefix or func.__name__
-                    cache_key = self._generate_cache_key(prefix, *args, **kwargs)
+                    cache_key = self._generate_cache_key(
+                        prefix, **self._bound_arguments(func, args, kwargs)
+                    )
 
-                    cached_value = self.get(cache_key)
-                    if cached_value is not None:
-                        return cached_value
-
-                    result = func(*args, **kwargs)
-                    serializable_result = self._serialize_result(result)
-                    self.set(cache_key, serializable_result, ttl)
-                    return result
+                    lectura = self.get_or_compute(
+                        cache_key, lambda: func(*args, **kwargs), ttl, tags
+                    )
+                    return lectura.valor
 
                 return sync_wrapper  # type: ignore[return-value]
 
         return decorator
 
-    def invalidate_cache(self, patterns: list[str]):
+    def invalidate_cache(self, patterns: Iterable[str] = (), tags: Iterable[str] = ()):
         """
         Decorador para invalidar caché después de operaciones de escritura (sync/async)
 
+        Preferir `tags`: invalidar una etiqueta cuesta lo que sus entradas, un patrón recorre
+        todo el keyspace con SCAN.
+
         Usage:
-            @cache_manager.invalidate_cache(["productos:*", "dashboard:*"])
+            @cache_manager.invalidate_cache(tags=["productos", "dashboard"])
             def create_producto(db, producto_data):
                 ...
         """
+        patterns = tuple(patterns)
+        tags = tuple(tags)
+
+        def invalidate() -> None:
+            if self.enabled:
+                if tags:
+                    self.invalidate_tags(*tags)
+                for pattern in patterns:
+                    self.delete_pattern(pattern)
+
+        async def ainvalidate() -> None:
+            if self.enabled:
+                if tags:
+                    await self.ainvalidate_tags(*tags)
+                for pattern in patterns:
+                    await self.adelete_pattern(pattern)
 
         def decorator(func: Callable) -> Callable:
             if inspect.iscoroutinefunction(func):
@@ -293,9 +1039,7 @@ class CacheManager:
                 @wraps(func)
                 async def async_wrapper(*args, **kwargs):
                     result = await func(*args, **kwargs)
-                    if self.enabled:
-                        for pattern in patterns:
-                            self.delete_pattern(pattern)
+                    await ainvalidate()
                     return result
 
                 return async_wrapper  # type: ignore[return-value]
@@ -304,9 +1048,7 @@ class CacheManager:
                 @wraps(func)
                 def sync_wrapper(*args, **kwargs):
                     result = func(*args, **kwargs)
-                    if self.enabled:
-                        for pattern in patterns:
-                            self.delete_pattern(pattern)
+                    invalidate()
                     return result
 
                 return sync_wrapper  # type: ignore[return-value]
@@ -339,12 +1081,19 @@ def clear_cache_pattern(pattern: str) -> int:
     return cache_manager.delete_pattern(pattern)
 
 
+def invalidate_tags(*tags: str) -> int:
+    """Eliminar las entradas registradas en las etiquetas"""
+    return cache_manager.invalidate_tags(*tags)
+
+
 # Exported symbols for static analyzers
 __all__ = [
     "CacheManager",
+    "Lectura",
     "cache_manager",
     "get_cache",
     "set_cache",
     "delete_cache",
     "clear_cache_pattern",
+    "invalidate_tags",
 ]
@@ -0,0 +1,262 @@
+"""
+Codec de valores del caché Redis
+
+Cada valor se guarda como una trama binaria: ``\\x00`` + id del serializador + id de la
+compresión + payload. Así un valor escrito con un codec se lee aunque la configuración haya
+cambiado después, y los valores antiguos (JSON en texto plano, sin cabecera) se siguen leyendo.
+
+- Serializadores: msgpack, orjson o json de la librería estándar. Los tres devuelven ``bytes``,
+  ``datetime``/``date``/``time`` y ``Decimal`` con su tipo original (msgpack con tipos ext, los
+  JSON con objetos etiquetados ``{"__tipo__": ..., "valor": ...}``).
+- Compresión opcional (zstd, lz4 o zlib) solo por encima de un umbral y si reduce el tamaño.
+
+Por defecto se usa json + zlib (librería estándar). msgpack, orjson, zstandard y lz4 son
+opcionales y no están en requirements.txt: se eligen por nombre o con ``auto`` (el mejor
+instalado). Un valor que ningún serializador sabe representar lanza ``TypeError``.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import zlib
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, NamedTuple
+
+try:
+    import msgpack  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depende del entorno
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depende del entorno
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depende del entorno
+    lz4_frame = None
+
+_MARCA = b"\x00"
+
+# Tipos ext de msgpack
+_EXT_DATETIME, _EXT_DATE, _EXT_TIME, _EXT_DECIMAL = 1, 2, 3, 4
+
+_TIPOS_TEXTO: dict[type, str] = {datetime: "datetime", date: "date", time: "time"}
+
+
+class Codificado(NamedTuple):
+    """Valor listo para Redis y el tamaño que tenía antes de comprimir."""
+
+    datos: bytes
+    tamaño_serializado: int
+    compresion: str
+
+
+# ---------- Serializadores ----------
+
+
+def _a_json(valor: Any) -> Any:
+    """`default` de los serializadores JSON: tipos sin representación JSON fiel."""
+    if isinstance(valor, bytes | bytearray | memoryview):
+        return {"__tipo__": "bytes", "valor": base64.b64encode(bytes(valor)).decode("ascii")}
+    if isinstance(valor, Decimal):
+        return {"__tipo__": "decimal", "valor": str(valor)}
+    if isinstance(valor, datetime | date | time):
+        # datetime antes que date (orden de _TIPOS_TEXTO): datetime es subclase de date
+        nombre = next(n for tipo, n in _TIPOS_TEXTO.items() if isinstance(valor, tipo))
+        return {"__tipo__": nombre, "valor": valor.isoformat()}
+    if isinstance(valor, set | frozenset | tuple):
+        return list(valor)
+    # Sin `str(valor)`: un repr no se puede leer de vuelta; `set()` registra el error y no escribe
+    raise TypeError(f"Valor no serializable para el caché: {type(valor).__name__}")
+
+
+def _desde_json(objeto: dict) -> Any:
+    """`object_hook` inverso de `_a_json`."""
+    tipo = objeto.get("__tipo__")
+    if tipo is None or len(objeto) != 2 or "valor" not in objeto:
+        return objeto
+    valor = objeto["valor"]
+    if tipo == "bytes":
+        return base64.b64decode(valor)
+    if tipo == "decimal":
+        return Decimal(valor)
+    if tipo == "datetime":
+        return datetime.fromisoformat(valor)
+    if tipo == "date":
+        return date.fromisoformat(valor)
+    if tipo == "time":
+        return time.fromisoformat(valor)
+    return objeto
+
+
+def _restaurar(valor: Any) -> Any:
+    """Aplicar `_desde_json` a un resultado ya decodificado (orjson no tiene object_hook)."""
+    if isinstance(valor, dict):
+        return _desde_json({k: _restaurar(v) for k, v in valor.items()})
+    if isinstance(valor, list):
+        return [_restaurar(v) for v in valor]
+    return valor
+
+
+def _json_dumps(valor: Any) -> bytes:
+    return json.dumps(valor, default=_a_json, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _json_loads(datos: bytes) -> Any:
+    return json.loads(datos, object_hook=_desde_json)
+
+
+def _orjson_dumps(valor: Any) -> bytes:
+    # PASSTHROUGH_DATETIME: las fechas pasan por `_a_json` en vez de volverse texto sin tipo
+    opciones = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    return orjson.dumps(valor, default=_a_json, option=opciones)
+
+
+def _orjson_loads(datos: bytes) -> Any:
+    return _restaurar(orjson.loads(datos))
+
+
+def _msgpack_default(valor: Any) -> Any:
+    if isinstance(valor, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, valor.isoformat().encode())
+    if isinstance(valor, date):
+        return msgpack.ExtType(_EXT_DATE, valor.isoformat().encode())
+    if isinstance(valor, time):
+        return msgpack.ExtType(_EXT_TIME, valor.isoformat().encode())
+    if isinstance(valor, Decimal):
+        return msgpack.ExtType(_EXT_DECIMAL, str(valor).encode())
+    if isinstance(valor, set | frozenset):
+        return list(valor)
+    raise TypeError(f"Valor no serializable para el caché: {type(valor).__name__}")
+
+
+def _msgpack_ext(codigo: int, datos: bytes) -> Any:
+    texto = datos.decode()
+    if codigo == _EXT_DATETIME:
+        return datetime.fromisoformat(texto)
+    if codigo == _EXT_DATE:
+        return date.fromisoformat(texto)
+    if codigo == _EXT_TIME:
+        return time.fromisoformat(texto)
+    if codigo == _EXT_DECIMAL:
+        return Decimal(texto)
+    return msgpack.ExtType(codigo, datos)
+
+
+def _msgpack_dumps(valor: Any) -> bytes:
+    return msgpack.packb(valor, default=_msgpack_default, use_bin_type=True, datetime=False)
+
+
+def _msgpack_loads(datos: bytes) -> Any:
+    return msgpack.unpackb(datos, raw=False, ext_hook=_msgpack_ext, strict_map_key=False)
+
+
+# nombre -> (id en la trama, disponible, dumps, loads); en orden de preferencia para "auto"
+SERIALIZADORES: dict[str, tuple[bytes, bool, Any, Any]] = {
+    "msgpack": (b"m", msgpack is not None, _msgpack_dumps, _msgpack_loads),
+    "orjson": (b"o", orjson is not None, _orjson_dumps, _orjson_loads),
+    "json": (b"j", True, _json_dumps, _json_loads),
+}
+
+# ---------- Compresión ----------
+
+
+def _zstd_comprimir(datos: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=3).compress(datos)
+
+
+def _zstd_descomprimir(datos: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(datos)
+
+
+def _lz4_comprimir(datos: bytes) -> bytes:
+    return lz4_frame.compress(datos)
+
+
+def _lz4_descomprimir(datos: bytes) -> bytes:
+    return lz4_frame.decompress(datos)
+
+
+def _zlib_comprimir(datos: bytes) -> bytes:
+    return zlib.compress(datos, 6)
+
+
+COMPRESORES: dict[str, tuple[bytes, bool, Any, Any]] = {
+    "zstd": (b"z", zstandard is not None, _zstd_comprimir, _zstd_descomprimir),
+    "lz4": (b"4", lz4_frame is not None, _lz4_comprimir, _lz4_descomprimir),
+    "zlib": (b"g", True, _zlib_comprimir, zlib.decompress),
+}
+_SIN_COMPRESION = b"-"
+
+
+def _elegir(opciones: dict[str, tuple], nombre: str, tipo: str) -> str:
+    if nombre == "auto":
+        return next(n for n, (_, disponible, *_) in opciones.items() if disponible)
+    if nombre not in opciones:
+        raise ValueError(f"{tipo} de caché desconocido: {nombre!r} (opciones: {list(opciones)})")
+    if not opciones[nombre][1]:
+        raise ValueError(f"{tipo} de caché {nombre!r} no está instalado")
+    return nombre
+
+
+def _por_marca(opciones: dict[str, tuple], marca: bytes):
+    """Función de decodificación (la última de la tupla) registrada con `marca`."""
+    for nombre, (ident, disponible, *_, decodificar) in opciones.items():
+        if ident == marca:
+            if not disponible:
+                raise ValueError(f"Valor de caché escrito con {nombre}, que no está instalado")
+            return decodificar
+    raise ValueError(f"Marca de codec de caché desconocida: {marca!r}")
+
+
+class CacheCodec:
+    """Serializa (y comprime por encima de `umbral` bytes) los valores del caché."""
+
+    def __init__(self, serializador: str = "json", compresion: str = "zlib", umbral: int = 1024):
+        self.serializador = _elegir(SERIALIZADORES, serializador, "Serializador")
+        self.compresion = (
+            None if compresion == "none" else _elegir(COMPRESORES, compresion, "Compresor")
+        )
+        self.umbral = umbral
+
+    def codificar(self, valor: Any) -> Codificado:
+        ident, _, dumps, _ = SERIALIZADORES[self.serializador]
+        payload = dumps(valor)
+        tamaño = len(payload)
+
+        compresion, marca_compresion = "none", _SIN_COMPRESION
+        if self.compresion and tamaño >= self.umbral:
+            marca, _, comprimir, _ = COMPRESORES[self.compresion]
+            comprimido = comprimir(payload)
+            if len(comprimido) < tamaño:
+                payload, compresion, marca_compresion = comprimido, self.compresion, marca
+        return Codificado(_MARCA + ident + marca_compresion + payload, tamaño, compresion)
+
+    @staticmethod
+    def decodificar(datos: bytes | str) -> Any:
+        """Valor original de una trama; los valores sin cabecera se leen como JSON o texto."""
+        if isinstance(datos, str):
+            datos = datos.encode()
+        if not datos.startswith(_MARCA):
+            texto = datos.decode("utf-8", errors="replace")
+            try:
+                return json.loads(texto)
+            except ValueError:
+                return texto
+
+        ident, marca_compresion, payload = datos[1:2], datos[2:3], datos[3:]
+        if marca_compresion != _SIN_COMPRESION:
+            payload = _por_marca(COMPRESORES, marca_compresion)(payload)
+        return _por_marca(SERIALIZADORES, ident)(payload)
+
+
+__all__ = ["COMPRESORES", "SERIALIZADORES", "CacheCodec", "Codificado"]
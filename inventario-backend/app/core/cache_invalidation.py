@@ -0,0 +1,104 @@
+"""
+Invalidación del caché guiada por las escrituras de la base de datos
+
+Cada flush (y cada INSERT/UPDATE/DELETE masivo ejecutado con la sesión) anota en
+``Session.info`` las etiquetas de caché de las tablas escritas; al hacer commit se invalidan
+todas juntas con una sola llamada a ``invalidate_tags``. Un rollback las descarta: lo que no
+llegó a la base no invalida nada.
+
+Así ningún servicio tiene que acordarse de invalidar (``crear_venta``, ``crear_entrada``,
+``ProductoService.actualizar``...): basta con que escriba por la sesión. Las escrituras fuera
+del ORM (SQL a mano en otro proceso) siguen acotadas por el TTL de cada entrada.
+"""
+
+import asyncio
+from itertools import chain
+
+from sqlalchemy import event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_manager
+from app.core.logging_config import inventario_logger
+
+logger = inventario_logger
+
+# Tabla escrita -> etiquetas de las entradas que dependen de ella. Las entradas del
+# dashboard y de métricas de negocio se registran también en `productos`, `lotes`, etc.
+# (ver los routers), así que cada tabla solo nombra las etiquetas de sus propios datos.
+ETIQUETAS_POR_TABLA: dict[str, tuple[str, ...]] = {
+    "producto": ("productos",),
+    "laboratorio": ("laboratorios",),
+    "seccion": ("secciones",),
+    "lote": ("lotes",),
+    "venta": ("ventas",),
+    "detalle_venta": ("ventas",),
+    "venta_daily_rollup": ("ventas",),
+    "inventory_snapshot": ("dashboard",),
+    "inventory_expiry_snapshot": ("dashboard", "business"),
+}
+
+# Clave en Session.info con las etiquetas a invalidar al confirmar la transacción
+_ETIQUETAS_PENDIENTES = "cache_etiquetas_pendientes"
+
+# Referencias a las invalidaciones async en curso (el loop solo guarda referencias débiles)
+_tareas: set[asyncio.Task] = set()
+
+
+def etiquetas_de(tablas: set[str]) -> set[str]:
+    """Etiquetas de caché afectadas por escribir en `tablas`."""
+    return {etiqueta for tabla in tablas for etiqueta in ETIQUETAS_POR_TABLA.get(tabla, ())}
+
+
+def _anotar(session: Session, tablas: set[str]) -> None:
+    etiquetas = etiquetas_de(tablas)
+    if etiquetas:
+        session.info.setdefault(_ETIQUETAS_PENDIENTES, set()).update(etiquetas)
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_flush(session: Session, flush_context) -> None:
+    tablas = {
+        tabla.name
+        for obj in chain(session.new, session.dirty, session.deleted)
+        for tabla in sa_inspect(obj).mapper.tables
+    }
+    _anotar(session, tablas)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _registrar_sentencia(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            _anotar(orm_execute_state.session, {tabla.name for tabla in mapper.tables})
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_al_confirmar(session: Session) -> None:
+    etiquetas = session.info.pop(_ETIQUETAS_PENDIENTES, None)
+    if not etiquetas or not cache_manager.enabled:
+        return
+    etiquetas = sorted(etiquetas)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    try:
+        if loop is None:
+            cache_manager.invalidate_tags(*etiquetas)
+        else:
+            # Commit de una AsyncSession: no bloquear el event loop con el cliente sync
+            tarea = loop.create_task(cache_manager.ainvalidate_tags(*etiquetas))
+            _tareas.add(tarea)
+            tarea.add_done_callback(_tareas.discard)
+    except Exception as e:
+        logger.log_error(e, {"context": "cache_invalidate_on_commit", "tags": etiquetas})
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_al_revertir(session: Session) -> None:
+    session.info.pop(_ETIQUETAS_PENDIENTES, None)
+
+
+__all__ = ["ETIQUETAS_POR_TABLA", "etiquetas_de"]
@@ -0,0 +1,92 @@
+"""
+Caché L1 en proceso delante de Redis
+
+LRU acotado por número de entradas, por bytes y por TTL. Guarda las tramas ya codificadas
+(`CacheCodec`), no los objetos: cada acierto devuelve una copia nueva y un llamador que
+modifique el resultado no altera lo que ven los demás requests.
+
+La coherencia entre workers la da `CacheManager`: cada escritura o borrado se publica en el
+canal de invalidación de Redis y los demás procesos expulsan la clave (o el patrón) de su L1.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from threading import Lock
+
+
+class CacheLocal:
+    """LRU thread-safe de `clave -> bytes` con TTL por entrada."""
+
+    def __init__(self, max_entradas: int, max_bytes: int, ttl: float):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entradas: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.expulsiones = 0
+
+    def get(self, clave: str) -> bytes | None:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            datos, vence = entrada
+            if vence <= time.monotonic():
+                self._quitar(clave)
+                return None
+            self._entradas.move_to_end(clave)
+            return datos
+
+    def set(self, clave: str, datos: bytes, ttl: float | None = None) -> None:
+        """Guardar `datos`; el TTL local nunca supera el de Redis (`ttl`) ni `self.ttl`."""
+        if len(datos) > self.max_bytes:
+            return
+        vigencia = self.ttl if not ttl else min(self.ttl, ttl)
+        with self._lock:
+            self._quitar(clave)
+            self._entradas[clave] = (datos, time.monotonic() + vigencia)
+            self._bytes += len(datos)
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                antigua = next(iter(self._entradas))
+                self._quitar(antigua)
+                self.expulsiones += 1
+
+    def delete(self, *claves: str) -> int:
+        with self._lock:
+            return sum(self._quitar(clave) for clave in claves)
+
+    def delete_pattern(self, patron: str) -> int:
+        """Expulsar las claves que cumplen un patrón glob de Redis (`productos:*`)."""
+        with self._lock:
+            coincidentes = [c for c in self._entradas if fnmatchcase(c, patron)]
+            return sum(self._quitar(clave) for clave in coincidentes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estado(self) -> dict[str, int | float]:
+        with self._lock:
+            return {
+                "entries": len(self._entradas),
+                "bytes": self._bytes,
+                "max_entries": self.max_entradas,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "evictions": self.expulsiones,
+            }
+
+    def _quitar(self, clave: str) -> bool:
+        entrada = self._entradas.pop(clave, None)
+        if entrada is None:
+            return False
+        self._bytes -= len(entrada[0])
+        return True
+
+
+__all__ = ["CacheLocal"]
@@ -0,0 +1,174 @@
+"""
+Precalentado del caché
+
+Tras un deploy o un reinicio de Redis, la primera ola de terminales del POS falla en las
+mismas claves (dashboard, estadísticas, página 1 del catálogo) y las recalcula a la vez. El
+job `cache_warmer_job` (ver `SchedulerManager.add_cache_warmer_job`) las recalcula al
+arrancar y luego periódicamente.
+
+Cada router registra aquí, junto al endpoint, una receta por familia de claves: el patrón
+de la clave, cómo recalcularla con una sesión propia, su TTL y sus etiquetas. Se calientan
+las recetas de CACHE_WARM_KEYS (con su clave por defecto) y, además, las
+CACHE_WARM_HOT_KEYS claves más leídas según la telemetría que alguna receta sepa calcular
+(p. ej. `business:metrics:v1:60` si se consulta mucho con 60 días).
+
+Las consultas contra la base de datos se limitan a CACHE_WARM_MAX_CONCURRENCY a la vez.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_manager
+from app.core.config import settings
+from app.core.logging_config import inventario_logger
+from app.core.metrics import metrics_manager
+from app.models.database import run_in_read_session
+
+logger = inventario_logger
+
+
+@dataclass(frozen=True)
+class Receta:
+    """Cómo recalcular las claves que cumplen `patron` (los grupos son sus parámetros)."""
+
+    nombre: str
+    patron: re.Pattern[str]
+    clave: str
+    calcular: Callable[[Session, re.Match[str]], Any]
+    ttl: int
+    tags: tuple[str, ...] = ()
+
+
+class CacheWarmer:
+    """Registro de recetas y ejecución del precalentado."""
+
+    def __init__(self):
+        self._recetas: dict[str, Receta] = {}
+        self._lock = threading.Lock()
+        self._ejecutando = False
+        self._ultima: dict[str, Any] | None = None
+        self.ejecuciones = 0
+
+    def registrar(
+        self,
+        nombre: str,
+        patron: str,
+        clave: str,
+        calcular: Callable[[Session, re.Match[str]], Any],
+        ttl: int,
+        tags: tuple[str, ...] | list[str] = (),
+    ) -> Receta:
+        receta = Receta(nombre, re.compile(patron), clave, calcular, ttl, tuple(tags))
+        if not receta.patron.fullmatch(clave):
+            raise ValueError(f"La clave por defecto {clave!r} no cumple el patrón de {nombre!r}")
+        self._recetas[nombre] = receta
+        return receta
+
+    def _receta_de(self, clave: str) -> tuple[Receta, re.Match[str]] | None:
+        for receta in self._recetas.values():
+            coincidencia = receta.patron.fullmatch(clave)
+            if coincidencia is not None:
+                return receta, coincidencia
+        return None
+
+    def objetivos(self) -> list[tuple[str, str]]:
+        """Claves a calentar, con el origen de cada una (`configured` o `hot`)."""
+        objetivos: dict[str, str] = {}
+        for nombre in filter(None, (n.strip() for n in settings.cache_warm_keys.split(","))):
+            receta = self._recetas.get(nombre)
+            if receta is None:
+                logger.log_warning(f"Cache warmer: receta desconocida {nombre!r}")
+                continue
+            objetivos[receta.clave] = "configured"
+        for fila in metrics_manager.hot_cache_keys(settings.cache_warm_hot_keys):
+            if fila["key"] not in objetivos and self._receta_de(fila["key"]) is not None:
+                objetivos[fila["key"]] = "hot"
+        return list(objetivos.items())
+
+    def _calentar_clave(self, clave: str, origen: str) -> dict[str, Any]:
+        receta, coincidencia = self._receta_de(clave)  # type: ignore[misc]
+        inicio = time.monotonic()
+        try:
+            calculada = cache_manager.warm(
+                clave,
+                lambda: run_in_read_session(lambda db: receta.calcular(db, coincidencia)),
+                receta.ttl,
+                receta.tags,
+            )
+            resultado = "warmed" if calculada else "skipped"
+        except Exception as e:
+            logger.log_error(e, {"context": "cache_warmer", "key": clave})
+            resultado = "error"
+        return {
+            "key": clave,
+            "recipe": receta.nombre,
+            "source": origen,
+            "result": resultado,
+            "duration_ms": round((time.monotonic() - inicio) * 1000, 2),
+        }
+
+    def calentar(self) -> dict[str, Any]:
+        """Recalcular todas las claves objetivo; no se solapa con otra ejecución."""
+        with self._lock:
+            if self._ejecutando:
+                return {"started": False, "reason": "already_running"}
+            self._ejecutando = True
+        try:
+            inicio = datetime.now(UTC)
+            if not cache_manager.enabled:
+                claves: list[dict[str, Any]] = []
+                logger.log_info("Cache warmer skipped: cache disabled")
+            else:
+                with ThreadPoolExecutor(
+                    max_workers=settings.cache_warm_max_concurrency,
+                    thread_name_prefix="cache-warmer",
+                ) as pool:
+                    claves = list(pool.map(lambda o: self._calentar_clave(*o), self.objetivos()))
+            fin = datetime.now(UTC)
+            resumen = {
+                "started_at": inicio.isoformat(),
+                "finished_at": fin.isoformat(),
+                "duration_ms": round((fin - inicio).total_seconds() * 1000, 2),
+                "cache_enabled": cache_manager.enabled,
+                "warmed": sum(c["result"] == "warmed" for c in claves),
+                "skipped": sum(c["result"] == "skipped" for c in claves),
+                "errors": sum(c["result"] == "error" for c in claves),
+                "keys": claves,
+            }
+            logger.log_info(
+                "Cache warmer run finished",
+                {k: v for k, v in resumen.items() if k != "keys"},
+            )
+            with self._lock:
+                self._ultima = resumen
+                self.ejecuciones += 1
+            return {"started": True, **resumen}
+        finally:
+            with self._lock:
+                self._ejecutando = False
+
+    def estado(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._ejecutando,
+                "runs": self.ejecuciones,
+                "recipes": sorted(self._recetas),
+                "max_concurrency": settings.cache_warm_max_concurrency,
+                "last_run": self._ultima,
+            }
+
+
+cache_warmer = CacheWarmer()
+
+
+__all__ = ["CacheWarmer", "Receta", "cache_warmer"]
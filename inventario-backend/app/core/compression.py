@@ -2,12 +2,14 @@
 Middleware de compresión Brotli/Gzip para respuestas HTTP.
 Reduce el tamaño de respuestas hasta 80% para JSON.
 """
-import brotli
 import gzip
-from typing import Callable
+import zlib
+from collections.abc import AsyncIterator, Callable
 
+import brotli
 from fastapi import Request, Response
-from starlette.datastructures import Headers, MutableHeaders
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
@@ -22,6 +24,8 @@ class CompressionMiddleware(BaseHTTPMiddleware):
     - Solo comprime respuestas > min_size bytes
     - Respeta Content-Type comprimibles
     - No comprime si ya está comprimido
+    - Respuestas en streaming (sin Content-Length) se comprimen chunk a chunk, sin
+      acumular el body en memoria
     """
 
     def __init__(
@@ -51,6 +55,15 @@ class CompressionMiddleware(BaseHTTPMiddleware):
         if not any(content_type.startswith(ct) for ct in self.compressible_types):
             return response
 
+        # Detectar encoding aceptado por cliente
+        accept_encoding = request.headers.get("Accept-Encoding", "").lower()
+
+        # Streaming (exports CSV): comprimir al vuelo, el tamaño total no se conoce
+        if "Content-Length" not in response.headers:
+            if response.status_code in (204, 304):
+                return response
+            return self._stream(response, accept_encoding)
+
         # Leer body original
         body = b""
         async for chunk in response.body_iterator:
@@ -65,9 +78,6 @@ class CompressionMiddleware(BaseHTTPMiddleware):
                 media_type=response.media_type,
             )
 
-        # Detectar encoding aceptado por cliente
-        accept_encoding = request.headers.get("Accept-Encoding", "").lower()
-
         compressed_body = body
         encoding = None
 
@@ -101,3 +111,34 @@ class CompressionMiddleware(BaseHTTPMiddleware):
             headers=dict(headers),
             media_type=response.media_type,
         )
+
+    @staticmethod
+    def _stream(response: StreamingResponse, accept_encoding: str) -> Response:
+        """Envolver el body_iterator con un compresor incremental (Brotli o Gzip)."""
+        if "br" in accept_encoding:
+            compressor = brotli.Compressor(quality=4)
+            encoding = "br"
+            comprimir, terminar = compressor.process, compressor.finish
+        elif "gzip" in accept_encoding:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            encoding = "gzip"
+            comprimir, terminar = compressor.compress, compressor.flush
+        else:
+            return response
+
+        async def comprimido() -> AsyncIterator[bytes]:
+            async for chunk in response.body_iterator:
+                salida = comprimir(chunk)
+                if salida:
+                    yield salida
+            yield terminar()
+
+        headers = MutableHeaders(response.headers)
+        headers["Content-Encoding"] = encoding
+        headers["Vary"] = "Accept-Encoding"
+        return StreamingResponse(
+            comprimido(),
+            status_code=response.status_code,
+            headers=dict(headers),
+            media_type=response.media_type,
+        )
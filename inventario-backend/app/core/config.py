@@ -30,7 +30,19 @@ class Settings(BaseSettings):
     db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "30"))
     db_pool_timeout: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
     db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+    # Ajuste automático de max_overflow según la saturación observada (pool_telemetry)
+    db_pool_adaptive_overflow: bool = (
+        os.getenv("DB_POOL_ADAPTIVE_OVERFLOW", "false").lower() == "true"
+    )
+    db_pool_overflow_min: int = int(os.getenv("DB_POOL_OVERFLOW_MIN", "0"))
+    db_pool_overflow_max: int = int(os.getenv("DB_POOL_OVERFLOW_MAX", "60"))
+    db_pool_adjust_interval_seconds: int = int(os.getenv("DB_POOL_ADJUST_INTERVAL_SECONDS", "30"))
+    # Espera p95 por conexión a partir de la cual el pool se considera saturado
+    db_pool_wait_threshold_seconds: float = float(
+        os.getenv("DB_POOL_WAIT_THRESHOLD_SECONDS", "0.05")
+    )
     db_connect_args: dict[str, Any] = {}
+    db_async_connect_args: dict[str, Any] = {}
 
     # Schema creation on startup (for development only; prefer Alembic migrations)
     create_schema_on_startup: bool = (
@@ -147,8 +159,68 @@ class Settings(BaseSettings):
     redis_db: int = int(os.getenv("REDIS_DB", "0"))
     redis_password: str | None = os.getenv("REDIS_PASSWORD")
     redis_socket_timeout: float = float(os.getenv("REDIS_SOCKET_TIMEOUT", "1.0"))
+    # Conexiones máximas de cada pool del caché (cliente sync y cliente async por event loop)
+    redis_max_connections: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
     # Health check socket timeout for Redis (used in /health/detailed)
     redis_health_timeout: float = float(os.getenv("REDIS_HEALTH_TIMEOUT", "1.0"))
+    # Codec de valores en Redis: json | msgpack | orjson | auto (el primero instalado).
+    # msgpack/orjson/zstandard/lz4 no están en requirements.txt: el default es librería estándar
+    cache_serializer: str = os.getenv("CACHE_SERIALIZER", "json")
+    # Compresión por encima de CACHE_COMPRESSION_MIN_BYTES: zlib | zstd | lz4 | none | auto
+    cache_compression: str = os.getenv("CACHE_COMPRESSION", "zlib")
+    cache_compression_min_bytes: int = int(os.getenv("CACHE_COMPRESSION_MIN_BYTES", "1024"))
+    # Caché L1 en proceso delante de Redis (invalidada entre workers por pub/sub)
+    cache_l1_enabled: bool = os.getenv("CACHE_L1_ENABLED", "false").lower() == "true"
+    cache_l1_max_entries: int = int(os.getenv("CACHE_L1_MAX_ENTRIES", "1000"))
+    cache_l1_max_bytes: int = int(os.getenv("CACHE_L1_MAX_BYTES", str(16 * 1024 * 1024)))
+    # TTL local: acota cuánto puede durar una copia si se pierde un mensaje de invalidación
+    cache_l1_ttl_seconds: float = float(os.getenv("CACHE_L1_TTL_SECONDS", "5"))
+    cache_invalidation_channel: str = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache:invalidate")
+    # Sets `tag:<nombre>` con las claves de cada etiqueta; se renuevan en cada escritura
+    cache_tag_ttl_seconds: int = int(os.getenv("CACHE_TAG_TTL_SECONDS", "86400"))
+    # Claves por iteración de SCAN/SSCAN y por comando UNLINK al invalidar
+    cache_scan_batch_size: int = int(os.getenv("CACHE_SCAN_BATCH_SIZE", "500"))
+    # Protección contra estampidas (`get_or_compute`): una entrada vencida se sigue sirviendo
+    # (marcada como stale) hasta CACHE_STALE_TTL_SECONDS mientras un solo proceso la recalcula
+    cache_stale_ttl_seconds: int = int(os.getenv("CACHE_STALE_TTL_SECONDS", "60"))
+    # Refresco anticipado probabilístico: 0 lo desactiva, >1 refresca antes
+    cache_early_refresh_beta: float = float(os.getenv("CACHE_EARLY_REFRESH_BETA", "1.0"))
+    # Vida máxima del lock de recálculo y espera máxima de los demás en un fallo de caché
+    cache_lock_timeout_seconds: float = float(os.getenv("CACHE_LOCK_TIMEOUT_SECONDS", "10"))
+    # Hilos para los refrescos en segundo plano
+    cache_refresh_workers: int = int(os.getenv("CACHE_REFRESH_WORKERS", "2"))
+    # Precalentado del caché (job del scheduler): al arrancar y cada CACHE_WARM_INTERVAL_SECONDS
+    cache_warm_enabled: bool = os.getenv("CACHE_WARM_ENABLED", "false").lower() == "true"
+    cache_warm_interval_seconds: int = int(os.getenv("CACHE_WARM_INTERVAL_SECONDS", "240"))
+    # Recetas a calentar siempre (nombres separados por coma; vacío = ninguna fija).
+    # productos_advanced y productos_stats quedan fuera: GET /productos/{producto_id} del
+    # router de productos captura hoy /productos/advanced y /productos/stats.
+    cache_warm_keys: str = os.getenv(
+        "CACHE_WARM_KEYS", "dashboard,business,productos_por_laboratorio,productos_por_seccion"
+    )
+    # Además, las N claves más leídas según la telemetría (si alguna receta sabe calcularlas)
+    cache_warm_hot_keys: int = int(os.getenv("CACHE_WARM_HOT_KEYS", "20"))
+    # Consultas simultáneas del precalentado contra la base de datos
+    cache_warm_max_concurrency: int = int(os.getenv("CACHE_WARM_MAX_CONCURRENCY", "2"))
+    # Claves distintas con contador de lecturas (telemetría de claves calientes)
+    cache_hot_keys_tracked: int = int(os.getenv("CACHE_HOT_KEYS_TRACKED", "1000"))
+    # Totales de paginación cacheados (en proceso, invalidados al escribir la tabla)
+    count_cache_ttl_seconds: float = float(os.getenv("COUNT_CACHE_TTL_SECONDS", "60"))
+    # Por debajo de este estimado del planificador se hace COUNT(*) exacto
+    count_estimate_exact_below: int = int(os.getenv("COUNT_ESTIMATE_EXACT_BELOW", "1000"))
+    # Réplica de lectura opcional para reportes, dashboard y estadísticas (get_read_db)
+    database_replica_url: str | None = os.getenv("DATABASE_REPLICA_URL") or None
+    # Con más retraso que este (o sin respuesta) las lecturas vuelven al primario
+    replica_max_lag_seconds: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    replica_check_interval_seconds: float = float(os.getenv("REPLICA_CHECK_INTERVAL_SECONDS", "5"))
+    # Números de cotización reservados por bloque en cada worker (1 = sin reservas en memoria)
+    quote_number_block_size: int = int(os.getenv("QUOTE_NUMBER_BLOCK_SIZE", "10"))
+    # Contador de consultas por request: Server-Timing, métricas y detección de N+1
+    query_counter_enabled: bool = os.getenv("QUERY_COUNTER_ENABLED", "true").lower() == "true"
+    # Veces que una misma forma de sentencia se repite en un request para reportarla como N+1
+    query_repeat_threshold: int = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+    # Modo estricto (tests): un request con más consultas que esto falla (0 = desactivado)
+    query_count_fail_above: int = int(os.getenv("QUERY_COUNT_FAIL_ABOVE", "0"))
 
     # SMTP / Email
     smtp_host: str | None = os.getenv("SMTP_HOST")
@@ -202,11 +274,25 @@ class Settings(BaseSettings):
         # Set connect_args based on database type
         if self.database_url.startswith("sqlite"):
             self.db_connect_args = {"check_same_thread": False}
+            self.db_async_connect_args = {}
         else:
+            connect_timeout = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+            app_name = os.getenv("DB_APP_NAME", "InventarioBackend")
+            pg_options = os.getenv("DB_PG_OPTIONS", "-c statement_timeout=30s")
             self.db_connect_args = {
-                "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "10")),
-                "application_name": os.getenv("DB_APP_NAME", "InventarioBackend"),
-                "options": os.getenv("DB_PG_OPTIONS", "-c statement_timeout=30s"),
+                "connect_timeout": connect_timeout,
+                "application_name": app_name,
+                "options": pg_options,
+            }
+            # asyncpg no acepta "options": los "-c clave=valor" van como server_settings
+            server_settings = {"application_name": app_name}
+            for option in pg_options.split("-c"):
+                key, sep, value = option.strip().partition("=")
+                if sep and key.strip():
+                    server_settings[key.strip()] = value.strip()
+            self.db_async_connect_args = {
+                "timeout": connect_timeout,
+                "server_settings": server_settings,
             }
 
         # Parse env-driven overrides for lists (comma-separated)
@@ -313,6 +399,16 @@ class Settings(BaseSettings):
             auth = f":{self.redis_password}@"
         return f"redis://{auth}{self.redis_host}:{self.redis_port}/{self.redis_db}"
 
+    def get_async_database_url(self) -> str:
+        """Build the async driver URL (asyncpg/aiosqlite) from the sync database_url"""
+        url = self.database_url
+        for prefix in ("postgresql+psycopg2://", "postgresql://"):
+            if url.startswith(prefix):
+                return url.replace(prefix, "postgresql+asyncpg://", 1)
+        if url.startswith("sqlite://"):
+            return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+        return url
+
     def get_log_level(self, module_name: str) -> str:
         """Get log level for specific module"""
         return self.log_levels.get(module_name, self.log_level)
@@ -5,8 +5,11 @@ from collections.abc import Generator
 from sqlalchemy import event, text
 
 from app.core.logging_config import inventario_logger
+from app.core.metrics import metrics_manager
+from app.core.pool_telemetry import controladores
 from app.models.database import SessionLocal as SharedSessionLocal
 from app.models.database import engine as shared_engine
+from app.models.database import pool_status, replica_monitor
 
 logger = inventario_logger
 
@@ -41,14 +44,8 @@ def receive_connect(dbapi_connection, connection_record):
     logger.log_database_operation("connect", "database")
 
 
-@event.listens_for(engine, "checkout")
-def receive_checkout(dbapi_connection, connection_record, connection_proxy):
-    logger.log_database_operation("checkout", "pool")
-
-
-@event.listens_for(engine, "checkin")
-def receive_checkin(dbapi_connection, connection_record):
-    logger.log_database_operation("checkin", "pool")
+# Checkout/checkin: instrumentados en app.core.pool_telemetry (espera, duración por ruta,
+# overflow y timeouts) en lugar de una línea de log por evento
 
 
 # Sesión de base de datos
@@ -94,13 +91,16 @@ class DatabaseManager:
             return {"status": "unhealthy", "message": f"Database connection failed: {str(e)}"}
 
     def get_connection_info(self) -> dict:
-        """Obtener información de la conexión"""
-        pool = engine.pool
+        """Obtener información de la conexión (pools, réplica y telemetría acumulada)"""
+        pools = pool_status()
         return {
-            "pool_size": pool.size(),  # type: ignore[attr-defined]
-            "checked_in": pool.checkedin(),  # type: ignore[attr-defined]
-            "checked_out": pool.checkedout(),  # type: ignore[attr-defined]
-            "overflow": pool.overflow(),  # type: ignore[attr-defined]
+            **pools["primary"],
+            "engines": pools,
+            "replica": replica_monitor.estado(),
+            "telemetry": metrics_manager.db_pool_summary(),
+            "overflow_controllers": {
+                nombre: controlador.estado() for nombre, controlador in controladores.items()
+            },
         }
 
 
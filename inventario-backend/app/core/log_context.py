@@ -2,6 +2,7 @@
 Log context utilities: request-scoped contextvars and logging filters.
 
 - request_id_var: ContextVar used to propagate request id into log records
+- route_var: ContextVar with the normalized route of the current request (pool telemetry)
 - RequestIdFilter: logging.Filter that injects request_id into LogRecord
 """
 
@@ -13,6 +14,9 @@ from contextvars import ContextVar
 # Context variable to hold the current request id
 request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
 
+# Normalized route of the current request; "background" outside requests (jobs, startup)
+route_var: ContextVar[str] = ContextVar("route", default="background")
+
 
 class RequestIdFilter(logging.Filter):
     """
@@ -56,10 +60,23 @@ def clear_request_id() -> None:
         pass
 
 
+def set_route(route: str) -> None:
+    """Set current normalized route in contextvar."""
+    route_var.set(route)
+
+
+def get_route() -> str:
+    """Get current normalized route from contextvar."""
+    return route_var.get()
+
+
 __all__ = [
     "request_id_var",
+    "route_var",
     "RequestIdFilter",
     "set_request_id",
     "get_request_id",
     "clear_request_id",
+    "set_route",
+    "get_route",
 ]
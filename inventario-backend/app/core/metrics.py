@@ -3,6 +3,11 @@ Observability and metrics utilities.
 
 - MetricsManager: in-memory counters and latency histograms
 - MetricsMiddleware: measures each request and records metrics
+- Database pool telemetry (wait time, checkout duration per route, overflow/timeout events),
+  fed by app.core.pool_telemetry
+- Per-request SQL query counts and N+1 suspects, fed by app.core.query_counter
+- Cache value sizes per key prefix (serialized vs stored in Redis), fed by app.core.cache
+- Cache hits and misses per tier (l1 = in-process, l2 = Redis)
 - Optional Prometheus integration (enabled if prometheus-client is installed and settings.prometheus_enabled = true)
 """
 
@@ -31,6 +36,9 @@ try:
     from prometheus_client import (
         Counter as PromCounter,
     )
+    from prometheus_client import (
+        Gauge as PromGauge,
+    )
     from prometheus_client import (
         Histogram as PromHistogram,
     )
@@ -65,6 +73,16 @@ except Exception:
         def observe(self, *args, **kwargs) -> None:
             pass
 
+    class PromGauge:  # type: ignore
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def labels(self, *args, **kwargs):  # noqa: D401
+            return self
+
+        def set(self, *args, **kwargs) -> None:
+            pass
+
     def generate_latest(*args, **kwargs):  # type: ignore
         return b""
 
@@ -102,6 +120,30 @@ class MetricsManager:
         self.latency_sum: float = 0.0
         self.latency_count: int = 0
 
+        # Database pool telemetry, per engine name (primary, replica, async)
+        self.db_pool_wait_buckets: list[float] = [
+            0.001,
+            0.005,
+            0.01,
+            0.05,
+            0.1,
+            0.5,
+            1.0,
+            5.0,
+            float("inf"),
+        ]
+        self.db_pools: dict[str, dict[str, Any]] = {}
+        # (engine, route) -> [count, sum_seconds, max_seconds]
+        self.db_checkouts: dict[tuple[str, str], list[float]] = {}
+        # route -> [requests, queries, db_seconds, max_queries, n_plus_one_requests]
+        self.db_requests: dict[str, list[float]] = {}
+        # cache key prefix -> [writes, serialized_bytes, stored_bytes, max_stored, compressed]
+        self.cache_writes: dict[str, list[int]] = {}
+        # cache tier (l1/l2) -> {"hits": n, "misses": n}
+        self.cache_lookups: dict[str, dict[str, int]] = {}
+        # Per-key lookups ([hits, misses]), bounded by CACHE_HOT_KEYS_TRACKED; feeds the warmer
+        self.cache_key_lookups: dict[str, list[int]] = {}
+
         # Lock for thread-safety in multi-thread servers
         self._lock: Lock = Lock()
 
@@ -112,6 +154,15 @@ class MetricsManager:
         self._prom_requests_total: Any = None
         self._prom_errors_total: Any = None
         self._prom_latency_hist: Any = None
+        self._prom_db_pool_connections: Any = None
+        self._prom_replica_lag: Any = None
+        self._prom_db_pool_wait_hist: Any = None
+        self._prom_db_checkout_hist: Any = None
+        self._prom_db_pool_events_total: Any = None
+        self._prom_request_queries_hist: Any = None
+        self._prom_n_plus_one_total: Any = None
+        self._prom_cache_value_bytes_hist: Any = None
+        self._prom_cache_lookups_total: Any = None
 
     # ---------- Internal helpers ----------
 
@@ -150,8 +201,78 @@ class MetricsManager:
             buckets=[0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, float("inf")],
             registry=self._prom_registry,
         )
+        self._prom_db_pool_connections = PromGauge(
+            "app_db_pool_connections",
+            "Database pool connections by engine (primary/replica) and state",
+            ["engine", "state"],
+            registry=self._prom_registry,
+        )
+        self._prom_replica_lag = PromGauge(
+            "app_db_replica_lag_seconds",
+            "Last measured read replica lag in seconds (-1 if unavailable)",
+            registry=self._prom_registry,
+        )
+        self._prom_db_pool_wait_hist = PromHistogram(
+            "app_db_pool_wait_seconds",
+            "Time spent waiting for a pooled database connection",
+            ["engine"],
+            buckets=self.db_pool_wait_buckets,
+            registry=self._prom_registry,
+        )
+        self._prom_db_checkout_hist = PromHistogram(
+            "app_db_checkout_seconds",
+            "Time a database connection stays checked out, per route",
+            ["engine", "route"],
+            buckets=[0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, float("inf")],
+            registry=self._prom_registry,
+        )
+        self._prom_db_pool_events_total = PromCounter(
+            "app_db_pool_events_total",
+            "Pool overflow connections opened and checkout timeouts",
+            ["engine", "event"],
+            registry=self._prom_registry,
+        )
+        self._prom_request_queries_hist = PromHistogram(
+            "app_request_db_queries",
+            "SQL statements executed per request",
+            ["route"],
+            buckets=[1, 2, 5, 10, 20, 50, 100, float("inf")],
+            registry=self._prom_registry,
+        )
+        self._prom_n_plus_one_total = PromCounter(
+            "app_request_n_plus_one_total",
+            "Requests that repeated a statement shape above the N+1 threshold",
+            ["route"],
+            registry=self._prom_registry,
+        )
+        self._prom_cache_value_bytes_hist = PromHistogram(
+            "app_cache_value_bytes",
+            "Size of cache values as stored in Redis (after compression), per key prefix",
+            ["prefix"],
+            buckets=[256, 1024, 4096, 16384, 65536, 262144, 1048576, float("inf")],
+            registry=self._prom_registry,
+        )
+        self._prom_cache_lookups_total = PromCounter(
+            "app_cache_lookups_total",
+            "Cache lookups per tier (l1 in-process, l2 Redis) and result (hit/miss)",
+            ["tier", "result"],
+            registry=self._prom_registry,
+        )
         self._prom_counters_initialized = True
 
+    def _refresh_db_metrics(self) -> None:
+        """Update pool and replica gauges right before a scrape."""
+        from app.models.database import pool_status, replica_monitor
+
+        pool_gauge = cast(Any, self._prom_db_pool_connections)
+        for engine_name, pool in pool_status().items():
+            for state, value in pool.items():
+                pool_gauge.labels(engine=engine_name, state=state).set(value)
+        replica = replica_monitor.estado()
+        if replica["configured"]:
+            lag = replica["lag_seconds"]
+            cast(Any, self._prom_replica_lag).set(-1 if lag is None else lag)
+
     # ---------- Public API ----------
 
     def record(self, duration: float, status_code: int, method: str, path: str) -> None:
@@ -187,6 +308,248 @@ class MetricsManager:
                         # Do not let metrics crash the request
                         pass
 
+    def _db_pool_entry(self, engine: str) -> dict[str, Any]:
+        entry = self.db_pools.get(engine)
+        if entry is None:
+            entry = self.db_pools[engine] = {
+                "wait_count": 0,
+                "wait_sum": 0.0,
+                "wait_buckets": {b: 0 for b in self.db_pool_wait_buckets},
+                "overflow": 0,
+                "timeout": 0,
+            }
+        return entry
+
+    def _prometheus_ready(self) -> bool:
+        if not (PROMETHEUS_AVAILABLE and settings.prometheus_enabled):
+            return False
+        self._maybe_init_prometheus()
+        return self._prom_counters_initialized
+
+    def record_db_pool_wait(self, engine: str, duration: float) -> None:
+        """
+        Record how long a checkout waited for a pooled connection.
+        """
+        with self._lock:
+            entry = self._db_pool_entry(engine)
+            entry["wait_count"] += 1
+            entry["wait_sum"] += duration
+            for b in self.db_pool_wait_buckets:
+                if duration <= b:
+                    entry["wait_buckets"][b] += 1
+                    break
+            if self._prometheus_ready():
+                try:
+                    hist = cast(Any, self._prom_db_pool_wait_hist)
+                    hist.labels(engine=engine).observe(duration)
+                except Exception:
+                    pass
+
+    def record_db_pool_event(self, engine: str, event: str) -> None:
+        """
+        Count a pool event: "overflow" (connection opened above pool_size) or "timeout".
+        """
+        with self._lock:
+            entry = self._db_pool_entry(engine)
+            entry[event] = entry.get(event, 0) + 1
+            if self._prometheus_ready():
+                try:
+                    counter = cast(Any, self._prom_db_pool_events_total)
+                    counter.labels(engine=engine, event=event).inc()
+                except Exception:
+                    pass
+
+    def record_db_checkout(self, engine: str, route: str, duration: float) -> None:
+        """
+        Record how long a connection stayed checked out by a route.
+        """
+        with self._lock:
+            stats = self.db_checkouts.setdefault((engine, route), [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+            if self._prometheus_ready():
+                try:
+                    hist = cast(Any, self._prom_db_checkout_hist)
+                    hist.labels(engine=engine, route=route).observe(duration)
+                except Exception:
+                    pass
+
+    def record_db_request(
+        self, route: str, queries: int, duration: float, n_plus_one: bool
+    ) -> None:
+        """
+        Record the SQL statements and DB time of one request.
+        """
+        with self._lock:
+            stats = self.db_requests.setdefault(route, [0, 0, 0.0, 0, 0])
+            stats[0] += 1
+            stats[1] += queries
+            stats[2] += duration
+            stats[3] = max(stats[3], queries)
+            stats[4] += int(n_plus_one)
+            if self._prometheus_ready():
+                try:
+                    cast(Any, self._prom_request_queries_hist).labels(route=route).observe(queries)
+                    if n_plus_one:
+                        cast(Any, self._prom_n_plus_one_total).labels(route=route).inc()
+                except Exception:
+                    pass
+
+    def record_cache_write(
+        self, prefix: str, serialized_bytes: int, stored_bytes: int, compressed: bool
+    ) -> None:
+        """
+        Record one value written to the cache: size before and after compression.
+        """
+        with self._lock:
+            stats = self.cache_writes.setdefault(prefix, [0, 0, 0, 0, 0])
+            stats[0] += 1
+            stats[1] += serialized_bytes
+            stats[2] += stored_bytes
+            stats[3] = max(stats[3], stored_bytes)
+            stats[4] += int(compressed)
+            if self._prometheus_ready():
+                try:
+                    hist = cast(Any, self._prom_cache_value_bytes_hist)
+                    hist.labels(prefix=prefix).observe(stored_bytes)
+                except Exception:
+                    pass
+
+    def record_cache_lookup(self, tier: str, hit: bool) -> None:
+        """
+        Count a cache lookup on one tier ("l1" in-process, "l2" Redis).
+        """
+        result = "hits" if hit else "misses"
+        with self._lock:
+            counts = self.cache_lookups.setdefault(tier, {"hits": 0, "misses": 0})
+            counts[result] += 1
+            if self._prometheus_ready():
+                try:
+                    counter = cast(Any, self._prom_cache_lookups_total)
+                    counter.labels(tier=tier, result="hit" if hit else "miss").inc()
+                except Exception:
+                    pass
+
+    def record_cache_key_lookup(self, key: str, hit: bool) -> None:
+        """
+        Count a read of one cache key. When more keys than CACHE_HOT_KEYS_TRACKED are
+        tracked, the least read half is dropped, so hot keys survive and cold ones rotate.
+        """
+        with self._lock:
+            stats = self.cache_key_lookups.setdefault(key, [0, 0])
+            stats[0 if hit else 1] += 1
+            if len(self.cache_key_lookups) > settings.cache_hot_keys_tracked:
+                ranked = sorted(self.cache_key_lookups.items(), key=lambda kv: -sum(kv[1]))
+                self.cache_key_lookups = dict(ranked[: settings.cache_hot_keys_tracked // 2])
+
+    def hot_cache_keys(self, limit: int) -> list[dict[str, Any]]:
+        """
+        Most read cache keys (hits + misses), most read first.
+        """
+        with self._lock:
+            ranked = sorted(self.cache_key_lookups.items(), key=lambda kv: -sum(kv[1]))
+        return [{"key": key, "hits": h, "misses": m} for key, (h, m) in ranked[:limit]]
+
+    def cache_tier_summary(self) -> dict[str, dict[str, Any]]:
+        """
+        Hits, misses and hit rate per cache tier.
+        """
+        with self._lock:
+            return {
+                tier: {
+                    **counts,
+                    "hit_rate": (
+                        counts["hits"] / (counts["hits"] + counts["misses"])
+                        if counts["hits"] + counts["misses"]
+                        else None
+                    ),
+                }
+                for tier, counts in self.cache_lookups.items()
+            }
+
+    def cache_size_summary(self) -> list[dict[str, Any]]:
+        """
+        Stored cache sizes by key prefix, largest total first.
+        """
+        with self._lock:
+            rows = [
+                {
+                    "prefix": prefix,
+                    "writes": writes,
+                    "serialized_bytes": serialized,
+                    "stored_bytes": stored,
+                    "average_stored_bytes": stored / writes,
+                    "max_stored_bytes": maximum,
+                    "compression_ratio": stored / serialized if serialized else None,
+                    "compressed_writes": compressed,
+                }
+                for prefix, (writes, serialized, stored, maximum, compressed) in (
+                    self.cache_writes.items()
+                )
+            ]
+        return sorted(rows, key=lambda row: row["stored_bytes"], reverse=True)
+
+    def db_request_summary(self) -> list[dict[str, Any]]:
+        """
+        Queries per request by route, heaviest routes first.
+        """
+        with self._lock:
+            rows = [
+                {
+                    "route": route,
+                    "requests": int(requests),
+                    "average_queries": queries / requests,
+                    "max_queries": int(maximum),
+                    "average_db_seconds": seconds / requests,
+                    "n_plus_one_requests": int(suspects),
+                }
+                for route, (requests, queries, seconds, maximum, suspects) in (
+                    self.db_requests.items()
+                )
+            ]
+        return sorted(rows, key=lambda row: row["average_queries"], reverse=True)
+
+    def db_pool_stats(self, engine: str) -> dict[str, Any]:
+        """
+        Copy of the cumulative pool counters of one engine (wait buckets included).
+        """
+        with self._lock:
+            entry = self._db_pool_entry(engine)
+            return {**entry, "wait_buckets": dict(entry["wait_buckets"])}
+
+    def db_pool_summary(self) -> dict[str, Any]:
+        """
+        JSON-serializable pool telemetry: waits/events per engine and checkouts per route.
+        """
+        with self._lock:
+            pools = {
+                engine: {
+                    "wait_count": entry["wait_count"],
+                    "wait_average_seconds": (
+                        entry["wait_sum"] / entry["wait_count"] if entry["wait_count"] else None
+                    ),
+                    "wait_buckets": {
+                        ("+Inf" if b == float("inf") else str(b)): n
+                        for b, n in entry["wait_buckets"].items()
+                    },
+                    "overflow_events": entry["overflow"],
+                    "timeout_events": entry["timeout"],
+                }
+                for engine, entry in self.db_pools.items()
+            }
+            checkouts = [
+                {
+                    "engine": engine,
+                    "route": route,
+                    "count": int(count),
+                    "average_seconds": total / count if count else None,
+                    "max_seconds": maximum,
+                }
+                for (engine, route), (count, total, maximum) in sorted(self.db_checkouts.items())
+            ]
+        return {"pools": pools, "checkouts": checkouts}
+
     def uptime_seconds(self) -> float:
         return max(0.0, time.time() - self.start_time)
 
@@ -245,6 +608,7 @@ class MetricsManager:
 
         self._maybe_init_prometheus()
         try:
+            self._refresh_db_metrics()
             output = generate_latest(self._prom_registry)  # type: ignore
             return FastAPIResponse(content=output, media_type=CONTENT_TYPE_LATEST, status_code=200)
         except Exception:
@@ -0,0 +1,93 @@
+"""
+Numeración de documentos por serie con reserva de bloques
+
+Cada serie (por ejemplo ``COT-2025``) tiene un contador en `contador_documento`. Un worker
+reserva un bloque de números con un único ``UPDATE ... SET ultimo = ultimo + n RETURNING``
+en una transacción propia y corta, y los entrega desde memoria hasta agotarlo: crear un
+documento no consulta la tabla del documento ni retiene bloqueos durante la petición.
+
+Los números son únicos y crecientes dentro de cada worker. Quedan huecos cuando un worker
+se reinicia con parte de su bloque sin usar o cuando se revierte la transacción que usó un
+número; con ``tamano_bloque=1`` solo queda el segundo caso.
+"""
+
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import Connection, Engine, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import ContadorDocumento
+
+# Valor inicial de una serie nueva (último número ya usado fuera del contador)
+Inicial = Callable[[Connection], int]
+
+
+class NumeradorDocumentos:
+    """Asigna números consecutivos por serie a partir de bloques reservados en la base."""
+
+    def __init__(self, tamano_bloque: int = 10):
+        self.tamano_bloque = max(1, tamano_bloque)
+        self._lock = threading.Lock()
+        # (engine, serie) -> (siguiente número a entregar, último número del bloque)
+        self._bloques: dict[tuple[Any, str], tuple[int, int]] = {}
+
+    def siguiente(self, db: Session, serie: str, inicial: Inicial | None = None) -> int:
+        """
+        Siguiente número de la serie
+
+        Args:
+            db: Sesión de base de datos (solo se usa su bind para reservar)
+            serie: Nombre de la serie
+            inicial: Se invoca una sola vez, al crear el contador de la serie, para continuar
+                la numeración existente
+        """
+        bind = db.get_bind()
+        clave = (bind.engine, serie)
+        with self._lock:
+            siguiente, tope = self._bloques.get(clave, (1, 0))
+            if siguiente > tope:
+                tope = self._reservar(bind, serie, inicial)
+                siguiente = tope - self.tamano_bloque + 1
+            self._bloques[clave] = (siguiente + 1, tope)
+            return siguiente
+
+    def _reservar(self, bind, serie: str, inicial: Inicial | None) -> int:
+        if isinstance(bind, Engine):
+            # Transacción propia: el bloque queda reservado aunque la petición se revierta
+            with bind.begin() as conn:
+                return self._incrementar(conn, serie, inicial)
+        return self._incrementar(bind, serie, inicial)
+
+    def _incrementar(self, conn: Connection, serie: str, inicial: Inicial | None) -> int:
+        tabla = ContadorDocumento.__table__
+        incrementar = (
+            update(tabla)
+            .where(tabla.c.serie == serie)
+            .values(ultimo=tabla.c.ultimo + self.tamano_bloque)
+            .returning(tabla.c.ultimo)
+        )
+        fila = conn.execute(incrementar).first()
+        if fila is None:
+            if conn.dialect.name == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert  # type: ignore[assignment]
+            base = inicial(conn) if inicial else 0
+            conn.execute(
+                dialect_insert(tabla)
+                .values(serie=serie, ultimo=base)
+                .on_conflict_do_nothing(index_elements=["serie"])
+            )
+            fila = conn.execute(incrementar).one()
+        return int(fila[0])
+
+    def clear(self) -> None:
+        """Olvidar los bloques reservados (los números no usados se pierden)."""
+        with self._lock:
+            self._bloques.clear()
+
+
+numerador_documentos = NumeradorDocumentos(tamano_bloque=settings.quote_number_block_size)
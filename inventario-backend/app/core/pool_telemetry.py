@@ -0,0 +1,250 @@
+"""
+Telemetría del pool de conexiones
+
+- InstrumentedQueuePool / InstrumentedAsyncQueuePool: miden la espera de cada checkout y
+  cuentan las conexiones abiertas por encima de pool_size (overflow) y los timeouts.
+- instrumentar(): registra en el motor los listeners checkout/checkin que miden cuánto tiempo
+  retiene cada ruta su conexión.
+- PoolOverflowController: ajusta max_overflow según la saturación observada y recomienda un
+  pool_size a partir de los picos de conexiones en uso (opcional, DB_POOL_ADAPTIVE_OVERFLOW).
+
+Todo se registra en `metrics_manager` (y en Prometheus si está habilitado).
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.log_context import get_route
+from app.core.logging_config import inventario_logger
+from app.core.metrics import metrics_manager
+
+logger = inventario_logger
+
+_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+_ID_NUMERICO = re.compile(r"/\d+(?=/|$)")
+
+
+def normalizar_ruta(path: str) -> str:
+    """Ruta sin identificadores (/productos/42 -> /productos/{id}) para acotar las etiquetas."""
+    return _ID_NUMERICO.sub("/{id}", _UUID.sub("{id}", path))
+
+
+class _PoolInstrumentado:
+    """Mixin para QueuePool: espera del checkout, overflow, timeouts y pico de uso."""
+
+    nombre: str = "primary"
+    pico_checked_out: int = 0
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        overflow_previo = self.overflow()  # type: ignore[attr-defined]
+        try:
+            conexion = super()._do_get()  # type: ignore[misc]
+        except exc.TimeoutError:
+            metrics_manager.record_db_pool_event(self.nombre, "timeout")
+            raise
+        finally:
+            metrics_manager.record_db_pool_wait(self.nombre, time.perf_counter() - inicio)
+        # overflow() parte de -pool_size: solo cuenta si la conexión nueva excede pool_size
+        overflow = self.overflow()  # type: ignore[attr-defined]
+        if overflow > overflow_previo and overflow > 0:
+            metrics_manager.record_db_pool_event(self.nombre, "overflow")
+        self.pico_checked_out = max(self.pico_checked_out, self.checkedout())  # type: ignore[attr-defined]
+        return conexion
+
+    def recreate(self):
+        # engine.dispose() recrea el pool (con el max_overflow vigente): conservar el nombre
+        nuevo = super().recreate()  # type: ignore[misc]
+        nuevo.nombre = self.nombre
+        return nuevo
+
+    def tomar_pico(self) -> int:
+        """Pico de conexiones en uso desde la última lectura (y reiniciarlo)."""
+        pico, self.pico_checked_out = self.pico_checked_out, self.checkedout()  # type: ignore[attr-defined]
+        return pico
+
+
+class InstrumentedQueuePool(_PoolInstrumentado, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_PoolInstrumentado, AsyncAdaptedQueuePool):
+    pass
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy, *, nombre: str) -> None:
+    connection_record.info["_telemetria_checkout"] = (time.perf_counter(), get_route())
+
+
+def _on_checkin(dbapi_connection, connection_record, *, nombre: str) -> None:
+    checkout = connection_record.info.pop("_telemetria_checkout", None)
+    if checkout is not None:
+        inicio, ruta = checkout
+        metrics_manager.record_db_checkout(nombre, ruta, time.perf_counter() - inicio)
+
+
+def instrumentar(engine: Any, nombre: str) -> None:
+    """Nombrar el pool del motor y registrar los listeners de duración del checkout."""
+    pool = engine.pool
+    if isinstance(pool, _PoolInstrumentado):
+        pool.nombre = nombre
+    event.listen(engine, "checkout", lambda *args: _on_checkout(*args, nombre=nombre))
+    event.listen(engine, "checkin", lambda *args: _on_checkin(*args, nombre=nombre))
+
+
+class PoolOverflowController:
+    """
+    Ajuste de max_overflow según la saturación observada en cada intervalo
+
+    - Sube `paso` si hubo timeouts, si la espera p95 superó `umbral_espera` segundos o si el pico
+      de conexiones en uso alcanzó pool_size + max_overflow.
+    - Baja `paso` si no hubo esperas por encima del umbral y el pico quedó por debajo de
+      pool_size + max_overflow / 2.
+    - Nunca sale de [minimo, maximo].
+
+    `estado()` incluye `recommended_pool_size`: el p95 de los picos por intervalo de la ventana,
+    para dimensionar DB_POOL_SIZE con datos.
+    """
+
+    def __init__(
+        self,
+        engine: Any,
+        minimo: int,
+        maximo: int,
+        paso: int = 5,
+        umbral_espera: float = 0.05,
+        ventana: int = 120,
+    ):
+        self.engine = engine
+        self.minimo = minimo
+        self.maximo = maximo
+        self.paso = paso
+        self.umbral_espera = umbral_espera
+        self.picos: deque[int] = deque(maxlen=ventana)
+        self.ajustes = 0
+        self.ultima_decision: str | None = None
+        self._anterior: dict[str, Any] | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> Any:
+        return self.engine.pool
+
+    def _p95_espera(self, actual: dict[str, Any], anterior: dict[str, Any]) -> float:
+        """Límite superior del bucket que contiene el p95 de las esperas del intervalo."""
+        deltas = [
+            (b, n - anterior["wait_buckets"].get(b, 0)) for b, n in actual["wait_buckets"].items()
+        ]
+        total = sum(n for _, n in deltas)
+        if total == 0:
+            return 0.0
+        objetivo = math.ceil(total * 0.95)
+        acumulado = 0
+        for b, n in deltas:
+            acumulado += n
+            if acumulado >= objetivo:
+                return b
+        return float("inf")
+
+    def ajustar(self) -> str:
+        """Evaluar el último intervalo y ajustar max_overflow; devuelve la decisión."""
+        with self._lock:
+            pool = self.pool
+            actual = metrics_manager.db_pool_stats(pool.nombre)
+            pico = pool.tomar_pico()
+            self.picos.append(pico)
+            anterior, self._anterior = self._anterior, actual
+            if anterior is None:
+                self.ultima_decision = "baseline"
+                return self.ultima_decision
+
+            overflow = pool._max_overflow
+            capacidad = pool.size() + overflow
+            timeouts = actual["timeout"] - anterior["timeout"]
+            espera = self._p95_espera(actual, anterior)
+
+            nuevo = overflow
+            if timeouts or espera > self.umbral_espera or pico >= capacidad:
+                nuevo = min(self.maximo, overflow + self.paso)
+            elif pico < pool.size() + overflow / 2:
+                nuevo = max(self.minimo, overflow - self.paso)
+
+            if nuevo > overflow:
+                self.ultima_decision = "grow"
+            elif nuevo < overflow:
+                self.ultima_decision = "shrink"
+            else:
+                self.ultima_decision = "keep"
+            if nuevo != overflow:
+                pool._max_overflow = nuevo
+                self.ajustes += 1
+                logger.log_info(
+                    "Pool max_overflow ajustado",
+                    {
+                        "engine": pool.nombre,
+                        "max_overflow": nuevo,
+                        "anterior": overflow,
+                        "pico_checked_out": pico,
+                        "timeouts": timeouts,
+                        "espera_p95": espera,
+                    },
+                )
+            return self.ultima_decision
+
+    def recomendacion_pool_size(self) -> int | None:
+        if not self.picos:
+            return None
+        ordenados = sorted(self.picos)
+        return ordenados[math.ceil(len(ordenados) * 0.95) - 1]
+
+    def estado(self) -> dict[str, Any]:
+        pool = self.pool
+        return {
+            "engine": pool.nombre,
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "min_overflow": self.minimo,
+            "max_overflow_limit": self.maximo,
+            "adjustments": self.ajustes,
+            "last_decision": self.ultima_decision,
+            "recent_peak_checked_out": self.picos[-1] if self.picos else None,
+            "recommended_pool_size": self.recomendacion_pool_size(),
+        }
+
+
+# Controladores activos por nombre de motor (los registra el scheduler)
+controladores: dict[str, PoolOverflowController] = {}
+
+
+def crear_controlador(engine: Any) -> PoolOverflowController:
+    """Controlador con los límites de la configuración, registrado en `controladores`."""
+    from app.core.config import settings
+
+    controlador = PoolOverflowController(
+        engine,
+        minimo=settings.db_pool_overflow_min,
+        maximo=settings.db_pool_overflow_max,
+        umbral_espera=settings.db_pool_wait_threshold_seconds,
+    )
+    controladores[engine.pool.nombre] = controlador
+    return controlador
+
+
+__all__ = [
+    "InstrumentedQueuePool",
+    "InstrumentedAsyncQueuePool",
+    "PoolOverflowController",
+    "controladores",
+    "crear_controlador",
+    "instrumentar",
+    "normalizar_ruta",
+]
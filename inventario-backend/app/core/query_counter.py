@@ -0,0 +1,158 @@
+"""
+Contador de consultas SQL por request y detector de N+1
+
+- Listeners globales de SQLAlchemy (before/after_cursor_execute sobre `Engine`) que, dentro de
+  un ámbito activo, cuentan sentencias, suman el tiempo en base de datos y agrupan por forma
+  de la sentencia (SQL sin literales ni listas IN).
+- QueryCounterMiddleware: abre un ámbito por request, publica `Server-Timing` y registra las
+  métricas; una forma repetida `QUERY_REPEAT_THRESHOLD` veces o más se reporta como posible N+1.
+- Modo estricto para tests: con `limite_consultas` (o QUERY_COUNT_FAIL_ABOVE) un request que
+  supere el límite lanza `QueryBudgetExceeded`, que TestClient propaga y hace fallar el test.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp
+
+from app.core.config import settings
+from app.core.log_context import get_route
+from app.core.logging_config import inventario_logger
+from app.core.metrics import metrics_manager
+
+logger = inventario_logger
+
+_ESPACIOS = re.compile(r"\s+")
+_LISTA_IN = re.compile(r"\bIN\s*\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Un request ejecutó más consultas que el límite configurado (modo estricto de tests)."""
+
+
+@dataclass
+class EstadisticasConsultas:
+    """Consultas de un ámbito (request o bloque `contar_consultas`)."""
+
+    consultas: int = 0
+    duracion: float = 0.0
+    formas: Counter = field(default_factory=Counter)
+
+    def repetidas(self, umbral: int | None = None) -> list[tuple[str, int]]:
+        """Formas ejecutadas al menos `umbral` veces, de más a menos repetida."""
+        umbral = umbral or settings.query_repeat_threshold
+        return [(forma, n) for forma, n in self.formas.most_common() if n >= umbral]
+
+    def server_timing(self) -> str:
+        repeticion = max(self.formas.values(), default=0)
+        return (
+            f'db;dur={self.duracion * 1000:.2f};desc="{self.consultas} queries", '
+            f'db-repeat;desc="{repeticion}"'
+        )
+
+
+_actual: ContextVar[EstadisticasConsultas | None] = ContextVar("query_counter", default=None)
+
+# Límite del modo estricto (None = desactivado); los tests lo fijan con `limite_consultas`
+limite: int | None = settings.query_count_fail_above or None
+
+
+def forma_sentencia(statement: str) -> str:
+    """SQL normalizado: sin literales, listas IN colapsadas y espacios simples."""
+    forma = _LISTA_IN.sub("IN (?)", statement)
+    forma = _LITERALES.sub("?", forma)
+    return _ESPACIOS.sub(" ", forma).strip()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    if _actual.get() is not None:
+        conn.info.setdefault("_query_counter_inicio", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    estadisticas = _actual.get()
+    inicios = conn.info.get("_query_counter_inicio")
+    if estadisticas is None or not inicios:
+        return
+    estadisticas.consultas += 1
+    estadisticas.duracion += time.perf_counter() - inicios.pop()
+    estadisticas.formas[forma_sentencia(statement)] += 1
+
+
+@contextmanager
+def contar_consultas() -> Iterator[EstadisticasConsultas]:
+    """Contar las consultas ejecutadas dentro del bloque (también fuera de un request)."""
+    estadisticas = EstadisticasConsultas()
+    token = _actual.set(estadisticas)
+    try:
+        yield estadisticas
+    finally:
+        _actual.reset(token)
+
+
+@contextmanager
+def limite_consultas(maximo: int | None) -> Iterator[None]:
+    """Activar el modo estricto: los requests con más de `maximo` consultas fallan."""
+    global limite
+    anterior, limite = limite, maximo
+    try:
+        yield
+    finally:
+        limite = anterior
+
+
+class QueryCounterMiddleware(BaseHTTPMiddleware):
+    """
+    Cuenta las consultas de cada request y las publica en `Server-Timing` y en las métricas.
+    """
+
+    def __init__(self, app: ASGIApp):
+        super().__init__(app)
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        with contar_consultas() as estadisticas:
+            response = await call_next(request)
+
+        ruta = get_route()
+        repetidas = estadisticas.repetidas()
+        metrics_manager.record_db_request(
+            ruta, estadisticas.consultas, estadisticas.duracion, bool(repetidas)
+        )
+        if repetidas:
+            forma, veces = repetidas[0]
+            logger.log_warning(
+                "Posible N+1: sentencia repetida en un request",
+                {"route": ruta, "times": veces, "statement": forma[:300]},
+            )
+        response.headers.append("Server-Timing", estadisticas.server_timing())
+
+        if limite is not None and estadisticas.consultas > limite:
+            raise QueryBudgetExceeded(
+                f"{ruta} ejecutó {estadisticas.consultas} consultas (límite {limite}); "
+                f"más repetidas: {repetidas[:3]}"
+            )
+        return response
+
+
+__all__ = [
+    "EstadisticasConsultas",
+    "QueryBudgetExceeded",
+    "QueryCounterMiddleware",
+    "contar_consultas",
+    "forma_sentencia",
+    "limite_consultas",
+]
@@ -1,18 +1,30 @@
 """
 Optimizador de queries con eager loading para eliminar N+1 queries.
+
+Las opciones usan atributos de clase (``Producto.seccion``), no cadenas: SQLAlchemy 2.0 ya no
+acepta nombres de relación como texto. Para comprobar que un endpoint no hace N+1, ver
+``app.core.query_counter``.
 """
-from typing import TYPE_CHECKING
 
 from sqlalchemy.orm import Query, joinedload, selectinload
 
-if TYPE_CHECKING:
-    from sqlalchemy.orm.strategy_options import _AbstractLoad
+from app.models.models import (
+    Cotizacion,
+    DetalleCotizacion,
+    DetalleVenta,
+    Entrada,
+    Gasto,
+    Lote,
+    Producto,
+    Salida,
+    Venta,
+)
 
 
 class QueryOptimizer:
     """
     Clase helper para optimizar queries con eager loading estratégico.
-    
+
     Uso:
         query = QueryOptimizer.optimize_producto_query(db.query(Producto))
         productos = query.all()  # Sin N+1 queries!
@@ -22,13 +34,12 @@ class QueryOptimizer:
     def optimize_producto_query(query: Query) -> Query:
         """
         Optimiza query de productos con eager loading de relaciones.
-        Elimina N+1 queries al cargar seccion, laboratorio, lotes.
+        Elimina N+1 queries al cargar seccion, laboratorio y lotes.
         """
         return query.options(
-            joinedload("seccion"),  # type: ignore[arg-type]
-            joinedload("laboratorio"),  # type: ignore[arg-type]
-            selectinload("lotes"),  # type: ignore[arg-type]
-            selectinload("alertas"),  # type: ignore[arg-type]
+            joinedload(Producto.seccion),
+            joinedload(Producto.laboratorio),
+            selectinload(Producto.lotes),
         )
 
     @staticmethod
@@ -37,9 +48,9 @@ class QueryOptimizer:
         Optimiza query de ventas con eager loading de detalles y relaciones.
         """
         return query.options(
-            joinedload("usuario"),  # type: ignore[arg-type]
-            joinedload("cliente"),  # type: ignore[arg-type]
-            selectinload("detalles").joinedload("lote").joinedload("producto"),  # type: ignore[arg-type]
+            joinedload(Venta.usuario),
+            joinedload(Venta.cliente),
+            selectinload(Venta.detalles).joinedload(DetalleVenta.lote).joinedload(Lote.producto),
         )
 
     @staticmethod
@@ -48,8 +59,8 @@ class QueryOptimizer:
         Optimiza query de entradas.
         """
         return query.options(
-            joinedload("usuario"),  # type: ignore[arg-type]
-            joinedload("lote").joinedload("producto"),  # type: ignore[arg-type]
+            joinedload(Entrada.usuario),
+            joinedload(Entrada.lote).joinedload(Lote.producto),
         )
 
     @staticmethod
@@ -58,20 +69,19 @@ class QueryOptimizer:
         Optimiza query de salidas.
         """
         return query.options(
-            joinedload("usuario"),  # type: ignore[arg-type]
-            joinedload("lote").joinedload("producto"),  # type: ignore[arg-type]
+            joinedload(Salida.usuario),
+            joinedload(Salida.lote).joinedload(Lote.producto),
         )
 
     @staticmethod
     def optimize_alerta_query(query: Query) -> Query:
         """
         Optimiza query de alertas.
+
+        Alerta solo guarda id_producto/id_seccion (sin relaciones mapeadas): no hay nada que
+        precargar y la query se devuelve tal cual.
         """
-        return query.options(
-            joinedload("producto").joinedload("seccion"),  # type: ignore[arg-type]
-            joinedload("producto").joinedload("laboratorio"),  # type: ignore[arg-type]
-            joinedload("seccion"),  # type: ignore[arg-type]
-        )
+        return query
 
     @staticmethod
     def optimize_cotizacion_query(query: Query) -> Query:
@@ -79,9 +89,9 @@ class QueryOptimizer:
         Optimiza query de cotizaciones.
         """
         return query.options(
-            joinedload("usuario"),  # type: ignore[arg-type]
-            joinedload("cliente"),  # type: ignore[arg-type]
-            selectinload("detalles").joinedload("producto"),  # type: ignore[arg-type]
+            joinedload(Cotizacion.usuario),
+            joinedload(Cotizacion.cliente),
+            selectinload(Cotizacion.detalles).joinedload(DetalleCotizacion.producto),
         )
 
     @staticmethod
@@ -90,36 +100,5 @@ class QueryOptimizer:
         Optimiza query de gastos.
         """
         return query.options(
-            joinedload("usuario"),  # type: ignore[arg-type]
+            joinedload(Gasto.usuario),
         )
-
-
-# Decorator para aplicar optimización automática
-def with_optimized_query(optimizer_method):
-    """
-    Decorator para aplicar optimización de query automáticamente.
-    
-    Uso:
-        @with_optimized_query(QueryOptimizer.optimize_producto_query)
-        def get_productos(db: Session):
-            return db.query(Producto).all()
-    """
-
-    def decorator(func):
-        def wrapper(db, *args, **kwargs):
-            # Intercept query creation
-            original_query = db.query
-            
-            def optimized_query(*q_args, **q_kwargs):
-                query = original_query(*q_args, **q_kwargs)
-                return optimizer_method(query)
-            
-            db.query = optimized_query
-            try:
-                return func(db, *args, **kwargs)
-            finally:
-                db.query = original_query
-        
-        return wrapper
-    
-    return decorator
@@ -4,6 +4,7 @@ Request ID middleware
 - Ensures every request has a stable request_id available as request.state.request_id
 - Echoes/generates X-Request-Id header on responses
 - If an incoming X-Request-Id header exists, uses a safe, validated value; otherwise generates a new UUID4
+- Sets the normalized route in context so pool telemetry can attribute connection checkouts
 """
 
 from __future__ import annotations
@@ -15,7 +16,8 @@ from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
-from app.core.log_context import clear_request_id, set_request_id
+from app.core.log_context import clear_request_id, set_request_id, set_route
+from app.core.pool_telemetry import normalizar_ruta
 
 REQUEST_ID_HEADER = "X-Request-Id"
 
@@ -53,6 +55,7 @@ class RequestIdMiddleware(BaseHTTPMiddleware):
         request.state.request_id = request_id
         # Also set into contextvar so log filter can inject it into all log records
         set_request_id(request_id)
+        set_route(f"{request.method} {normalizar_ruta(request.url.path)}")
 
         try:
             # Process downstream
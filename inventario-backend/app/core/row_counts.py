@@ -0,0 +1,192 @@
+"""
+Totales de filas para respuestas paginadas
+
+Cada endpoint elige cómo obtener el total de su consulta filtrada:
+
+- ``exact``: ``COUNT(*)`` en cada petición.
+- ``cached``: ``COUNT(*)`` guardado en memoria con TTL. Se invalida en cuanto este proceso
+  escribe en alguna de las tablas de la consulta (INSERT/UPDATE/DELETE por ORM o sentencias
+  ejecutadas con la sesión). Las escrituras de otros procesos quedan acotadas por el TTL.
+- ``estimate``: filas estimadas por el planificador de PostgreSQL (``EXPLAIN``), sin recorrer
+  la tabla. Si el estimado es pequeño, o el motor no es PostgreSQL, se cuenta exacto.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from itertools import chain
+from typing import Literal
+
+from sqlalchemy import Table, event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import find_tables
+
+from app.core.config import settings
+
+CountStrategy = Literal["exact", "cached", "estimate"]
+
+# Clave en Session.info con las tablas escritas en la transacción en curso
+_TABLAS_PENDIENTES = "row_counts_tablas_escritas"
+
+
+class TableVersions:
+    """Versión por tabla; cada escritura la incrementa e invalida los conteos cacheados."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: dict[str, int] = {}
+
+    def bump(self, tablas: Iterable[str]) -> None:
+        with self._lock:
+            for tabla in tablas:
+                self._versions[tabla] = self._versions.get(tabla, 0) + 1
+
+    def snapshot(self, tablas: Iterable[str]) -> tuple[int, ...]:
+        with self._lock:
+            return tuple(self._versions.get(tabla, 0) for tabla in tablas)
+
+
+table_versions = TableVersions()
+
+
+def _marcar_escritura(session: Session, tablas: set[str]) -> None:
+    if tablas:
+        table_versions.bump(tablas)
+        session.info.setdefault(_TABLAS_PENDIENTES, set()).update(tablas)
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_flush(session: Session, flush_context) -> None:
+    tablas = {
+        tabla.name
+        for obj in chain(session.new, session.dirty, session.deleted)
+        for tabla in sa_inspect(obj).mapper.tables
+    }
+    _marcar_escritura(session, tablas)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _registrar_sentencia(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        tabla = getattr(orm_execute_state.statement, "table", None)
+        if isinstance(tabla, Table):
+            _marcar_escritura(orm_execute_state.session, {tabla.name})
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _confirmar_escrituras(session: Session, transaction) -> None:
+    # Segundo incremento al cerrar la transacción: un conteo hecho por otra sesión entre
+    # el flush y el commit no vio los cambios y no debe sobrevivir al commit.
+    tablas = session.info.pop(_TABLAS_PENDIENTES, None)
+    if tablas:
+        table_versions.bump(tablas)
+
+
+def estimate_count(db: Session, query) -> int:
+    """
+    Estimación del total a partir del planificador (PostgreSQL)
+
+    Ejecuta ``EXPLAIN (FORMAT JSON)`` y devuelve las filas estimadas del nodo raíz, sin
+    recorrer la tabla. En otros motores recurre a ``COUNT(*)`` exacto.
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return query.order_by(None).count()
+    compiled = query.order_by(None).statement.compile(
+        dialect=bind.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    parametros = compiled.params
+    if bind.dialect.positional:
+        # asyncpg ($1, $2...) y demás drivers posicionales reciben una tupla en orden
+        parametros = tuple(parametros[nombre] for nombre in compiled.positiontup)
+    plan = (
+        db.connection()
+        .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", parametros)
+        .scalar()
+    )
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class CountProvider:
+    """Proveedor de totales exactos, cacheados o estimados para consultas paginadas"""
+
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        max_entradas: int = 512,
+        umbral_exacto: int = 1000,
+        versiones: TableVersions = table_versions,
+    ):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.umbral_exacto = umbral_exacto
+        self.versiones = versiones
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[
+            tuple[str, str], tuple[int, float, tuple[int, ...]]
+        ] = OrderedDict()
+
+    def count(self, db: Session, query, strategy: CountStrategy = "exact") -> tuple[int, bool]:
+        """
+        Total de filas de `query` según la estrategia
+
+        Returns:
+            tuple: (total, exacto) — `exacto` es False solo para estimados del planificador
+        """
+        query = query.order_by(None)
+        if strategy == "cached":
+            return self._cached_count(db, query), True
+        if strategy == "estimate" and db.get_bind().dialect.name == "postgresql":
+            estimado = estimate_count(db, query)
+            if estimado >= self.umbral_exacto:
+                return estimado, False
+        return query.count(), True
+
+    def _cached_count(self, db: Session, query) -> int:
+        stmt = query.statement
+        tablas = sorted(
+            {t.name for t in find_tables(stmt, include_joins=True) if isinstance(t, Table)}
+        )
+        compiled = stmt.compile(dialect=db.get_bind().dialect)
+        clave = (str(compiled), repr(sorted(compiled.params.items())))
+        # La versión se toma antes de contar: una escritura concurrente invalida el resultado
+        version = self.versiones.snapshot(tablas)
+        ahora = time.monotonic()
+
+        with self._lock:
+            entrada = self._cache.get(clave)
+            if entrada is not None and entrada[1] > ahora and entrada[2] == version:
+                self._cache.move_to_end(clave)
+                return entrada[0]
+
+        total = query.count()
+        with self._lock:
+            self._cache[clave] = (total, ahora + self.ttl, version)
+            self._cache.move_to_end(clave)
+            while len(self._cache) > self.max_entradas:
+                self._cache.popitem(last=False)
+        return total
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+count_provider = CountProvider(
+    ttl=settings.count_cache_ttl_seconds, umbral_exacto=settings.count_estimate_exact_below
+)
+
+
+__all__ = [
+    "CountProvider",
+    "CountStrategy",
+    "TableVersions",
+    "count_provider",
+    "estimate_count",
+    "table_versions",
+]
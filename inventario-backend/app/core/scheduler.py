@@ -2,18 +2,23 @@
 Scheduler de tareas en segundo plano (APScheduler - AsyncIOScheduler)
 
 - Programa y administra tareas periódicas como el envío de alertas de stock bajo.
+- Ajuste periódico de max_overflow del pool (DB_POOL_ADAPTIVE_OVERFLOW).
+- Precalentado del caché al arrancar y periódicamente (CACHE_WARM_ENABLED).
 - Integración con FastAPI mediante inicialización en lifespan (main.py).
 """
 
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Any
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
+from app.core.cache_warmer import cache_warmer
 from app.core.config import settings
 from app.core.logging_config import inventario_logger
+from app.core.pool_telemetry import crear_controlador
 from app.models.database import SessionLocal
 from app.services.notification_service import send_stock_bajo_email
 
@@ -21,6 +26,8 @@ logger = inventario_logger
 
 
 STOCK_BAJO_JOB_ID = "stock_bajo_email_job"
+POOL_OVERFLOW_JOB_ID = "pool_overflow_controller_job"
+CACHE_WARMER_JOB_ID = "cache_warmer_job"
 
 
 def _stock_bajo_job() -> None:
@@ -134,6 +141,73 @@ class SchedulerManager:
         """
         _stock_bajo_job()
 
+    def add_pool_overflow_job(self, engine: Any, interval_seconds: int) -> dict[str, Any]:
+        """
+        Registra el ajuste periódico de max_overflow del pool del motor indicado.
+        """
+        self.ensure_started()
+        assert self.scheduler is not None
+
+        controlador = crear_controlador(engine)
+        trigger = IntervalTrigger(
+            seconds=int(interval_seconds), timezone=getattr(settings, "scheduler_timezone", "UTC")
+        )
+        job = self.scheduler.add_job(
+            controlador.ajustar, trigger, id=POOL_OVERFLOW_JOB_ID, replace_existing=True
+        )
+        logger.log_info(
+            "Scheduled pool overflow controller", {"interval_seconds": interval_seconds}
+        )
+        return {
+            "job_id": job.id,
+            "next_run_time": job.next_run_time.isoformat() if job.next_run_time else None,
+            "interval_seconds": interval_seconds,
+        }
+
+    def add_cache_warmer_job(self, interval_seconds: int) -> dict[str, Any]:
+        """
+        Registra el precalentado del caché: una corrida inmediata y luego cada intervalo.
+        """
+        self.ensure_started()
+        assert self.scheduler is not None
+
+        tz = getattr(settings, "scheduler_timezone", "UTC")
+        trigger = IntervalTrigger(seconds=int(interval_seconds), timezone=tz)
+        job = self.scheduler.add_job(
+            cache_warmer.calentar,
+            trigger,
+            id=CACHE_WARMER_JOB_ID,
+            replace_existing=True,
+            next_run_time=datetime.now(trigger.timezone),
+        )
+        logger.log_info("Scheduled cache warmer", {"interval_seconds": interval_seconds})
+        return {
+            "job_id": job.id,
+            "next_run_time": job.next_run_time.isoformat() if job.next_run_time else None,
+            "interval_seconds": interval_seconds,
+        }
+
+    def run_cache_warmer_now(self) -> dict[str, Any]:
+        """
+        Ejecuta inmediatamente el precalentado del caché una vez.
+        """
+        return cache_warmer.calentar()
+
+    def cache_warmer_status(self) -> dict[str, Any]:
+        """
+        Estado del precalentado: recetas, última corrida y próxima ejecución programada.
+        """
+        job = None
+        if self.started and self.scheduler:
+            job = self.scheduler.get_job(CACHE_WARMER_JOB_ID)
+        return {
+            **cache_warmer.estado(),
+            "scheduled": job is not None,
+            "next_run_time": (
+                job.next_run_time.isoformat() if job is not None and job.next_run_time else None
+            ),
+        }
+
     def get_jobs(self) -> list[dict[str, Any]]:
         """
         Devuelve listado de jobs con información básica.
@@ -156,4 +230,10 @@ class SchedulerManager:
 # Instancia global del scheduler manager
 scheduler_manager = SchedulerManager()
 
-__all__ = ["scheduler_manager", "SchedulerManager", "STOCK_BAJO_JOB_ID"]
+__all__ = [
+    "scheduler_manager",
+    "SchedulerManager",
+    "STOCK_BAJO_JOB_ID",
+    "POOL_OVERFLOW_JOB_ID",
+    "CACHE_WARMER_JOB_ID",
+]
@@ -241,7 +241,7 @@ class UserRateLimiter:
         
         try:
             if cache_manager.redis_client:
-                keys = cache_manager.redis_client.keys(pattern)  # type: ignore[union-attr]
+                keys = cache_manager.redis_client.scan_iter(match=pattern)  # type: ignore[union-attr]
                 
                 usage = {}
                 for key in keys:  # type: ignore[union-attr]
@@ -0,0 +1,33 @@
+"""
+Tablas de acumulados mantenidas con deltas
+
+Las tablas precalculadas (snapshot de inventario, rollup diario de ventas) se actualizan
+sumando deltas con un único UPSERT, sin leer la fila antes: dos transacciones concurrentes
+que suman sobre la misma clave no pierden actualizaciones.
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+
+def upsert_sumando(
+    db: Session,
+    modelo,
+    claves: Sequence[str],
+    columnas: Sequence[str],
+    filas: list[dict[str, Any]],
+) -> None:
+    """INSERT ... ON CONFLICT DO UPDATE SET col = col + excluded.col (PostgreSQL/SQLite)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert  # type: ignore[assignment]
+
+    tabla = modelo.__table__
+    stmt = dialect_insert(tabla)
+    set_ = {c: tabla.c[c] + stmt.excluded[c] for c in columnas}
+    if "actualizado_en" in tabla.c:
+        set_["actualizado_en"] = stmt.excluded.actualizado_en
+    db.execute(stmt.on_conflict_do_update(index_elements=list(claves), set_=set_), filas)
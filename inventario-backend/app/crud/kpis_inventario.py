@@ -0,0 +1,134 @@
+"""
+KPIs de inventario calculados en una sola consulta
+
+Todos los indicadores (conteos, sumas y promedios por estado, productos por vencer y ventas
+del día/semana) salen de un único ``SELECT`` con agregados condicionales: ``FILTER (WHERE ...)``
+en PostgreSQL y ``CASE`` en los demás motores. Lo comparten el dashboard, el resumen de
+inventario, las métricas de negocio y los gauges de Prometheus.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.models.filters import day_range, range_predicates, week_range
+from app.models.models import Lote, Producto, Venta
+
+
+def _agregado(fn, expr, condicion, usar_filter: bool):
+    """`fn(expr)` solo sobre las filas que cumplen `condicion` (FILTER o CASE sin ELSE)."""
+    if usar_filter:
+        return fn(expr).filter(condicion)
+    return fn(case((condicion, expr)))
+
+
+def _filtros_producto(
+    id_laboratorio: int | None, id_seccion: int | None, estado: str | None
+) -> list:
+    filtros = []
+    if id_laboratorio:
+        filtros.append(Producto.id_laboratorio == id_laboratorio)
+    if id_seccion:
+        filtros.append(Producto.id_seccion == id_seccion)
+    if estado:
+        filtros.append(Producto.estado == estado)
+    return filtros
+
+
+def calcular_kpis_inventario(
+    db: Session,
+    id_laboratorio: int | None = None,
+    id_seccion: int | None = None,
+    estado: str | None = None,
+    dias_vencimiento: int = 30,
+    incluir_ventas: bool = False,
+    hoy: date | None = None,
+) -> dict[str, Any]:
+    """
+    Calcular los KPIs de inventario en un único round-trip
+
+    Args:
+        db: Sesión de base de datos
+        id_laboratorio, id_seccion, estado: Filtros opcionales sobre los productos
+        dias_vencimiento: Ventana (días) para contar productos con lotes por vencer
+        incluir_ventas: Agregar ventas del día y de la semana (subconsultas escalares)
+        hoy: Fecha de referencia (por defecto, la fecha actual)
+
+    Returns:
+        Dict con los indicadores; los de valor, stock, precio y bajo stock se calculan
+        solo sobre productos activos
+    """
+    hoy = hoy or date.today()
+    usar_filter = db.get_bind().dialect.name == "postgresql"
+    filtros = _filtros_producto(id_laboratorio, id_seccion, estado)
+    activo = Producto.estado == "Activo"
+
+    inicio_hoy = datetime.combine(hoy, time.min)
+    proximos_vencer = (
+        select(func.count(func.distinct(Lote.id_producto)))
+        .join(Producto, Lote.id_producto == Producto.id_producto)
+        .where(
+            activo,
+            Lote.fecha_vencimiento >= inicio_hoy,
+            Lote.fecha_vencimiento < inicio_hoy + timedelta(days=dias_vencimiento + 1),
+            *filtros,
+        )
+        # Subconsulta independiente: no debe correlacionarse con el Producto externo
+        .correlate(None)
+        .scalar_subquery()
+    )
+
+    columnas = [
+        func.count(Producto.id_producto).label("total_productos"),
+        _agregado(func.count, Producto.id_producto, activo, usar_filter).label("productos_activos"),
+        _agregado(
+            func.count,
+            Producto.id_producto,
+            activo & (Producto.stock_actual <= Producto.stock_minimo),
+            usar_filter,
+        ).label("productos_bajo_stock"),
+        _agregado(
+            func.count, Producto.id_producto, activo & (Producto.stock_actual <= 0), usar_filter
+        ).label("productos_sin_stock"),
+        _agregado(
+            func.sum, Producto.stock_actual * Producto.precio_compra, activo, usar_filter
+        ).label("valor_total_inventario"),
+        _agregado(func.sum, Producto.stock_actual, activo, usar_filter).label("stock_total"),
+        _agregado(func.avg, Producto.precio_compra, activo, usar_filter).label("precio_promedio"),
+        proximos_vencer.label("productos_proximos_vencer"),
+    ]
+
+    if incluir_ventas:
+        # Rangos semiabiertos sobre fecha_venta: aprovechan el índice, a diferencia de date()
+        for nombre, rango in (("ventas_dia", day_range(hoy)), ("ventas_semana", week_range(hoy))):
+            columnas.append(
+                select(func.coalesce(func.sum(Venta.total), 0.0))
+                .where(*range_predicates(Venta.fecha_venta, rango))
+                .scalar_subquery()
+                .label(nombre)
+            )
+
+    fila = db.execute(select(*columnas).select_from(Producto).where(*filtros)).one()
+
+    productos_activos = int(fila.productos_activos or 0)
+    productos_bajo_stock = int(fila.productos_bajo_stock or 0)
+    kpis: dict[str, Any] = {
+        "total_productos": int(fila.total_productos or 0),
+        "productos_activos": productos_activos,
+        "productos_inactivos": int(fila.total_productos or 0) - productos_activos,
+        "productos_bajo_stock": productos_bajo_stock,
+        "productos_sin_stock": int(fila.productos_sin_stock or 0),
+        "productos_proximos_vencer": int(fila.productos_proximos_vencer or 0),
+        "valor_total_inventario": round(float(fila.valor_total_inventario or 0), 2),
+        "stock_total": int(fila.stock_total or 0),
+        "precio_promedio": round(float(fila.precio_promedio or 0), 2),
+        "porcentaje_bajo_stock": round(
+            (productos_bajo_stock / productos_activos * 100) if productos_activos > 0 else 0, 2
+        ),
+    }
+    if incluir_ventas:
+        kpis["ventas_dia"] = round(float(fila.ventas_dia or 0), 2)
+        kpis["ventas_semana"] = round(float(fila.ventas_semana or 0), 2)
+    return kpis
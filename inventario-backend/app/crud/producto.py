@@ -1,9 +1,10 @@
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, cast
 
 from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
+from app.crud.snapshot_inventario import seguimiento
 from app.models.models import Laboratorio, Lote, Producto, Seccion
 from app.models.schemas import ProductoCreate, ProductoUpdate
 
@@ -69,13 +70,67 @@ def create_producto(db: Session, producto_data: ProductoCreate) -> Producto:
     if not laboratorio:
         raise ValueError("El laboratorio especificado no existe")
 
-    db_producto = Producto(**producto_data.model_dump())
-    db.add(db_producto)
+    with seguimiento(db) as ids:
+        db_producto = Producto(**producto_data.model_dump())
+        db.add(db_producto)
+        db.flush()
+        ids.add(cast(int, db_producto.id_producto))
     db.commit()
     db.refresh(db_producto)
     return db_producto
 
 
+def upsert_productos(db: Session, filas: list[dict[str, Any]]) -> tuple[int, int]:
+    """Insertar o actualizar productos por `codigo_barras` en una sentencia por grupo de columnas.
+
+    Usa INSERT ... ON CONFLICT (codigo_barras) DO UPDATE (PostgreSQL/SQLite), enviado como
+    executemany. Solo se actualizan las columnas presentes en cada fila. No hace commit.
+    Devuelve (creados, actualizados).
+    """
+    # Dentro de una misma sentencia un código no puede repetirse: gana la última fila
+    por_codigo: dict[Any, dict[str, Any]] = {}
+    sin_codigo: list[dict[str, Any]] = []
+    for fila in filas:
+        if fila.get("codigo_barras"):
+            por_codigo[fila["codigo_barras"]] = fila
+        else:
+            sin_codigo.append(fila)
+
+    existentes: dict[str, int] = {}
+    if por_codigo:
+        existentes = {
+            codigo: id_producto
+            for codigo, id_producto in db.query(
+                Producto.codigo_barras, Producto.id_producto
+            ).filter(Producto.codigo_barras.in_(list(por_codigo)))
+        }
+
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert  # type: ignore[assignment]
+
+    # executemany exige el mismo conjunto de columnas en todas las filas de una sentencia
+    grupos: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+    for fila in [*por_codigo.values(), *sin_codigo]:
+        grupos.setdefault(tuple(sorted(fila)), []).append(fila)
+
+    # RETURNING entrega los ids creados y actualizados para mantener el snapshot de inventario
+    with seguimiento(db, existentes.values()) as ids:
+        for columnas, grupo in grupos.items():
+            stmt = dialect_insert(Producto.__table__)
+            actualizables = [c for c in columnas if c not in ("codigo_barras", "id_producto")]
+            if "codigo_barras" in columnas and actualizables:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["codigo_barras"],
+                    set_={c: stmt.excluded[c] for c in actualizables},
+                )
+            ids.update(db.scalars(stmt.returning(Producto.id_producto), grupo))
+
+    actualizados = len(existentes)
+    return len(por_codigo) + len(sin_codigo) - actualizados, actualizados
+
+
 def update_producto(
     db: Session, id_producto: int, producto_data: ProductoUpdate
 ) -> Producto | None:
@@ -99,8 +154,9 @@ def update_producto(
             raise ValueError("El laboratorio especificado no existe")
 
     update_data = producto_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(producto, field, value)
+    with seguimiento(db, [id_producto]):
+        for field, value in update_data.items():
+            setattr(producto, field, value)
 
     db.commit()
     db.refresh(producto)
@@ -113,12 +169,12 @@ def delete_producto(db: Session, id_producto: int, logical: bool = True) -> bool
     if not producto:
         return False
 
-    if logical:
-        producto.estado = "Inactivo"  # type: ignore[assignment]
-        db.commit()
-    else:
-        db.delete(producto)
-        db.commit()
+    with seguimiento(db, [id_producto]):
+        if logical:
+            producto.estado = "Inactivo"  # type: ignore[assignment]
+        else:
+            db.delete(producto)
+    db.commit()
 
     return True
 
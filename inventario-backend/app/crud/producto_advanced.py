@@ -7,6 +7,8 @@ from typing import Any
 from sqlalchemy import func, or_
 from sqlalchemy.orm import Session, joinedload
 
+from app.core.row_counts import CountStrategy, count_provider
+from app.crud.kpis_inventario import calcular_kpis_inventario
 from app.models.filters import (
     ProductoFilters,
     apply_exact_filter,
@@ -23,6 +25,7 @@ def get_productos_advanced(
     pagination: PaginationParams,
     sort_by: str = "nombre_producto",
     order: str = "asc",
+    count_strategy: CountStrategy = "estimate",
 ) -> dict[str, Any]:
     """
     Obtener productos con filtros avanzados y paginación
@@ -33,6 +36,7 @@ def get_productos_advanced(
         pagination: Parámetros de paginación
         sort_by: Campo por el cual ordenar
         order: Dirección del ordenamiento (asc/desc)
+        count_strategy: Cómo obtener el total (exact/cached/estimate)
 
     Returns:
         Dict con datos paginados y metadata
@@ -90,8 +94,9 @@ def get_productos_advanced(
     else:
         query = query.order_by(order_column.asc())
 
-    # Aplicar paginación
-    items, total = paginate_query(query, pagination.page, pagination.size)
+    # Aplicar paginación; el catálogo completo es grande, por defecto el total es estimado
+    total, total_exact = count_provider.count(db, query, count_strategy)
+    items = query.offset(pagination.skip).limit(pagination.size).all()
 
     # Crear respuesta paginada
     return create_paginated_response(
@@ -100,6 +105,7 @@ def get_productos_advanced(
         page=pagination.page,
         size=pagination.size,
         message="Productos obtenidos exitosamente",
+        total_exact=total_exact,
     )
 
 
@@ -176,53 +182,25 @@ def get_productos_stats(db: Session, filters: ProductoFilters | None = None) ->
     Returns:
         Dict con estadísticas
     """
-    query = db.query(Producto)
-
-    # Aplicar filtros si se proporcionan
-    if filters:
-        if filters.id_laboratorio:
-            query = query.filter(Producto.id_laboratorio == filters.id_laboratorio)
-        if filters.id_seccion:
-            query = query.filter(Producto.id_seccion == filters.id_seccion)
-        if filters.estado:
-            query = query.filter(Producto.estado == filters.estado)
-
-    # Calcular estadísticas
-    total_productos = query.count()
-
-    productos_activos = query.filter(Producto.estado == "Activo").count()
-
-    productos_bajo_stock = query.filter(
-        Producto.estado == "Activo", Producto.stock_actual <= Producto.stock_minimo
-    ).count()
-
-    valor_total = (
-        db.query(func.sum(Producto.stock_actual * Producto.precio_compra))
-        .filter(Producto.estado == "Activo")
-        .scalar()
-        or 0.0
-    )
-
-    stock_total = (
-        db.query(func.sum(Producto.stock_actual)).filter(Producto.estado == "Activo").scalar() or 0
+    # Una sola consulta con agregados condicionales (antes: seis consultas)
+    kpis = calcular_kpis_inventario(
+        db,
+        id_laboratorio=filters.id_laboratorio if filters else None,
+        id_seccion=filters.id_seccion if filters else None,
+        estado=filters.estado if filters else None,
     )
-
-    precio_promedio = (
-        db.query(func.avg(Producto.precio_compra)).filter(Producto.estado == "Activo").scalar()
-        or 0.0
-    )
-
     return {
-        "total_productos": total_productos,
-        "productos_activos": productos_activos,
-        "productos_inactivos": total_productos - productos_activos,
-        "productos_bajo_stock": productos_bajo_stock,
-        "valor_total_inventario": round(float(valor_total), 2),
-        "stock_total": int(stock_total),
-        "precio_promedio": round(float(precio_promedio), 2),
-        "porcentaje_bajo_stock": round(
-            (productos_bajo_stock / productos_activos * 100) if productos_activos > 0 else 0, 2
-        ),
+        clave: kpis[clave]
+        for clave in (
+            "total_productos",
+            "productos_activos",
+            "productos_inactivos",
+            "productos_bajo_stock",
+            "valor_total_inventario",
+            "stock_total",
+            "precio_promedio",
+            "porcentaje_bajo_stock",
+        )
     }
 
 
@@ -238,7 +216,13 @@ def get_top_productos(db: Session, limit: int = 10, criterio: str = "stock") ->
     Returns:
         Lista de productos
     """
-    query = db.query(Producto).filter(Producto.estado == "Activo")
+    # Laboratorio y sección se serializan en el router: cargarlos aquí evita N+1 y
+    # lazy loads fuera del contexto de la sesión asíncrona
+    query = (
+        db.query(Producto)
+        .options(joinedload(Producto.laboratorio), joinedload(Producto.seccion))
+        .filter(Producto.estado == "Activo")
+    )
 
     if criterio == "stock":
         query = query.order_by(Producto.stock_actual.desc())
@@ -0,0 +1,393 @@
+"""
+Snapshot de KPIs de inventario mantenido de forma incremental
+
+`inventory_snapshot` guarda una fila global y una por sección y por laboratorio con los
+totales que el dashboard necesita. `inventory_expiry_snapshot` cuenta los lotes con stock de
+productos activos por fecha de vencimiento y ámbito. Las rutas de escritura aplican deltas en la misma transacción:
+
+- Ajustes de stock (ventas, entradas): `registrar_ajuste_productos` y `registrar_ajuste_lotes`
+  a partir de las filas devueltas por ``UPDATE ... RETURNING`` en `app.crud.stock`; el estado
+  anterior es el nuevo menos el delta, sin lecturas extra.
+- Altas, cambios y bajas de productos: el contexto `seguimiento`, que captura los productos
+  antes y después de la escritura.
+
+`reconstruir_snapshot` recalcula todo desde cero (comando
+``python -m app.scripts.rebuild_inventory_snapshot``) y corrige cualquier deriva.
+"""
+
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Any, NamedTuple, cast
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.crud.acumulados import upsert_sumando
+from app.models.models import (
+    InventoryExpirySnapshot,
+    InventorySnapshot,
+    Laboratorio,
+    Lote,
+    Producto,
+    Seccion,
+)
+
+AMBITO_GLOBAL = "global"
+AMBITO_SECCION = "seccion"
+AMBITO_LABORATORIO = "laboratorio"
+
+METRICAS = (
+    "total_productos",
+    "productos_activos",
+    "productos_bajo_stock",
+    "productos_sin_stock",
+    "stock_total",
+    "valor_total_inventario",
+    "suma_precio_activos",
+)
+
+# Columnas de producto que determinan su contribución (también las usa app.crud.stock)
+COLUMNAS_PRODUCTO = (
+    Producto.id_producto,
+    Producto.id_seccion,
+    Producto.id_laboratorio,
+    Producto.estado,
+    Producto.stock_actual,
+    Producto.stock_minimo,
+    Producto.precio_compra,
+)
+
+
+# Hasta la primera reconstrucción no hay base sobre la cual sumar deltas
+_inicializado = False
+
+
+def snapshot_inicializado(db: Session) -> bool:
+    """True si el snapshot ya fue construido (se recuerda por proceso una vez visto)."""
+    global _inicializado
+    if not _inicializado:
+        _inicializado = (
+            db.query(InventorySnapshot.ambito)
+            .filter(InventorySnapshot.ambito == AMBITO_GLOBAL, InventorySnapshot.id_ambito == 0)
+            .first()
+            is not None
+        )
+    return _inicializado
+
+
+class EstadoProducto(NamedTuple):
+    id_seccion: int | None
+    id_laboratorio: int | None
+    estado: str | None
+    stock_actual: int | None
+    stock_minimo: int | None
+    precio_compra: float | None
+    # Fechas de vencimiento de sus lotes con stock (una entrada por lote)
+    vencimientos: tuple[date, ...] = ()
+
+
+def _ambitos(id_seccion: int | None, id_laboratorio: int | None) -> Iterator[tuple[str, int]]:
+    yield AMBITO_GLOBAL, 0
+    if id_seccion is not None:
+        yield AMBITO_SECCION, id_seccion
+    if id_laboratorio is not None:
+        yield AMBITO_LABORATORIO, id_laboratorio
+
+
+def _contribucion(p: EstadoProducto) -> dict[str, float]:
+    """Aporte de un producto a cada métrica; replica la semántica de NULL de los agregados SQL."""
+    activo = p.estado == "Activo"
+    stock = p.stock_actual
+    return {
+        "total_productos": 1,
+        "productos_activos": int(activo),
+        "productos_bajo_stock": int(
+            activo and stock is not None and p.stock_minimo is not None and stock <= p.stock_minimo
+        ),
+        "productos_sin_stock": int(activo and stock is not None and stock <= 0),
+        "stock_total": (stock or 0) if activo else 0,
+        "valor_total_inventario": (stock or 0) * (p.precio_compra or 0) if activo else 0.0,
+        "suma_precio_activos": (p.precio_compra or 0) if activo else 0.0,
+    }
+
+
+def _a_fecha(valor: datetime | date) -> date:
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+class _Deltas:
+    """Acumula deltas por ámbito (KPIs) y por ámbito + fecha (lotes por vencer)."""
+
+    def __init__(self):
+        self.kpis: dict[tuple[str, int], dict[str, float]] = defaultdict(
+            lambda: dict.fromkeys(METRICAS, 0)
+        )
+        self.lotes: Counter[tuple[str, int, date]] = Counter()
+
+    def producto(self, p: EstadoProducto, signo: int) -> None:
+        contribucion = _contribucion(p)
+        for ambito in _ambitos(p.id_seccion, p.id_laboratorio):
+            acumulado = self.kpis[ambito]
+            for metrica, valor in contribucion.items():
+                acumulado[metrica] += signo * valor
+            # Como en los KPIs, solo cuentan los lotes de productos activos
+            if p.estado == "Activo":
+                for fecha in p.vencimientos:
+                    self.lotes[(*ambito, fecha)] += signo
+
+    def lote(self, id_seccion: int | None, id_laboratorio: int | None, fecha: date, signo: int):
+        for ambito in _ambitos(id_seccion, id_laboratorio):
+            self.lotes[(*ambito, fecha)] += signo
+
+    def aplicar(self, db: Session, incluir_vacios: bool = False) -> None:
+        """Sumar los deltas acumulados con un UPSERT por tabla."""
+        ahora = datetime.now()
+        filas = [
+            {"ambito": ambito, "id_ambito": id_ambito, **valores, "actualizado_en": ahora}
+            for (ambito, id_ambito), valores in self.kpis.items()
+            if incluir_vacios or any(valores.values())
+        ]
+        if filas:
+            upsert_sumando(db, InventorySnapshot, ["ambito", "id_ambito"], METRICAS, filas)
+
+        filas = [
+            {"ambito": ambito, "id_ambito": id_ambito, "fecha_vencimiento": fecha, "lotes": n}
+            for (ambito, id_ambito, fecha), n in self.lotes.items()
+            if n
+        ]
+        if filas:
+            upsert_sumando(
+                db,
+                InventoryExpirySnapshot,
+                ["ambito", "id_ambito", "fecha_vencimiento"],
+                ("lotes",),
+                filas,
+            )
+
+
+def capturar_productos(
+    db: Session, ids_producto: Iterable[int], bloquear: bool = False
+) -> dict[int, EstadoProducto]:
+    """Estado actual de los productos dados, con las fechas de sus lotes con stock."""
+    ids = list(ids_producto)
+    if not ids:
+        return {}
+    query = db.query(*COLUMNAS_PRODUCTO).filter(Producto.id_producto.in_(ids))
+    if bloquear:
+        query = query.order_by(Producto.id_producto).with_for_update()
+    filas = query.all()
+
+    vencimientos: dict[int, list[date]] = defaultdict(list)
+    for id_producto, fecha in db.query(Lote.id_producto, Lote.fecha_vencimiento).filter(
+        Lote.id_producto.in_(ids),
+        Lote.cantidad_disponible > 0,
+        Lote.fecha_vencimiento.isnot(None),
+    ):
+        vencimientos[id_producto].append(_a_fecha(fecha))
+
+    return {
+        fila.id_producto: EstadoProducto._make((*fila[1:], tuple(vencimientos[fila.id_producto])))
+        for fila in filas
+    }
+
+
+@contextmanager
+def seguimiento(db: Session, ids_producto: Iterable[int] = ()) -> Iterator[set[int]]:
+    """
+    Mantener el snapshot alrededor de una escritura de productos (sin commit)
+
+    Bloquea y captura los productos al entrar y vuelve a capturarlos al salir (tras un
+    flush). El bloque puede agregar al set devuelto los ids de productos creados dentro de
+    él. Si el bloque lanza una excepción no se aplica nada.
+
+    Usage:
+        with seguimiento(db, [id_producto]) as ids:
+            producto.precio_compra = 12.5
+    """
+    ids = set(ids_producto)
+    if not snapshot_inicializado(db):
+        yield ids
+        return
+    antes = capturar_productos(db, ids, bloquear=True)
+    yield ids
+    db.flush()
+    despues = capturar_productos(db, ids)
+
+    deltas = _Deltas()
+    for estado in antes.values():
+        deltas.producto(estado, -1)
+    for estado in despues.values():
+        deltas.producto(estado, 1)
+    deltas.aplicar(db)
+
+
+def registrar_ajuste_productos(db: Session, filas, deltas: dict[int, int]) -> None:
+    """Aplicar transiciones de stock a partir de filas ``UPDATE producto ... RETURNING``.
+
+    Cada fila trae las columnas de `COLUMNAS_PRODUCTO` ya actualizadas; el stock anterior es
+    el nuevo menos el delta aplicado, así que el cálculo es exacto aun con escrituras
+    concurrentes sobre el mismo producto.
+    """
+    if not snapshot_inicializado(db):
+        return
+    acumulado = _Deltas()
+    for fila in filas:
+        despues = EstadoProducto(*fila[1:])
+        antes = despues._replace(stock_actual=(despues.stock_actual or 0) - deltas[fila[0]])
+        acumulado.producto(antes, -1)
+        acumulado.producto(despues, 1)
+    acumulado.aplicar(db)
+
+
+def registrar_ajuste_lotes(db: Session, filas, deltas: dict[int, int]) -> None:
+    """Actualizar los lotes por vencer a partir de filas ``UPDATE lote ... RETURNING``.
+
+    `filas` son (id_lote, id_producto, fecha_vencimiento, cantidad_disponible). Solo importan
+    los lotes que pasan de tener stock a no tenerlo, o al revés.
+    """
+    if not snapshot_inicializado(db):
+        return
+    cruces: list[tuple[int, date, int]] = []
+    for id_lote, id_producto, fecha, cantidad in filas:
+        if id_producto is None or fecha is None:
+            continue
+        tenia = (cantidad or 0) - deltas[id_lote] > 0
+        tiene = (cantidad or 0) > 0
+        if tenia != tiene:
+            cruces.append((id_producto, _a_fecha(fecha), 1 if tiene else -1))
+    if not cruces:
+        return
+
+    ambitos = {
+        id_producto: (id_seccion, id_laboratorio)
+        for id_producto, id_seccion, id_laboratorio in db.query(
+            Producto.id_producto, Producto.id_seccion, Producto.id_laboratorio
+        ).filter(Producto.id_producto.in_({c[0] for c in cruces}), Producto.estado == "Activo")
+    }
+    acumulado = _Deltas()
+    for id_producto, fecha, signo in cruces:
+        if id_producto in ambitos:
+            acumulado.lote(*ambitos[id_producto], fecha, signo)
+    acumulado.aplicar(db)
+
+
+def reconstruir_snapshot(db: Session, tamano_lote: int = 1000) -> dict[str, int]:
+    """Recalcular ambos snapshots desde producto y lote, en una transacción con commit."""
+    global _inicializado
+    try:
+        db.execute(delete(InventorySnapshot))
+        db.execute(delete(InventoryExpirySnapshot))
+
+        vencimientos: dict[int, list[date]] = defaultdict(list)
+        for id_producto, fecha in db.query(Lote.id_producto, Lote.fecha_vencimiento).filter(
+            Lote.id_producto.isnot(None),
+            Lote.cantidad_disponible > 0,
+            Lote.fecha_vencimiento.isnot(None),
+        ):
+            vencimientos[id_producto].append(_a_fecha(fecha))
+
+        deltas = _Deltas()
+        productos = 0
+        for fila in db.query(*COLUMNAS_PRODUCTO).yield_per(tamano_lote):
+            deltas.producto(EstadoProducto._make((*fila[1:], tuple(vencimientos[fila[0]]))), 1)
+            productos += 1
+        # La fila global existe aunque el catálogo esté vacío
+        deltas.kpis[(AMBITO_GLOBAL, 0)]
+        deltas.aplicar(db, incluir_vacios=True)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    _inicializado = True
+    return {"productos": productos, "ambitos": len(deltas.kpis), "fechas": len(deltas.lotes)}
+
+
+def leer_snapshot(
+    db: Session,
+    ambito: str = AMBITO_GLOBAL,
+    id_ambito: int = 0,
+    dias_vencimiento: int = 30,
+    hoy: date | None = None,
+) -> dict[str, Any] | None:
+    """KPIs de un ámbito leídos del snapshot; None si aún no se ha construido."""
+    fila = (
+        db.query(InventorySnapshot)
+        .populate_existing()
+        .filter(InventorySnapshot.ambito == ambito, InventorySnapshot.id_ambito == id_ambito)
+        .first()
+    )
+    if fila is None:
+        return None
+    hoy = hoy or date.today()
+    lotes = [
+        n
+        for (n,) in db.query(InventoryExpirySnapshot.lotes).filter(
+            InventoryExpirySnapshot.ambito == ambito,
+            InventoryExpirySnapshot.id_ambito == id_ambito,
+            InventoryExpirySnapshot.fecha_vencimiento >= hoy,
+            InventoryExpirySnapshot.fecha_vencimiento <= hoy + timedelta(days=dias_vencimiento),
+        )
+    ]
+    return _formatear(fila) | {"lotes_proximos_vencer": sum(lotes)}
+
+
+def leer_snapshot_por_ambito(db: Session, ambito: str) -> dict[int, dict[str, Any]]:
+    """KPIs de todas las secciones o de todos los laboratorios, por id."""
+    return {
+        cast(int, fila.id_ambito): _formatear(fila)
+        for fila in db.query(InventorySnapshot)
+        .populate_existing()
+        .filter(InventorySnapshot.ambito == ambito)
+    }
+
+
+def estadisticas_por_ambito(db: Session, ambito: str) -> list[dict[str, Any]]:
+    """
+    Productos activos, stock y valor por laboratorio o por sección, leídos del snapshot
+
+    Mismo formato que `get_productos_por_laboratorio_stats` / `get_productos_por_seccion_stats`.
+    """
+    modelo, clave = (
+        (Laboratorio, "laboratorio") if ambito == AMBITO_LABORATORIO else (Seccion, "seccion")
+    )
+    nombre, pk = getattr(modelo, f"nombre_{clave}"), getattr(modelo, f"id_{clave}")
+    filas = (
+        db.query(
+            nombre.label("nombre"),
+            InventorySnapshot.productos_activos,
+            InventorySnapshot.stock_total,
+            InventorySnapshot.valor_total_inventario,
+        )
+        .join(modelo, pk == InventorySnapshot.id_ambito)
+        .filter(InventorySnapshot.ambito == ambito, InventorySnapshot.productos_activos > 0)
+        .order_by(InventorySnapshot.productos_activos.desc())
+        .all()
+    )
+    return [
+        {
+            clave: fila.nombre,
+            "total_productos": int(fila.productos_activos),
+            "stock_total": int(fila.stock_total or 0),
+            "valor_total": round(float(fila.valor_total_inventario or 0), 2),
+        }
+        for fila in filas
+    ]
+
+
+def _formatear(fila: InventorySnapshot) -> dict[str, Any]:
+    activos = int(fila.productos_activos)
+    bajo_stock = int(fila.productos_bajo_stock)
+    return {
+        "total_productos": int(fila.total_productos),
+        "productos_activos": activos,
+        "productos_inactivos": int(fila.total_productos) - activos,
+        "productos_bajo_stock": bajo_stock,
+        "productos_sin_stock": int(fila.productos_sin_stock),
+        "valor_total_inventario": round(float(fila.valor_total_inventario), 2),
+        "stock_total": int(fila.stock_total),
+        "precio_promedio": round(float(fila.suma_precio_activos) / activos, 2) if activos else 0.0,
+        "porcentaje_bajo_stock": round((bajo_stock / activos * 100) if activos > 0 else 0, 2),
+        "actualizado_en": fila.actualizado_en.isoformat() if fila.actualizado_en else None,
+    }
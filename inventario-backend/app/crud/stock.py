@@ -0,0 +1,64 @@
+from collections.abc import Sequence
+
+from sqlalchemy import Integer, Row, case, column, update, values
+from sqlalchemy.orm import Session
+
+from app.crud.snapshot_inventario import (
+    COLUMNAS_PRODUCTO,
+    registrar_ajuste_lotes,
+    registrar_ajuste_productos,
+)
+from app.models.models import Lote, Producto
+
+# Lo que necesita el snapshot para saber si un lote entra o sale de "con stock"
+COLUMNAS_LOTE = (Lote.id_lote, Lote.id_producto, Lote.fecha_vencimiento, Lote.cantidad_disponible)
+
+
+def _ajustar(db: Session, tabla, pk, columna, deltas: dict[int, int], returning) -> Sequence[Row]:
+    """Sumar `deltas[id]` a `columna` de cada fila en una sola sentencia UPDATE.
+
+    PostgreSQL: UPDATE ... FROM (VALUES (id, delta), ...). SQLite no admite alias de columnas
+    en VALUES derivados, así que allí se usa un CASE sobre la clave primaria. Devuelve las
+    filas actualizadas con las columnas de `returning` (ya con el valor nuevo).
+    """
+    if not deltas:
+        return []
+
+    if db.get_bind().dialect.name == "postgresql":
+        v = values(column("id", Integer), column("delta", Integer), name="v").data(
+            list(deltas.items())
+        )
+        stmt = update(tabla).where(pk == v.c.id).values({columna: columna + v.c.delta})
+    else:
+        stmt = (
+            update(tabla)
+            .where(pk.in_(list(deltas)))
+            .values({columna: columna + case(deltas, value=pk)})
+        )
+    result = db.execute(stmt.returning(*returning).execution_options(synchronize_session=False))
+    return result.all()
+
+
+def ajustar_stock_lotes(db: Session, deltas: dict[int, int]) -> int:
+    """Aplicar incrementos (o decrementos si son negativos) a `Lote.cantidad_disponible`."""
+    deltas = {k: v for k, v in deltas.items() if v}
+    filas = _ajustar(
+        db,
+        Lote,
+        Lote.id_lote,
+        Lote.cantidad_disponible,
+        deltas,
+        COLUMNAS_LOTE,
+    )
+    registrar_ajuste_lotes(db, filas, deltas)
+    return len(filas)
+
+
+def ajustar_stock_productos(db: Session, deltas: dict[int, int]) -> int:
+    """Aplicar incrementos (o decrementos si son negativos) a `Producto.stock_actual`."""
+    deltas = {k: v for k, v in deltas.items() if v}
+    filas = _ajustar(
+        db, Producto, Producto.id_producto, Producto.stock_actual, deltas, COLUMNAS_PRODUCTO
+    )
+    registrar_ajuste_productos(db, filas, deltas)
+    return len(filas)
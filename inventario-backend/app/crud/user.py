@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from app.core.security import get_password_hash, verify_password
 from app.models.models import Usuario
@@ -38,7 +38,7 @@ def create_user(db: Session, user: UserCreate) -> Usuario:
 
 def get_users(db: Session, skip: int = 0, limit: int = 100):
     """Obtener lista de usuarios"""
-    return db.query(Usuario).offset(skip).limit(limit).all()
+    return db.query(Usuario).options(selectinload(Usuario.rol)).offset(skip).limit(limit).all()
 
 
 def authenticate_user(db: Session, username: str, password: str):
@@ -0,0 +1,142 @@
+"""
+Rollup diario de ventas y consultas por rango de fechas
+
+`venta_daily_rollup` guarda, por día y método de pago, la cantidad y el total de las ventas
+activas. Se mantiene con deltas en la misma transacción que la venta: +1 al registrarla y
+±1 cuando su estado entra o sale de "Activo". Las estadísticas de cualquier rango se leen
+de a lo sumo una fila por día y método de pago, con rangos semiabiertos ``[desde, hasta)``
+sobre la clave primaria.
+"""
+
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date, datetime
+from typing import Any
+
+from sqlalchemy import delete, func
+from sqlalchemy.orm import Session
+
+from app.crud.acumulados import upsert_sumando
+from app.models.models import Venta, VentaDailyRollup
+
+ESTADO_CONTABILIZADO = "Activo"
+
+
+def _a_fecha(valor: datetime | date) -> date:
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+def registrar_ventas(db: Session, ventas: Iterable[Any], signo: int = 1) -> None:
+    """
+    Sumar (o restar, con ``signo=-1``) ventas al rollup, sin commit
+
+    `ventas` son objetos o filas con `fecha_venta`, `metodo_pago` y `total`.
+    """
+    acumulado: dict[tuple[date, str], list] = defaultdict(lambda: [0, 0.0])
+    for venta in ventas:
+        clave = (_a_fecha(venta.fecha_venta), venta.metodo_pago or "")
+        acumulado[clave][0] += signo
+        acumulado[clave][1] += signo * float(venta.total or 0)
+    if not acumulado:
+        return
+    upsert_sumando(
+        db,
+        VentaDailyRollup,
+        ("fecha", "metodo_pago"),
+        ("cantidad_ventas", "total_ventas"),
+        [
+            {"fecha": fecha, "metodo_pago": metodo, "cantidad_ventas": n, "total_ventas": total}
+            for (fecha, metodo), (n, total) in acumulado.items()
+        ],
+    )
+
+
+def reconstruir_rollup_ventas(
+    db: Session, desde: date | None = None, hasta: date | None = None, tamano_lote: int = 1000
+) -> int:
+    """Recalcular el rollup de ``[desde, hasta)`` (todo, por defecto) desde venta, con commit."""
+    borrar = delete(VentaDailyRollup)
+    ventas = db.query(Venta.fecha_venta, Venta.metodo_pago, Venta.total).filter(
+        Venta.estado == ESTADO_CONTABILIZADO
+    )
+    if desde:
+        borrar = borrar.where(VentaDailyRollup.fecha >= desde)
+        ventas = ventas.filter(Venta.fecha_venta >= datetime.combine(desde, datetime.min.time()))
+    if hasta:
+        borrar = borrar.where(VentaDailyRollup.fecha < hasta)
+        ventas = ventas.filter(Venta.fecha_venta < datetime.combine(hasta, datetime.min.time()))
+
+    total = 0
+    try:
+        db.execute(borrar)
+        lote: list = []
+        for fila in ventas.yield_per(tamano_lote):
+            lote.append(fila)
+            if len(lote) >= tamano_lote:
+                registrar_ventas(db, lote)
+                total += len(lote)
+                lote = []
+        registrar_ventas(db, lote)
+        total += len(lote)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return total
+
+
+def _resumen(cantidad: int, total: float) -> dict[str, Any]:
+    return {
+        "total_ventas": round(total, 2),
+        "cantidad_ventas": cantidad,
+        "promedio_venta": round(total / cantidad, 2) if cantidad else 0.0,
+    }
+
+
+def estadisticas_rango(db: Session, desde: date, hasta: date) -> dict[str, Any]:
+    """Totales de ventas activas en ``[desde, hasta)``, globales y por método de pago."""
+    filas = (
+        db.query(
+            VentaDailyRollup.metodo_pago,
+            func.sum(VentaDailyRollup.cantidad_ventas).label("cantidad"),
+            func.sum(VentaDailyRollup.total_ventas).label("total"),
+        )
+        .filter(VentaDailyRollup.fecha >= desde, VentaDailyRollup.fecha < hasta)
+        .group_by(VentaDailyRollup.metodo_pago)
+        .all()
+    )
+    por_metodo = [
+        {"metodo_pago": fila.metodo_pago or None, **_resumen(int(fila.cantidad), fila.total)}
+        for fila in filas
+        if fila.cantidad
+    ]
+    return {
+        **_resumen(sum(m["cantidad_ventas"] for m in por_metodo), sum(f.total for f in filas)),
+        "por_metodo_pago": sorted(por_metodo, key=lambda m: -m["total_ventas"]),
+    }
+
+
+def estadisticas_por_mes(db: Session, año: int) -> list[dict[str, Any]]:
+    """Totales por mes del año (solo meses con ventas), a partir de las filas diarias."""
+    filas = (
+        db.query(
+            VentaDailyRollup.fecha,
+            func.sum(VentaDailyRollup.cantidad_ventas).label("cantidad"),
+            func.sum(VentaDailyRollup.total_ventas).label("total"),
+        )
+        .filter(
+            VentaDailyRollup.fecha >= date(año, 1, 1), VentaDailyRollup.fecha < date(año + 1, 1, 1)
+        )
+        .group_by(VentaDailyRollup.fecha)
+        .all()
+    )
+    meses: dict[int, list] = defaultdict(lambda: [0, 0.0])
+    for fila in filas:
+        meses[fila.fecha.month][0] += int(fila.cantidad)
+        meses[fila.fecha.month][1] += fila.total
+    return [
+        {"mes": mes, "año": año, **_resumen(cantidad, total)}
+        for mes, (cantidad, total) in sorted(meses.items())
+        if cantidad
+    ]
+
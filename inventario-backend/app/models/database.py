@@ -1,38 +1,221 @@
+import logging
 import os
-from collections.abc import Generator
+import threading
+import time
+from collections.abc import AsyncGenerator, Callable, Generator
+from typing import Any, TypeVar
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.dml import UpdateBase
 
+# Registra los listeners que invalidan el caché al confirmar escrituras
+import app.core.cache_invalidation  # noqa: F401
 from app.core.config import settings
+from app.core.pool_telemetry import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrumentar
 
-# Normalize async driver to sync driver always; tests further normalize plain postgresql to psycopg2
-database_url = settings.database_url
-if database_url.startswith("postgresql+asyncpg://"):
-    database_url = database_url.replace("postgresql+asyncpg://", "postgresql+psycopg2://", 1)
 
-# Force sync driver for testing (also convert plain postgresql to psycopg2)
-if os.getenv("TESTING") == "true":
-    if database_url.startswith("postgresql://"):
-        database_url = database_url.replace("postgresql://", "postgresql+psycopg2://", 1)
+def _sync_url(url: str) -> str:
+    """Normalizar la URL al driver síncrono (psycopg2 para PostgreSQL)."""
+    # Normalize async driver to sync driver always; tests further normalize plain postgresql
+    if url.startswith("postgresql+asyncpg://"):
+        url = url.replace("postgresql+asyncpg://", "postgresql+psycopg2://", 1)
+    # Force sync driver for testing (also convert plain postgresql to psycopg2)
+    if os.getenv("TESTING") == "true" and url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+psycopg2://", 1)
+    return url
 
-engine = create_engine(
-    database_url,
+
+def _create_engine(url: str, nombre: str) -> Engine:
+    motor = create_engine(
+        url,
+        echo=getattr(settings, "debug", False),
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True,
+        connect_args=settings.db_connect_args,
+        future=True,
+    )
+    instrumentar(motor, nombre)
+    return motor
+
+
+database_url = _sync_url(settings.database_url)
+engine = _create_engine(database_url, "primary")
+
+# Réplica de lectura opcional: solo la usan las sesiones de `get_read_db`
+replica_engine: Engine | None = (
+    _create_engine(_sync_url(settings.database_replica_url), "replica")
+    if settings.database_replica_url
+    else None
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Motor asíncrono (asyncpg/aiosqlite) para los routers `async def`: las consultas
+# se esperan con await y no bloquean el event loop del worker.
+async_database_url = settings.get_async_database_url()
+
+async_engine = create_async_engine(
+    async_database_url,
     echo=getattr(settings, "debug", False),
-    poolclass=QueuePool,
+    poolclass=InstrumentedAsyncQueuePool,
     pool_size=settings.db_pool_size,
     max_overflow=settings.db_max_overflow,
     pool_timeout=settings.db_pool_timeout,
     pool_recycle=settings.db_pool_recycle,
     pool_pre_ping=True,
-    connect_args=settings.db_connect_args,
-    future=True,
+    connect_args=settings.db_async_connect_args,
+)
+instrumentar(async_engine.sync_engine, "async")
+# expire_on_commit=False: tras commit los atributos siguen cargados y no disparan
+# lazy loads (que fallarían fuera del contexto greenlet de la sesión asíncrona)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+logger = logging.getLogger(__name__)
+
+# Retraso de la réplica en segundos (PostgreSQL). Si ya reprodujo todo lo recibido, el retraso
+# es 0 aunque el primario lleve tiempo sin escribir.
+_REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class ReplicaMonitor:
+    """
+    Disponibilidad de la réplica de lectura según su retraso
+
+    El retraso se mide como mucho una vez cada `intervalo` segundos; entre mediciones se
+    reutiliza el último resultado. Si la réplica no responde o supera `max_lag` segundos,
+    las lecturas vuelven al primario hasta la siguiente medición satisfactoria.
+    """
+
+    def __init__(self, replica: Engine | None, max_lag: float, intervalo: float):
+        self.replica = replica
+        self.max_lag = max_lag
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._proxima = 0.0
+        self._disponible = False
+        self.lag_seconds: float | None = None
+        self.fallbacks = 0
+
+    def _medir_lag(self) -> float | None:
+        assert self.replica is not None
+        try:
+            with self.replica.connect() as conn:
+                if conn.dialect.name != "postgresql":
+                    conn.execute(text("SELECT 1"))
+                    return 0.0
+                return float(conn.execute(_REPLICA_LAG_SQL).scalar() or 0.0)
+        except Exception as e:
+            logger.warning("Réplica de lectura no disponible: %s", e)
+            return None
+
+    def disponible(self) -> bool:
+        """True si las lecturas pueden ir a la réplica."""
+        if self.replica is None:
+            return False
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora < self._proxima:
+                return self._disponible
+            # Los demás hilos siguen con el resultado anterior mientras se mide
+            self._proxima = ahora + self.intervalo
+        lag = self._medir_lag()
+        disponible = lag is not None and lag <= self.max_lag
+        with self._lock:
+            if self._disponible and not disponible:
+                logger.warning("Lecturas redirigidas al primario (retraso de réplica: %s s)", lag)
+            self.lag_seconds = lag
+            self._disponible = disponible
+        return disponible
+
+    def registrar_fallback(self) -> None:
+        with self._lock:
+            self.fallbacks += 1
+
+    def estado(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "configured": self.replica is not None,
+                "available": self._disponible,
+                "lag_seconds": self.lag_seconds,
+                "max_lag_seconds": self.max_lag,
+                "fallbacks_to_primary": self.fallbacks,
+            }
+
+
+replica_monitor = ReplicaMonitor(
+    replica_engine, settings.replica_max_lag_seconds, settings.replica_check_interval_seconds
+)
+
+
+class RoutingSession(Session):
+    """
+    Sesión de lectura: réplica si está disponible y al día, primario en caso contrario
+
+    El destino se decide en la primera sentencia y se mantiene durante toda la sesión para
+    leer de una sola fuente. Cualquier escritura (flush o INSERT/UPDATE/DELETE) va al
+    primario.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, UpdateBase):
+            return engine
+        destino = self.info.get("read_bind")
+        if destino is None:
+            if replica_engine is not None and replica_monitor.disponible():
+                destino = replica_engine
+            else:
+                if replica_engine is not None:
+                    replica_monitor.registrar_fallback()
+                destino = engine
+            self.info["read_bind"] = destino
+        return destino
+
+
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+
+
+def engines() -> dict[str, Engine]:
+    """Motores síncronos configurados, por nombre (primary y, si existe, replica)."""
+    motores = {"primary": engine}
+    if replica_engine is not None:
+        motores["replica"] = replica_engine
+    return motores
+
+
+def pool_status() -> dict[str, dict[str, int]]:
+    """Estado del pool de conexiones de cada motor (vacío si el pool no es un QueuePool)."""
+    estado: dict[str, dict[str, int]] = {}
+    for nombre, motor in engines().items():
+        pool: Any = motor.pool
+        if not isinstance(pool, QueuePool):
+            estado[nombre] = {}
+            continue
+        estado[nombre] = {
+            "pool_size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+    return estado
+
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -44,3 +227,49 @@ def get_db() -> Generator[Session, None, None]:
         raise
     finally:
         db.close()
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """Dependency para endpoints de solo lectura (reportes, dashboard, estadísticas).
+
+    Usa la réplica si `DATABASE_REPLICA_URL` está configurada y su retraso es aceptable; si
+    no, el primario. Las lecturas pueden ir hasta `REPLICA_MAX_LAG_SECONDS` por detrás.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+T = TypeVar("T")
+
+
+def run_in_read_session(fn: Callable[[Session], T]) -> T:
+    """Ejecutar `fn` con una sesión de lectura propia, fuera de cualquier request.
+
+    Para recálculos en segundo plano (refrescos del caché): la sesión del request ya
+    estará cerrada cuando corran.
+    """
+    db = ReadSessionLocal()
+    try:
+        return fn(db)
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency asíncrona para routers `async def`.
+
+    Las funciones CRUD/servicios síncronas se reutilizan con ``await db.run_sync(fn, ...)``,
+    que las ejecuta sobre la conexión asíncrona sin bloquear el event loop.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
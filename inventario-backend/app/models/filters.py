@@ -2,9 +2,10 @@
 Modelos y utilidades para filtros avanzados
 """
 
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 
 from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import extract
 
 
 class ProductoFilters(BaseModel):
@@ -195,3 +196,72 @@ def apply_date_range_filter(
     if fecha_hasta:
         query = query.filter(model_field <= fecha_hasta)
     return query
+
+
+# ==========================
+# Periodos como rangos semiabiertos
+# ==========================
+# `columna >= inicio AND columna < fin` puede usar los índices sobre la columna de fecha;
+# `extract(...) == n` y `date(columna)` obligan a evaluar la función en cada fila.
+
+
+def day_range(dia: date) -> tuple[datetime, datetime]:
+    """Rango [00:00 del día, 00:00 del día siguiente)"""
+    inicio = datetime.combine(dia, time.min)
+    return inicio, inicio + timedelta(days=1)
+
+
+def week_range(dia: date) -> tuple[datetime, datetime]:
+    """Semana (lunes a domingo) que contiene a `dia`, hasta el final de ese día inclusive"""
+    inicio = datetime.combine(dia - timedelta(days=dia.weekday()), time.min)
+    return inicio, day_range(dia)[1]
+
+
+def month_range(año: int, mes: int) -> tuple[datetime, datetime]:
+    """Rango [primer día del mes, primer día del mes siguiente)"""
+    inicio = datetime(año, mes, 1)
+    return inicio, datetime(año + mes // 12, mes % 12 + 1, 1)
+
+
+def year_range(año: int) -> tuple[datetime, datetime]:
+    """Rango [1 de enero, 1 de enero del año siguiente)"""
+    return datetime(año, 1, 1), datetime(año + 1, 1, 1)
+
+
+def range_predicates(model_field, rango: tuple[datetime, datetime]) -> list:
+    """Predicados `>= inicio` y `< fin` sobre el campo"""
+    inicio, fin = rango
+    return [model_field >= inicio, model_field < fin]
+
+
+def period_predicates(model_field, mes: int | None = None, año: int | None = None) -> list:
+    """
+    Predicados para filtrar por mes y/o año
+
+    Con año (y opcionalmente mes) se genera un rango semiabierto. Un mes sin año abarca
+    varios rangos disjuntos y es el único caso que recurre a `extract`.
+    """
+    if año is not None and mes is not None:
+        return range_predicates(model_field, month_range(año, mes))
+    if año is not None:
+        return range_predicates(model_field, year_range(año))
+    if mes is not None:
+        return [extract('month', model_field) == mes]
+    return []
+
+
+def apply_period_filter(query, model_field, mes: int | None = None, año: int | None = None):
+    """
+    Aplicar filtro de periodo (mes/año) con rangos indexables
+
+    Args:
+        query: Query de SQLAlchemy
+        model_field: Columna de fecha a filtrar
+        mes: Mes (1-12)
+        año: Año
+
+    Returns:
+        Query modificada
+    """
+    predicados = period_predicates(model_field, mes, año)
+    return query.filter(*predicados) if predicados else query
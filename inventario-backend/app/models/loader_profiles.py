@@ -0,0 +1,66 @@
+"""
+Perfiles de carga (eager loading) validados contra los modelos
+
+Cada perfil declara las rutas de relaciones que serializa la respuesta de un endpoint
+("detalles", "detalles.lote.producto"). Las rutas se comprueban contra el mapper al importar
+el módulo: una relación mal escrita o eliminada falla al arrancar, no con un lazy load por fila.
+
+La estrategia sale de la relación: colecciones con ``selectinload`` (un ``SELECT ... IN`` por
+nivel, sin multiplicar filas) y many-to-one con ``joinedload``. El resto de relaciones de la
+entidad principal queda con ``raiseload``: si la serialización tocara una no declarada, el
+request falla en los tests en vez de emitir N consultas (o un MissingGreenlet en los routers
+async).
+"""
+
+from dataclasses import dataclass
+
+from sqlalchemy.orm import Query, class_mapper, joinedload, raiseload, selectinload
+
+from app.models.models import Alerta, Cotizacion, Entrada, Venta
+
+
+@dataclass(frozen=True)
+class PerfilCarga:
+    modelo: type
+    rutas: tuple[str, ...]
+    opciones: tuple
+
+    def aplicar(self, query: Query) -> Query:
+        """Añadir las opciones de carga del perfil a una query del modelo."""
+        return query.options(*self.opciones)
+
+
+def _opcion(modelo: type, ruta: str):
+    """Cadena de loaders para `ruta`, validando cada tramo contra el mapper."""
+    opcion = None
+    actual = modelo
+    for tramo in ruta.split("."):
+        relacion = class_mapper(actual).relationships.get(tramo)
+        if relacion is None:
+            raise ValueError(
+                f"Perfil de carga de {modelo.__name__}: '{ruta}' no es una ruta de relaciones "
+                f"válida ({actual.__name__} no tiene la relación '{tramo}')"
+            )
+        atributo = getattr(actual, tramo)
+        if opcion is None:
+            opcion = selectinload(atributo) if relacion.uselist else joinedload(atributo)
+        else:
+            opcion = (
+                opcion.selectinload(atributo) if relacion.uselist else opcion.joinedload(atributo)
+            )
+        actual = relacion.mapper.class_
+    return opcion
+
+
+def perfil(modelo: type, *rutas: str) -> PerfilCarga:
+    """Construir (y validar) el perfil de carga de `modelo` para las rutas dadas."""
+    opciones = tuple(_opcion(modelo, ruta) for ruta in rutas)
+    return PerfilCarga(modelo, rutas, (*opciones, raiseload("*", sql_only=True)))
+
+
+# Listado y detalle: VentaResponse / CotizacionResponse serializan sus detalles
+VENTA = perfil(Venta, "detalles")
+COTIZACION = perfil(Cotizacion, "detalles")
+# Sus respuestas solo usan columnas propias: ninguna relación que precargar
+ENTRADA = perfil(Entrada)
+ALERTA = perfil(Alerta)
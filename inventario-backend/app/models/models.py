@@ -1,4 +1,15 @@
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.orm import relationship
 
 from app.models.database import Base
@@ -132,6 +143,8 @@ class Lote(Base):
 # Modelo para Entradas
 class Entrada(Base):
     __tablename__ = "entrada"
+    # Paginación keyset: ORDER BY (fecha_entrada, id_entrada) DESC
+    __table_args__ = (Index("ix_entrada_fecha_entrada_id_entrada", "fecha_entrada", "id_entrada"),)
 
     id_entrada = Column(Integer, primary_key=True, index=True)
     id_usuario = Column(Integer, ForeignKey("usuario.id_usuario"))
@@ -166,6 +179,8 @@ class Salida(Base):
 # Modelo para Ventas
 class Venta(Base):
     __tablename__ = "venta"
+    # Paginación keyset: ORDER BY (fecha_venta, id_venta) DESC
+    __table_args__ = (Index("ix_venta_fecha_venta_id_venta", "fecha_venta", "id_venta"),)
 
     id_venta = Column(Integer, primary_key=True, index=True)
     id_usuario = Column(Integer, ForeignKey("usuario.id_usuario"))
@@ -199,6 +214,8 @@ class DetalleVenta(Base):
 # Modelo para Gastos
 class Gasto(Base):
     __tablename__ = "gasto"
+    # Paginación keyset: ORDER BY (fecha_gasto, id_gasto) DESC
+    __table_args__ = (Index("ix_gasto_fecha_gasto_id_gasto", "fecha_gasto", "id_gasto"),)
 
     id_gasto = Column(Integer, primary_key=True, index=True)
     id_usuario = Column(Integer, ForeignKey("usuario.id_usuario"))
@@ -219,6 +236,8 @@ class Gasto(Base):
 # Modelo para Cotizaciones
 class Cotizacion(Base):
     __tablename__ = "cotizacion"
+    # Paginación keyset: ORDER BY (fecha_cotizacion, id_cotizacion) DESC
+    __table_args__ = (Index("ix_cotizacion_fecha_cotizacion_id_cotizacion", "fecha_cotizacion", "id_cotizacion"),)
 
     id_cotizacion = Column(Integer, primary_key=True, index=True)
     id_usuario = Column(Integer, ForeignKey("usuario.id_usuario"))
@@ -270,3 +289,47 @@ class Alerta(Base):
     dias_para_vencer = Column(Integer)
     stock_actual = Column(Integer)
     stock_minimo = Column(Integer)
+
+
+# Snapshot de KPIs de inventario (mantenido por app.crud.snapshot_inventario)
+class InventorySnapshot(Base):
+    __tablename__ = "inventory_snapshot"
+
+    ambito = Column(String(20), primary_key=True)  # global, seccion, laboratorio
+    id_ambito = Column(Integer, primary_key=True, default=0)
+    total_productos = Column(Integer, nullable=False, default=0)
+    productos_activos = Column(Integer, nullable=False, default=0)
+    productos_bajo_stock = Column(Integer, nullable=False, default=0)
+    productos_sin_stock = Column(Integer, nullable=False, default=0)
+    stock_total = Column(Integer, nullable=False, default=0)
+    valor_total_inventario = Column(Float, nullable=False, default=0.0)
+    suma_precio_activos = Column(Float, nullable=False, default=0.0)
+    actualizado_en = Column(DateTime)
+
+
+# Lotes con stock por fecha de vencimiento y ámbito (mismo mantenimiento que el snapshot)
+class InventoryExpirySnapshot(Base):
+    __tablename__ = "inventory_expiry_snapshot"
+
+    ambito = Column(String(20), primary_key=True)
+    id_ambito = Column(Integer, primary_key=True, default=0)
+    fecha_vencimiento = Column(Date, primary_key=True)
+    lotes = Column(Integer, nullable=False, default=0)
+
+
+# Totales diarios de ventas activas por método de pago (se mantienen al registrar o anular ventas)
+class VentaDailyRollup(Base):
+    __tablename__ = "venta_daily_rollup"
+
+    fecha = Column(Date, primary_key=True)
+    metodo_pago = Column(String(50), primary_key=True, default="")
+    cantidad_ventas = Column(Integer, nullable=False, default=0)
+    total_ventas = Column(Float, nullable=False, default=0.0)
+
+
+# Contadores de numeración de documentos por serie (p. ej. "COT-2025")
+class ContadorDocumento(Base):
+    __tablename__ = "contador_documento"
+
+    serie = Column(String(30), primary_key=True)
+    ultimo = Column(Integer, nullable=False, default=0)
@@ -2,10 +2,16 @@
 Modelos y utilidades para paginación mejorada
 """
 
+import base64
+import json
+from datetime import datetime
 from math import ceil
-from typing import Generic, TypeVar
+from typing import Any, Generic, Literal, TypeVar
 
 from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import tuple_
+
+from app.core.row_counts import count_provider
 
 T = TypeVar('T')
 
@@ -27,22 +33,60 @@ class PaginationParams(BaseModel):
         return self.size
 
 
+CountMode = Literal["exact", "cached", "estimate", "none"]
+
+
 class PaginationMeta(BaseModel):
     """Metadata de paginación"""
 
-    page: int = Field(description="Página actual")
+    page: int | None = Field(default=None, description="Página actual (solo paginación offset)")
     size: int = Field(description="Elementos por página")
-    total: int = Field(description="Total de elementos")
-    pages: int = Field(description="Total de páginas")
+    total: int | None = Field(default=None, description="Total de elementos (None si se omitió)")
+    total_exact: bool = Field(
+        default=True, description="False si el total es un estimado del planificador"
+    )
+    pages: int | None = Field(default=None, description="Total de páginas")
     has_next: bool = Field(description="Hay página siguiente")
     has_prev: bool = Field(description="Hay página anterior")
+    next_cursor: str | None = Field(default=None, description="Cursor opaco a la página siguiente")
+    prev_cursor: str | None = Field(default=None, description="Cursor opaco a la página anterior")
 
     @classmethod
-    def create(cls, page: int, size: int, total: int) -> "PaginationMeta":
+    def create(
+        cls, page: int, size: int, total: int, total_exact: bool = True
+    ) -> "PaginationMeta":
         """Crear metadata de paginación"""
         pages = ceil(total / size) if size > 0 else 0
         return cls(
-            page=page, size=size, total=total, pages=pages, has_next=page < pages, has_prev=page > 1
+            page=page,
+            size=size,
+            total=total,
+            total_exact=total_exact,
+            pages=pages,
+            has_next=page < pages,
+            has_prev=page > 1,
+        )
+
+    @classmethod
+    def create_keyset(
+        cls,
+        size: int,
+        next_cursor: str | None,
+        prev_cursor: str | None,
+        total: int | None = None,
+        total_exact: bool = True,
+    ) -> "PaginationMeta":
+        """Crear metadata de paginación por cursor (sin número de página)"""
+        pages = ceil(total / size) if total is not None and size > 0 else None
+        return cls(
+            size=size,
+            total=total,
+            total_exact=total is not None and total_exact,
+            pages=pages,
+            has_next=next_cursor is not None,
+            has_prev=prev_cursor is not None,
+            next_cursor=next_cursor,
+            prev_cursor=prev_cursor,
         )
 
 
@@ -104,8 +148,143 @@ def paginate_query(query, page: int, size: int):
     return items, total
 
 
+def encode_cursor(values: list[Any], direction: str = "next") -> str:
+    """Codificar la clave de la última/primera fila como cursor opaco (base64url de JSON)"""
+    payload = {
+        "d": direction,
+        "k": [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[list[Any], str]:
+    """Decodificar un cursor; ValueError si está malformado"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        direction = payload["d"]
+        values = [
+            datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v for v in payload["k"]
+        ]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Cursor de paginación inválido") from e
+    if direction not in ("next", "prev"):
+        raise ValueError("Cursor de paginación inválido")
+    return values, direction
+
+
+def keyset_paginate(query, columns: tuple, size: int, cursor: str | None = None):
+    """
+    Paginación por cursor (keyset) en orden descendente sobre `columns`
+
+    En lugar de OFFSET filtra con una comparación de filas ``(fecha, id) < (:fecha, :id)``,
+    que usa el índice compuesto y cuesta lo mismo en la página 1 que en la 10.000.
+    La última columna debe ser única (la clave primaria) para que el orden sea total.
+
+    Args:
+        query: Query de SQLAlchemy sin ORDER BY/LIMIT
+        columns: Columnas de ordenamiento, p.ej. (Venta.fecha_venta, Venta.id_venta)
+        size: Elementos por página
+        cursor: Cursor devuelto en una página anterior (None para la primera)
+
+    Returns:
+        tuple: (items, next_cursor, prev_cursor)
+    """
+    direction = "next"
+    if cursor:
+        values, direction = decode_cursor(cursor)
+        if len(values) != len(columns):
+            raise ValueError("Cursor de paginación inválido")
+        key = tuple_(*columns)
+        query = query.filter(
+            key < tuple_(*values) if direction == "next" else key > tuple_(*values)
+        )
+
+    if direction == "next":
+        query = query.order_by(*[c.desc() for c in columns])
+    else:
+        query = query.order_by(*[c.asc() for c in columns])
+
+    # Una fila extra indica si existe otra página en la misma dirección
+    rows = query.limit(size + 1).all()
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if direction == "prev":
+        rows.reverse()
+
+    def key_of(item) -> list[Any]:
+        return [getattr(item, c.key) for c in columns]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if direction == "prev" or has_more:
+            next_cursor = encode_cursor(key_of(rows[-1]), "next")
+        if cursor and (direction == "next" or has_more):
+            prev_cursor = encode_cursor(key_of(rows[0]), "prev")
+    return rows, next_cursor, prev_cursor
+
+
+def count_for_mode(db, query, mode: CountMode) -> tuple[int | None, bool]:
+    """Total según el modo pedido (ver `app.core.row_counts`) u omitido: (total, exacto)"""
+    if mode == "none":
+        return None, False
+    return count_provider.count(db, query, mode)
+
+
+def create_keyset_response(
+    items: list[T],
+    size: int,
+    next_cursor: str | None,
+    prev_cursor: str | None,
+    total: int | None = None,
+    message: str = "Datos obtenidos exitosamente",
+    total_exact: bool = True,
+) -> dict:
+    """Crear respuesta paginada por cursor en formato dict"""
+    pagination_meta = PaginationMeta.create_keyset(
+        size, next_cursor, prev_cursor, total, total_exact
+    )
+    return {
+        "success": True,
+        "message": message,
+        "data": items,
+        "pagination": pagination_meta.model_dump(),
+    }
+
+
+def keyset_page(
+    db,
+    query,
+    columns: tuple,
+    size: int,
+    cursor: str | None = None,
+    count_mode: CountMode = "none",
+    message: str = "Datos obtenidos exitosamente",
+    serializer=None,
+) -> dict:
+    """
+    Página por cursor lista para devolver: total según `count_mode` + items + cursores
+
+    Raises:
+        ValueError: si el cursor está malformado
+    """
+    total, total_exact = count_for_mode(db, query, count_mode)
+    items, next_cursor, prev_cursor = keyset_paginate(query, columns, size, cursor)
+    if serializer is not None:
+        items = [serializer(item) for item in items]
+    return create_keyset_response(
+        items, size, next_cursor, prev_cursor, total, message, total_exact
+    )
+
+
 def create_paginated_response(
-    items: list[T], total: int, page: int, size: int, message: str = "Datos obtenidos exitosamente"
+    items: list[T],
+    total: int,
+    page: int,
+    size: int,
+    message: str = "Datos obtenidos exitosamente",
+    total_exact: bool = True,
 ) -> dict:
     """
     Crear respuesta paginada en formato dict
@@ -116,11 +295,12 @@ def create_paginated_response(
         page: Página actual
         size: Elementos por página
         message: Mensaje de respuesta
+        total_exact: False si `total` es un estimado
 
     Returns:
         dict con estructura de respuesta paginada
     """
-    pagination_meta = PaginationMeta.create(page, size, total)
+    pagination_meta = PaginationMeta.create(page, size, total, total_exact)
 
     return {
         "success": True,
@@ -1,8 +1,8 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from typing import Any, Generic, TypeVar
 
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, model_validator
 
 T = TypeVar('T')
 
@@ -432,7 +432,16 @@ class DetalleVentaBase(BaseModel):
 
 
 class DetalleVentaCreate(DetalleVentaBase):
-    pass
+    # Sin id_lote la línea se reparte entre los lotes del producto (FEFO)
+    id_lote: int | None = None  # type: ignore[assignment]
+    id_producto: int | None = None
+    subtotal: float = Field(default=0.0, ge=0)
+
+    @model_validator(mode="after")
+    def _lote_o_producto(self) -> "DetalleVentaCreate":
+        if self.id_lote is None and self.id_producto is None:
+            raise ValueError("Cada detalle requiere id_lote o id_producto")
+        return self
 
 
 class DetalleVentaResponse(DetalleVentaBase):
@@ -492,6 +501,51 @@ class VentaEstadisticasAño(BaseModel):
     meses: list[VentaEstadisticasMes]
 
 
+class VentaEstadisticasMetodoPago(BaseModel):
+    metodo_pago: str | None
+    total_ventas: float
+    cantidad_ventas: int
+    promedio_venta: float
+
+
+class VentaEstadisticasRango(BaseModel):
+    desde: date
+    hasta: date
+    total_ventas: float
+    cantidad_ventas: int
+    promedio_venta: float
+    por_metodo_pago: list[VentaEstadisticasMetodoPago]
+
+
+# ==========================
+# Entradas (recepción de mercancía)
+# ==========================
+class EntradaLineaCreate(BaseModel):
+    id_lote: int
+    cantidad: int = Field(..., gt=0)
+    precio_compra_unitario: float = Field(..., ge=0)
+    observaciones: str | None = None
+
+
+class EntradaFacturaCreate(BaseModel):
+    """Factura de proveedor completa: todas sus líneas se registran en una transacción."""
+
+    numero_factura_compra: str | None = Field(None, max_length=50)
+    proveedor: str | None = Field(None, max_length=100)
+    fecha_entrada: datetime | None = None
+    observaciones: str | None = None
+    lineas: list[EntradaLineaCreate] = Field(..., min_length=1)
+
+
+class EntradaFacturaResponse(BaseModel):
+    numero_factura_compra: str | None = None
+    ids_entrada: list[int]
+    lotes_actualizados: int
+    productos_actualizados: int
+    total_unidades: int
+    total_compra: float
+
+
 # ==========================
 # Gastos
 # ==========================
@@ -1,10 +1,10 @@
 import logging
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth_middleware import require_product_read, require_product_write
-from app.models.database import get_db
+from app.models.database import get_async_db
 from app.models.schemas import (
     AlertaBase,
     AlertaCreate,
@@ -23,7 +23,7 @@ logger = logging.getLogger(__name__)
 
 @router.get("", response_model=AlertaPaginatedResponse)
 async def listar_alertas(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
     tipo_alerta: str | None = Query(None),
@@ -46,7 +46,9 @@ async def listar_alertas(
             if v is not None
         }
 
-        alertas, total = AlertaService.listar(db, page, size, filtros)
+        alertas, total, total_exact = await db.run_sync(
+            AlertaService.listar, page, size, filtros, "cached"
+        )
         total_pages = (total + size - 1) // size
 
         alertas_data = [AlertaBase.model_validate(a) for a in alertas]
@@ -58,6 +60,7 @@ async def listar_alertas(
                 "page": page,
                 "size": size,
                 "total": total,
+                "total_exact": total_exact,
                 "pages": total_pages,
                 "has_next": page < total_pages,
                 "has_prev": page > 1,
@@ -72,10 +75,10 @@ async def listar_alertas(
 @router.get("/{id_alerta}", response_model=AlertaResponse)
 async def obtener_alerta(
     id_alerta: int = Path(..., gt=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_read()),
 ):
-    alerta = AlertaService.obtener_por_id(db, id_alerta)
+    alerta = await db.run_sync(AlertaService.obtener_por_id, id_alerta)
     if not alerta:
         raise HTTPException(status_code=404, detail="Alerta no encontrada")
     alerta_data = AlertaBase.model_validate(alerta)
@@ -84,11 +87,13 @@ async def obtener_alerta(
 
 @router.post("", response_model=AlertaCreateResponse)
 async def crear_alerta(
-    alerta: AlertaCreate, db: Session = Depends(get_db), _: dict = Depends(require_product_write())
+    alerta: AlertaCreate,
+    db: AsyncSession = Depends(get_async_db),
+    _: dict = Depends(require_product_write()),
 ):
     try:
         alerta_data = alerta.model_dump()
-        nuevo_id = AlertaService.crear(db, alerta_data)
+        nuevo_id = await db.run_sync(AlertaService.crear, alerta_data)
         resp = crear_respuesta(message="Alerta creada exitosamente", data={"id_alerta": nuevo_id})
         # Optional Location header (no contract change)
         resp.headers["Location"] = f"/api/v1/alertas/{nuevo_id}"
@@ -101,12 +106,12 @@ async def crear_alerta(
 async def actualizar_alerta(
     id_alerta: int = Path(..., gt=0),
     alerta: AlertaUpdate = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_write()),
 ):
     try:
         updates = alerta.model_dump(exclude_unset=True)
-        if not AlertaService.actualizar(db, id_alerta, updates):
+        if not await db.run_sync(AlertaService.actualizar, id_alerta, updates):
             raise HTTPException(status_code=404, detail="Alerta no encontrada")
         return crear_respuesta(message="Alerta actualizada exitosamente")
     except ValueError as e:
@@ -117,10 +122,10 @@ async def actualizar_alerta(
 async def eliminar_alerta(
     id_alerta: int = Path(..., gt=0),
     modo: str = Query("logico", pattern="^(logico|fisico)$"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_write()),
 ):
-    if not AlertaService.eliminar(db, id_alerta, modo):
+    if not await db.run_sync(AlertaService.eliminar, id_alerta, modo):
         raise HTTPException(status_code=404, detail="Alerta no encontrada")
     return crear_respuesta(
         message=f"Alerta {'eliminada' if modo == 'fisico' else 'desactivada'} exitosamente"
@@ -4,13 +4,13 @@ from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.audit_logging import audit_logger
 from app.core.config import settings
 from app.core.security import create_access_token, get_password_hash, verify_password
 from app.crud.user import authenticate_user, create_user, get_user_by_email, get_user_by_username
-from app.models.database import get_db
+from app.models.database import get_async_db
 from app.models.models import Rol
 from app.models.schemas import (
     ChangePasswordRequest,
@@ -28,29 +28,34 @@ router = APIRouter(tags=["Authentication"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
+def _to_user_response(db, user) -> UserResponse:
+    """Serializar dentro de run_sync: el acceso a `user.rol` puede requerir carga perezosa"""
+    return UserResponse.model_validate(user)
+
+
 @router.post("/register", response_model=UserResponse)
 async def register_user(
     user_data: RegisterRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     request: Request = None,  # type: ignore[assignment]
 ):
     """
     Registrar un nuevo usuario
     """
     # Verificar si el nombre de usuario ya existe
-    if get_user_by_username(db, user_data.username):
+    if await db.run_sync(get_user_by_username, user_data.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Username already taken"
         )
 
     # Verificar si el email ya existe
-    if get_user_by_email(db, user_data.email):
+    if await db.run_sync(get_user_by_email, user_data.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
 
     # Verificar que el rol exista
-    role = db.query(Rol).filter(Rol.id_rol == user_data.rol_id).first()
+    role = await db.get(Rol, user_data.rol_id)
     if not role:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid role id")
 
@@ -64,7 +69,7 @@ async def register_user(
             nombre_completo=user_data.nombre_completo,
             rol_id=user_data.rol_id,
         )
-        user = create_user(db, user_create)
+        user = await db.run_sync(create_user, user_create)
 
         # Log de auditoría
         if request:
@@ -75,9 +80,9 @@ async def register_user(
                 details={"username": user.nombre_usuario, "email": user.email},
             )
 
-        return UserResponse.model_validate(user)
+        return await db.run_sync(_to_user_response, user)
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists or invalid data"
         ) from None
@@ -91,13 +96,13 @@ async def register_user(
 @router.post("/login", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     request: Request = None,  # type: ignore[assignment]
 ):
     """
     Autenticar usuario y obtener token de acceso
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await db.run_sync(authenticate_user, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -107,7 +112,7 @@ async def login_for_access_token(
 
     # Actualizar último acceso
     user.ultima_acceso = datetime.utcnow()  # type: ignore[assignment]
-    db.commit()
+    await db.commit()
 
     # Log de auditoría
     if request:
@@ -127,11 +132,11 @@ async def login_for_access_token(
 
 
 @router.post("/login-json", response_model=Token)
-async def login_json(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login_json(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Autenticar usuario con JSON payload
     """
-    user = authenticate_user(db, login_data.username, login_data.password)
+    user = await db.run_sync(authenticate_user, login_data.username, login_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password"
@@ -139,7 +144,7 @@ async def login_json(login_data: LoginRequest, db: Session = Depends(get_db)):
 
     # Actualizar último acceso
     user.ultima_acceso = datetime.utcnow()  # type: ignore[assignment]
-    db.commit()
+    await db.commit()
 
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
@@ -150,7 +155,7 @@ async def login_json(login_data: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     """
     Obtener información del usuario actual
     """
@@ -162,18 +167,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials"
         )
 
-    user = get_user_by_username(db, username)
+    user = await db.run_sync(get_user_by_username, username)
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    return UserResponse.model_validate(user)
+    return await db.run_sync(_to_user_response, user)
 
 
 @router.post("/change-password")
 async def change_password(
     password_data: ChangePasswordRequest,
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Cambiar contraseña del usuario actual
@@ -186,7 +191,7 @@ async def change_password(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials"
         )
 
-    user = get_user_by_username(db, username)
+    user = await db.run_sync(get_user_by_username, username)
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
@@ -198,13 +203,13 @@ async def change_password(
 
     # Actualizar contraseña
     user.password_hash = get_password_hash(password_data.new_password)  # type: ignore[assignment]
-    db.commit()
+    await db.commit()
 
     return {"message": "Password changed successfully"}
 
 
 @router.post("/reset-password-request")
-async def request_password_reset(reset_data: PasswordResetRequest, db: Session = Depends(get_db)):
+async def request_password_reset(reset_data: PasswordResetRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Solicitar restablecimiento de contraseña
     """
@@ -214,7 +219,7 @@ async def request_password_reset(reset_data: PasswordResetRequest, db: Session =
     from email.message import EmailMessage
 
     codigo = None  # Inicializar fuera del bloque if
-    user = get_user_by_email(db, reset_data.email)
+    user = await db.run_sync(get_user_by_email, reset_data.email)
     if user:
         # Generar código de recuperación de 6 dígitos
         codigo = ''.join(random.choices(string.digits, k=6))
@@ -225,7 +230,7 @@ async def request_password_reset(reset_data: PasswordResetRequest, db: Session =
         # Limpiar intentos fallidos previos
         user.reset_attempts = 0  # type: ignore[assignment]
         user.reset_locked_until = None  # type: ignore[assignment]
-        db.commit()
+        await db.commit()
         
         # Si SMTP está configurado, envia el correo; si no, en modo debug devolvemos el código para pruebas
         try:
@@ -266,7 +271,7 @@ async def request_password_reset(reset_data: PasswordResetRequest, db: Session =
 
 
 @router.post("/reset-password-confirm")
-async def confirm_password_reset(reset_data: PasswordResetConfirm, db: Session = Depends(get_db)):
+async def confirm_password_reset(reset_data: PasswordResetConfirm, db: AsyncSession = Depends(get_async_db)):
     """
     Confirmar restablecimiento de contraseña
     """
@@ -277,7 +282,7 @@ async def confirm_password_reset(reset_data: PasswordResetConfirm, db: Session =
             detail="Password must be at least 6 characters long"
         )
     
-    user = get_user_by_email(db, reset_data.email)
+    user = await db.run_sync(get_user_by_email, reset_data.email)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
@@ -305,7 +310,7 @@ async def confirm_password_reset(reset_data: PasswordResetConfirm, db: Session =
             locked_until = datetime.utcnow() + timedelta(minutes=15)
             setattr(user, "reset_locked_until", locked_until)
         
-        db.commit()
+        await db.commit()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid recovery code")
     
     # Validar expiración del código
@@ -319,7 +324,7 @@ async def confirm_password_reset(reset_data: PasswordResetConfirm, db: Session =
     setattr(user, "codigo_recuperacion_expiry", None)
     setattr(user, "reset_attempts", 0)
     setattr(user, "reset_locked_until", None)
-    db.commit()
+    await db.commit()
     
     # Log de auditoría
     try:
@@ -1,141 +1,98 @@
 """
 Router para métricas de negocio agregadas.
 """
-from datetime import date, datetime, timedelta
+from datetime import datetime
 from typing import Any
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy import func, text
 from sqlalchemy.orm import Session
 
 from app.core.auth_middleware import require_permission
 from app.core.cache import cache_manager
+from app.core.cache_warmer import cache_warmer
 from app.core.logging_config import get_logger
 from app.core.roles import Permission
-from app.models.database import get_db
-from app.models.models import Lote, Producto, Venta
+from app.crud.kpis_inventario import calcular_kpis_inventario
+from app.models.database import get_read_db, run_in_read_session
 
 router = APIRouter(prefix="/metrics", tags=["Business Metrics"])
 logger = get_logger()
 
 
+def _calcular_metricas_negocio(db: Session, dias_vencimiento: int) -> dict[str, Any]:
+    # Todos los indicadores en una sola consulta (agregados condicionales + subconsultas)
+    kpis = calcular_kpis_inventario(db, dias_vencimiento=dias_vencimiento, incluir_ventas=True)
+
+    return {
+        "valor_total_inventario": kpis["valor_total_inventario"],
+        "productos_bajo_stock": kpis["productos_bajo_stock"],
+        "productos_proximos_vencer": kpis["productos_proximos_vencer"],
+        "dias_vencimiento_parametro": dias_vencimiento,
+        "ventas_dia": kpis["ventas_dia"],
+        "ventas_semana": kpis["ventas_semana"],
+        "total_productos_activos": kpis["productos_activos"],
+        "stock_total": kpis["stock_total"],
+        "fecha_consulta": datetime.utcnow().isoformat(),
+    }
+
+
+_TTL_METRICAS = 300
+_TAGS_METRICAS = ["business", "productos", "lotes", "ventas"]
+
+
+def _clave_metricas(dias_vencimiento: int) -> str:
+    return f"business:metrics:v1:{dias_vencimiento}"
+
+
+# Una entrada por valor de `dias_vencimiento`: la telemetría decide cuáles, además de 30
+cache_warmer.registrar(
+    "business",
+    r"business:metrics:v1:(\d+)",
+    _clave_metricas(30),
+    lambda db, m: _calcular_metricas_negocio(db, int(m[1])),
+    _TTL_METRICAS,
+    _TAGS_METRICAS,
+)
+
+
 @router.get("/business", response_model=dict)
 def get_business_metrics(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _: dict = Depends(require_permission(Permission.INVENTORY_READ)),
     dias_vencimiento: int = Query(default=30, ge=1, le=365),
 ) -> dict[str, Any]:
     """
     Retorna métricas clave de negocio agregadas:
-    - Valor total del inventario (productos activos con stock)
-    - Cantidad de productos bajo stock (stock < stock_minimo)
+    - Valor total del inventario (productos activos)
+    - Cantidad de productos bajo stock (stock_actual <= stock_minimo)
     - Cantidad de productos próximos a vencer en los próximos N días
     - Ventas del día (fecha = hoy)
     - Ventas de la semana actual (desde lunes hasta hoy)
     - Total de productos activos
     - Stock total (suma de stock de productos activos)
-    Cacheado por 5 minutos.
+    Cacheado por 5 minutos; al vencer se sirve el valor anterior (`stale: true`, con su
+    `fecha_consulta`) mientras un solo proceso lo recalcula en segundo plano.
     """
-    cache_key = f"business:metrics:v1:{dias_vencimiento}"
-    cached = cache_manager.get(cache_key)
-    if cached:
-        logger.info("Business metrics retrieved from cache")
-        return {
-            "success": True,
-            "message": "Métricas de negocio obtenidas exitosamente (cache)",
-            "data": cached,
-        }
-
-    # Valor total inventario: suma(precio_compra * stock) para productos activos
-    valor_total_inventario_query = (
-        db.query(func.sum(Producto.precio_compra * Producto.stock))
-        .filter(Producto.estado == "Activo", Producto.stock > 0)
-        .scalar()
+    # Registrado en las etiquetas de los datos de los que depende
+    lectura = cache_manager.get_or_compute(
+        _clave_metricas(dias_vencimiento),
+        lambda: _calcular_metricas_negocio(db, dias_vencimiento),
+        ttl=_TTL_METRICAS,
+        tags=_TAGS_METRICAS,
+        refresh=lambda: run_in_read_session(
+            lambda sesion: _calcular_metricas_negocio(sesion, dias_vencimiento)
+        ),
     )
-    valor_total_inventario = float(valor_total_inventario_query or 0.0)
-
-    # Productos bajo stock: stock < stock_minimo y activos
-    productos_bajo_stock_query = (
-        db.query(func.count(Producto.id_producto))
-        .filter(
-            Producto.estado == "Activo",
-            Producto.stock_minimo.isnot(None),
-            text("stock < stock_minimo"),
-        )
-        .scalar()
-    )
-    productos_bajo_stock = int(productos_bajo_stock_query or 0)
-
-    # Productos próximos a vencer: lotes con fecha_vencimiento entre hoy y +N días
-    hoy = date.today()
-    fecha_limite = hoy + timedelta(days=dias_vencimiento)
-    productos_proximos_vencer_query = (
-        db.query(func.count(func.distinct(Lote.id_producto)))
-        .join(Producto, Lote.id_producto == Producto.id_producto)
-        .filter(
-            Producto.estado == "Activo",
-            Lote.fecha_vencimiento.isnot(None),
-            Lote.fecha_vencimiento >= hoy,
-            Lote.fecha_vencimiento <= fecha_limite,
-        )
-        .scalar()
-    )
-    productos_proximos_vencer = int(productos_proximos_vencer_query or 0)
-
-    # Ventas del día: suma del total de ventas con fecha_venta = hoy
-    ventas_dia_query = (
-        db.query(func.sum(Venta.total))
-        .filter(func.date(Venta.fecha_venta) == hoy)
-        .scalar()
-    )
-    ventas_dia = float(ventas_dia_query or 0.0)
-
-    # Ventas de la semana: desde lunes de la semana actual hasta hoy
-    inicio_semana = hoy - timedelta(days=hoy.weekday())
-    ventas_semana_query = (
-        db.query(func.sum(Venta.total))
-        .filter(
-            func.date(Venta.fecha_venta) >= inicio_semana,
-            func.date(Venta.fecha_venta) <= hoy,
-        )
-        .scalar()
-    )
-    ventas_semana = float(ventas_semana_query or 0.0)
-
-    # Total productos activos
-    total_productos_activos = (
-        db.query(func.count(Producto.id_producto))
-        .filter(Producto.estado == "Activo")
-        .scalar()
-        or 0
-    )
-
-    # Stock total (suma de stock de productos activos)
-    stock_total = (
-        db.query(func.sum(Producto.stock))
-        .filter(Producto.estado == "Activo")
-        .scalar()
-        or 0
-    )
-
-    data = {
-        "valor_total_inventario": round(valor_total_inventario, 2),
-        "productos_bajo_stock": productos_bajo_stock,
-        "productos_proximos_vencer": productos_proximos_vencer,
-        "dias_vencimiento_parametro": dias_vencimiento,
-        "ventas_dia": round(ventas_dia, 2),
-        "ventas_semana": round(ventas_semana, 2),
-        "total_productos_activos": total_productos_activos,
-        "stock_total": stock_total,
-        "fecha_consulta": datetime.utcnow().isoformat(),
-    }
-
-    cache_manager.set(cache_key, data, ttl=300)  # 5 minutos
 
-    logger.info("Business metrics computed and cached", extra={"data": data})
+    if lectura.estado == "miss":
+        logger.info("Business metrics computed and cached", extra={"data": lectura.valor})
+    else:
+        logger.info("Business metrics retrieved from cache", extra={"stale": lectura.stale})
 
     return {
         "success": True,
-        "message": "Métricas de negocio obtenidas exitosamente",
-        "data": data,
+        "message": "Métricas de negocio obtenidas exitosamente"
+        + (" (cache)" if lectura.estado != "miss" else ""),
+        "data": lectura.valor,
+        "stale": lectura.stale,
     }
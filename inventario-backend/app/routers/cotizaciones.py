@@ -1,41 +1,47 @@
 """Router para gestión de cotizaciones."""
 
 from datetime import datetime
+from typing import Any, Literal, cast
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import extract
+from sqlalchemy import Connection, func, select
 from sqlalchemy.orm import Session
 
 from app.core.auth_middleware import require_permission
+from app.core.exceptions import InventarioException
+from app.core.numeracion import numerador_documentos
 from app.core.roles import Permission
-from app.models import models, schemas
-from app.models.database import get_db
+from app.models import loader_profiles, models, schemas
+from app.models.database import get_db, get_read_db
+from app.models.filters import apply_period_filter
+from app.models.pagination import CountMode, PaginatedResponse, keyset_page
+from app.services.venta_service import VentaService
 
 router = APIRouter(prefix="/cotizaciones", tags=["Cotizaciones"])
 
 
-def generar_numero_cotizacion(db: Session, año: int) -> str:
-    """Generar número de cotizaci ón auto-incrementable por año."""
-    # Obtener el último número de cotización del año
-    ultima_cotizacion = (
-        db.query(models.Cotizacion)
-        .filter(extract('year', models.Cotizacion.fecha_cotizacion) == año)
-        .order_by(models.Cotizacion.id_cotizacion.desc())
-        .first()
-    )
+def _ultimo_numero_cotizacion(conn: Connection, serie: str) -> int:
+    """Mayor sufijo numérico ya usado en la serie (solo al crear su contador).
 
-    if ultima_cotizacion is not None and getattr(ultima_cotizacion, "numero_cotizacion", None):
-        # Extraer el número secuencial
-        partes = ultima_cotizacion.numero_cotizacion.split('-')
-        if len(partes) == 3:
-            ultimo_numero = int(partes[2])
-            nuevo_numero = ultimo_numero + 1
-        else:
-            nuevo_numero = 1
-    else:
-        nuevo_numero = 1
+    Se compara el valor numérico, no el texto: sin ceros a la izquierda `-10` ordena antes
+    que `-9`. Los sufijos no numéricos se ignoran en vez de reiniciar la serie.
+    """
+    numeros = conn.execute(
+        select(models.Cotizacion.numero_cotizacion).where(
+            models.Cotizacion.numero_cotizacion.like(f"{serie}-%")
+        )
+    ).scalars()
+    sufijos = (numero.rsplit('-', 1)[1] for numero in numeros)
+    return max((int(sufijo) for sufijo in sufijos if sufijo.isdecimal()), default=0)
 
-    return f"COT-{año}-{nuevo_numero:05d}"
+
+def generar_numero_cotizacion(db: Session, año: int) -> str:
+    """Generar número de cotización COT-AAAA-NNNNN a partir del contador del año."""
+    serie = f"COT-{año}"
+    numero = numerador_documentos.siguiente(
+        db, serie, inicial=lambda conn: _ultimo_numero_cotizacion(conn, serie)
+    )
+    return f"{serie}-{numero:05d}"
 
 
 @router.post("/", response_model=schemas.CotizacionResponse, status_code=status.HTTP_201_CREATED)
@@ -117,29 +123,42 @@ def crear_cotizacion(
     return db_cotizacion
 
 
-@router.get("/", response_model=list[schemas.CotizacionResponse])
+@router.get(
+    "/",
+    response_model=list[schemas.CotizacionResponse]
+    | PaginatedResponse[schemas.CotizacionResponse],
+)
 def listar_cotizaciones(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     estado: str | None = None,
     mes: int | None = Query(None, ge=1, le=12),
-    año: int | None = Query(None, ge=2000),
+    año: int | None = Query(None, ge=2000, le=9998),
     id_cliente: int | None = None,
+    paginacion: Literal["offset", "cursor"] = Query(
+        "offset", description="`cursor` activa la paginación keyset (sin OFFSET)"
+    ),
+    cursor: str | None = Query(None, description="Cursor opaco devuelto en `pagination`"),
+    conteo: CountMode = Query("none", description="Total en modo cursor: exact/estimate/none"),
     db: Session = Depends(get_db),
     _: dict = Depends(require_permission(Permission.PRODUCT_READ)),
 ):
     """Listar cotizaciones con filtros opcionales."""
-    query = db.query(models.Cotizacion)
+    query = loader_profiles.COTIZACION.aplicar(db.query(models.Cotizacion))
 
     if estado:
         query = query.filter(models.Cotizacion.estado == estado)
-    if mes:
-        query = query.filter(extract('month', models.Cotizacion.fecha_cotizacion) == mes)
-    if año:
-        query = query.filter(extract('year', models.Cotizacion.fecha_cotizacion) == año)
+    query = apply_period_filter(query, models.Cotizacion.fecha_cotizacion, mes, año)
     if id_cliente:
         query = query.filter(models.Cotizacion.id_cliente == id_cliente)
 
+    if paginacion == "cursor" or cursor:
+        try:
+            columnas = (models.Cotizacion.fecha_cotizacion, models.Cotizacion.id_cotizacion)
+            return keyset_page(db, query, columnas, limit, cursor, conteo)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
     cotizaciones = (
         query.order_by(models.Cotizacion.fecha_cotizacion.desc()).offset(skip).limit(limit).all()
     )
@@ -148,21 +167,21 @@ def listar_cotizaciones(
 
 @router.get("/estadisticas", response_model=schemas.CotizacionEstadisticas)
 def estadisticas_cotizaciones(
-    año: int | None = Query(None, ge=2000),
-    db: Session = Depends(get_db),
+    año: int | None = Query(None, ge=2000, le=9998),
+    db: Session = Depends(get_read_db),
     _: dict = Depends(require_permission(Permission.PRODUCT_READ)),
 ):
     """Obtener estadísticas de cotizaciones."""
-    query = db.query(models.Cotizacion)
+    # Un solo GROUP BY estado sobre el rango del año (antes: cinco COUNT)
+    query = db.query(models.Cotizacion.estado, func.count(models.Cotizacion.id_cotizacion))
+    query = apply_period_filter(query, models.Cotizacion.fecha_cotizacion, año=año)
+    por_estado = dict(query.group_by(models.Cotizacion.estado).all())
 
-    if año:
-        query = query.filter(extract('year', models.Cotizacion.fecha_cotizacion) == año)
-
-    total = query.count()
-    pendientes = query.filter(models.Cotizacion.estado == "Pendiente").count()
-    aceptadas = query.filter(models.Cotizacion.estado == "Aceptada").count()
-    rechazadas = query.filter(models.Cotizacion.estado == "Rechazada").count()
-    convertidas = query.filter(models.Cotizacion.estado == "Convertida").count()
+    total = sum(por_estado.values())
+    pendientes = por_estado.get("Pendiente", 0)
+    aceptadas = por_estado.get("Aceptada", 0)
+    rechazadas = por_estado.get("Rechazada", 0)
+    convertidas = por_estado.get("Convertida", 0)
 
     tasa_conversion = (convertidas / total * 100) if total > 0 else 0.0
 
@@ -184,7 +203,9 @@ def obtener_cotizacion(
 ):
     """Obtener detalles de una cotización específica."""
     cotizacion = (
-        db.query(models.Cotizacion).filter(models.Cotizacion.id_cotizacion == id_cotizacion).first()
+        loader_profiles.COTIZACION.aplicar(db.query(models.Cotizacion))
+        .filter(models.Cotizacion.id_cotizacion == id_cotizacion)
+        .first()
     )
     if not cotizacion:
         raise HTTPException(status_code=404, detail="Cotizacion no encontrada")
@@ -234,65 +255,11 @@ def convertir_cotizacion_a_venta(
             status_code=400, detail="Solo se pueden convertir cotizaciones pendientes o aceptadas"
         )
 
-    # Crear la venta
-    db_venta = models.Venta(
-        id_usuario=current_user.id_usuario,
-        id_cliente=cotizacion.id_cliente,
-        fecha_venta=datetime.now(),
-        subtotal=cotizacion.subtotal,
-        descuento=cotizacion.descuento,
-        impuestos=cotizacion.impuestos,
-        total=cotizacion.total,
-        metodo_pago=metodo_pago,
-        estado="Activo",
-    )
-    db.add(db_venta)
-    db.flush()
-
-    # Convertir detalles de cotización a detalles de venta
-    # Nota: Esto requiere encontrar lotes disponibles para cada producto
-    for detalle_cot in cotizacion.detalles:
-        # Buscar un lote disponible para este producto
-        lote = (
-            db.query(models.Lote)
-            .filter(
-                models.Lote.id_producto == detalle_cot.id_producto,
-                models.Lote.cantidad_disponible >= detalle_cot.cantidad,
-                models.Lote.estado == "Activo",
-            )
-            .first()
+    try:
+        db_venta = VentaService.convertir_cotizacion(
+            db, cotizacion, metodo_pago, int(cast(Any, current_user).id_usuario)
         )
-
-        if not lote:
-            raise HTTPException(
-                status_code=400,
-                detail=f"No hay stock suficiente para el producto {detalle_cot.id_producto}",
-            )
-
-        db_detalle = models.DetalleVenta(
-            id_venta=db_venta.id_venta,
-            id_lote=lote.id_lote,
-            cantidad=detalle_cot.cantidad,
-            precio_unitario=detalle_cot.precio_unitario,
-            subtotal=detalle_cot.subtotal,
-        )
-        db.add(db_detalle)
-
-        # Actualizar stock
-        lote.cantidad_disponible -= detalle_cot.cantidad
-        producto = (
-            db.query(models.Producto)
-            .filter(models.Producto.id_producto == lote.id_producto)
-            .first()
-        )
-        if producto:
-            producto.stock_actual -= detalle_cot.cantidad
-
-    # Actualizar cotización
-    cotizacion.estado = "Convertida"  # type: ignore[assignment]
-    cotizacion.id_venta_relacionada = db_venta.id_venta  # type: ignore[assignment]
-
-    db.commit()
-    db.refresh(db_venta)
+    except InventarioException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message) from e
 
     return db_venta
@@ -2,6 +2,7 @@
 Router de Dashboard de métricas
 """
 
+import re
 from typing import Any
 
 from fastapi import APIRouter, Depends
@@ -9,20 +10,70 @@ from sqlalchemy.orm import Session
 
 from app.core.auth_middleware import require_permission
 from app.core.cache import cache_manager
+from app.core.cache_warmer import cache_warmer
 from app.core.roles import Permission
 from app.crud.producto_advanced import (
     get_productos_por_laboratorio_stats,
     get_productos_por_seccion_stats,
     get_productos_stats,
 )
-from app.models.database import get_db
+from app.crud.snapshot_inventario import (
+    AMBITO_LABORATORIO,
+    AMBITO_SECCION,
+    estadisticas_por_ambito,
+    leer_snapshot,
+)
+from app.models.database import get_read_db, run_in_read_session
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
+_CLAVES_GENERALES = (
+    "total_productos",
+    "productos_activos",
+    "productos_inactivos",
+    "productos_bajo_stock",
+    "valor_total_inventario",
+    "stock_total",
+    "precio_promedio",
+    "porcentaje_bajo_stock",
+)
+
+
+def _calcular_metricas(db: Session) -> dict[str, Any]:
+    snapshot = leer_snapshot(db)
+    if snapshot is not None:
+        stats = {clave: snapshot[clave] for clave in _CLAVES_GENERALES}
+        por_laboratorio = estadisticas_por_ambito(db, AMBITO_LABORATORIO)
+        por_seccion = estadisticas_por_ambito(db, AMBITO_SECCION)
+    else:
+        stats = get_productos_stats(db)
+        por_laboratorio = get_productos_por_laboratorio_stats(db)
+        por_seccion = get_productos_por_seccion_stats(db)
+
+    return {
+        "generales": stats,
+        "por_laboratorio": por_laboratorio,
+        "por_seccion": por_seccion,
+    }
+
+
+_CLAVE_METRICAS = "dashboard:metrics:v1"
+_TTL_METRICAS = 60
+_TAGS_METRICAS = ["dashboard", "productos", "laboratorios", "secciones"]
+
+cache_warmer.registrar(
+    "dashboard",
+    re.escape(_CLAVE_METRICAS),
+    _CLAVE_METRICAS,
+    lambda db, _: _calcular_metricas(db),
+    _TTL_METRICAS,
+    _TAGS_METRICAS,
+)
+
 
 @router.get("/metrics", response_model=dict)
 def get_metrics(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _: dict = Depends(require_permission(Permission.INVENTORY_READ)),
 ) -> dict[str, Any]:
     """
@@ -30,31 +81,22 @@ def get_metrics(
     - Estadísticas generales de productos
     - Estadísticas por laboratorio
     - Estadísticas por sección
-    Cacheado por 60s.
+    Se leen del snapshot de inventario (filas precalculadas); mientras no se haya construido,
+    se calculan con agregados sobre productos. Cacheado por 60s; al vencer se sirve el valor
+    anterior (`stale: true`) mientras un solo proceso lo recalcula en segundo plano.
     """
-    cache_key = "dashboard:metrics:v1"
-    cached = cache_manager.get(cache_key)
-    if cached:
-        return {
-            "success": True,
-            "message": "Métricas obtenidas exitosamente (cache)",
-            "data": cached,
-        }
-
-    stats = get_productos_stats(db)
-    por_laboratorio = get_productos_por_laboratorio_stats(db)
-    por_seccion = get_productos_por_seccion_stats(db)
-
-    data = {
-        "generales": stats,
-        "por_laboratorio": por_laboratorio,
-        "por_seccion": por_seccion,
-    }
-
-    cache_manager.set(cache_key, data, ttl=60)
+    lectura = cache_manager.get_or_compute(
+        _CLAVE_METRICAS,
+        lambda: _calcular_metricas(db),
+        ttl=_TTL_METRICAS,
+        tags=_TAGS_METRICAS,
+        refresh=lambda: run_in_read_session(_calcular_metricas),
+    )
 
     return {
         "success": True,
-        "message": "Métricas obtenidas exitosamente",
-        "data": data,
+        "message": "Métricas obtenidas exitosamente"
+        + (" (cache)" if lectura.estado != "miss" else ""),
+        "data": lectura.valor,
+        "stale": lectura.stale,
     }
@@ -1,18 +1,39 @@
 """Router para gestión de entradas (compras/recepciones)."""
 
 from datetime import datetime
+from typing import Any, Literal, cast
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.core.auth_middleware import require_permission
+from app.core.exceptions import InventarioException
 from app.core.roles import Permission
-from app.models import models
-from app.models.database import get_db
+from app.crud.stock import ajustar_stock_lotes, ajustar_stock_productos
+from app.models import loader_profiles, models, schemas
+from app.models.database import get_db, get_read_db
+from app.models.filters import apply_period_filter, period_predicates
+from app.models.pagination import CountMode, keyset_page
+from app.services.entrada_service import EntradaService
 
 router = APIRouter(prefix="/entradas", tags=["Entradas"])
 
 
+def _serializar_entrada(e: models.Entrada) -> dict:
+    # Serialización simple compatible con el frontend actual
+    return {
+        "id_entrada": e.id_entrada,
+        "id_lote": e.id_lote,
+        "cantidad": e.cantidad,
+        "fecha_entrada": e.fecha_entrada,
+        "precio_compra_unitario": e.precio_compra_unitario,
+        "precio_compra_total": e.precio_compra_total,
+        "numero_factura_compra": e.numero_factura_compra,
+        "proveedor": e.proveedor,
+        "observaciones": e.observaciones,
+    }
+
+
 @router.post("/", status_code=status.HTTP_201_CREATED)
 def crear_entrada(
     id_lote: int,
@@ -50,54 +71,70 @@ def crear_entrada(
     )
     db.add(entrada)
 
-    # Actualizar stock del lote y del producto
-    lote.cantidad_disponible = int(getattr(lote, "cantidad_disponible", 0)) + int(cantidad)  # type: ignore[assignment]
-    producto = (
-        db.query(models.Producto).filter(models.Producto.id_producto == lote.id_producto).first()
-    )
-    if producto:
-        producto.stock_actual = int(getattr(producto, "stock_actual", 0)) + int(cantidad)  # type: ignore[assignment]
+    # Actualizar stock del lote y del producto (UPDATE atómicos; mantienen el snapshot)
+    ajustar_stock_lotes(db, {cast(int, lote.id_lote): int(cantidad)})
+    if lote.id_producto is not None:
+        ajustar_stock_productos(db, {cast(int, lote.id_producto): int(cantidad)})
 
     db.commit()
     db.refresh(entrada)
     return entrada
 
 
-@router.get("/", response_model=list[dict])
+@router.post(
+    "/recepcion",
+    response_model=schemas.EntradaFacturaResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def registrar_recepcion(
+    factura: schemas.EntradaFacturaCreate,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(require_permission(Permission.INVENTORY_WRITE)),
+):
+    """Registrar la recepción de una factura de proveedor completa en una sola transacción."""
+    try:
+        return EntradaService.registrar_factura(
+            db, factura, int(cast(Any, current_user).id_usuario)
+        )
+    except InventarioException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message) from e
+
+
+@router.get("/", response_model=list[dict] | dict)
 def listar_entradas(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     id_lote: int | None = None,
     mes: int | None = Query(None, ge=1, le=12),
-    año: int | None = Query(None, alias="año"),
+    año: int | None = Query(None, alias="año", ge=2000, le=9998),
+    paginacion: Literal["offset", "cursor"] = Query(
+        "offset", description="`cursor` activa la paginación keyset (sin OFFSET)"
+    ),
+    cursor: str | None = Query(None, description="Cursor opaco devuelto en `pagination`"),
+    conteo: CountMode = Query("none", description="Total en modo cursor: exact/estimate/none"),
     db: Session = Depends(get_db),
     _: dict = Depends(require_permission(Permission.INVENTORY_READ)),
 ):
-    from sqlalchemy import extract
-
-    q = db.query(models.Entrada)
+    q = loader_profiles.ENTRADA.aplicar(db.query(models.Entrada))
     if id_lote:
         q = q.filter(models.Entrada.id_lote == id_lote)
-    if mes:
-        q = q.filter(extract("month", models.Entrada.fecha_entrada) == mes)
-    if año:
-        q = q.filter(extract("year", models.Entrada.fecha_entrada) == año)
+    q = apply_period_filter(q, models.Entrada.fecha_entrada, mes, año)
+    if paginacion == "cursor" or cursor:
+        try:
+            return keyset_page(
+                db,
+                q,
+                (models.Entrada.fecha_entrada, models.Entrada.id_entrada),
+                limit,
+                cursor,
+                conteo,
+                serializer=_serializar_entrada,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
     entradas = q.order_by(models.Entrada.fecha_entrada.desc()).offset(skip).limit(limit).all()
-    # Serialización simple compatible con el frontend actual
-    return [
-        {
-            "id_entrada": e.id_entrada,
-            "id_lote": e.id_lote,
-            "cantidad": e.cantidad,
-            "fecha_entrada": e.fecha_entrada,
-            "precio_compra_unitario": e.precio_compra_unitario,
-            "precio_compra_total": e.precio_compra_total,
-            "numero_factura_compra": e.numero_factura_compra,
-            "proveedor": e.proveedor,
-            "observaciones": e.observaciones,
-        }
-        for e in entradas
-    ]
+    return [_serializar_entrada(e) for e in entradas]
 
 
 @router.get("/{id_entrada}", response_model=dict)
@@ -106,40 +143,31 @@ def obtener_entrada(
     db: Session = Depends(get_db),
     _: dict = Depends(require_permission(Permission.INVENTORY_READ)),
 ):
-    e = db.query(models.Entrada).filter(models.Entrada.id_entrada == id_entrada).first()
+    e = (
+        loader_profiles.ENTRADA.aplicar(db.query(models.Entrada))
+        .filter(models.Entrada.id_entrada == id_entrada)
+        .first()
+    )
     if not e:
         raise HTTPException(status_code=404, detail="Entrada no encontrada")
-    return {
-        "id_entrada": e.id_entrada,
-        "id_lote": e.id_lote,
-        "cantidad": e.cantidad,
-        "fecha_entrada": e.fecha_entrada,
-        "precio_compra_unitario": e.precio_compra_unitario,
-        "precio_compra_total": e.precio_compra_total,
-        "numero_factura_compra": e.numero_factura_compra,
-        "proveedor": e.proveedor,
-        "observaciones": e.observaciones,
-    }
+    return _serializar_entrada(e)
 
 
 @router.get("/estadisticas/mes", response_model=dict)
 def estadisticas_entradas_mes(
     mes: int = Query(..., ge=1, le=12),
-    año: int = Query(..., alias="año"),
-    db: Session = Depends(get_db),
+    año: int = Query(..., alias="año", ge=2000, le=9998),
+    db: Session = Depends(get_read_db),
     _: dict = Depends(require_permission(Permission.INVENTORY_READ)),
 ):
-    from sqlalchemy import extract, func
+    from sqlalchemy import func
 
     q = db.query(
         func.count(models.Entrada.id_entrada).label("cantidad_entradas"),
         func.sum(models.Entrada.precio_compra_total).label("total_compras"),
         func.avg(models.Entrada.precio_compra_total).label("promedio_entrada"),
         func.sum(models.Entrada.cantidad).label("total_unidades"),
-    ).filter(
-        extract("month", models.Entrada.fecha_entrada) == mes,
-        extract("year", models.Entrada.fecha_entrada) == año,
-    )
+    ).filter(*period_predicates(models.Entrada.fecha_entrada, mes, año))
     result = q.first()
     return {
         "mes": mes,
@@ -153,20 +181,18 @@ def estadisticas_entradas_mes(
 
 @router.get("/estadisticas/año", response_model=dict)
 def estadisticas_entradas_año(
-    año: int = Query(..., alias="año"),
-    db: Session = Depends(get_db),
+    año: int = Query(..., alias="año", ge=2000, le=9998),
+    db: Session = Depends(get_read_db),
     _: dict = Depends(require_permission(Permission.INVENTORY_READ)),
 ):
-    from sqlalchemy import extract, func
+    from sqlalchemy import func
 
     q = db.query(
         func.count(models.Entrada.id_entrada).label("cantidad_entradas"),
         func.sum(models.Entrada.precio_compra_total).label("total_compras"),
         func.avg(models.Entrada.precio_compra_total).label("promedio_entrada"),
         func.sum(models.Entrada.cantidad).label("total_unidades"),
-    ).filter(
-        extract("year", models.Entrada.fecha_entrada) == año,
-    )
+    ).filter(*period_predicates(models.Entrada.fecha_entrada, año=año))
     result = q.first()
     return {
         "año": año,
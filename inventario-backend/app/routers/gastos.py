@@ -1,5 +1,7 @@
 """Router para gestión de gastos."""
 
+from typing import Any, Literal
+
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import extract, func
 from sqlalchemy.orm import Session
@@ -7,7 +9,9 @@ from sqlalchemy.orm import Session
 from app.core.auth_middleware import require_permission
 from app.core.roles import Permission
 from app.models import models, schemas
-from app.models.database import get_db
+from app.models.database import get_db, get_read_db
+from app.models.filters import apply_period_filter, period_predicates
+from app.models.pagination import CountMode, PaginatedResponse, keyset_page
 
 router = APIRouter(prefix="/gastos", tags=["Gastos"])
 
@@ -26,26 +30,38 @@ def crear_gasto(
     return db_gasto
 
 
-@router.get("/", response_model=list[schemas.GastoResponse])
+@router.get(
+    "/",
+    response_model=list[schemas.GastoResponse] | PaginatedResponse[schemas.GastoResponse],
+)
 def listar_gastos(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     mes: int | None = Query(None, ge=1, le=12),
-    año: int | None = Query(None, ge=2000),
+    año: int | None = Query(None, ge=2000, le=9998),
     categoria: str | None = None,
+    paginacion: Literal["offset", "cursor"] = Query(
+        "offset", description="`cursor` activa la paginación keyset (sin OFFSET)"
+    ),
+    cursor: str | None = Query(None, description="Cursor opaco devuelto en `pagination`"),
+    conteo: CountMode = Query("none", description="Total en modo cursor: exact/estimate/none"),
     db: Session = Depends(get_db),
     _: dict = Depends(require_permission(Permission.INVENTORY_READ)),
 ):
     """Listar gastos con filtros opcionales."""
     query = db.query(models.Gasto)
 
-    if mes:
-        query = query.filter(extract('month', models.Gasto.fecha_gasto) == mes)
-    if año:
-        query = query.filter(extract('year', models.Gasto.fecha_gasto) == año)
+    query = apply_period_filter(query, models.Gasto.fecha_gasto, mes, año)
     if categoria:
         query = query.filter(models.Gasto.categoria == categoria)
 
+    if paginacion == "cursor" or cursor:
+        try:
+            columnas = (models.Gasto.fecha_gasto, models.Gasto.id_gasto)
+            return keyset_page(db, query, columnas, limit, cursor, conteo)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
     gastos = query.order_by(models.Gasto.fecha_gasto.desc()).offset(skip).limit(limit).all()
     return gastos
 
@@ -66,31 +82,20 @@ def obtener_gasto(
 @router.get("/estadisticas/mes", response_model=schemas.GastoEstadisticasMes)
 def estadisticas_gastos_mes(
     mes: int = Query(..., ge=1, le=12),
-    año: int = Query(..., ge=2000),
-    db: Session = Depends(get_db),
+    año: int = Query(..., ge=2000, le=9998),
+    db: Session = Depends(get_read_db),
     _: dict = Depends(require_permission(Permission.INVENTORY_READ)),
 ):
     """Obtener estadísticas de gastos de un mes específico."""
-    # Total del mes
-    resultado_total = (
+    # Total y cantidad salen de la misma agrupación por categoría
+    resultado_categorias = (
         db.query(
-            func.sum(models.Gasto.monto).label("total_gastos"),
-            func.count(models.Gasto.id_gasto).label("cantidad_gastos"),
+            models.Gasto.categoria,
+            func.sum(models.Gasto.monto).label("total"),
+            func.count(models.Gasto.id_gasto).label("cantidad"),
         )
         .filter(
-            extract('month', models.Gasto.fecha_gasto) == mes,
-            extract('year', models.Gasto.fecha_gasto) == año,
-            models.Gasto.estado == "Activo",
-        )
-        .first()
-    )
-
-    # Total por categoría
-    resultado_categorias = (
-        db.query(models.Gasto.categoria, func.sum(models.Gasto.monto).label("total"))
-        .filter(
-            extract('month', models.Gasto.fecha_gasto) == mes,
-            extract('year', models.Gasto.fecha_gasto) == año,
+            *period_predicates(models.Gasto.fecha_gasto, mes, año),
             models.Gasto.estado == "Activo",
         )
         .group_by(models.Gasto.categoria)
@@ -102,107 +107,57 @@ def estadisticas_gastos_mes(
     return {
         "mes": mes,
         "año": año,
-        "total_gastos": getattr(resultado_total, "total_gastos", 0.0) or 0.0,
-        "cantidad_gastos": getattr(resultado_total, "cantidad_gastos", 0) or 0,
+        "total_gastos": sum(r.total or 0.0 for r in resultado_categorias),
+        "cantidad_gastos": sum(r.cantidad for r in resultado_categorias),
         "por_categoria": por_categoria,
     }
 
 
 @router.get("/estadisticas/año", response_model=schemas.GastoEstadisticasAño)
 def estadisticas_gastos_año(
-    año: int = Query(..., ge=2000),
-    db: Session = Depends(get_db),
+    año: int = Query(..., ge=2000, le=9998),
+    db: Session = Depends(get_read_db),
     _: dict = Depends(require_permission(Permission.INVENTORY_READ)),
 ):
     """Obtener estadísticas de gastos de un año completo."""
-    # Total del año
-    resultado_año = (
+    # Una consulta agrupada por mes y categoría sobre el rango del año (antes: una por mes)
+    mes_gasto = extract('month', models.Gasto.fecha_gasto)
+    resultado = (
         db.query(
-            func.sum(models.Gasto.monto).label("total_gastos"),
-            func.count(models.Gasto.id_gasto).label("cantidad_gastos"),
+            mes_gasto.label("mes"),
+            models.Gasto.categoria,
+            func.sum(models.Gasto.monto).label("total"),
+            func.count(models.Gasto.id_gasto).label("cantidad"),
         )
-        .filter(extract('year', models.Gasto.fecha_gasto) == año, models.Gasto.estado == "Activo")
-        .first()
-    )
-
-    # Estadísticas por mes
-    resultado_meses = (
-        db.query(
-            extract('month', models.Gasto.fecha_gasto).label("mes"),
-            func.sum(models.Gasto.monto).label("total_gastos"),
-            func.count(models.Gasto.id_gasto).label("cantidad_gastos"),
+        .filter(
+            *period_predicates(models.Gasto.fecha_gasto, año=año),
+            models.Gasto.estado == "Activo",
         )
-        .filter(extract('year', models.Gasto.fecha_gasto) == año, models.Gasto.estado == "Activo")
-        .group_by(extract('month', models.Gasto.fecha_gasto))
+        .group_by(mes_gasto, models.Gasto.categoria)
         .all()
     )
 
-    meses = []
-    for r in resultado_meses:
-        # Obtener gastos por categoría para este mes
-        resultado_cat = (
-            db.query(models.Gasto.categoria, func.sum(models.Gasto.monto).label("total"))
-            .filter(
-                extract('month', models.Gasto.fecha_gasto) == int(r.mes),
-                extract('year', models.Gasto.fecha_gasto) == año,
-                models.Gasto.estado == "Activo",
-            )
-            .group_by(models.Gasto.categoria)
-            .all()
-        )
-
-        por_categoria = {cat.categoria: cat.total for cat in resultado_cat}
-
-        meses.append(
+    por_mes: dict[int, dict[str, Any]] = {}
+    for r in resultado:
+        mes = por_mes.setdefault(
+            int(r.mes),
             {
                 "mes": int(r.mes),
                 "año": año,
-                "total_gastos": r.total_gastos or 0.0,
-                "cantidad_gastos": r.cantidad_gastos or 0,
-                "por_categoria": por_categoria,
-            }
+                "total_gastos": 0.0,
+                "cantidad_gastos": 0,
+                "por_categoria": {},
+            },
         )
+        mes["total_gastos"] += r.total or 0.0
+        mes["cantidad_gastos"] += r.cantidad
+        mes["por_categoria"][r.categoria] = r.total
+
+    meses = [por_mes[m] for m in sorted(por_mes)]
 
     return {
         "año": año,
-        "total_gastos": getattr(resultado_año, "total_gastos", 0.0) or 0.0,
-        "cantidad_gastos": getattr(resultado_año, "cantidad_gastos", 0) or 0,
+        "total_gastos": sum(m["total_gastos"] for m in meses),
+        "cantidad_gastos": sum(m["cantidad_gastos"] for m in meses),
         "meses": meses,
     }
-
-
-@router.patch("/{id_gasto}", response_model=schemas.GastoResponse)
-def actualizar_gasto(
-    id_gasto: int,
-    gasto_update: schemas.GastoUpdate,
-    db: Session = Depends(get_db),
-    _: dict = Depends(require_permission(Permission.INVENTORY_WRITE)),
-):
-    """Actualizar un gasto."""
-    gasto = db.query(models.Gasto).filter(models.Gasto.id_gasto == id_gasto).first()
-    if not gasto:
-        raise HTTPException(status_code=404, detail="Gasto no encontrado")
-
-    update_data = gasto_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(gasto, field, value)
-
-    db.commit()
-    db.refresh(gasto)
-    return gasto
-
-
-@router.delete("/{id_gasto}", status_code=status.HTTP_204_NO_CONTENT)
-def eliminar_gasto(
-    id_gasto: int,
-    db: Session = Depends(get_db),
-    _: dict = Depends(require_permission(Permission.INVENTORY_DELETE)),
-):
-    """Eliminar (marcar como inactivo) un gasto."""
-    gasto = db.query(models.Gasto).filter(models.Gasto.id_gasto == id_gasto).first()
-    if not gasto:
-        raise HTTPException(status_code=404, detail="Gasto no encontrado")
-
-    gasto.estado = "Inactivo"  # type: ignore[assignment]
-    db.commit()
-    return None
@@ -188,6 +188,10 @@ async def application_metrics() -> dict[str, Any]:
             "p95_bucket_seconds": latency.get("p95_bucket_seconds"),
             "observations": latency.get("observation_count"),
         },
+        # Consultas SQL por request y sospechas de N+1, por ruta (QueryCounterMiddleware)
+        "db_queries_by_route": metrics_manager.db_request_summary(),
+        # Tamaño de los valores escritos en Redis por prefijo de clave (antes/después de comprimir)
+        "cache_sizes_by_prefix": metrics_manager.cache_size_summary(),
     }
 
 
@@ -7,11 +7,12 @@ from typing import Any
 
 from fastapi import APIRouter, Depends, status
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.cache import cache_manager
 from app.core.config import settings
-from app.models.database import get_db
+from app.models.database import get_async_db, get_read_db, pool_status, replica_monitor
 
 router = APIRouter(prefix="/health", tags=["Health"])
 
@@ -30,7 +31,7 @@ async def liveness_check() -> dict[str, Any]:
 
 
 @router.get("/readiness", status_code=status.HTTP_200_OK)
-async def readiness_check(db: Session = Depends(get_db)) -> dict[str, Any]:
+async def readiness_check(db: AsyncSession = Depends(get_async_db)) -> dict[str, Any]:
     """
     Readiness probe para Kubernetes/Docker.
     Verifica que la aplicación esté lista para recibir tráfico.
@@ -44,7 +45,7 @@ async def readiness_check(db: Session = Depends(get_db)) -> dict[str, Any]:
     # Check Database
     try:
         start = time.time()
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         db_latency = round((time.time() - start) * 1000, 2)
         checks["database"] = True
         checks["database_latency_ms"] = db_latency
@@ -57,8 +58,8 @@ async def readiness_check(db: Session = Depends(get_db)) -> dict[str, Any]:
     if redis_enabled:
         try:
             start = time.time()
-            cache_manager.set("health_check", "ok", ttl=10)
-            result = cache_manager.get("health_check")
+            await cache_manager.aset("health_check", "ok", ttl=10)
+            result = await cache_manager.aget("health_check")
             redis_latency = round((time.time() - start) * 1000, 2)
             checks["redis"] = result == "ok"
             checks["redis_latency_ms"] = redis_latency
@@ -82,7 +83,7 @@ async def readiness_check(db: Session = Depends(get_db)) -> dict[str, Any]:
 
 
 @router.get("/startup", status_code=status.HTTP_200_OK)
-async def startup_check(db: Session = Depends(get_db)) -> dict[str, Any]:
+async def startup_check(db: AsyncSession = Depends(get_async_db)) -> dict[str, Any]:
     """
     Startup probe para Kubernetes.
     Verifica que la aplicación haya completado la inicialización.
@@ -95,14 +96,14 @@ async def startup_check(db: Session = Depends(get_db)) -> dict[str, Any]:
 
     # Check DB connection
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         checks["database_connection"] = True
     except Exception as e:
         errors.append(f"DB Connection: {str(e)}")
 
     # Check DB migrations (verifica tabla alembic_version)
     try:
-        result = db.execute(text("SELECT version_num FROM alembic_version LIMIT 1"))
+        result = await db.execute(text("SELECT version_num FROM alembic_version LIMIT 1"))
         version = result.scalar()
         checks["database_migration"] = version is not None
         checks["alembic_version"] = version
@@ -124,7 +125,7 @@ async def startup_check(db: Session = Depends(get_db)) -> dict[str, Any]:
 
 
 @router.get("/detailed", response_model=dict)
-def get_detailed_health(db: Session = Depends(get_db)) -> dict[str, Any]:
+def get_detailed_health(db: Session = Depends(get_read_db)) -> dict[str, Any]:
     """
     Health check detallado con métricas del sistema.
     Incluye latencias, pool de conexiones, memoria, etc.
@@ -142,13 +143,16 @@ def get_detailed_health(db: Session = Depends(get_db)) -> dict[str, Any]:
         start = time.time()
         db.execute(text("SELECT 1"))
         db_latency = round((time.time() - start) * 1000, 2)
+        pools = pool_status()
         checks["database"] = {
             "status": "healthy",
             "latency_ms": db_latency,
-            "pool_size": db.bind.pool.size(),  # type: ignore[union-attr]
-            "pool_checked_in": db.bind.pool.checkedin(),  # type: ignore[union-attr]
-            "pool_checked_out": db.bind.pool.checkedout(),  # type: ignore[union-attr]
-            "pool_overflow": db.bind.pool.overflow(),  # type: ignore[union-attr]
+            "pool_size": pools["primary"].get("pool_size"),
+            "pool_checked_in": pools["primary"].get("checked_in"),
+            "pool_checked_out": pools["primary"].get("checked_out"),
+            "pool_overflow": pools["primary"].get("overflow"),
+            "pools": pools,
+            "replica": replica_monitor.estado(),
         }
     except Exception as e:
         checks["database"] = {"status": "unhealthy", "error": str(e)}
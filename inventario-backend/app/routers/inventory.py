@@ -1,32 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth_middleware import require_product_read
-from app.models.database import get_db
+from app.crud.kpis_inventario import calcular_kpis_inventario
+from app.crud.snapshot_inventario import leer_snapshot
+from app.models.database import get_async_db
 from app.models.schemas import InventorySummaryResponse
-from app.services.producto_service import ProductoService
 
 router = APIRouter(prefix="/inventory", tags=["Inventario"])
 
 
 @router.get("", response_model=InventorySummaryResponse)
 async def obtener_resumen_inventario(
-    db: Session = Depends(get_db), _: dict = Depends(require_product_read())
+    db: AsyncSession = Depends(get_async_db), _: dict = Depends(require_product_read())
 ):
     """Obtener resumen general del inventario"""
     try:
-        # Obtener métricas del inventario
-        total_productos = ProductoService.get_total_productos_activos(db)
-        valor_total_stock = ProductoService.get_valor_total_stock(db)
-        productos_bajo_stock = ProductoService.count_productos_bajo_stock(db)
+        # Snapshot precalculado; si aún no existe, agregados en una sola consulta
+        kpis = await db.run_sync(leer_snapshot)
+        if kpis is None:
+            kpis = await db.run_sync(calcular_kpis_inventario)
 
         return {
             "success": True,
             "message": "Resumen de inventario obtenido exitosamente",
             "data": {
-                "total_productos": total_productos,
-                "valor_total_stock": round(valor_total_stock, 2),
-                "productos_bajo_stock": productos_bajo_stock,
+                "total_productos": kpis["productos_activos"],
+                "valor_total_stock": kpis["valor_total_inventario"],
+                "productos_bajo_stock": kpis["productos_bajo_stock"],
             },
         }
     except Exception as e:
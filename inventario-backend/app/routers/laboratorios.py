@@ -1,10 +1,10 @@
 import logging
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Response
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth_middleware import require_product_read, require_product_write
-from app.models.database import get_db
+from app.models.database import get_async_db
 from app.models.schemas import (
     LaboratorioBase,
     LaboratorioCreate,
@@ -23,7 +23,7 @@ logger = logging.getLogger(__name__)
 
 @router.get("", response_model=LaboratorioPaginatedResponse)
 async def listar_laboratorios(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
     nombre_laboratorio: str | None = Query(None),
@@ -37,7 +37,9 @@ async def listar_laboratorios(
             if v is not None
         }
 
-        laboratorios, total = LaboratorioService.listar(db, page, size, filtros)
+        laboratorios, total, total_exact = await db.run_sync(
+            LaboratorioService.listar, page, size, filtros, "cached"
+        )
         total_pages = (total + size - 1) // size
 
         laboratorios_data = [LaboratorioBase.model_validate(lab) for lab in laboratorios]
@@ -49,6 +51,7 @@ async def listar_laboratorios(
                 "page": page,
                 "size": size,
                 "total": total,
+                "total_exact": total_exact,
                 "pages": total_pages,
                 "has_next": page < total_pages,
                 "has_prev": page > 1,
@@ -63,10 +66,10 @@ async def listar_laboratorios(
 @router.get("/{id_laboratorio}", response_model=LaboratorioResponse)
 async def obtener_laboratorio(
     id_laboratorio: int = Path(..., gt=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_read()),
 ):
-    laboratorio = LaboratorioService.obtener_por_id(db, id_laboratorio)
+    laboratorio = await db.run_sync(LaboratorioService.obtener_por_id, id_laboratorio)
     if not laboratorio:
         raise HTTPException(status_code=404, detail="Laboratorio no encontrado")
     laboratorio_data = LaboratorioBase.model_validate(laboratorio)
@@ -76,12 +79,12 @@ async def obtener_laboratorio(
 @router.post("", response_model=LaboratorioCreateResponse)
 async def crear_laboratorio(
     laboratorio: LaboratorioCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_write()),
     response: Response = None,  # type: ignore[assignment]
 ):
     laboratorio_data = laboratorio.model_dump()
-    nuevo_id = LaboratorioService.crear(db, laboratorio_data)
+    nuevo_id = await db.run_sync(LaboratorioService.crear, laboratorio_data)
     if response is not None:
         response.headers["Location"] = f"/api/v1/laboratorios/{nuevo_id}"
     return crear_respuesta(
@@ -93,12 +96,12 @@ async def crear_laboratorio(
 async def actualizar_laboratorio(
     id_laboratorio: int = Path(..., gt=0),
     laboratorio: LaboratorioUpdate = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_write()),
 ):
     try:
         updates = laboratorio.model_dump(exclude_unset=True)
-        if not LaboratorioService.actualizar(db, id_laboratorio, updates):
+        if not await db.run_sync(LaboratorioService.actualizar, id_laboratorio, updates):
             raise HTTPException(status_code=404, detail="Laboratorio no encontrado")
         return crear_respuesta(message="Laboratorio actualizado exitosamente")
     except ValueError as e:
@@ -109,10 +112,10 @@ async def actualizar_laboratorio(
 async def eliminar_laboratorio(
     id_laboratorio: int = Path(..., gt=0),
     modo: str = Query("logico", pattern="^(logico|fisico)$"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_write()),
 ):
-    if not LaboratorioService.eliminar(db, id_laboratorio, modo):
+    if not await db.run_sync(LaboratorioService.eliminar, id_laboratorio, modo):
         raise HTTPException(status_code=404, detail="Laboratorio no encontrado")
     return crear_respuesta(
         message=f"Laboratorio {'eliminado' if modo == 'fisico' else 'desactivado'} exitosamente"
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.auth_middleware import require_product_read, require_product_write
@@ -11,7 +12,7 @@ from app.crud.producto import (
     search_productos,
     update_producto,
 )
-from app.models.database import get_db
+from app.models.database import get_async_db, get_db
 from app.models.schemas import (
     MessageResponse,
     ProductoBase,
@@ -20,6 +21,7 @@ from app.models.schemas import (
     ProductoResponse,
     ProductoUpdate,
 )
+from app.services.importacion_productos import TAMANO_LOTE_IMPORTACION, ImportadorProductos
 
 router = APIRouter(tags=["Productos"])
 
@@ -34,12 +36,12 @@ async def buscar_productos(
     q: str = Query(..., min_length=1, max_length=100),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_read()),
 ):
     """Buscar productos por texto"""
     try:
-        productos = search_productos(db, q, skip, limit)
+        productos = await db.run_sync(search_productos, q, skip, limit)
         productos_data = [ProductoBase.model_validate(p).model_dump() for p in productos]
         return {
             "success": True,
@@ -53,13 +55,13 @@ async def buscar_productos(
 
 @router.get("/bajo-stock", response_model=dict)
 async def productos_bajo_stock(
-    db: Session = Depends(get_db), _: dict = Depends(require_product_read())
+    db: AsyncSession = Depends(get_async_db), _: dict = Depends(require_product_read())
 ):
     """Obtener productos con stock bajo"""
     try:
         from app.crud.producto import get_productos_bajo_stock
 
-        productos = get_productos_bajo_stock(db)
+        productos = await db.run_sync(get_productos_bajo_stock)
         productos_data = [ProductoBase.model_validate(p).model_dump() for p in productos]
         return {
             "success": True,
@@ -75,14 +77,14 @@ async def productos_bajo_stock(
 @router.get("/por-vencer", response_model=dict)
 async def productos_por_vencer(
     dias: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_read()),
 ):
     """Obtener productos próximos a vencer"""
     try:
         from app.crud.producto import get_productos_por_vencer
 
-        productos = get_productos_por_vencer(db, dias)
+        productos = await db.run_sync(get_productos_por_vencer, dias)
         productos_data = [ProductoBase.model_validate(p).model_dump() for p in productos]
         return {
             "success": True,
@@ -104,14 +106,14 @@ async def listar_productos(
     id_seccion: int | None = None,
     id_laboratorio: int | None = None,
     estado: str | None = Query("Activo"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_read()),
 ):
     """Listar productos con filtros opcionales y paginación"""
     try:
-        productos = get_productos(
-            db=db,
-            params={
+        productos = await db.run_sync(
+            get_productos,
+            {
                 "skip": skip,
                 "limit": limit,
                 "nombre": nombre,
@@ -122,8 +124,8 @@ async def listar_productos(
         )
 
         # Calcular total con COUNT() sobre los mismos filtros
-        total = count_productos(
-            db=db,
+        total = await db.run_sync(
+            count_productos,
             nombre=nombre,
             id_seccion=id_seccion,
             id_laboratorio=id_laboratorio,
@@ -181,11 +183,11 @@ async def listar_productos(
 
 @router.get("/{producto_id}", response_model=ProductoResponse)
 async def obtener_producto(
-    producto_id: int, db: Session = Depends(get_db), _: dict = Depends(require_product_read())
+    producto_id: int, db: AsyncSession = Depends(get_async_db), _: dict = Depends(require_product_read())
 ):
     """Obtener un producto específico por ID"""
     try:
-        producto = get_producto_by_id(db, producto_id)
+        producto = await db.run_sync(get_producto_by_id, producto_id)
         if not producto:
             raise HTTPException(status_code=404, detail="Producto no encontrado")
 
@@ -214,16 +216,44 @@ async def obtener_producto(
         raise HTTPException(status_code=500, detail=f"Error al obtener producto: {str(e)}") from e
 
 
+@router.post("/importar", response_model=dict)
+def importar_productos(
+    archivo: UploadFile = File(..., description="Catálogo en CSV (con encabezados) o NDJSON"),
+    tamano_lote: int = Query(TAMANO_LOTE_IMPORTACION, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    _: dict = Depends(require_product_write()),
+):
+    """Importar productos en bloque con upsert por código de barras.
+
+    Las filas inválidas se reportan con su número de fila sin abortar el resto del archivo.
+    Endpoint síncrono a propósito: FastAPI lo ejecuta en el threadpool, así que leer y
+    validar un archivo grande no bloquea el event loop.
+    """
+    formato = ImportadorProductos.detectar_formato(archivo.filename, archivo.content_type)
+    if formato is None:
+        raise HTTPException(status_code=415, detail="Formato no soportado: use CSV o NDJSON")
+
+    resumen = ImportadorProductos.importar(db, archivo.file, formato, tamano_lote)
+    return {
+        "success": resumen["con_error"] == 0,
+        "message": (
+            f"Importación finalizada: {resumen['creados']} creados, "
+            f"{resumen['actualizados']} actualizados, {resumen['con_error']} con error"
+        ),
+        "data": resumen,
+    }
+
+
 @router.post("", response_model=dict)
 async def crear_producto(
     producto: ProductoCreate,
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_write()),
 ):
     """Crear un nuevo producto"""
     try:
-        nuevo_producto = create_producto(db, producto)
+        nuevo_producto = await db.run_sync(create_producto, producto)
         # Set Location header to created resource
         response.headers["Location"] = f"/api/v1/productos/{nuevo_producto.id_producto}"
         # Convertir el objeto SQLAlchemy a diccionario
@@ -254,12 +284,12 @@ async def crear_producto(
 async def actualizar_producto(
     producto_id: int,
     producto_update: ProductoUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_write()),
 ):
     """Actualizar un producto existente"""
     try:
-        producto_actualizado = update_producto(db, producto_id, producto_update)
+        producto_actualizado = await db.run_sync(update_producto, producto_id, producto_update)
         if not producto_actualizado:
             raise HTTPException(status_code=404, detail="Producto no encontrado")
 
@@ -300,12 +330,12 @@ async def actualizar_producto(
 async def eliminar_producto(
     producto_id: int,
     modo: str = Query("logico", pattern="^(logico|fisico)$"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_write()),
 ):
     """Eliminar un producto (lógico o físico)"""
     try:
-        eliminado = delete_producto(db, producto_id, modo == "logico")
+        eliminado = await db.run_sync(delete_producto, producto_id, modo == "logico")
         if not eliminado:
             raise HTTPException(status_code=404, detail="Producto no encontrado")
 
@@ -2,11 +2,15 @@
 Router avanzado de productos con filtros, paginación y caché
 """
 
+from typing import Any
+
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.auth_middleware import require_permission
 from app.core.cache import cache_manager
+from app.core.cache_warmer import cache_warmer
 from app.core.roles import Permission
 from app.crud.producto_advanced import (
     get_productos_advanced,
@@ -16,13 +20,86 @@ from app.crud.producto_advanced import (
     get_top_productos,
     search_productos_advanced,
 )
-from app.models.database import get_db
+from app.models.database import get_async_db
 from app.models.filters import ProductoFilters
 from app.models.pagination import PaginationParams
-from app.models.schemas import MessageResponse
+from app.models.schemas import MessageResponse, ProductoBase
 
 router = APIRouter(prefix="/productos", tags=["productos-advanced"])
 
+_TAGS_POR_LABORATORIO = ["productos", "laboratorios"]
+_TAGS_POR_SECCION = ["productos", "secciones"]
+_CLAVE_POR_LABORATORIO = "productos:stats:por_laboratorio"
+_CLAVE_POR_SECCION = "productos:stats:por_seccion"
+
+
+def _clave_advanced(
+    filters: ProductoFilters, pagination: PaginationParams, sort_by: str, order: str
+) -> str:
+    return (
+        f"productos:advanced:{filters.model_dump_json()}:{pagination.model_dump_json()}"
+        f":{sort_by}:{order}"
+    )
+
+
+def _clave_stats(filters: ProductoFilters) -> str:
+    return f"productos:stats:{filters.model_dump_json()}"
+
+
+def _con_filas_serializadas(resultado: dict[str, Any]) -> dict[str, Any]:
+    """Respuesta paginada con los productos como dicts JSON (cacheables), no objetos ORM."""
+    return {
+        **resultado,
+        "data": [ProductoBase.model_validate(p).model_dump(mode="json") for p in resultado["data"]],
+    }
+
+
+def _productos_advanced(
+    db: Session, filters: ProductoFilters, pagination: PaginationParams, sort_by: str, order: str
+) -> dict[str, Any]:
+    return _con_filas_serializadas(get_productos_advanced(db, filters, pagination, sort_by, order))
+
+
+# Recetas del precalentado: los parámetros se leen de la propia clave (JSON de los filtros)
+cache_warmer.registrar(
+    "productos_advanced",
+    r"productos:advanced:(\{[^{}]*\}):(\{[^{}]*\}):(\w+):(asc|desc)",
+    _clave_advanced(ProductoFilters(), PaginationParams(), "nombre_producto", "asc"),
+    lambda db, m: _productos_advanced(
+        db,
+        ProductoFilters.model_validate_json(m[1]),
+        PaginationParams.model_validate_json(m[2]),
+        m[3],
+        m[4],
+    ),
+    300,
+    ["productos"],
+)
+cache_warmer.registrar(
+    "productos_stats",
+    r"productos:stats:(\{[^{}]*\})",
+    _clave_stats(ProductoFilters()),
+    lambda db, m: get_productos_stats(db, ProductoFilters.model_validate_json(m[1])),
+    300,
+    ["productos"],
+)
+cache_warmer.registrar(
+    "productos_por_laboratorio",
+    _CLAVE_POR_LABORATORIO,
+    _CLAVE_POR_LABORATORIO,
+    lambda db, _: get_productos_por_laboratorio_stats(db),
+    600,
+    _TAGS_POR_LABORATORIO,
+)
+cache_warmer.registrar(
+    "productos_por_seccion",
+    _CLAVE_POR_SECCION,
+    _CLAVE_POR_SECCION,
+    lambda db, _: get_productos_por_seccion_stats(db),
+    600,
+    _TAGS_POR_SECCION,
+)
+
 
 @router.get("/advanced", response_model=dict)
 async def get_productos_with_filters(
@@ -47,7 +124,7 @@ async def get_productos_with_filters(
     sort_by: str = Query("nombre_producto", description="Campo para ordenar"),
     order: str = Query("asc", pattern="^(asc|desc)$", description="Dirección del ordenamiento"),
     # Dependencias
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_permission(Permission.PRODUCT_READ)),
 ):
     """
@@ -77,21 +154,15 @@ async def get_productos_with_filters(
 
     pagination = PaginationParams(page=page, size=size)
 
-    # Generar clave de caché
-    cache_key = f"productos:advanced:{filters.model_dump_json()}:{pagination.model_dump_json()}:{sort_by}:{order}"
-
-    # Intentar obtener del caché
-    cached_result = cache_manager.get(cache_key)
-    if cached_result:
-        return cached_result
-
-    # Obtener datos de la base de datos
-    result = get_productos_advanced(db, filters, pagination, sort_by, order)
-
-    # Cachear resultado por 5 minutos
-    cache_manager.set(cache_key, result, ttl=300)
+    # Cachear resultado por 5 minutos (un solo recálculo concurrente por clave)
+    lectura = await cache_manager.aget_or_compute(
+        _clave_advanced(filters, pagination, sort_by, order),
+        lambda: db.run_sync(_productos_advanced, filters, pagination, sort_by, order),
+        ttl=300,
+        tags=["productos"],
+    )
 
-    return result
+    return lectura.valor
 
 
 @router.get("/search", response_model=dict)
@@ -102,7 +173,7 @@ async def search_productos(
     id_laboratorio: int | None = Query(None, description="Filtrar por laboratorio"),
     id_seccion: int | None = Query(None, description="Filtrar por sección"),
     estado: str | None = Query("Activo", description="Estado del producto"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_permission(Permission.PRODUCT_READ)),
 ):
     """
@@ -123,15 +194,17 @@ async def search_productos(
     cache_key = f"productos:search:{q}:{filters.model_dump_json()}:{pagination.model_dump_json()}"
 
     # Intentar obtener del caché
-    cached_result = cache_manager.get(cache_key)
+    cached_result = await cache_manager.aget(cache_key)
     if cached_result:
         return cached_result
 
     # Buscar en la base de datos
-    result = search_productos_advanced(db, q, pagination, filters)
+    result = _con_filas_serializadas(
+        await db.run_sync(search_productos_advanced, q, pagination, filters)
+    )
 
     # Cachear resultado por 3 minutos
-    cache_manager.set(cache_key, result, ttl=180)
+    await cache_manager.aset(cache_key, result, ttl=180, tags=["productos"])
 
     return result
 
@@ -141,7 +214,7 @@ async def get_stats(
     id_laboratorio: int | None = Query(None, description="Filtrar por laboratorio"),
     id_seccion: int | None = Query(None, description="Filtrar por sección"),
     estado: str | None = Query("Activo", description="Estado del producto"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_permission(Permission.PRODUCT_READ)),
 ):
     """
@@ -158,25 +231,19 @@ async def get_stats(
     """
     filters = ProductoFilters(id_laboratorio=id_laboratorio, id_seccion=id_seccion, estado=estado)
 
-    # Generar clave de caché
-    cache_key = f"productos:stats:{filters.model_dump_json()}"
-
-    # Intentar obtener del caché
-    cached_result = cache_manager.get(cache_key)
-    if cached_result:
-        return {
-            "success": True,
-            "message": "Estadísticas obtenidas exitosamente",
-            "data": cached_result,
-        }
-
-    # Obtener estadísticas
-    stats = get_productos_stats(db, filters)
+    cache_key = _clave_stats(filters)
 
-    # Cachear resultado por 5 minutos
-    cache_manager.set(cache_key, stats, ttl=300)
+    # Cachear resultado por 5 minutos (un solo recálculo concurrente por clave)
+    lectura = await cache_manager.aget_or_compute(
+        cache_key, lambda: db.run_sync(get_productos_stats, filters), ttl=300, tags=["productos"]
+    )
 
-    return {"success": True, "message": "Estadísticas obtenidas exitosamente", "data": stats}
+    return {
+        "success": True,
+        "message": "Estadísticas obtenidas exitosamente",
+        "data": lectura.valor,
+        "stale": lectura.stale,
+    }
 
 
 @router.get("/top", response_model=dict)
@@ -187,7 +254,7 @@ async def get_top(
         pattern="^(stock|precio|nombre|stock_bajo)$",
         description="Criterio de ordenamiento",
     ),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_permission(Permission.PRODUCT_READ)),
 ):
     """
@@ -203,7 +270,7 @@ async def get_top(
     cache_key = f"productos:top:{limit}:{criterio}"
 
     # Intentar obtener del caché
-    cached_result = cache_manager.get(cache_key)
+    cached_result = await cache_manager.aget(cache_key)
     if cached_result:
         return {
             "success": True,
@@ -212,7 +279,7 @@ async def get_top(
         }
 
     # Obtener top productos
-    productos = get_top_productos(db, limit, criterio)
+    productos = await db.run_sync(get_top_productos, limit, criterio)
 
     # Convertir a diccionarios
     productos_dict = [
@@ -229,7 +296,9 @@ async def get_top(
     ]
 
     # Cachear resultado por 10 minutos
-    cache_manager.set(cache_key, productos_dict, ttl=600)
+    await cache_manager.aset(
+        cache_key, productos_dict, ttl=600, tags=["productos", "laboratorios", "secciones"]
+    )
 
     return {
         "success": True,
@@ -240,7 +309,8 @@ async def get_top(
 
 @router.get("/stats/por-laboratorio", response_model=dict)
 async def get_stats_por_laboratorio(
-    db: Session = Depends(get_db), _: dict = Depends(require_permission(Permission.PRODUCT_READ))
+    db: AsyncSession = Depends(get_async_db),
+    _: dict = Depends(require_permission(Permission.PRODUCT_READ)),
 ):
     """
     Obtener estadísticas de productos agrupados por laboratorio
@@ -250,34 +320,28 @@ async def get_stats_por_laboratorio(
     - Stock total
     - Valor total del inventario
     """
-    # Generar clave de caché
-    cache_key = "productos:stats:por_laboratorio"
-
-    # Intentar obtener del caché
-    cached_result = cache_manager.get(cache_key)
-    if cached_result:
-        return {
-            "success": True,
-            "message": "Estadísticas por laboratorio obtenidas exitosamente",
-            "data": cached_result,
-        }
-
-    # Obtener estadísticas
-    stats = get_productos_por_laboratorio_stats(db)
-
-    # Cachear resultado por 10 minutos
-    cache_manager.set(cache_key, stats, ttl=600)
+    cache_key = _CLAVE_POR_LABORATORIO
+
+    # Cachear resultado por 10 minutos (un solo recálculo concurrente por clave)
+    lectura = await cache_manager.aget_or_compute(
+        cache_key,
+        lambda: db.run_sync(get_productos_por_laboratorio_stats),
+        ttl=600,
+        tags=_TAGS_POR_LABORATORIO,
+    )
 
     return {
         "success": True,
         "message": "Estadísticas por laboratorio obtenidas exitosamente",
-        "data": stats,
+        "data": lectura.valor,
+        "stale": lectura.stale,
     }
 
 
 @router.get("/stats/por-seccion", response_model=dict)
 async def get_stats_por_seccion(
-    db: Session = Depends(get_db), _: dict = Depends(require_permission(Permission.PRODUCT_READ))
+    db: AsyncSession = Depends(get_async_db),
+    _: dict = Depends(require_permission(Permission.PRODUCT_READ)),
 ):
     """
     Obtener estadísticas de productos agrupados por sección
@@ -287,28 +351,21 @@ async def get_stats_por_seccion(
     - Stock total
     - Valor total del inventario
     """
-    # Generar clave de caché
-    cache_key = "productos:stats:por_seccion"
-
-    # Intentar obtener del caché
-    cached_result = cache_manager.get(cache_key)
-    if cached_result:
-        return {
-            "success": True,
-            "message": "Estadísticas por sección obtenidas exitosamente",
-            "data": cached_result,
-        }
-
-    # Obtener estadísticas
-    stats = get_productos_por_seccion_stats(db)
-
-    # Cachear resultado por 10 minutos
-    cache_manager.set(cache_key, stats, ttl=600)
+    cache_key = _CLAVE_POR_SECCION
+
+    # Cachear resultado por 10 minutos (un solo recálculo concurrente por clave)
+    lectura = await cache_manager.aget_or_compute(
+        cache_key,
+        lambda: db.run_sync(get_productos_por_seccion_stats),
+        ttl=600,
+        tags=_TAGS_POR_SECCION,
+    )
 
     return {
         "success": True,
         "message": "Estadísticas por sección obtenidas exitosamente",
-        "data": stats,
+        "data": lectura.valor,
+        "stale": lectura.stale,
     }
 
 
@@ -319,8 +376,8 @@ async def clear_productos_cache(_: dict = Depends(require_permission(Permission.
 
     Útil después de operaciones masivas de actualización
     """
-    # Limpiar caché de productos
-    deleted = cache_manager.delete_pattern("productos:*")
+    # Limpiar caché de productos (y lo que se calcula a partir de ellos)
+    deleted = await cache_manager.ainvalidate_tags("productos")
 
     return MessageResponse(
         success=True,
@@ -1,23 +1,33 @@
 """
 Router de exportación de reportes (CSV)
+
+Los exports se envían con StreamingResponse a medida que se leen de la base de datos. La sesión
+de `get_read_db` sigue abierta mientras se consume el generador: FastAPI cierra las
+dependencias con yield después de enviar la respuesta completa.
 """
 
-from fastapi import APIRouter, Depends, Query, Response
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.core.auth_middleware import require_admin
-from app.models.database import get_db
+from app.models.database import get_read_db
 from app.models.filters import ProductoFilters
 from app.models.models import Usuario
 from app.services.report_service import (
-    generate_laboratorios_csv,
-    generate_productos_csv,
-    generate_secciones_csv,
+    stream_laboratorios_csv,
+    stream_productos_csv,
+    stream_secciones_csv,
 )
 
 router = APIRouter(prefix="/reportes", tags=["reportes"])
 
 
+def _csv_response(contenido, filename: str) -> StreamingResponse:
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(contenido, media_type="text/csv", headers=headers)
+
+
 @router.get("/productos.csv")
 def export_productos_csv(
     # Filtros (alineados con ProductoFilters)
@@ -35,7 +45,7 @@ def export_productos_csv(
     estado: str | None = Query("Activo", description="Estado del producto"),
     forma_farmaceutica: str | None = Query(None, description="Forma farmacéutica"),
     # Dependencias
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Usuario = Depends(require_admin),
 ):
     """
@@ -57,35 +67,29 @@ def export_productos_csv(
         forma_farmaceutica=forma_farmaceutica,
     )
 
-    content = generate_productos_csv(db, filters)
-    headers = {"Content-Disposition": 'attachment; filename="productos.csv"'}
-    return Response(content=content, media_type="text/csv; charset=utf-8", headers=headers)
+    return _csv_response(stream_productos_csv(db, filters), "productos.csv")
 
 
 @router.get("/laboratorios.csv")
 def export_laboratorios_csv(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Usuario = Depends(require_admin),
 ):
     """
     Exporta laboratorios a CSV. Restringido a usuarios admin.
     """
-    content = generate_laboratorios_csv(db)
-    headers = {"Content-Disposition": 'attachment; filename="laboratorios.csv"'}
-    return Response(content=content, media_type="text/csv; charset=utf-8", headers=headers)
+    return _csv_response(stream_laboratorios_csv(db), "laboratorios.csv")
 
 
 @router.get("/secciones.csv")
 def export_secciones_csv(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Usuario = Depends(require_admin),
 ):
     """
     Exporta secciones a CSV. Restringido a usuarios admin.
     """
-    content = generate_secciones_csv(db)
-    headers = {"Content-Disposition": 'attachment; filename="secciones.csv"'}
-    return Response(content=content, media_type="text/csv; charset=utf-8", headers=headers)
+    return _csv_response(stream_secciones_csv(db), "secciones.csv")
 
 
 @router.get("/productos_stock_bajo.csv")
@@ -98,7 +102,7 @@ def export_productos_stock_bajo_csv(
     id_seccion: int | None = Query(None, description="Filtrar por sección"),
     forma_farmaceutica: str | None = Query(None, description="Forma farmacéutica"),
     estado: str | None = Query("Activo", description="Estado del producto"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Usuario = Depends(require_admin),
 ):
     """
@@ -116,6 +120,4 @@ def export_productos_stock_bajo_csv(
         stock_bajo=True,  # Forzado
     )
 
-    content = generate_productos_csv(db, filters)
-    headers = {"Content-Disposition": 'attachment; filename="productos_stock_bajo.csv"'}
-    return Response(content=content, media_type="text/csv; charset=utf-8", headers=headers)
+    return _csv_response(stream_productos_csv(db, filters), "productos_stock_bajo.csv")
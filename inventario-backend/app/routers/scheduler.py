@@ -6,6 +6,8 @@ Endpoints (solo admin):
 - POST   /api/v1/scheduler/stock-bajo/start     -> Inicia/actualiza el job de stock bajo (intervalo en horas)
 - POST   /api/v1/scheduler/stock-bajo/stop      -> Detiene el job de stock bajo
 - POST   /api/v1/scheduler/stock-bajo/run-now   -> Ejecuta una corrida inmediata del job de stock bajo
+- GET    /api/v1/scheduler/cache-warmer         -> Estado del precalentado del caché
+- POST   /api/v1/scheduler/cache-warmer/run-now -> Ejecuta el precalentado del caché ahora
 - POST   /api/v1/scheduler/start                -> Arranca el scheduler (si estuviera detenido)
 - POST   /api/v1/scheduler/stop                 -> Detiene el scheduler
 """
@@ -92,6 +94,39 @@ def run_stock_bajo_now(
     }
 
 
+@router.get("/cache-warmer", response_model=dict[str, Any])
+def get_cache_warmer_status(
+    current_user: Usuario = Depends(require_admin),
+) -> dict[str, Any]:
+    """
+    Estado del precalentado del caché (recetas, última corrida y próxima ejecución).
+    """
+    return {
+        "success": True,
+        "message": "Estado del precalentado del caché",
+        "data": scheduler_manager.cache_warmer_status(),
+    }
+
+
+@router.post("/cache-warmer/run-now", response_model=dict[str, Any])
+def run_cache_warmer_now(
+    current_user: Usuario = Depends(require_admin),
+) -> dict[str, Any]:
+    """
+    Ejecutar inmediatamente el precalentado del caché.
+    """
+    result = scheduler_manager.run_cache_warmer_now()
+    return {
+        "success": True,
+        "message": (
+            "Precalentado del caché ejecutado"
+            if result["started"]
+            else "El precalentado del caché ya está en curso"
+        ),
+        "data": result,
+    }
+
+
 @router.post("/start", response_model=dict[str, Any])
 def start_scheduler(
     current_user: Usuario = Depends(require_admin),
@@ -1,10 +1,10 @@
 import logging
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Response
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth_middleware import require_product_read, require_product_write
-from app.models.database import get_db
+from app.models.database import get_async_db
 from app.models.schemas import (
     MessageResponse,
     SeccionBase,
@@ -23,7 +23,7 @@ logger = logging.getLogger(__name__)
 
 @router.get("", response_model=SeccionPaginatedResponse)
 async def listar_secciones(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
     nombre_seccion: str | None = Query(None),
@@ -37,7 +37,9 @@ async def listar_secciones(
             if v is not None
         }
 
-        secciones, total = SeccionService.listar(db, page, size, filtros)
+        secciones, total, total_exact = await db.run_sync(
+            SeccionService.listar, page, size, filtros, "cached"
+        )
         total_pages = (total + size - 1) // size
 
         secciones_data = [SeccionBase.model_validate(s) for s in secciones]
@@ -49,6 +51,7 @@ async def listar_secciones(
                 "page": page,
                 "size": size,
                 "total": total,
+                "total_exact": total_exact,
                 "pages": total_pages,
                 "has_next": page < total_pages,
                 "has_prev": page > 1,
@@ -63,10 +66,10 @@ async def listar_secciones(
 @router.get("/{id_seccion}", response_model=SeccionResponse)
 async def obtener_seccion(
     id_seccion: int = Path(..., gt=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_read()),
 ):
-    seccion = SeccionService.obtener_por_id(db, id_seccion)
+    seccion = await db.run_sync(SeccionService.obtener_por_id, id_seccion)
     if not seccion:
         raise HTTPException(status_code=404, detail="Sección no encontrada")
     seccion_data = SeccionBase.model_validate(seccion)
@@ -76,13 +79,13 @@ async def obtener_seccion(
 @router.post("", response_model=SeccionCreateResponse)
 async def crear_seccion(
     seccion: SeccionCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_write()),
     response: Response = None,
 ):
     try:
         seccion_data = seccion.model_dump()
-        nuevo_id = SeccionService.crear(db, seccion_data)
+        nuevo_id = await db.run_sync(SeccionService.crear, seccion_data)
         if response is not None:
             response.headers["Location"] = f"/api/v1/secciones/{nuevo_id}"
         return crear_respuesta(message="Sección creada exitosamente", data={"id_seccion": nuevo_id})
@@ -94,12 +97,12 @@ async def crear_seccion(
 async def actualizar_seccion(
     id_seccion: int = Path(..., gt=0),
     seccion: SeccionUpdate = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_write()),
 ):
     try:
         updates = seccion.model_dump(exclude_unset=True)
-        if not SeccionService.actualizar(db, id_seccion, updates):
+        if not await db.run_sync(SeccionService.actualizar, id_seccion, updates):
             raise HTTPException(status_code=404, detail="Sección no encontrada")
         return crear_respuesta(message="Sección actualizada exitosamente")
     except ValueError as e:
@@ -110,11 +113,11 @@ async def actualizar_seccion(
 async def eliminar_seccion(
     id_seccion: int = Path(..., gt=0),
     modo: str = Query("logico", pattern="^(logico|fisico)$"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_product_write()),
 ):
     try:
-        if not SeccionService.eliminar(db, id_seccion, modo):
+        if not await db.run_sync(SeccionService.eliminar, id_seccion, modo):
             raise HTTPException(status_code=404, detail="Sección no encontrada")
         return crear_respuesta(
             message=f"Sección {'eliminada' if modo == 'fisico' else 'desactivada'} exitosamente"
@@ -1,13 +1,15 @@
 # app/routers/users.py
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.core.audit_logging import audit_logger
 from app.core.auth_middleware import require_permission
 from app.core.roles import Permission
 from app.crud.user import delete_user, get_users, update_user
-from app.models.database import get_db
+from app.models.database import get_async_db
 from app.models.models import Usuario
 from app.models.schemas import UserResponse, UserUpdate
 
@@ -21,7 +23,7 @@ def get_pagination_params(limit: int = Query(50, ge=1, le=1000), skip: int = Que
 @router.get("/users", response_model=list[UserResponse])
 async def list_users(
     pagination: dict = Depends(get_pagination_params),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_permission(Permission.USER_READ)),
 ):
     """
@@ -29,20 +31,22 @@ async def list_users(
     """
     limit = pagination.get("limit", 50)
     skip = pagination.get("skip", 0)
-    users = get_users(db, skip=skip, limit=limit)
+    users = await db.run_sync(get_users, skip=skip, limit=limit)
     return [UserResponse.model_validate(user) for user in users]
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(require_permission(Permission.USER_READ)),
 ):
     """
     Obtener usuario por ID (requiere permiso USER_READ)
     """
-    user = db.query(Usuario).filter(Usuario.id_usuario == user_id).first()
+    user = await db.scalar(
+        select(Usuario).options(selectinload(Usuario.rol)).where(Usuario.id_usuario == user_id)
+    )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return UserResponse.model_validate(user)
@@ -52,7 +56,7 @@ async def get_user(
 async def update_user_endpoint(
     user_id: int,
     user_data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(require_permission(Permission.USER_WRITE)),
     request: Request = None,  # type: ignore[assignment]
 ):
@@ -60,9 +64,13 @@ async def update_user_endpoint(
     Actualizar usuario (requiere permiso USER_WRITE)
     """
     try:
-        updated_user = update_user(db, user_id, user_data.model_dump(exclude_unset=True))
+        updated_user = await db.run_sync(
+            update_user, user_id, user_data.model_dump(exclude_unset=True)
+        )
         if not updated_user:
             raise HTTPException(status_code=404, detail="User not found")
+        # Cargar el rol explícitamente: un lazy load fuera de run_sync no es posible
+        await db.refresh(updated_user, ["rol"])
 
         # Log de auditoría
         if request:
@@ -84,7 +92,7 @@ async def update_user_endpoint(
 @router.delete("/users/{user_id}")
 async def delete_user_endpoint(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(require_permission(Permission.USER_DELETE)),
     request: Request = None,  # type: ignore[assignment]
 ):
@@ -94,7 +102,7 @@ async def delete_user_endpoint(
     if int(getattr(current_user, "id_usuario", 0)) == user_id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
 
-    success = delete_user(db, user_id, logical=True)
+    success = await db.run_sync(delete_user, user_id, logical=True)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -0,0 +1,73 @@
+"""Clear blank and duplicated product barcodes before the unique constraint.
+
+The migration ``20261017_codigo_barras_unique`` refuses to run while two
+products share a barcode. List the conflicts, and clear them once reviewed
+(blank barcodes become NULL; a duplicated barcode stays with the product with
+the lowest id_producto and is removed from the others):
+
+    python -m app.scripts.dedupe_codigo_barras            # dry run
+    python -m app.scripts.dedupe_codigo_barras --apply
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.database import SessionLocal
+from app.models.models import Producto
+
+
+def codigos_a_liberar(db: Session) -> list[tuple[int, str]]:
+    """(id_producto, codigo_barras) de los productos que perderían el código de barras."""
+    filas = db.query(Producto.id_producto, Producto.codigo_barras).filter(
+        Producto.codigo_barras.is_not(None)
+    )
+    vistos: set[str] = set()
+    liberados: list[tuple[int, str]] = []
+    for id_producto, codigo in filas.order_by(Producto.id_producto):
+        if not codigo.strip() or codigo in vistos:
+            liberados.append((id_producto, codigo))
+        vistos.add(codigo)
+    return liberados
+
+
+def liberar_codigos(db: Session, liberados: list[tuple[int, str]]) -> None:
+    """Dejar sin código de barras los productos indicados (sin commit)."""
+    if liberados:
+        db.execute(
+            update(Producto)
+            .where(Producto.id_producto.in_([id_producto for id_producto, _ in liberados]))
+            .values(codigo_barras=None)
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--apply", action="store_true", help="write the changes (default: dry run)")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        liberados = codigos_a_liberar(db)
+        for id_producto, codigo in liberados:
+            print(f"id_producto={id_producto} codigo_barras={codigo!r}")
+        if not args.apply:
+            print(f"{len(liberados)} barcodes would be cleared (dry run, use --apply)")
+            return 0
+        liberar_codigos(db, liberados)
+        db.commit()
+        print(f"{len(liberados)} barcodes cleared")
+        return 0
+    except Exception as e:
+        db.rollback()
+        print(f"Barcode cleanup failed: {e}", file=sys.stderr)
+        return 2
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,33 @@
+"""Rebuild the inventory KPI snapshot from scratch.
+
+Run once after applying the migration that creates the snapshot tables, and
+whenever the incrementally maintained totals need to be realigned:
+
+    python -m app.scripts.rebuild_inventory_snapshot
+"""
+from __future__ import annotations
+
+import sys
+
+from app.crud.snapshot_inventario import reconstruir_snapshot
+from app.models.database import SessionLocal
+
+
+def main() -> int:
+    db = SessionLocal()
+    try:
+        resumen = reconstruir_snapshot(db)
+        print(
+            f"Inventory snapshot rebuilt: {resumen['productos']} products, "
+            f"{resumen['ambitos']} scopes, {resumen['fechas']} expiry buckets"
+        )
+        return 0
+    except Exception as e:
+        print(f"Inventory snapshot rebuild failed: {e}", file=sys.stderr)
+        return 2
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
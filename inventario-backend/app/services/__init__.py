@@ -1,10 +1,14 @@
+from .entrada_service import EntradaService
 from .laboratorio_service import LaboratorioService
 from .producto_service import ProductoService
 from .services import AlertaService, SeccionService
+from .venta_service import VentaService
 
 __all__ = [
+    "EntradaService",
     "LaboratorioService",
     "ProductoService",
     "AlertaService",
     "SeccionService",
+    "VentaService",
 ]
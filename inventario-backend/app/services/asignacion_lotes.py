@@ -0,0 +1,139 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import ColumnElement, and_, or_
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import NotFoundError, StockInsuficienteException
+from app.models.models import Lote
+
+
+class _LoteDisponible:
+    __slots__ = ("id_lote", "id_producto", "disponible", "fecha_vencimiento", "estado")
+
+    def __init__(
+        self,
+        id_lote: int,
+        id_producto: int | None,
+        disponible: int,
+        fecha_vencimiento: datetime | None,
+        estado: str | None = "Activo",
+    ):
+        self.id_lote = id_lote
+        self.id_producto = id_producto
+        self.disponible = disponible
+        self.fecha_vencimiento = fecha_vencimiento
+        self.estado = estado
+
+
+class AsignadorLotesFEFO:
+    """Asigna cantidades a lotes en orden First-Expired-First-Out.
+
+    Trabaja sobre un índice en memoria por producto construido con una sola lectura
+    de todos los lotes del carrito; las reservas se descuentan del índice, de modo que
+    varias líneas del mismo producto (o un lote pedido explícitamente) no se solapan.
+    """
+
+    def __init__(self, lotes: list[_LoteDisponible], ahora: datetime | None = None):
+        ahora = ahora or datetime.now()
+        self._por_lote = {lote.id_lote: lote for lote in lotes}
+        self._por_producto: dict[int, list[_LoteDisponible]] = defaultdict(list)
+        # Un lote inactivo solo se vende si la línea lo pide por id, nunca por FEFO
+        for lote in lotes:
+            vencido = lote.fecha_vencimiento is not None and lote.fecha_vencimiento < ahora
+            if (
+                lote.id_producto is not None
+                and lote.estado == "Activo"
+                and lote.disponible > 0
+                and not vencido
+            ):
+                self._por_producto[lote.id_producto].append(lote)
+        # Sin fecha de vencimiento al final; id_lote desempata de forma estable
+        for candidatos in self._por_producto.values():
+            candidatos.sort(
+                key=lambda c: (c.fecha_vencimiento is None, c.fecha_vencimiento or ahora, c.id_lote)
+            )
+
+    @classmethod
+    def cargar(
+        cls, db: Session, ids_lote: list[int] | None = None, ids_producto: list[int] | None = None
+    ) -> "AsignadorLotesFEFO":
+        """Leer en una consulta los lotes pedidos por id y los activos de los productos dados.
+
+        En PostgreSQL las filas quedan bloqueadas (FOR UPDATE, en orden de id_lote) hasta
+        el commit de la venta.
+        """
+        condiciones: list[ColumnElement[bool]] = []
+        if ids_lote:
+            condiciones.append(Lote.id_lote.in_(ids_lote))
+        if ids_producto:
+            condiciones.append(
+                and_(
+                    Lote.id_producto.in_(ids_producto),
+                    Lote.estado == "Activo",
+                    Lote.cantidad_disponible > 0,
+                )
+            )
+        if not condiciones:
+            return cls([])
+
+        filas = (
+            db.query(
+                Lote.id_lote,
+                Lote.id_producto,
+                Lote.cantidad_disponible,
+                Lote.fecha_vencimiento,
+                Lote.estado,
+            )
+            .filter(or_(*condiciones))
+            .order_by(Lote.id_lote)
+            .with_for_update()
+            .all()
+        )
+        return cls(
+            [
+                _LoteDisponible(
+                    int(f.id_lote),
+                    f.id_producto,
+                    int(f.cantidad_disponible or 0),
+                    f.fecha_vencimiento,
+                    f.estado,
+                )
+                for f in filas
+            ]
+        )
+
+    def producto_de(self, id_lote: int) -> int | None:
+        return self._por_lote[id_lote].id_producto
+
+    def reservar_lote(self, id_lote: int, cantidad: int) -> list[tuple[int, int]]:
+        """Reservar `cantidad` de un lote concreto (línea con id_lote explícito)."""
+        lote = self._por_lote.get(id_lote)
+        if lote is None:
+            raise NotFoundError("Lote", str(id_lote))
+        if lote.disponible < cantidad:
+            raise StockInsuficienteException(lote.id_producto or 0, lote.disponible, cantidad)
+        lote.disponible -= cantidad
+        return [(id_lote, cantidad)]
+
+    def asignar(self, id_producto: int, cantidad: int) -> list[tuple[int, int]]:
+        """Repartir `cantidad` del producto entre sus lotes, primero los que vencen antes.
+
+        Devuelve pares (id_lote, cantidad); si el stock vigente no alcanza no reserva nada.
+        """
+        candidatos = self._por_producto.get(id_producto, [])
+        disponible = sum(lote.disponible for lote in candidatos)
+        if disponible < cantidad:
+            raise StockInsuficienteException(id_producto, disponible, cantidad)
+
+        asignaciones = []
+        pendiente = cantidad
+        for lote in candidatos:
+            if pendiente == 0:
+                break
+            tomado = min(lote.disponible, pendiente)
+            if tomado:
+                lote.disponible -= tomado
+                pendiente -= tomado
+                asignaciones.append((lote.id_lote, tomado))
+        return asignaciones
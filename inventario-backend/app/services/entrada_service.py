@@ -0,0 +1,74 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import NotFoundError
+from app.crud.stock import ajustar_stock_lotes, ajustar_stock_productos
+from app.models.models import Entrada, Lote
+from app.models.schemas import EntradaFacturaCreate
+
+
+class EntradaService:
+    @staticmethod
+    def registrar_factura(
+        db: Session, factura: EntradaFacturaCreate, id_usuario: int
+    ) -> dict[str, Any]:
+        """Registrar todas las líneas de una factura de proveedor en una transacción.
+
+        Sentencias por factura (independiente del número de líneas): lectura de lotes,
+        INSERT de entradas, UPDATE agregado de lotes y UPDATE agregado de productos.
+        """
+        fecha = factura.fecha_entrada or datetime.now()
+        ids_lote = {linea.id_lote for linea in factura.lineas}
+        try:
+            lotes: dict[int, int | None] = {
+                id_lote: id_producto
+                for id_lote, id_producto in db.query(Lote.id_lote, Lote.id_producto).filter(
+                    Lote.id_lote.in_(ids_lote)
+                )
+            }
+            faltantes = sorted(ids_lote - set(lotes))
+            if faltantes:
+                raise NotFoundError("Lote", ", ".join(str(i) for i in faltantes))
+
+            filas = []
+            por_lote: dict[int, int] = defaultdict(int)
+            por_producto: dict[int, int] = defaultdict(int)
+            for linea in factura.lineas:
+                filas.append(
+                    {
+                        "id_usuario": id_usuario,
+                        "id_lote": linea.id_lote,
+                        "cantidad": linea.cantidad,
+                        "fecha_entrada": fecha,
+                        "precio_compra_unitario": linea.precio_compra_unitario,
+                        "precio_compra_total": linea.precio_compra_unitario * linea.cantidad,
+                        "numero_factura_compra": factura.numero_factura_compra,
+                        "proveedor": factura.proveedor,
+                        "observaciones": linea.observaciones or factura.observaciones,
+                    }
+                )
+                por_lote[linea.id_lote] += linea.cantidad
+                id_producto = lotes[linea.id_lote]
+                if id_producto is not None:
+                    por_producto[id_producto] += linea.cantidad
+
+            ids_entrada = list(db.scalars(insert(Entrada).returning(Entrada.id_entrada), filas))
+            lotes_actualizados = ajustar_stock_lotes(db, por_lote)
+            productos_actualizados = ajustar_stock_productos(db, por_producto)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        return {
+            "numero_factura_compra": factura.numero_factura_compra,
+            "ids_entrada": ids_entrada,
+            "lotes_actualizados": lotes_actualizados,
+            "productos_actualizados": productos_actualizados,
+            "total_unidades": sum(f["cantidad"] for f in filas),
+            "total_compra": sum(f["precio_compra_total"] for f in filas),
+        }
@@ -0,0 +1,163 @@
+import csv
+import io
+import json
+from collections.abc import Iterator
+from typing import Any, BinaryIO
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.logging_config import get_logger
+from app.crud.producto import upsert_productos
+from app.models.models import Laboratorio, Seccion
+from app.models.schemas import ProductoCreate
+
+logger = get_logger()
+
+FORMATOS_IMPORTACION = ("csv", "ndjson")
+TAMANO_LOTE_IMPORTACION = 500
+MAX_ERRORES_REPORTADOS = 1000
+
+
+class ImportadorProductos:
+    """Importación masiva de catálogos de productos (CSV o NDJSON).
+
+    El archivo se lee fila a fila (nunca completo en memoria), las claves foráneas se validan
+    contra los ids de sección/laboratorio precargados y las filas válidas se escriben por
+    lotes con upsert sobre `codigo_barras`. Una fila inválida no aborta el resto del archivo.
+    """
+
+    @staticmethod
+    def detectar_formato(nombre_archivo: str | None, content_type: str | None) -> str | None:
+        nombre = (nombre_archivo or "").lower()
+        tipo = (content_type or "").lower()
+        if nombre.endswith((".ndjson", ".jsonl")) or "ndjson" in tipo or "jsonl" in tipo:
+            return "ndjson"
+        if nombre.endswith(".csv") or "csv" in tipo:
+            return "csv"
+        return None
+
+    @staticmethod
+    def _iterar_registros(archivo: BinaryIO, formato: str) -> Iterator[tuple[int, Any]]:
+        """Generar (número de fila, registro) leyendo el archivo de forma incremental."""
+        texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+        try:
+            if formato == "csv":
+                lector = csv.DictReader(texto)
+                for registro in lector:
+                    # line_num es la última línea física leída (campos multilínea incluidos)
+                    yield lector.line_num, registro
+            else:
+                for numero, linea in enumerate(texto, start=1):
+                    if not linea.strip():
+                        continue
+                    try:
+                        yield numero, json.loads(linea)
+                    except json.JSONDecodeError as e:
+                        yield numero, e
+        finally:
+            # No cerrar el archivo subyacente: lo gestiona quien lo abrió
+            texto.detach()
+
+    @staticmethod
+    def _normalizar(registro: dict[str, Any]) -> dict[str, Any]:
+        """Quitar espacios y tratar celdas vacías como ausentes (CSV no distingue null)."""
+        limpio = {}
+        for clave, valor in registro.items():
+            if clave is None:
+                continue
+            if isinstance(valor, str):
+                valor = valor.strip()
+                if valor == "":
+                    continue
+            if valor is not None:
+                limpio[clave.strip()] = valor
+        return limpio
+
+    @staticmethod
+    def importar(
+        db: Session,
+        archivo: BinaryIO,
+        formato: str,
+        tamano_lote: int = TAMANO_LOTE_IMPORTACION,
+    ) -> dict[str, Any]:
+        if formato not in FORMATOS_IMPORTACION:
+            raise ValueError(f"Formato no soportado: {formato}")
+
+        secciones = {id_ for (id_,) in db.query(Seccion.id_seccion)}
+        laboratorios = {id_ for (id_,) in db.query(Laboratorio.id_laboratorio)}
+
+        resumen: dict[str, Any] = {
+            "procesados": 0,
+            "creados": 0,
+            "actualizados": 0,
+            "con_error": 0,
+            "errores": [],
+        }
+
+        def registrar_error(fila: int, errores: list[str], codigo: Any = None) -> None:
+            resumen["con_error"] += 1
+            if len(resumen["errores"]) < MAX_ERRORES_REPORTADOS:
+                resumen["errores"].append(
+                    {"fila": fila, "codigo_barras": codigo, "errores": errores}
+                )
+
+        lote: list[tuple[int, dict[str, Any]]] = []
+
+        def escribir_lote() -> None:
+            try:
+                creados, actualizados = upsert_productos(db, [datos for _, datos in lote])
+                db.commit()
+                resumen["creados"] += creados
+                resumen["actualizados"] += actualizados
+            except SQLAlchemyError as e:
+                db.rollback()
+                logger.error("Error importando lote de productos: %s", e)
+                for fila, datos in lote:
+                    registrar_error(
+                        fila,
+                        ["Error de base de datos al guardar el lote"],
+                        datos.get("codigo_barras"),
+                    )
+            lote.clear()
+
+        for fila, registro in ImportadorProductos._iterar_registros(archivo, formato):
+            resumen["procesados"] += 1
+            if isinstance(registro, Exception):
+                registrar_error(fila, [f"JSON inválido: {registro}"])
+                continue
+            if not isinstance(registro, dict):
+                registrar_error(fila, ["Cada registro debe ser un objeto"])
+                continue
+
+            registro = ImportadorProductos._normalizar(registro)
+            try:
+                producto = ProductoCreate.model_validate(registro)
+            except ValidationError as e:
+                errores = [
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                ]
+                registrar_error(fila, errores, registro.get("codigo_barras"))
+                continue
+
+            errores = []
+            if producto.id_seccion not in secciones:
+                errores.append(f"id_seccion: la sección {producto.id_seccion} no existe")
+            if producto.id_laboratorio not in laboratorios:
+                errores.append(
+                    f"id_laboratorio: el laboratorio {producto.id_laboratorio} no existe"
+                )
+            if errores:
+                registrar_error(fila, errores, producto.codigo_barras)
+                continue
+
+            lote.append((fila, producto.model_dump(mode="json", exclude_unset=True)))
+            if len(lote) >= tamano_lote:
+                escribir_lote()
+
+        if lote:
+            escribir_lote()
+
+        resumen["errores_omitidos"] = resumen["con_error"] - len(resumen["errores"])
+        return resumen
@@ -2,20 +2,26 @@ from typing import Any, cast
 
 from sqlalchemy.orm import Session
 
+from app.core.row_counts import CountStrategy, count_provider
 from app.models.models import Laboratorio
 
 
 class LaboratorioService:
     @staticmethod
     def listar(
-        db: Session, page: int, size: int, filtros: dict[str, Any]
-    ) -> tuple[list[Laboratorio], int]:
+        db: Session,
+        page: int,
+        size: int,
+        filtros: dict[str, Any],
+        conteo: CountStrategy = "exact",
+    ) -> tuple[list[Laboratorio], int, bool]:
+        """Página de laboratorios filtrados: (items, total, total_exacto)"""
         query = db.query(Laboratorio)
         for attr, value in filtros.items():
             query = query.filter(getattr(Laboratorio, attr) == value)
-        total = query.count()
+        total, total_exacto = count_provider.count(db, query, conteo)
         laboratorios = query.offset((page - 1) * size).limit(size).all()
-        return laboratorios, total
+        return laboratorios, total, total_exacto
 
     @staticmethod
     def obtener_por_id(db: Session, id_laboratorio: int) -> Laboratorio | None:
@@ -3,6 +3,7 @@ from typing import Any, cast
 from sqlalchemy.orm import Session
 
 from app.core.logging_config import get_logger
+from app.core.row_counts import CountStrategy, count_provider
 from app.crud.producto import (
     count_productos,
     count_productos_bajo_stock,
@@ -17,6 +18,7 @@ from app.crud.producto import (
     search_productos,
     update_producto,
 )
+from app.crud.snapshot_inventario import seguimiento
 from app.models.models import Laboratorio, Producto, Seccion
 
 logger = get_logger()
@@ -25,14 +27,19 @@ logger = get_logger()
 class ProductoService:
     @staticmethod
     def listar(
-        db: Session, page: int, size: int, filtros: dict[str, Any]
-    ) -> tuple[list[Producto], int]:
+        db: Session,
+        page: int,
+        size: int,
+        filtros: dict[str, Any],
+        conteo: CountStrategy = "exact",
+    ) -> tuple[list[Producto], int, bool]:
+        """Página de productos filtrados: (items, total, total_exacto)"""
         query = db.query(Producto)
         for attr, value in filtros.items():
             query = query.filter(getattr(Producto, attr) == value)
-        total = query.count()
+        total, total_exacto = count_provider.count(db, query, conteo)
         productos = query.offset((page - 1) * size).limit(size).all()
-        return productos, total
+        return productos, total, total_exacto
 
     @staticmethod
     def obtener_por_id(db: Session, id_producto: int) -> Producto | None:
@@ -58,8 +65,11 @@ class ProductoService:
                 if not laboratorio:
                     raise ValueError("El laboratorio especificado no existe")
 
-            nuevo_producto = Producto(**data)
-            db.add(nuevo_producto)
+            with seguimiento(db) as ids:
+                nuevo_producto = Producto(**data)
+                db.add(nuevo_producto)
+                db.flush()
+                ids.add(cast(int, nuevo_producto.id_producto))
             db.commit()
             db.refresh(nuevo_producto)
             return nuevo_producto
@@ -97,9 +107,10 @@ class ProductoService:
 
             # Update only the provided fields
             # SQLAlchemy expects a mapping of column arguments; cast for static type checkers
-            db.query(Producto).filter(Producto.id_producto == id_producto).update(
-                cast(Any, updates)
-            )
+            with seguimiento(db, [id_producto]):
+                db.query(Producto).filter(Producto.id_producto == id_producto).update(
+                    cast(Any, updates)
+                )
             db.commit()
             # Return the updated product
             return db.query(Producto).filter(Producto.id_producto == id_producto).first()
@@ -116,12 +127,13 @@ class ProductoService:
             producto = db.query(Producto).filter(Producto.id_producto == id_producto).first()
             if not producto:
                 return False
-            if modo == "logico":
-                cast(Any, producto).estado = "Inactivo"
-            elif modo == "fisico":
-                db.delete(producto)
-            else:
-                raise ValueError("Modo de eliminación inválido")
+            with seguimiento(db, [id_producto]):
+                if modo == "logico":
+                    cast(Any, producto).estado = "Inactivo"
+                elif modo == "fisico":
+                    db.delete(producto)
+                else:
+                    raise ValueError("Modo de eliminación inválido")
             db.commit()
             return True
         except Exception as e:
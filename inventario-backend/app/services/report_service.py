@@ -1,10 +1,20 @@
+"""
+Exportación de reportes CSV en streaming
+
+Cada export es un generador de bytes para `StreamingResponse`: la consulta se ejecuta con
+``yield_per`` (cursor del lado del servidor en PostgreSQL) y las filas se escriben con
+``csv.writer`` en bloques de `FILAS_POR_BLOQUE`, así que la memoria del proceso no depende del
+número de productos exportados. Se seleccionan columnas, no entidades ORM, para no llenar el
+identity map de la sesión mientras dura el export.
+"""
+
 import csv
-import io
+from collections.abc import Iterable, Iterator
 from typing import Any
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
 
-from app.core import cache as cache_mod
 from app.models.filters import (
     ProductoFilters,
     apply_exact_filter,
@@ -13,15 +23,53 @@ from app.models.filters import (
 )
 from app.models.models import Laboratorio, Producto, Seccion
 
+FILAS_POR_BLOQUE = 1000
+
+PRODUCTOS_CABECERAS = [
+    "ID",
+    "Nombre",
+    "Principio Activo",
+    "Forma Farmacéutica",
+    "Código Barras",
+    "Requiere Receta",
+    "Precio Compra",
+    "Stock Actual",
+    "Stock Mínimo",
+    "Estado",
+    "Laboratorio",
+    "Sección",
+]
+
+
+class _Eco:
+    """Pseudo-buffer para csv.writer: `write` devuelve la línea en vez de guardarla."""
 
-def _build_productos_query(db: Session, filters: ProductoFilters):
+    def write(self, value: str) -> str:
+        return value
+
+
+def _build_productos_query(filters: ProductoFilters) -> Select:
     """
-    Construye un query SQLAlchemy para productos aplicando los mismos filtros
-    que usamos en las consultas avanzadas, incluyendo joins para laboratorio y sección.
+    Construye el SELECT de columnas de productos aplicando los mismos filtros
+    que usamos en las consultas avanzadas, con outer joins a laboratorio y sección.
     """
-    query = db.query(Producto).options(
-        joinedload(Producto.laboratorio),
-        joinedload(Producto.seccion),
+    query = (
+        select(
+            Producto.id_producto,
+            Producto.nombre_producto,
+            Producto.principio_activo,
+            Producto.forma_farmaceutica,
+            Producto.codigo_barras,
+            Producto.requiere_receta,
+            Producto.precio_compra,
+            Producto.stock_actual,
+            Producto.stock_minimo,
+            Producto.estado,
+            Laboratorio.nombre_laboratorio,
+            Seccion.nombre_seccion,
+        )
+        .outerjoin(Laboratorio, Producto.id_laboratorio == Laboratorio.id_laboratorio)
+        .outerjoin(Seccion, Producto.id_seccion == Seccion.id_seccion)
     )
 
     # Filtros de texto y exactos
@@ -49,7 +97,7 @@ def _build_productos_query(db: Session, filters: ProductoFilters):
     if filters.estado:
         query = query.filter(Producto.estado == filters.estado)
 
-    return query
+    return query.order_by(Producto.nombre_producto.asc())
 
 
 def _safe_str(value: Any) -> str:
@@ -70,75 +118,90 @@ def _safe_float(value: Any) -> float | None:
         return None
 
 
-def _producto_row(p: Producto) -> list[str]:
+def _producto_row(fila: Any) -> list[str]:
     """
-    Convierte un producto a una fila CSV en el orden de columnas definido.
-    Fuerza tipos de salida a str para cumplir con la firma.
+    Convierte una fila de `_build_productos_query` a una fila CSV en el orden de columnas
+    definido. Fuerza tipos de salida a str para cumplir con la firma.
     """
-    precio = _safe_float(getattr(p, "precio_compra", None))
-    requiere_receta = _safe_bool(getattr(p, "requiere_receta", False))
+    precio = _safe_float(fila.precio_compra)
     return [
-        _safe_str(getattr(p, "id_producto", "")),
-        _safe_str(getattr(p, "nombre_producto", "")),
-        _safe_str(getattr(p, "principio_activo", "")),
-        _safe_str(getattr(p, "forma_farmaceutica", "")),
-        _safe_str(getattr(p, "codigo_barras", "")),
-        "Sí" if requiere_receta else "No",
+        _safe_str(fila.id_producto),
+        _safe_str(fila.nombre_producto),
+        _safe_str(fila.principio_activo),
+        _safe_str(fila.forma_farmaceutica),
+        _safe_str(fila.codigo_barras),
+        "Sí" if _safe_bool(fila.requiere_receta) else "No",
         f"{precio:.2f}" if precio is not None else "",
-        _safe_str(getattr(p, "stock_actual", 0)),
-        _safe_str(getattr(p, "stock_minimo", 0)),
-        _safe_str(getattr(p, "estado", "")),
-        _safe_str(getattr(getattr(p, "laboratorio", None), "nombre_laboratorio", "")),
-        _safe_str(getattr(getattr(p, "seccion", None), "nombre_seccion", "")),
+        _safe_str(fila.stock_actual),
+        _safe_str(fila.stock_minimo),
+        _safe_str(fila.estado),
+        _safe_str(fila.nombre_laboratorio),
+        _safe_str(fila.nombre_seccion),
     ]
 
 
-@cache_mod.cache_manager.cache_result(ttl=120, key_prefix="export:productos")
-def generate_productos_csv(db: Session, filters: ProductoFilters) -> bytes:
+def _csv_stream(cabeceras: list[str], filas: Iterable[list[str]]) -> Iterator[bytes]:
+    """Cabeceras y filas como CSV UTF-8, un chunk cada `FILAS_POR_BLOQUE` filas."""
+    writer = csv.writer(_Eco())
+    yield writer.writerow(cabeceras).encode("utf-8")
+
+    bloque: list[str] = []
+    for fila in filas:
+        bloque.append(writer.writerow(fila))
+        if len(bloque) >= FILAS_POR_BLOQUE:
+            yield "".join(bloque).encode("utf-8")
+            bloque.clear()
+    if bloque:
+        yield "".join(bloque).encode("utf-8")
+
+
+def _ejecutar(db: Session, query: Select):
+    """Resultado consumido por lotes (`yield_per`) en vez de materializado con `.all()`."""
+    return db.execute(query.execution_options(yield_per=FILAS_POR_BLOQUE))
+
+
+def stream_productos_csv(db: Session, filters: ProductoFilters) -> Iterator[bytes]:
     """
-    Genera un CSV completo de productos aplicando filtros.
-    El resultado se devuelve como bytes (contenido del archivo CSV).
-    Se cachea por 120 segundos para peticiones idénticas.
+    Genera el CSV de productos aplicando filtros, en chunks de bytes.
     """
-    query = _build_productos_query(db, filters)
-    productos = query.order_by(Producto.nombre_producto.asc()).all()
-
-    output = io.StringIO(newline="")
-    writer = csv.writer(output)
-    # Cabeceras
-    writer.writerow(
-        [
-            "ID",
-            "Nombre",
-            "Principio Activo",
-            "Forma Farmacéutica",
-            "Código Barras",
-            "Requiere Receta",
-            "Precio Compra",
-            "Stock Actual",
-            "Stock Mínimo",
-            "Estado",
-            "Laboratorio",
-            "Sección",
-        ]
-    )
+    filas = _ejecutar(db, _build_productos_query(filters))
+    yield from _csv_stream(PRODUCTOS_CABECERAS, (_producto_row(f) for f in filas))
 
-    for p in productos:
-        writer.writerow(_producto_row(p))
 
-    return output.getvalue().encode("utf-8")
+def _total_productos(columna_fk):
+    """Subconsulta `(fk, total)` de productos agrupados por la clave foránea dada."""
+    return (
+        select(columna_fk.label("fk"), func.count(Producto.id_producto).label("total"))
+        .group_by(columna_fk)
+        .subquery()
+    )
 
 
-@cache_mod.cache_manager.cache_result(ttl=120, key_prefix="export:laboratorios")
-def generate_laboratorios_csv(db: Session) -> bytes:
+def stream_laboratorios_csv(db: Session) -> Iterator[bytes]:
     """
     Genera un CSV sencillo con información de laboratorios y el total de productos asociados.
+    El total sale de un GROUP BY en base de datos, sin cargar los productos.
     """
-    laboratorios = db.query(Laboratorio).options(joinedload(Laboratorio.productos)).all()
-
-    output = io.StringIO(newline="")
-    writer = csv.writer(output)
-    writer.writerow(
+    totales = _total_productos(Producto.id_laboratorio)
+    query = (
+        select(Laboratorio, func.coalesce(totales.c.total, 0))
+        .outerjoin(totales, totales.c.fk == Laboratorio.id_laboratorio)
+        .order_by(Laboratorio.id_laboratorio)
+    )
+    filas = (
+        [
+            _safe_str(lab.id_laboratorio),
+            _safe_str(lab.nombre_laboratorio),
+            _safe_str(lab.pais_origen),
+            _safe_str(lab.telefono),
+            _safe_str(lab.email),
+            _safe_str(lab.direccion),
+            _safe_str(lab.estado),
+            _safe_str(total),
+        ]
+        for lab, total in _ejecutar(db, query)
+    )
+    yield from _csv_stream(
         [
             "ID",
             "Nombre",
@@ -148,36 +211,36 @@ def generate_laboratorios_csv(db: Session) -> bytes:
             "Dirección",
             "Estado",
             "Total Productos",
-        ]
+        ],
+        filas,
     )
 
-    for lab in laboratorios:
-        writer.writerow(
-            [
-                _safe_str(getattr(lab, "id_laboratorio", "")),
-                _safe_str(getattr(lab, "nombre_laboratorio", "")),
-                _safe_str(getattr(lab, "pais_origen", "")),
-                _safe_str(getattr(lab, "telefono", "")),
-                _safe_str(getattr(lab, "email", "")),
-                _safe_str(getattr(lab, "direccion", "")),
-                _safe_str(getattr(lab, "estado", "")),
-                _safe_str(len(getattr(lab, "productos", []) or [])),
-            ]
-        )
-
-    return output.getvalue().encode("utf-8")
-
 
-@cache_mod.cache_manager.cache_result(ttl=120, key_prefix="export:secciones")
-def generate_secciones_csv(db: Session) -> bytes:
+def stream_secciones_csv(db: Session) -> Iterator[bytes]:
     """
     Genera un CSV sencillo con información de secciones y el total de productos asociados.
+    El total sale de un GROUP BY en base de datos, sin cargar los productos.
     """
-    secciones = db.query(Seccion).options(joinedload(Seccion.productos)).all()
-
-    output = io.StringIO(newline="")
-    writer = csv.writer(output)
-    writer.writerow(
+    totales = _total_productos(Producto.id_seccion)
+    query = (
+        select(Seccion, func.coalesce(totales.c.total, 0))
+        .outerjoin(totales, totales.c.fk == Seccion.id_seccion)
+        .order_by(Seccion.id_seccion)
+    )
+    filas = (
+        [
+            _safe_str(sec.id_seccion),
+            _safe_str(sec.nombre_seccion),
+            _safe_str(sec.descripcion),
+            _safe_str(sec.ubicacion_fisica),
+            _safe_str(sec.capacidad_maxima),
+            _safe_str(sec.temperatura_recomendada),
+            _safe_str(sec.estado),
+            _safe_str(total),
+        ]
+        for sec, total in _ejecutar(db, query)
+    )
+    yield from _csv_stream(
         [
             "ID",
             "Nombre",
@@ -187,21 +250,6 @@ def generate_secciones_csv(db: Session) -> bytes:
             "Temperatura Recomendada",
             "Estado",
             "Total Productos",
-        ]
+        ],
+        filas,
     )
-
-    for sec in secciones:
-        writer.writerow(
-            [
-                _safe_str(getattr(sec, "id_seccion", "")),
-                _safe_str(getattr(sec, "nombre_seccion", "")),
-                _safe_str(getattr(sec, "descripcion", "")),
-                _safe_str(getattr(sec, "ubicacion_fisica", "")),
-                _safe_str(getattr(sec, "capacidad_maxima", 0)),
-                _safe_str(getattr(sec, "temperatura_recomendada", "")),
-                _safe_str(getattr(sec, "estado", "")),
-                _safe_str(len(getattr(sec, "productos", []) or [])),
-            ]
-        )
-
-    return output.getvalue().encode("utf-8")
@@ -2,20 +2,27 @@ from typing import Any, cast
 
 from sqlalchemy.orm import Session
 
+from app.core.row_counts import CountStrategy, count_provider
+from app.models import loader_profiles
 from app.models.models import Alerta, Seccion
 
 
 class SeccionService:
     @staticmethod
     def listar(
-        db: Session, page: int, size: int, filtros: dict[str, Any]
-    ) -> tuple[list[Seccion], int]:
+        db: Session,
+        page: int,
+        size: int,
+        filtros: dict[str, Any],
+        conteo: CountStrategy = "exact",
+    ) -> tuple[list[Seccion], int, bool]:
+        """Página de secciones filtrados: (items, total, total_exacto)"""
         query = db.query(Seccion)
         for attr, value in filtros.items():
             query = query.filter(getattr(Seccion, attr) == value)
-        total = query.count()
+        total, total_exacto = count_provider.count(db, query, conteo)
         secciones = query.offset((page - 1) * size).limit(size).all()
-        return secciones, total
+        return secciones, total, total_exacto
 
     @staticmethod
     def obtener_por_id(db: Session, id_seccion: int) -> Seccion | None:
@@ -59,18 +66,27 @@ class SeccionService:
 class AlertaService:
     @staticmethod
     def listar(
-        db: Session, page: int, size: int, filtros: dict[str, Any]
-    ) -> tuple[list[Alerta], int]:
+        db: Session,
+        page: int,
+        size: int,
+        filtros: dict[str, Any],
+        conteo: CountStrategy = "exact",
+    ) -> tuple[list[Alerta], int, bool]:
+        """Página de alertas filtrados: (items, total, total_exacto)"""
         query = db.query(Alerta)
         for attr, value in filtros.items():
             query = query.filter(getattr(Alerta, attr) == value)
-        total = query.count()
-        alertas = query.offset((page - 1) * size).limit(size).all()
-        return alertas, total
+        total, total_exacto = count_provider.count(db, query, conteo)
+        alertas = loader_profiles.ALERTA.aplicar(query).offset((page - 1) * size).limit(size).all()
+        return alertas, total, total_exacto
 
     @staticmethod
     def obtener_por_id(db: Session, id_alerta: int) -> Alerta | None:
-        return db.query(Alerta).filter(Alerta.id_alerta == id_alerta).first()
+        return (
+            loader_profiles.ALERTA.aplicar(db.query(Alerta))
+            .filter(Alerta.id_alerta == id_alerta)
+            .first()
+        )
 
     @staticmethod
     def crear(db: Session, data: dict[str, Any]) -> int:
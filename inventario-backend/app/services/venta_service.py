@@ -0,0 +1,208 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, cast
+
+from sqlalchemy import case, insert, update
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import NotFoundError, StockInsuficienteException
+from app.core.logging_config import get_logger
+from app.crud.snapshot_inventario import registrar_ajuste_lotes
+from app.crud.stock import COLUMNAS_LOTE, ajustar_stock_productos
+from app.crud.ventas_rollup import ESTADO_CONTABILIZADO, registrar_ventas
+from app.models.models import Cliente, Cotizacion, DetalleVenta, Lote, Venta
+from app.models.schemas import VentaCreate
+from app.services.asignacion_lotes import AsignadorLotesFEFO
+
+logger = get_logger()
+
+
+class VentaService:
+    @staticmethod
+    def crear_venta(db: Session, venta: VentaCreate, id_usuario: int) -> Venta:
+        """Registrar una venta y descontar el stock de sus lotes en una sola transacción.
+
+        Round-trips por carrito (independiente del número de líneas): cliente, carga de
+        lotes para la asignación, INSERT de la venta, UPDATE condicional de lotes, UPDATE
+        de productos e INSERT masivo de detalles.
+        """
+        lineas: list[dict[str, Any]] = [
+            {
+                "id_lote": detalle.id_lote,
+                "id_producto": detalle.id_producto,
+                "cantidad": detalle.cantidad,
+                "precio_unitario": detalle.precio_unitario,
+            }
+            for detalle in venta.detalles
+        ]
+        try:
+            cliente = (
+                db.query(Cliente.id_cliente).filter(Cliente.id_cliente == venta.id_cliente).first()
+            )
+            if not cliente:
+                raise NotFoundError("Cliente")
+
+            subtotal = sum(linea["precio_unitario"] * linea["cantidad"] for linea in lineas)
+            db_venta = Venta(
+                id_usuario=id_usuario,
+                id_cliente=venta.id_cliente,
+                fecha_venta=venta.fecha_venta or datetime.now(),
+                subtotal=subtotal,
+                descuento=venta.descuento,
+                impuestos=venta.impuestos,
+                total=subtotal - venta.descuento + venta.impuestos,
+                metodo_pago=venta.metodo_pago,
+                estado="Activo",
+            )
+            VentaService.registrar_detalles(db, db_venta, lineas)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        db.refresh(db_venta)
+        return db_venta
+
+    @staticmethod
+    def convertir_cotizacion(
+        db: Session, cotizacion: Cotizacion, metodo_pago: str, id_usuario: int
+    ) -> Venta:
+        """Crear la venta de una cotización asignando lotes FEFO a cada producto."""
+        lineas = [
+            {
+                "id_producto": detalle.id_producto,
+                "cantidad": detalle.cantidad,
+                "precio_unitario": detalle.precio_unitario,
+            }
+            for detalle in cotizacion.detalles
+        ]
+        try:
+            db_venta = Venta(
+                id_usuario=id_usuario,
+                id_cliente=cotizacion.id_cliente,
+                fecha_venta=datetime.now(),
+                subtotal=cotizacion.subtotal,
+                descuento=cotizacion.descuento,
+                impuestos=cotizacion.impuestos,
+                total=cotizacion.total,
+                metodo_pago=metodo_pago,
+                estado="Activo",
+            )
+            VentaService.registrar_detalles(db, db_venta, lineas)
+            cast(Any, cotizacion).estado = "Convertida"
+            cast(Any, cotizacion).id_venta_relacionada = db_venta.id_venta
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        db.refresh(db_venta)
+        return db_venta
+
+    @staticmethod
+    def cambiar_estado(db: Session, id_venta: int, estado: str) -> Venta:
+        """Cambiar el estado de una venta (anular, reactivar) y ajustar el rollup diario.
+
+        La fila se bloquea para que dos cambios concurrentes no cuenten la misma transición
+        dos veces.
+        """
+        try:
+            venta = db.query(Venta).filter(Venta.id_venta == id_venta).with_for_update().first()
+            if not venta:
+                raise NotFoundError("Venta", str(id_venta))
+            anterior = venta.estado
+            cast(Any, venta).estado = estado
+            if (anterior == ESTADO_CONTABILIZADO) != (estado == ESTADO_CONTABILIZADO):
+                registrar_ventas(db, [venta], 1 if estado == ESTADO_CONTABILIZADO else -1)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        db.refresh(venta)
+        return venta
+
+    @staticmethod
+    def registrar_detalles(db: Session, db_venta: Venta, lineas: list[dict[str, Any]]) -> None:
+        """Asignar lotes, descontar stock y persistir la venta con sus detalles (sin commit).
+
+        `lineas` son dicts con cantidad, precio_unitario y `id_lote`, o bien `id_producto`
+        para que el lote se asigne FEFO (una línea puede repartirse en varios lotes).
+        """
+        asignador = AsignadorLotesFEFO.cargar(
+            db,
+            ids_lote=[int(x["id_lote"]) for x in lineas if x.get("id_lote") is not None],
+            ids_producto=[int(x["id_producto"]) for x in lineas if x.get("id_lote") is None],
+        )
+
+        detalles: list[dict[str, Any]] = []
+        demanda: dict[int, int] = defaultdict(int)
+        for linea in lineas:
+            cantidad = int(linea["cantidad"])
+            if linea.get("id_lote") is not None:
+                asignaciones = asignador.reservar_lote(int(linea["id_lote"]), cantidad)
+            else:
+                asignaciones = asignador.asignar(int(linea["id_producto"]), cantidad)
+            for id_lote, parcial in asignaciones:
+                demanda[id_lote] += parcial
+                detalles.append(
+                    {
+                        "id_lote": id_lote,
+                        "cantidad": parcial,
+                        "precio_unitario": linea["precio_unitario"],
+                        "subtotal": linea["precio_unitario"] * parcial,
+                    }
+                )
+
+        db.add(db_venta)
+        db.flush()
+        if db_venta.estado == ESTADO_CONTABILIZADO:
+            registrar_ventas(db, [db_venta])
+
+        VentaService._descontar_lotes(db, demanda)
+
+        demanda_productos: dict[int, int] = defaultdict(int)
+        for id_lote, cantidad in demanda.items():
+            id_producto = asignador.producto_de(id_lote)
+            if id_producto is not None:
+                demanda_productos[id_producto] += cantidad
+        ajustar_stock_productos(db, {k: -v for k, v in demanda_productos.items()})
+
+        db.execute(insert(DetalleVenta), [{**d, "id_venta": db_venta.id_venta} for d in detalles])
+
+    @staticmethod
+    def _descontar_lotes(db: Session, demanda: dict[int, int]) -> None:
+        """UPDATE condicional único: solo descuenta si cada lote aún cubre su cantidad.
+
+        Si otra transacción consumió stock entre la lectura y la escritura, el número de filas
+        afectadas no coincide y la venta se rechaza en vez de dejar cantidades negativas.
+        """
+        cantidades = case(demanda, value=Lote.id_lote)
+        actualizados = db.execute(
+            update(Lote)
+            .where(Lote.id_lote.in_(list(demanda)), Lote.cantidad_disponible >= cantidades)
+            .values(cantidad_disponible=Lote.cantidad_disponible - cantidades)
+            .returning(*COLUMNAS_LOTE)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if len(actualizados) == len(demanda):
+            registrar_ajuste_lotes(db, actualizados, {k: -v for k, v in demanda.items()})
+            return
+
+        filas = (
+            db.query(Lote.id_lote, Lote.id_producto, Lote.cantidad_disponible)
+            .filter(Lote.id_lote.in_(list(demanda)))
+            .all()
+        )
+        for fila in filas:
+            cantidad = demanda[int(fila.id_lote)]
+            if int(fila.cantidad_disponible or 0) < cantidad:
+                logger.warning("Conflicto de stock en lote %s durante la venta", fila.id_lote)
+                raise StockInsuficienteException(
+                    fila.id_producto, int(fila.cantidad_disponible or 0), cantidad
+                )
+        # Todos los lotes que quedan cubren su cantidad: falta alguno (borrado entre la
+        # asignación y el UPDATE)
+        faltantes = sorted(set(demanda) - {int(fila.id_lote) for fila in filas})
+        logger.warning("Lotes %s eliminados durante la venta", faltantes)
+        raise NotFoundError("Lote", ", ".join(str(i) for i in faltantes))
@@ -25,6 +25,7 @@ from app.core.exception_handlers import (
 from app.core.exceptions import InventarioException
 from app.core.input_validation import InputValidationMiddleware
 from app.core.metrics import MetricsMiddleware, get_prometheus_metrics
+from app.core.query_counter import QueryCounterMiddleware
 from app.core.rate_limiter import RateLimitMiddleware
 from app.core.request_id_middleware import RequestIdMiddleware
 from app.core.roles import DEFAULT_ROLES
@@ -79,6 +80,12 @@ async def lifespan(app: FastAPI):
                 scheduler_manager.start()
                 interval = getattr(settings, "scheduler_interval_hours", 24)
                 scheduler_manager.add_or_update_stock_bajo_job(interval)
+            if settings.db_pool_adaptive_overflow:
+                scheduler_manager.add_pool_overflow_job(
+                    engine, settings.db_pool_adjust_interval_seconds
+                )
+            if settings.cache_warm_enabled:
+                scheduler_manager.add_cache_warmer_job(settings.cache_warm_interval_seconds)
         except Exception as e:
             logger.error(f"Scheduler start error: {e}")
     except Exception as e:
@@ -86,10 +93,18 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown scheduler on application shutdown
     try:
-        if settings.scheduler_enabled:
+        if (
+            settings.scheduler_enabled
+            or settings.db_pool_adaptive_overflow
+            or settings.cache_warm_enabled
+        ):
             scheduler_manager.shutdown()
     except Exception as e:
         logger.error(f"Scheduler shutdown error: {e}")
+    # Stop the L1 cache invalidation listener (no-op without CACHE_L1_ENABLED)
+    cache_manager.close()
+    # Release the async Redis pool bound to this event loop
+    await cache_manager.aclose()
 
 
 # Create FastAPI app
@@ -102,6 +117,10 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Add SQL query counter (innermost: counts what the endpoint runs, adds Server-Timing)
+if settings.query_counter_enabled:
+    app.add_middleware(QueryCounterMiddleware)
+
 # Add request ID middleware (early so downstream can use request.state.request_id)
 app.add_middleware(RequestIdMiddleware)
 
@@ -0,0 +1,172 @@
+"""Peak-RSS benchmark of the products CSV export.
+
+Seeds N products (100k by default) into a temporary SQLite file and runs the export in a
+fresh child process per mode, reporting how much the peak RSS grew during the export:
+
+- materialized: the previous implementation (ORM entities with joinedload, ``.all()`` and a
+  StringIO holding the whole file)
+- streaming: ``stream_productos_csv`` (``yield_per`` cursor, CSV written in blocks)
+
+    python scripts/benchmark_export_csv.py --rows 100000
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ["TESTING"] = "true"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import Session, joinedload  # noqa: E402
+
+from app.models.database import Base  # noqa: E402
+from app.models.filters import ProductoFilters  # noqa: E402
+from app.models.models import Laboratorio, Producto, Seccion  # noqa: E402
+from app.services.report_service import (  # noqa: E402
+    PRODUCTOS_CABECERAS,
+    stream_productos_csv,
+)
+
+MODES = ("materialized", "streaming")
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def seed(url: str, rows: int) -> None:
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Laboratorio),
+            [{"id_laboratorio": i, "nombre_laboratorio": f"Lab {i}"} for i in range(1, 51)],
+        )
+        conn.execute(
+            insert(Seccion),
+            [{"id_seccion": i, "nombre_seccion": f"Sección {i}"} for i in range(1, 21)],
+        )
+        for start in range(0, rows, 10_000):
+            conn.execute(
+                insert(Producto),
+                [
+                    {
+                        "id_producto": i + 1,
+                        "id_laboratorio": i % 50 + 1,
+                        "id_seccion": i % 20 + 1,
+                        "nombre_producto": f"Producto {i:07d}",
+                        "principio_activo": "Extracto de manzanilla",
+                        "forma_farmaceutica": "Cápsulas",
+                        "codigo_barras": f"770{i:010d}",
+                        "precio_compra": 12.5,
+                        "stock_actual": i % 40,
+                        "stock_minimo": 10,
+                        "estado": "Activo",
+                    }
+                    for i in range(start, min(start + 10_000, rows))
+                ],
+            )
+    engine.dispose()
+
+
+def _export_materialized(db: Session) -> int:
+    productos = (
+        db.query(Producto)
+        .options(joinedload(Producto.laboratorio), joinedload(Producto.seccion))
+        .filter(Producto.estado == "Activo")
+        .order_by(Producto.nombre_producto.asc())
+        .all()
+    )
+    output = io.StringIO(newline="")
+    writer = csv.writer(output)
+    writer.writerow(PRODUCTOS_CABECERAS)
+    for p in productos:
+        writer.writerow(
+            [
+                p.id_producto,
+                p.nombre_producto,
+                p.principio_activo,
+                p.forma_farmaceutica,
+                p.codigo_barras,
+                "Sí" if p.requiere_receta else "No",
+                f"{p.precio_compra:.2f}",
+                p.stock_actual,
+                p.stock_minimo,
+                p.estado,
+                p.laboratorio.nombre_laboratorio,
+                p.seccion.nombre_seccion,
+            ]
+        )
+    return len(output.getvalue().encode("utf-8"))
+
+
+def _export_streaming(db: Session) -> int:
+    return sum(len(chunk) for chunk in stream_productos_csv(db, ProductoFilters()))
+
+
+def measure(url: str, mode: str) -> dict:
+    """Run one export in this process and report bytes written, time and peak RSS growth."""
+    engine = create_engine(url)
+    export = _export_materialized if mode == "materialized" else _export_streaming
+    with Session(engine) as db:
+        before = _peak_rss_mb()
+        start = time.perf_counter()
+        size = export(db)
+        elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "bytes": size,
+        "seconds": round(elapsed, 2),
+        "peak_rss_growth_mb": round(_peak_rss_mb() - before, 1),
+    }
+
+
+def run(rows: int) -> list[dict]:
+    """Seed a temporary database and measure every mode in its own child process."""
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'export.db')}"
+        seed(url, rows)
+        results = []
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", url, mode],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+        return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--child", nargs=2, metavar=("URL", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(*args.child)))
+        return 0
+
+    print(f"Products CSV export, {args.rows} rows")
+    for result in run(args.rows):
+        print(
+            f"  {result['mode']:<13} {result['bytes'] / 1e6:7.1f} MB written  "
+            f"{result['seconds']:6.2f} s  peak RSS +{result['peak_rss_growth_mb']} MB"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -18,7 +18,11 @@ os.environ.setdefault("DATABASE_URL", "sqlite:///./test_db.sqlite")
 
 # Import models so they are registered with Base.metadata (required for audit_trail)
 from app.core.audit_trail import AuditLog  # noqa: E402, F401
-from app.models.database import Base, get_db  # noqa: E402, F401
+from app.core import query_counter  # noqa: E402
+from app.core.numeracion import numerador_documentos  # noqa: E402
+from app.core.row_counts import count_provider  # noqa: E402
+from app.crud import snapshot_inventario  # noqa: E402
+from app.models.database import Base, get_async_db, get_db, get_read_db  # noqa: E402, F401
 # Import ALL models BEFORE creating tables
 from app.models import models  # noqa: E402, F401
 from main import app  # noqa: E402
@@ -43,12 +47,66 @@ db_module.engine = engine  # type: ignore[attr-defined]
 db_module.SessionLocal = TestingSessionLocal  # type: ignore[attr-defined]
 
 
+class _AsyncSessionAdapter:
+    """Expose the shared sync test session through the AsyncSession API used by routers.
+
+    The in-memory SQLite database lives on a single pysqlite connection, so async
+    endpoints must see the same session (and transaction) the tests seed data with.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sync_session, *args, **kwargs)
+
+    async def execute(self, *args, **kwargs):
+        return self.sync_session.execute(*args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return self.sync_session.scalar(*args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return self.sync_session.scalars(*args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return self.sync_session.get(*args, **kwargs)
+
+    def add(self, instance) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances) -> None:
+        self.sync_session.add_all(instances)
+
+    async def delete(self, instance) -> None:
+        self.sync_session.delete(instance)
+
+    async def flush(self, *args, **kwargs) -> None:
+        self.sync_session.flush(*args, **kwargs)
+
+    async def refresh(self, *args, **kwargs) -> None:
+        self.sync_session.refresh(*args, **kwargs)
+
+    async def commit(self) -> None:
+        self.sync_session.commit()
+
+    async def rollback(self) -> None:
+        self.sync_session.rollback()
+
+    async def close(self) -> None:
+        pass
+
+
 @pytest.fixture(autouse=True)
 def _shared_db_session(monkeypatch: pytest.MonkeyPatch):
     """Create a single shared DB session per-test and use it everywhere (API + tests).
 
     This avoids visibility issues between different connections/transactions.
     """
+    # Every test rebuilds the schema outside the ORM, so cached totals must not leak across
+    count_provider.clear()
+    numerador_documentos.clear()
+    snapshot_inventario._inicializado = False
     connection = engine.connect()
     transaction = connection.begin()
     # Recreate schema for this test on the shared connection
@@ -78,6 +136,12 @@ def _shared_db_session(monkeypatch: pytest.MonkeyPatch):
             pass
 
     app.dependency_overrides[get_db] = _dep_override
+    app.dependency_overrides[get_read_db] = _dep_override
+
+    async def _async_dep_override():
+        yield _AsyncSessionAdapter(session)
+
+    app.dependency_overrides[get_async_db] = _async_dep_override
 
     try:
         yield session
@@ -87,6 +151,31 @@ def _shared_db_session(monkeypatch: pytest.MonkeyPatch):
         connection.close()
 
 
+@pytest.fixture
+def memory_db():
+    """Provide a session on a private in-memory SQLite database, outside the shared session.
+
+    For code that really commits or rolls back (checkout, receipts, numbering...), which
+    would end the shared test transaction. Modules seed their own data on top of it.
+    """
+    memory_engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=memory_engine)
+    session = sessionmaker(bind=memory_engine, autoflush=False)()
+    yield session
+    session.close()
+    memory_engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def _query_budget(request: pytest.FixtureRequest):
+    """Strict query-count mode: `@pytest.mark.max_queries(n)` (or QUERY_COUNT_FAIL_ABOVE)."""
+    marker = request.node.get_closest_marker("max_queries")
+    with query_counter.limite_consultas(marker.args[0] if marker else query_counter.limite):
+        yield
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """Provide a database session for tests."""
@@ -0,0 +1,64 @@
+"""Tests del asignador de lotes FEFO (índice en memoria, sin base de datos)."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.exceptions import NotFoundError, StockInsuficienteException
+from app.services.asignacion_lotes import AsignadorLotesFEFO, _LoteDisponible
+
+AHORA = datetime(2025, 6, 1)
+
+
+def _asignador() -> AsignadorLotesFEFO:
+    return AsignadorLotesFEFO(
+        [
+            _LoteDisponible(1, 10, 5, AHORA + timedelta(days=90)),
+            _LoteDisponible(2, 10, 3, AHORA + timedelta(days=10)),
+            _LoteDisponible(3, 10, 4, None),
+            _LoteDisponible(4, 10, 50, AHORA - timedelta(days=1)),  # vencido
+            _LoteDisponible(5, 20, 2, AHORA + timedelta(days=5)),
+        ],
+        ahora=AHORA,
+    )
+
+
+def test_asigna_primero_el_lote_que_vence_antes():
+    asignador = _asignador()
+    assert asignador.asignar(10, 2) == [(2, 2)]
+    assert asignador.asignar(10, 4) == [(2, 1), (1, 3)]
+    # Los lotes sin fecha de vencimiento se consumen al final
+    assert asignador.asignar(10, 4) == [(1, 2), (3, 2)]
+
+
+def test_no_asigna_lotes_vencidos_ni_reserva_si_no_alcanza():
+    asignador = _asignador()
+    with pytest.raises(StockInsuficienteException):
+        asignador.asignar(10, 13)
+    # Una asignación fallida no consume stock del índice
+    assert asignador.asignar(10, 12) == [(2, 3), (1, 5), (3, 4)]
+
+
+def test_reserva_explicita_descuenta_del_indice_fefo():
+    asignador = _asignador()
+    assert asignador.reservar_lote(2, 3) == [(2, 3)]
+    assert asignador.asignar(10, 1) == [(1, 1)]
+    with pytest.raises(StockInsuficienteException):
+        asignador.reservar_lote(5, 3)
+    with pytest.raises(NotFoundError):
+        asignador.reservar_lote(99, 1)
+
+
+def test_lote_inactivo_pedido_por_id_no_entra_en_fefo():
+    asignador = AsignadorLotesFEFO(
+        [
+            _LoteDisponible(1, 10, 5, AHORA + timedelta(days=90)),
+            _LoteDisponible(2, 10, 8, AHORA + timedelta(days=10), estado="Inactivo"),
+        ],
+        ahora=AHORA,
+    )
+    # El carrito nombra el lote inactivo por id; las líneas por producto no lo tocan
+    assert asignador.reservar_lote(2, 1) == [(2, 1)]
+    assert asignador.asignar(10, 5) == [(1, 5)]
+    with pytest.raises(StockInsuficienteException):
+        asignador.asignar(10, 1)
@@ -0,0 +1,106 @@
+"""Tests para la capa de sesión asíncrona (AsyncSession)."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app.core.config import Settings
+from app.core.security import create_access_token
+from app.models import database
+from app.models.database import Base, get_async_db
+from app.models.models import Laboratorio
+from main import app
+
+
+class _Rol:
+    nombre_rol = "admin"
+
+
+class _Usuario:
+    id_usuario = 1
+    nombre_usuario = "admin"
+    estado = "Activo"
+    rol = _Rol()
+
+
+@pytest.mark.parametrize(
+    "sync_url,expected",
+    [
+        ("postgresql://u:p@localhost/db", "postgresql+asyncpg://u:p@localhost/db"),
+        ("postgresql+psycopg2://u:p@localhost/db", "postgresql+asyncpg://u:p@localhost/db"),
+        ("postgresql+asyncpg://u:p@localhost/db", "postgresql+asyncpg://u:p@localhost/db"),
+        ("sqlite:///./test.db", "sqlite+aiosqlite:///./test.db"),
+    ],
+)
+def test_get_async_database_url(sync_url, expected):
+    """Test que la URL síncrona se traduce al driver asíncrono correspondiente."""
+    s = Settings(database_url=sync_url)
+    assert s.get_async_database_url() == expected
+
+
+def test_async_connect_args_for_postgres(monkeypatch):
+    """Test que asyncpg recibe timeout y server_settings en lugar de args de psycopg2."""
+    monkeypatch.setenv("DB_PG_OPTIONS", "-c statement_timeout=5000")
+    s = Settings(database_url="postgresql://u:p@localhost/db")
+    args = s.db_async_connect_args
+    assert "timeout" in args
+    assert args["server_settings"]["statement_timeout"] == "5000"
+    assert "options" not in args
+
+
+@pytest.mark.asyncio
+async def test_run_sync_reuses_sync_crud_functions():
+    """Test que una función CRUD síncrona se ejecuta sobre la AsyncSession con run_sync."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+
+    def _crud(db, value):
+        return db.execute(text("SELECT :v"), {"v": value}).scalar()
+
+    async with session_factory() as db:
+        assert await db.run_sync(_crud, 42) == 42
+    await engine.dispose()
+
+
+def test_router_migrado_sobre_aiosqlite_sin_adaptador(tmp_path, monkeypatch):
+    """Test que get_async_db entrega una AsyncSession real (aiosqlite) que escribe y lee."""
+    pytest.importorskip("aiosqlite")
+    ruta = tmp_path / "async.sqlite"
+    sync_engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(sync_engine)
+    # NullPool: TestClient atiende cada petición en su propio event loop
+    engine = create_async_engine(f"sqlite+aiosqlite:///{ruta}", poolclass=NullPool)
+    monkeypatch.setattr(
+        database,
+        "AsyncSessionLocal",
+        async_sessionmaker(
+            bind=engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+        ),
+    )
+    # Sin el override de conftest: corre la dependency real
+    monkeypatch.delitem(app.dependency_overrides, get_async_db)
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'admin'})}"}
+
+    with patch("app.core.auth_middleware.get_current_user_from_token", return_value=_Usuario()):
+        client = TestClient(app)
+        creado = client.post(
+            "/api/v1/laboratorios",
+            json={"nombre_laboratorio": "Lab Async", "estado": "Activo"},
+            headers=headers,
+        )
+        id_laboratorio = creado.json()["data"]["id_laboratorio"]
+        leido = client.get(f"/api/v1/laboratorios/{id_laboratorio}", headers=headers)
+
+    assert creado.status_code == 200
+    assert leido.status_code == 200 and leido.json()["data"]["nombre_laboratorio"] == "Lab Async"
+    # El commit llegó al archivo por aiosqlite, no a la sesión compartida de los tests
+    with Session(sync_engine) as db:
+        assert [lab.nombre_laboratorio for lab in db.query(Laboratorio)] == ["Lab Async"]
+    asyncio.run(engine.dispose())
+    sync_engine.dispose()
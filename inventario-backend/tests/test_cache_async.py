@@ -0,0 +1,169 @@
+"""Tests de la API async del caché: aget/amget/aset, etiquetas y pool por event loop."""
+
+import asyncio
+from fnmatch import fnmatchcase
+
+import pytest
+import redis
+
+from app.core.cache import CacheManager
+from app.core.cache_l1 import CacheLocal
+from app.core.config import settings
+
+
+class _PipelineAsync:
+    def __init__(self, redis_falso):
+        self.redis = redis_falso
+        self.comandos = []
+
+    def __getattr__(self, nombre):
+        def encolar(*args, **kwargs):
+            self.comandos.append((nombre, args, kwargs))
+            return self
+
+        return encolar
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        return [await getattr(self.redis, n)(*a, **k) for n, a, k in self.comandos]
+
+
+class _RedisAsync:
+    """Subconjunto de `redis.asyncio.Redis` usado por CacheManager."""
+
+    def __init__(self):
+        self.datos: dict[str, object] = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return _PipelineAsync(self)
+
+    async def get(self, key):
+        self.round_trips += 1
+        return self.datos.get(key)
+
+    async def mget(self, keys):
+        self.round_trips += 1
+        return [self.datos.get(k) for k in keys]
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.datos:
+            return None
+        self.datos[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        return int(self.datos.get(key) == token and self.datos.pop(key) is not None)
+
+    async def setex(self, key, ttl, value):
+        self.datos[key] = value
+
+    async def sadd(self, key, *miembros):
+        self.datos.setdefault(key, set()).update(m.encode() for m in miembros)
+
+    async def expire(self, key, ttl):
+        return True
+
+    async def rename(self, origen, destino):
+        if origen not in self.datos:
+            raise redis.ResponseError("no such key")
+        self.datos[destino] = self.datos.pop(origen)
+
+    async def sscan_iter(self, key, count=None):
+        for miembro in sorted(self.datos.get(key, set())):
+            yield miembro
+
+    async def scan_iter(self, match=None, count=None):
+        for key in [k for k in list(self.datos) if fnmatchcase(k, match)]:
+            yield key.encode()
+
+    async def unlink(self, *keys):
+        return sum(self.datos.pop(k, None) is not None for k in keys)
+
+    async def delete(self, *keys):
+        return await self.unlink(*keys)
+
+    async def publish(self, channel, payload):
+        return 0
+
+
+class _SinClienteSync:
+    def __getattr__(self, nombre):
+        raise AssertionError(f"El camino async no debe usar el cliente sync ({nombre})")
+
+
+def _cache(l1: bool = False) -> tuple[CacheManager, _RedisAsync]:
+    cache = CacheManager()
+    cache.redis_client = _SinClienteSync()
+    cache.enabled = True
+    cache.l1 = CacheLocal(max_entradas=100, max_bytes=1_000_000, ttl=30) if l1 else None
+    falso = _RedisAsync()
+    cache._async_clients[asyncio.get_running_loop()] = falso
+    return cache, falso
+
+
+@pytest.mark.asyncio
+async def test_aset_aget_y_amget_en_un_solo_round_trip():
+    cache, falso = _cache(l1=True)
+
+    assert await cache.aset("productos:a", {"id": 1}, ttl=60)
+    assert await cache.aset("productos:b", [1, 2], ttl=60)
+    cache.l1.clear()
+    assert await cache.aget("productos:a") == {"id": 1}  # ahora también en el L1
+
+    falso.round_trips = 0
+    valores = await cache.amget(["productos:a", "productos:b", "productos:c"])
+    assert valores == [{"id": 1}, [1, 2], None]
+    assert falso.round_trips == 1  # un MGET, solo con las claves que no estaban en el L1
+    assert await cache.adelete("productos:a")
+    assert await cache.aget("productos:a") is None
+
+
+@pytest.mark.asyncio
+async def test_ainvalidate_tags_y_decoradores_async(monkeypatch):
+    monkeypatch.setattr(settings, "cache_scan_batch_size", 2)
+    cache, falso = _cache()
+    llamadas = []
+
+    @cache.cache_result(ttl=60, key_prefix="productos:stats", tags=["productos"])
+    async def stats(seccion: int):
+        llamadas.append(seccion)
+        return {"seccion": seccion}
+
+    @cache.invalidate_cache(tags=["productos"])
+    async def actualizar_producto():
+        return "ok"
+
+    await stats(1), await stats(1), await stats(2)
+    await cache.aset("dashboard:metrics:v1", 1, ttl=60, tags=["dashboard"])
+    assert llamadas == [1, 2]
+
+    assert await actualizar_producto() == "ok"
+    assert sorted(falso.datos) == ["dashboard:metrics:v1", "tag:dashboard"]
+    await stats(1)
+    assert llamadas == [1, 2, 1]
+    assert await cache.ainvalidate_tags("inexistente") == 0
+
+
+@pytest.mark.asyncio
+async def test_un_cliente_async_por_event_loop_con_pool_acotado():
+    cache = CacheManager()
+    cliente = cache._async_client()
+
+    assert cache._async_client() is cliente
+    assert cliente.connection_pool.max_connections == settings.redis_max_connections
+
+    otro_loop = await asyncio.to_thread(lambda: asyncio.run(_cliente_de(cache)))
+    assert otro_loop is not cliente
+    await cache.aclose()
+    assert cache._async_clients.get(asyncio.get_running_loop()) is None
+
+
+async def _cliente_de(cache: CacheManager):
+    return cache._async_client()
@@ -0,0 +1,119 @@
+"""Tests del codec del caché: tipos que vuelven intactos, compresión y tamaños por prefijo."""
+
+import json
+from datetime import UTC, date, datetime, time
+from decimal import Decimal
+
+import pytest
+
+from app.core.cache import CacheManager
+from app.core.cache_codec import COMPRESORES, CacheCodec
+from app.core.metrics import metrics_manager
+
+VALOR = {
+    "csv": b"ID,Nombre\r\n1,Manzanilla\r\n",
+    "generado": datetime(2025, 6, 1, 8, 30, tzinfo=UTC),
+    "dia": date(2025, 6, 1),
+    "hora": time(8, 30),
+    "total": Decimal("1234.50"),
+    "filas": [{"id": 1, "precio": Decimal("2.10"), "vence": date(2026, 1, 1)}],
+    "texto": "ñandú",
+    "vacio": None,
+}
+
+
+class _RedisFalso:
+    def __init__(self):
+        self.datos: dict[str, bytes] = {}
+
+    def get(self, key):
+        return self.datos.get(key)
+
+    def setex(self, key, ttl, value):
+        self.datos[key] = value
+
+    def set(self, key, value):
+        self.datos[key] = value
+
+
+# Cada backend con el módulo que necesita: los opcionales se saltan si no están instalados
+_SERIALIZADORES = [("json", None), ("msgpack", "msgpack"), ("orjson", "orjson")]
+_COMPRESORES = [("zlib", None), ("zstd", "zstandard"), ("lz4", "lz4.frame")]
+
+
+@pytest.mark.parametrize("serializador, modulo", _SERIALIZADORES)
+def test_bytes_fechas_y_decimales_vuelven_con_su_tipo(serializador, modulo):
+    if modulo:
+        pytest.importorskip(modulo)
+    codec = CacheCodec(serializador, "none")
+
+    assert codec.decodificar(codec.codificar(VALOR).datos) == VALOR
+
+
+@pytest.mark.parametrize("serializador, modulo", _SERIALIZADORES)
+def test_valor_sin_representacion_lanza_type_error(serializador, modulo):
+    if modulo:
+        pytest.importorskip(modulo)
+
+    with pytest.raises(TypeError):
+        CacheCodec(serializador, "none").codificar({"producto": object()})
+
+
+@pytest.mark.parametrize("compresion, modulo", _COMPRESORES)
+def test_comprime_solo_por_encima_del_umbral(compresion, modulo):
+    if modulo:
+        pytest.importorskip(modulo)
+    codec = CacheCodec("json", compresion, umbral=512)
+    grande = {"filas": [{"nombre": "Producto", "stock": i} for i in range(200)]}
+
+    pequeño = codec.codificar({"ok": True})
+    comprimido = codec.codificar(grande)
+
+    assert pequeño.compresion == "none"
+    assert comprimido.compresion == compresion
+    assert len(comprimido.datos) < comprimido.tamaño_serializado / 4
+    # Otra configuración lee lo que escribió esta: la trama lleva su codec
+    assert CacheCodec("json", "none").decodificar(comprimido.datos) == grande
+
+
+def test_lee_valores_json_anteriores_al_codec():
+    assert CacheCodec.decodificar(json.dumps({"total": 3}).encode()) == {"total": 3}
+    assert CacheCodec.decodificar(b"ok") == "ok"
+
+
+def test_codec_no_instalado_o_desconocido_falla_al_configurarlo():
+    with pytest.raises(ValueError, match="desconocido"):
+        CacheCodec("pickle")
+    ausentes = [n for n, c in COMPRESORES.items() if not c[1]]
+    if ausentes:
+        with pytest.raises(ValueError, match="no está instalado"):
+            CacheCodec("json", ausentes[0])
+
+
+def test_cache_manager_guarda_binario_y_registra_tamaños_por_prefijo():
+    cache = CacheManager()
+    cache.redis_client = _RedisFalso()
+    cache.enabled = True
+    cache.codec = CacheCodec("json", "zlib", umbral=256)
+    metrics_manager.cache_writes.pop("dashboardtest", None)
+    grande = {"ventas": [{"dia": date(2025, 6, d), "total": Decimal("10.5")} for d in range(1, 29)]}
+
+    assert cache.set("dashboardtest:resumen", grande, ttl=60)
+    assert cache.set("dashboardtest:csv", b"a,b\r\n", ttl=60)
+
+    assert cache.get("dashboardtest:resumen") == grande
+    assert cache.get("dashboardtest:csv") == b"a,b\r\n"
+    (fila,) = [f for f in metrics_manager.cache_size_summary() if f["prefix"] == "dashboardtest"]
+    assert fila["writes"] == 2
+    assert fila["compressed_writes"] == 1
+    assert fila["stored_bytes"] == sum(len(v) for v in cache.redis_client.datos.values())
+    assert fila["stored_bytes"] < fila["serialized_bytes"]
+
+
+def test_cache_manager_no_escribe_valores_que_el_codec_rechaza():
+    cache = CacheManager()
+    cache.redis_client = _RedisFalso()
+    cache.enabled = True
+
+    assert cache.set("dashboardtest:orm", {"producto": object()}, ttl=60) is False
+    assert cache.redis_client.datos == {}
@@ -0,0 +1,140 @@
+"""Tests de la invalidación del caché al confirmar escrituras (listeners de la sesión)."""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core import cache_invalidation
+from app.core.cache import CacheManager, cache_manager
+from app.models.database import Base
+from app.models.models import Cliente, Laboratorio, Producto, Seccion, Venta
+
+
+class _RedisFalso:
+    def __init__(self):
+        self.datos: dict[str, object] = {}
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+    def get(self, key):
+        return self.datos.get(key)
+
+    def setex(self, key, ttl, value):
+        self.datos[key] = value
+
+    def sadd(self, key, *miembros):
+        self.datos.setdefault(key, set()).update(m.encode() for m in miembros)
+
+    def expire(self, key, ttl):
+        return True
+
+    def rename(self, origen, destino):
+        self.datos[destino] = self.datos.pop(origen)
+
+    def sscan_iter(self, key, count=None):
+        yield from sorted(self.datos.get(key, set()))
+
+    def unlink(self, *keys):
+        return sum(self.datos.pop(k, None) is not None for k in keys)
+
+
+@pytest.fixture
+def invalidaciones(monkeypatch):
+    llamadas: list[tuple[str, ...]] = []
+    monkeypatch.setattr(cache_manager, "enabled", True)
+    monkeypatch.setattr(cache_manager, "invalidate_tags", lambda *tags: llamadas.append(tags))
+    return llamadas
+
+
+def _catalogo(db):
+    db.add_all(
+        [
+            Seccion(id_seccion=1, nombre_seccion="Hierbas"),
+            Laboratorio(id_laboratorio=1, nombre_laboratorio="Lab Uno"),
+            Producto(
+                id_producto=1,
+                id_seccion=1,
+                id_laboratorio=1,
+                nombre_producto="Manzanilla",
+                precio_compra=2.5,
+                stock_actual=10,
+            ),
+        ]
+    )
+
+
+def test_una_invalidacion_por_transaccion_con_todas_las_etiquetas(
+    _shared_db_session, invalidaciones
+):
+    db = _shared_db_session
+    _catalogo(db)
+    db.flush()
+    db.get(Producto, 1).stock_actual = 7
+    db.flush()  # varios flushes, una sola invalidación al confirmar
+    db.commit()
+
+    assert invalidaciones == [("laboratorios", "productos", "secciones")]
+
+    db.add(Venta(fecha_venta=datetime(2025, 6, 1), subtotal=10.0, total=10.0))
+    db.execute(update(Producto).where(Producto.id_producto == 1).values(stock_actual=6))
+    db.commit()
+    assert invalidaciones[-1] == ("productos", "ventas")
+
+
+def test_rollback_y_transacciones_sin_tablas_cacheadas_no_invalidan(invalidaciones):
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    _catalogo(db)
+    db.flush()
+    db.rollback()
+    db.add(Cliente(nombre_cliente="Ana", apellido_cliente="Ruiz", cedula="101"))
+    db.commit()
+
+    assert invalidaciones == []
+    db.close()
+    engine.dispose()
+
+
+def test_commit_expulsa_las_entradas_del_caché(_shared_db_session, monkeypatch):
+    cache = CacheManager()
+    cache.redis_client = _RedisFalso()
+    cache.enabled = True
+    monkeypatch.setattr(cache_invalidation, "cache_manager", cache)
+    cache.set("productos:stats:x", {"total": 1}, ttl=300, tags=["productos"])
+    cache.set("dashboard:metrics:v1", {"ok": 1}, ttl=60, tags=["dashboard", "secciones"])
+    cache.set("business:metrics:v1:30", {"ok": 1}, ttl=300, tags=["business", "ventas"])
+
+    db = _shared_db_session
+    _catalogo(db)
+    db.commit()
+
+    assert [k for k in cache.redis_client.datos if not k.startswith("tag:")] == [
+        "business:metrics:v1:30"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_commit_dentro_del_event_loop_invalida_sin_bloquearlo(
+    _shared_db_session, invalidaciones, monkeypatch
+):
+    asincronas = []
+
+    async def ainvalidate_tags(*tags):
+        asincronas.append(tags)
+
+    monkeypatch.setattr(cache_manager, "ainvalidate_tags", ainvalidate_tags)
+    db = _shared_db_session
+    _catalogo(db)
+    db.commit()
+    await asyncio.gather(*cache_invalidation._tareas)
+
+    assert invalidaciones == []
+    assert asincronas == [("laboratorios", "productos", "secciones")]
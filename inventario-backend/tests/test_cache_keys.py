@@ -0,0 +1,93 @@
+"""Tests de la derivación de claves de caché (filtros pydantic/dataclass, sesiones omitidas)."""
+
+from dataclasses import dataclass
+from datetime import date
+
+from app.core.cache import CacheManager
+from app.models.filters import ProductoFilters
+from app.models.models import Seccion
+
+
+class _RedisFalso:
+    def __init__(self):
+        self.datos: dict[str, str] = {}
+
+    def get(self, key):
+        return self.datos.get(key)
+
+    def setex(self, key, ttl, value):
+        self.datos[key] = value
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.datos:
+            return None
+        self.datos[key] = value
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        return int(self.datos.get(key) == token and self.datos.pop(key) is not None)
+
+
+@dataclass
+class _Rango:
+    desde: date
+    hasta: date
+
+
+@dataclass
+class _OtroRango:
+    desde: date
+    hasta: date
+
+
+def _cache() -> CacheManager:
+    cache = CacheManager()
+    cache.redis_client = _RedisFalso()
+    cache.enabled = True
+    return cache
+
+
+def test_filtros_distintos_dan_claves_distintas_y_la_sesion_no_cuenta(_shared_db_session):
+    clave = CacheManager()._generate_cache_key
+
+    sin_filtro = clave("export:productos", _shared_db_session, ProductoFilters())
+    con_filtro = clave("export:productos", _shared_db_session, ProductoFilters(id_seccion=3))
+
+    assert sin_filtro != con_filtro
+    assert sin_filtro.startswith("export:productos:")
+    assert con_filtro == clave("export:productos", ProductoFilters(id_seccion=3))
+    assert clave("k", ProductoFilters(nombre="a", estado=None)) != clave("k", ProductoFilters())
+
+
+def test_dataclasses_y_valores_compuestos_son_canonicos():
+    clave = CacheManager()._generate_cache_key
+    rango = _Rango(date(2025, 1, 1), date(2025, 1, 31))
+
+    assert clave("k", rango) == clave("k", _Rango(date(2025, 1, 1), date(2025, 1, 31)))
+    assert clave("k", rango) != clave("k", _Rango(date(2025, 1, 1), date(2025, 2, 28)))
+    assert clave("k", rango) != clave("k", _OtroRango(date(2025, 1, 1), date(2025, 1, 31)))
+    assert clave("k", {"b": 1, "a": {2, 1}}) == clave("k", {"a": {1, 2}, "b": 1})
+    assert clave("k", 5) != clave("k", "5")
+    assert clave("k", Seccion(id_seccion=1)) != clave("k", Seccion(id_seccion=2))
+
+
+def test_cache_result_no_sirve_un_export_con_otros_filtros(_shared_db_session):
+    cache = _cache()
+    llamadas = []
+
+    @cache.cache_result(ttl=60, key_prefix="export:productos")
+    def exportar(db, filters: ProductoFilters, formato: str = "csv"):
+        llamadas.append(filters)
+        return {"seccion": filters.id_seccion, "formato": formato}
+
+    assert exportar(_shared_db_session, ProductoFilters()) == {"seccion": None, "formato": "csv"}
+    assert exportar(_shared_db_session, ProductoFilters(id_seccion=3)) == {
+        "seccion": 3,
+        "formato": "csv",
+    }
+    # Misma llamada escrita de otra forma (nombrada y con el default explícito): acierto
+    filtros = ProductoFilters(id_seccion=3)
+    otra_forma = exportar(db=_shared_db_session, filters=filtros, formato="csv")
+    assert otra_forma["seccion"] == 3
+    assert len(llamadas) == 2
+    assert len(cache.redis_client.datos) == 2
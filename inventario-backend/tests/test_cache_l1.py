@@ -0,0 +1,107 @@
+"""Tests del caché en dos niveles: LRU en proceso, invalidación por pub/sub y contadores."""
+
+from fnmatch import fnmatchcase
+
+from app.core import cache_l1
+from app.core.cache import CacheManager
+from app.core.cache_l1 import CacheLocal
+from app.core.metrics import metrics_manager
+
+
+class _RedisCompartido:
+    """Redis en memoria compartido por varios workers, con PUBLISH síncrono."""
+
+    def __init__(self):
+        self.datos: dict[str, bytes] = {}
+        self.suscriptores: list = []
+        self.lecturas = 0
+
+    def get(self, key):
+        self.lecturas += 1
+        return self.datos.get(key)
+
+    def setex(self, key, ttl, value):
+        self.datos[key] = value
+
+    def set(self, key, value):
+        self.datos[key] = value
+
+    def delete(self, *keys):
+        return sum(self.datos.pop(k, None) is not None for k in keys)
+
+    unlink = delete
+
+    def scan_iter(self, match=None, count=None):
+        return [k.encode() for k in list(self.datos) if fnmatchcase(k, match)]
+
+    def publish(self, channel, payload):
+        for handler in self.suscriptores:
+            handler({"channel": channel, "data": payload})
+
+
+def _worker(redis: _RedisCompartido) -> CacheManager:
+    cache = CacheManager()
+    cache.redis_client = redis
+    cache.enabled = True
+    cache.l1 = CacheLocal(max_entradas=100, max_bytes=1_000_000, ttl=30)
+    redis.suscriptores.append(cache._on_invalidation)
+    return cache
+
+
+def test_lru_acotado_por_entradas_bytes_y_ttl(monkeypatch):
+    reloj = [100.0]
+    monkeypatch.setattr(cache_l1.time, "monotonic", lambda: reloj[0])
+    l1 = CacheLocal(max_entradas=2, max_bytes=10, ttl=5)
+
+    l1.set("a", b"1")
+    l1.set("b", b"2")
+    l1.get("a")
+    l1.set("c", b"3")
+    assert l1.get("b") is None  # la menos usada
+    assert l1.get("a") == b"1"
+
+    l1.set("grande", b"x" * 9)
+    assert l1.estado()["bytes"] <= 10
+    l1.set("enorme", b"x" * 11)
+    assert l1.get("enorme") is None
+
+    l1.set("corto", b"1", ttl=1)
+    reloj[0] += 2
+    assert l1.get("corto") is None
+
+
+def test_escrituras_y_borrados_invalidan_el_l1_de_los_demas_workers():
+    redis = _RedisCompartido()
+    caja, terminal = _worker(redis), _worker(redis)
+
+    caja.set("dashboard:metrics:v1", {"ventas": 1}, ttl=60)
+    assert terminal.get("dashboard:metrics:v1") == {"ventas": 1}
+    lecturas = redis.lecturas
+    assert terminal.get("dashboard:metrics:v1") == {"ventas": 1}
+    assert redis.lecturas == lecturas  # servido desde el L1
+
+    caja.set("dashboard:metrics:v1", {"ventas": 2}, ttl=60)
+    assert terminal.get("dashboard:metrics:v1") == {"ventas": 2}
+
+    terminal.get("dashboard:metrics:v1")
+    caja.delete_pattern("dashboard:*")
+    assert terminal.l1.get("dashboard:metrics:v1") is None
+    assert terminal.get("dashboard:metrics:v1") is None
+
+
+def test_el_l1_devuelve_copias_y_cuenta_aciertos_por_nivel():
+    cache = _worker(_RedisCompartido())
+    antes = {t: dict(c) for t, c in metrics_manager.cache_tier_summary().items()}
+
+    cache.set("productos:stats", {"total": [1, 2]}, ttl=60)
+    cache.get("productos:stats")["total"].append(3)
+    assert cache.get("productos:stats") == {"total": [1, 2]}
+    cache.get("productos:otra")
+
+    despues = metrics_manager.cache_tier_summary()
+    delta = {
+        (tier, r): despues[tier][r] - antes.get(tier, {}).get(r, 0)
+        for tier in ("l1", "l2")
+        for r in ("hits", "misses")
+    }
+    assert delta == {("l1", "hits"): 2, ("l1", "misses"): 1, ("l2", "hits"): 0, ("l2", "misses"): 1}
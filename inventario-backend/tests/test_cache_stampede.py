@@ -0,0 +1,206 @@
+"""Tests de la protección contra estampidas: single-flight, refresco anticipado y stale."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from app.core import cache as cache_module
+from app.core.cache import CacheManager
+from app.core.config import settings
+
+HILOS = 20
+
+
+class _RedisCompartido:
+    """Redis en memoria thread-safe con SET NX y el script de liberación del lock."""
+
+    def __init__(self):
+        self.datos: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self.datos.get(key)
+
+    def set(self, key, value, nx=False, px=None):
+        with self._lock:
+            if nx and key in self.datos:
+                return None
+            self.datos[key] = value
+            return True
+
+    def setex(self, key, ttl, value):
+        self.datos[key] = value
+
+    def eval(self, script, numkeys, key, token):
+        with self._lock:
+            if self.datos.get(key) != token:
+                return 0
+            del self.datos[key]
+            return 1
+
+
+class _Reloj:
+    def __init__(self):
+        self.ahora = 1_000_000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = _Reloj()
+    monkeypatch.setattr(cache_module, "_ahora", reloj)
+    monkeypatch.setattr(settings, "cache_stale_ttl_seconds", 60)
+    monkeypatch.setattr(settings, "cache_refresh_workers", 1)
+    return reloj
+
+
+@pytest.fixture
+def cache():
+    cache = CacheManager()
+    cache.redis_client = _RedisCompartido()
+    cache.enabled = True
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def agregado(tmp_path):
+    """Agregado "caro" contra SQLite que cuenta las consultas que llegan a la base."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'carga.db'}")
+    consultas = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    def calcular():
+        with engine.connect() as conn:
+            total = conn.execute(text("SELECT 42")).scalar()
+        time.sleep(0.02)  # los agregados reales tardan: ensancha la ventana de carrera
+        return {"total": total}
+
+    yield calcular, consultas
+    engine.dispose()
+
+
+def _en_paralelo(fn, hilos=HILOS):
+    barrera = threading.Barrier(hilos)
+
+    def tarea():
+        barrera.wait()
+        return fn()
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        return [f.result() for f in [pool.submit(tarea) for _ in range(hilos)]]
+
+
+def test_carga_una_consulta_por_ventana_de_ttl(cache, reloj, agregado):
+    calcular, consultas = agregado
+
+    # Sin protección (get + set manual): cada request concurrente recalcula
+    def sin_proteccion():
+        valor = cache.get("dashboard:sin_proteccion")
+        if valor is None:
+            valor = calcular()
+            cache.set("dashboard:sin_proteccion", valor, ttl=60)
+        return valor
+
+    _en_paralelo(sin_proteccion)
+    assert len(consultas) > 1
+
+    # Con get_or_compute: una consulta por ventana, incluida la carga en frío
+    por_ventana = []
+    for ventana in range(4):
+        consultas.clear()
+        lecturas = _en_paralelo(
+            lambda: cache.get_or_compute("dashboard:metrics:v1", calcular, ttl=60, refresh=calcular)
+        )
+        if cache._refresh_executor is not None:
+            # Un solo hilo de refresco: la tarea vacía corre cuando el refresco terminó
+            cache._refresh_executor.submit(lambda: None).result()
+        por_ventana.append(len(consultas))
+        assert {tuple(lectura.valor.items()) for lectura in lecturas} == {(("total", 42),)}
+        if ventana > 0:
+            # Nadie esperó al recálculo: valor anterior (o el nuevo si ya estaba)
+            assert {lectura.estado for lectura in lecturas} <= {"stale", "hit"}
+            assert any(lectura.stale for lectura in lecturas)
+        reloj.ahora += 61  # vence el TTL lógico, sigue dentro de la ventana stale
+
+    assert por_ventana == [1, 1, 1, 1]
+
+
+def test_miss_concurrente_espera_al_que_calcula(cache):
+    llamadas = []
+
+    def calcular():
+        llamadas.append(1)
+        time.sleep(0.1)
+        return {"ok": True}
+
+    lecturas = _en_paralelo(lambda: cache.get_or_compute("business:metrics:v1:30", calcular, 300))
+
+    assert len(llamadas) == 1
+    assert sorted(lectura.estado for lectura in lecturas) == ["hit"] * (HILOS - 1) + ["miss"]
+    assert "lock:business:metrics:v1:30" not in cache.redis_client.datos
+
+
+def test_refresco_anticipado_probabilistico(cache, reloj, monkeypatch):
+    llamadas = []
+
+    def calcular():
+        llamadas.append(1)
+        return len(llamadas)
+
+    assert cache.get_or_compute("productos:stats", calcular, ttl=60).valor == 1
+    reloj.ahora += 30  # fresca: a mitad de su TTL
+
+    monkeypatch.setattr(cache_module.random, "random", lambda: 0.5)
+    assert cache.get_or_compute("productos:stats", calcular, ttl=60) == (1, "hit")
+    assert len(llamadas) == 1  # un cálculo de ~0s no justifica adelantarse
+
+    sobre = cache.redis_client.datos["productos:stats"]
+    sobre = cache.codec.decodificar(sobre)
+    sobre["delta"] = 60.0  # cálculo caro: -delta·log(azar) supera lo que le queda
+    cache.redis_client.datos["productos:stats"] = cache.codec.codificar(sobre).datos
+    # Sin `refresh` recalcula en línea quien toma el lock; la entrada sigue vigente
+    assert cache.get_or_compute("productos:stats", calcular, ttl=60) == (2, "miss")
+
+
+@pytest.mark.asyncio
+async def test_async_sirve_stale_y_refresca_en_una_tarea(cache, reloj):
+    class _RedisAsync:
+        def __init__(self, sync):
+            self.sync = sync
+
+        def __getattr__(self, nombre):
+            metodo = getattr(self.sync, nombre)
+
+            async def llamar(*args, **kwargs):
+                return metodo(*args, **kwargs)
+
+            return llamar
+
+    cache._async_clients[asyncio.get_running_loop()] = _RedisAsync(cache.redis_client)
+    llamadas = []
+
+    async def calcular():
+        llamadas.append(1)
+        await asyncio.sleep(0.01)
+        return len(llamadas)
+
+    assert (await cache.aget_or_compute("dashboard:x", calcular, 60, refresh=calcular)).valor == 1
+    reloj.ahora += 61
+
+    lecturas = await asyncio.gather(
+        *[cache.aget_or_compute("dashboard:x", calcular, 60, refresh=calcular) for _ in range(10)]
+    )
+    assert {(lectura.valor, lectura.estado) for lectura in lecturas} == {(1, "stale")}
+    await asyncio.gather(*cache._refresh_tasks)
+    assert len(llamadas) == 2
+    assert await cache.aget_or_compute("dashboard:x", calcular, 60) == (2, "hit")
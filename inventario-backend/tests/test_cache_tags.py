@@ -0,0 +1,127 @@
+"""Tests de la invalidación por etiquetas y de los borrados por patrón con SCAN + UNLINK."""
+
+from fnmatch import fnmatchcase
+
+import pytest
+import redis
+
+from app.core.cache import CacheManager
+from app.core.config import settings
+
+
+class _Pipeline:
+    def __init__(self, redis_falso):
+        self.redis = redis_falso
+        self.comandos = []
+
+    def __getattr__(self, nombre):
+        return lambda *args, **kwargs: self.comandos.append((nombre, args, kwargs))
+
+    def execute(self):
+        self.redis.round_trips += 1
+        return [getattr(self.redis, n)(*a, **k) for n, a, k in self.comandos]
+
+
+class _RedisFalso:
+    """Subconjunto de Redis usado por CacheManager; KEYS está prohibido."""
+
+    def __init__(self):
+        self.datos: dict[str, object] = {}
+        self.unlinks: list[int] = []
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self)
+
+    def get(self, key):
+        return self.datos.get(key)
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.datos:
+            return None
+        self.datos[key] = value
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        return int(self.datos.get(key) == token and self.datos.pop(key) is not None)
+
+    def setex(self, key, ttl, value):
+        self.datos[key] = value
+
+    def sadd(self, key, *miembros):
+        self.datos.setdefault(key, set()).update(m.encode() for m in miembros)
+
+    def expire(self, key, ttl):
+        return True
+
+    def rename(self, origen, destino):
+        if origen not in self.datos:
+            raise redis.ResponseError("no such key")
+        self.datos[destino] = self.datos.pop(origen)
+
+    def sscan_iter(self, key, count=None):
+        yield from sorted(self.datos.get(key, set()))
+
+    def scan_iter(self, match=None, count=None):
+        yield from [k.encode() for k in list(self.datos) if fnmatchcase(k, match)]
+
+    def unlink(self, *keys):
+        self.unlinks.append(len(keys))
+        return sum(self.datos.pop(k, None) is not None for k in keys)
+
+    def keys(self, pattern):
+        raise AssertionError("KEYS bloquea Redis: usar SCAN")
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(settings, "cache_scan_batch_size", 3)
+    cache = CacheManager()
+    cache.redis_client = _RedisFalso()
+    cache.enabled = True
+    return cache
+
+
+def test_invalidar_una_etiqueta_borra_solo_sus_entradas(cache):
+    for i in range(5):
+        cache.set(f"productos:search:{i}", {"i": i}, ttl=180, tags=["productos"])
+    cache.set("dashboard:metrics:v1", {"ok": 1}, ttl=60, tags=["dashboard", "productos"])
+    cache.set("business:metrics:v1:30", {"ok": 1}, ttl=300, tags=["business"])
+    assert cache.redis_client.round_trips == 7  # cada valor con sus etiquetas en un pipeline
+
+    assert cache.invalidate_tags("productos") == 6
+
+    datos = cache.redis_client.datos
+    assert sorted(datos) == ["business:metrics:v1:30", "tag:business", "tag:dashboard"]
+    # UNLINK por lotes de CACHE_SCAN_BATCH_SIZE, más el set renombrado de la etiqueta
+    assert cache.redis_client.unlinks == [3, 3, 1]
+    assert cache.invalidate_tags("productos") == 0
+
+
+def test_decoradores_registran_e_invalidan_por_etiqueta(cache):
+    llamadas = []
+
+    @cache.cache_result(ttl=60, key_prefix="productos:stats", tags=["productos"])
+    def stats(seccion: int):
+        llamadas.append(seccion)
+        return {"seccion": seccion}
+
+    @cache.invalidate_cache(tags=["productos"])
+    def actualizar_producto():
+        return "ok"
+
+    stats(1), stats(1), stats(2)
+    assert llamadas == [1, 2]
+    assert actualizar_producto() == "ok"
+    stats(1)
+    assert llamadas == [1, 2, 1]
+
+
+def test_borrado_por_patron_usa_scan_y_unlink_por_lotes(cache):
+    for i in range(7):
+        cache.set(f"productos:top:{i}", i, ttl=60)
+    cache.set("dashboard:metrics:v1", 1, ttl=60)
+
+    assert cache.delete_pattern("productos:*") == 7
+    assert list(cache.redis_client.datos) == ["dashboard:metrics:v1"]
+    assert cache.redis_client.unlinks == [3, 3, 1]
@@ -0,0 +1,173 @@
+"""Tests del precalentado del caché: claves objetivo, concurrencia acotada y estado."""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import cache_warmer as warmer_module
+from app.core.cache import CacheManager
+from app.core.cache_warmer import CacheWarmer, cache_warmer
+from app.core.config import settings
+from app.core.metrics import metrics_manager
+from app.core.security import create_access_token
+from app.models.models import Laboratorio, Producto, Seccion
+from main import app
+
+
+class _RedisFalso:
+    def __init__(self):
+        self.datos: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+    def get(self, key):
+        return self.datos.get(key)
+
+    def set(self, key, value, nx=False, px=None):
+        with self._lock:
+            if nx and key in self.datos:
+                return None
+            self.datos[key] = value
+            return True
+
+    def setex(self, key, ttl, value):
+        self.datos[key] = value
+
+    def sadd(self, key, *miembros):
+        return 1
+
+    def expire(self, key, ttl):
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        with self._lock:
+            return int(self.datos.get(key) == token and self.datos.pop(key) is not None)
+
+
+class _Rol:
+    nombre_rol = "admin"
+
+
+class _Usuario:
+    id_usuario = 1
+    nombre_usuario = "admin"
+    estado = "Activo"
+    rol = _Rol()
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = CacheManager()
+    cache.redis_client = _RedisFalso()
+    cache.enabled = True
+    monkeypatch.setattr(warmer_module, "cache_manager", cache)
+    monkeypatch.setattr(metrics_manager, "cache_key_lookups", {})
+    yield cache
+    cache.close()
+
+
+def test_calienta_las_recetas_configuradas_en_el_formato_que_leen_los_endpoints(
+    _shared_db_session, cache, monkeypatch
+):
+    db = _shared_db_session
+    db.add_all(
+        [
+            Seccion(id_seccion=1, nombre_seccion="Hierbas"),
+            Laboratorio(id_laboratorio=1, nombre_laboratorio="Lab Uno"),
+            Producto(
+                id_producto=1,
+                id_seccion=1,
+                id_laboratorio=1,
+                nombre_producto="Manzanilla",
+                precio_compra=2.5,
+                stock_actual=10,
+            ),
+        ]
+    )
+    db.flush()
+    # Una sola conexión SQLite en los tests: sin concurrencia y con la sesión compartida
+    monkeypatch.setattr(settings, "cache_warm_max_concurrency", 1)
+    monkeypatch.setattr(warmer_module, "run_in_read_session", lambda fn: fn(db))
+
+    resultado = cache_warmer.calentar()
+
+    claves = [fila["key"] for fila in resultado["keys"]]
+    assert resultado["warmed"] == len(claves) == 4 and resultado["errors"] == 0
+    for clave in claves:
+        lectura = cache.get_or_compute(clave, lambda: pytest.fail("no debía recalcular"), 60)
+        assert lectura.estado == "hit"
+    assert cache.get("dashboard:metrics:v1")["valor"]["generales"]["total_productos"] == 1
+    assert cache_warmer.estado()["last_run"]["warmed"] == 4
+
+    # La receta del catálogo (fuera del default) guarda filas JSON, no objetos ORM
+    monkeypatch.setattr(settings, "cache_warm_keys", "productos_advanced")
+    monkeypatch.setattr(settings, "cache_warm_hot_keys", 0)
+    (fila,) = cache_warmer.calentar()["keys"]
+    assert fila["result"] == "warmed"
+    (producto,) = cache.get(fila["key"])["valor"]["data"]
+    assert producto["nombre_producto"] == "Manzanilla" and producto["precio_compra"] == 2.5
+
+
+def test_la_telemetria_agrega_claves_calientes_que_alguna_receta_sabe_calcular(cache, monkeypatch):
+    monkeypatch.setattr(settings, "cache_warm_keys", "dashboard")
+    monkeypatch.setattr(settings, "cache_warm_hot_keys", 2)
+    for _ in range(5):
+        metrics_manager.record_cache_key_lookup("business:metrics:v1:60", True)
+        metrics_manager.record_cache_key_lookup("productos:top:10:stock", True)
+    metrics_manager.record_cache_key_lookup("dashboard:metrics:v1", False)
+
+    assert cache_warmer.objetivos() == [
+        ("dashboard:metrics:v1", "configured"),
+        ("business:metrics:v1:60", "hot"),
+    ]
+
+
+def test_concurrencia_acotada_y_claves_en_recalculo_se_omiten(cache, monkeypatch):
+    monkeypatch.setattr(settings, "cache_warm_max_concurrency", 2)
+    monkeypatch.setattr(settings, "cache_warm_keys", ",".join(f"r{i}" for i in range(6)))
+    monkeypatch.setattr(warmer_module, "run_in_read_session", lambda fn: fn(None))
+    activas, maximo = [0], [0]
+    lock = threading.Lock()
+
+    def calcular(db, m):
+        with lock:
+            activas[0] += 1
+            maximo[0] = max(maximo[0], activas[0])
+        time.sleep(0.05)
+        with lock:
+            activas[0] -= 1
+        return m[0]
+
+    warmer = CacheWarmer()
+    for i in range(6):
+        warmer.registrar(f"r{i}", f"k:{i}", f"k:{i}", calcular, 60)
+    cache.redis_client.datos["lock:k:5"] = "otro-proceso"
+
+    resultado = warmer.calentar()
+
+    assert maximo[0] == 2
+    assert [f["result"] for f in resultado["keys"]] == ["warmed"] * 5 + ["skipped"]
+    with pytest.raises(ValueError, match="no cumple el patrón"):
+        warmer.registrar("mala", r"k:\d+", "otra", calcular, 60)
+
+
+def test_estado_y_ejecucion_desde_el_router_del_scheduler():
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'admin'})}"}
+    with patch("app.core.auth_middleware.get_current_user_from_token", return_value=_Usuario()):
+        client = TestClient(app)
+        ejecucion = client.post("/api/v1/scheduler/cache-warmer/run-now", headers=headers)
+        estado = client.get("/api/v1/scheduler/cache-warmer", headers=headers)
+
+    assert ejecucion.status_code == 200
+    assert ejecucion.json()["data"]["cache_enabled"] is False  # Redis apagado en los tests
+    data = estado.json()["data"]
+    assert {"dashboard", "business", "productos_advanced"} <= set(data["recipes"])
+    assert data["last_run"]["keys"] == [] and data["scheduled"] is False
@@ -0,0 +1,102 @@
+"""Tests de la recepción de facturas de proveedor (entradas en bloque)."""
+
+import pytest
+
+from app.core.exceptions import NotFoundError
+from app.models.models import Entrada, Laboratorio, Lote, Producto, Seccion
+from app.models.schemas import EntradaFacturaCreate, EntradaLineaCreate
+from app.services.entrada_service import EntradaService
+
+
+@pytest.fixture
+def db(memory_db):
+    memory_db.add_all(
+        [
+            Seccion(id_seccion=1, nombre_seccion="Hierbas"),
+            Laboratorio(id_laboratorio=1, nombre_laboratorio="Lab Uno"),
+            Producto(
+                id_producto=1,
+                id_seccion=1,
+                id_laboratorio=1,
+                nombre_producto="A",
+                precio_compra=1,
+                stock_actual=5,
+            ),
+            Producto(
+                id_producto=2,
+                id_seccion=1,
+                id_laboratorio=1,
+                nombre_producto="B",
+                precio_compra=1,
+                stock_actual=0,
+            ),
+        ]
+    )
+    for id_lote, id_producto, cantidad in [(1, 1, 5), (2, 1, 0), (3, 2, 0)]:
+        memory_db.add(
+            Lote(
+                id_lote=id_lote,
+                id_producto=id_producto,
+                cantidad_inicial=cantidad,
+                cantidad_disponible=cantidad,
+                precio_compra_lote=1,
+            )
+        )
+    memory_db.commit()
+    return memory_db
+
+
+def _factura(lineas: list[tuple[int, int, float]]) -> EntradaFacturaCreate:
+    return EntradaFacturaCreate(
+        numero_factura_compra="F-100",
+        proveedor="Distribuidora Andina",
+        lineas=[
+            EntradaLineaCreate(id_lote=id_lote, cantidad=cantidad, precio_compra_unitario=precio)
+            for id_lote, cantidad, precio in lineas
+        ],
+    )
+
+
+def test_registrar_factura_agrega_incrementos_por_lote_y_producto(db):
+    resumen = EntradaService.registrar_factura(
+        db, _factura([(1, 10, 2.0), (2, 4, 2.5), (1, 1, 2.0), (3, 7, 1.0)]), id_usuario=1
+    )
+
+    assert len(resumen["ids_entrada"]) == 4
+    assert resumen["lotes_actualizados"] == 3
+    assert resumen["productos_actualizados"] == 2
+    assert resumen["total_unidades"] == 22
+    assert resumen["total_compra"] == pytest.approx(39.0)
+    db.expire_all()
+    assert [db.get(Lote, i).cantidad_disponible for i in (1, 2, 3)] == [16, 4, 7]
+    assert db.get(Producto, 1).stock_actual == 20
+    assert db.get(Producto, 2).stock_actual == 7
+    assert {e.numero_factura_compra for e in db.query(Entrada)} == {"F-100"}
+
+
+def test_registrar_factura_con_lote_inexistente_no_aplica_nada(db):
+    with pytest.raises(NotFoundError):
+        EntradaService.registrar_factura(db, _factura([(1, 10, 2.0), (99, 1, 1.0)]), id_usuario=1)
+
+    db.expire_all()
+    assert db.query(Entrada).count() == 0
+    assert db.get(Lote, 1).cantidad_disponible == 5
+    assert db.get(Producto, 1).stock_actual == 5
+
+
+def test_ajuste_de_stock_usa_update_from_values_en_postgresql():
+    from unittest.mock import MagicMock
+
+    from sqlalchemy.dialects import postgresql
+
+    from app.crud.stock import ajustar_stock_lotes
+
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    ajustar_stock_lotes(db, {1: 2, 2: 0, 3: 5})
+
+    stmt = db.execute.call_args.args[0]
+    compilado = stmt.compile(dialect=postgresql.dialect())
+    assert "FROM (VALUES" in str(compilado)
+    # Los deltas nulos no viajan a la base de datos
+    assert sorted(compilado.params.values()) == [1, 2, 3, 5]
@@ -0,0 +1,173 @@
+"""Tests de la importación masiva de productos (CSV/NDJSON con upsert por código de barras)."""
+
+import asyncio
+import importlib.util
+import io
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from app.core.security import create_access_token
+from app.models.models import Laboratorio, Producto, Seccion
+from app.routers.productos import importar_productos
+from app.scripts import dedupe_codigo_barras
+from app.services.importacion_productos import ImportadorProductos
+from main import app
+
+VERSIONES_ALEMBIC = Path(__file__).parent.parent / "alembic" / "versions"
+
+
+@pytest.fixture
+def db(memory_db):
+    memory_db.add_all(
+        [
+            Seccion(id_seccion=1, nombre_seccion="Hierbas", estado="Activo"),
+            Laboratorio(id_laboratorio=1, nombre_laboratorio="Lab Uno", estado="Activo"),
+        ]
+    )
+    memory_db.commit()
+    return memory_db
+
+
+CSV_CATALOGO = (
+    "codigo_barras,nombre_producto,id_seccion,id_laboratorio,precio_compra,stock_minimo\n"
+    "770001,Manzanilla,1,1,2.5,5\n"
+    "770002,\"Valeriana, gotas\",1,1,8,\n"
+    "770003,Sin laboratorio,1,99,3,1\n"
+    "770004,Precio inválido,1,1,abc,1\n"
+    ",Sin código,1,1,1.0,0\n"
+)
+
+
+def test_importar_csv_crea_productos_y_reporta_errores_por_fila(db):
+    resumen = ImportadorProductos.importar(db, io.BytesIO(CSV_CATALOGO.encode()), "csv", 2)
+
+    assert resumen["procesados"] == 5
+    assert resumen["creados"] == 3
+    assert resumen["actualizados"] == 0
+    assert [e["fila"] for e in resumen["errores"]] == [4, 5]
+    assert "id_laboratorio" in resumen["errores"][0]["errores"][0]
+    assert resumen["errores"][1]["errores"][0].startswith("precio_compra")
+    valeriana = db.query(Producto).filter_by(codigo_barras="770002").one()
+    assert valeriana.nombre_producto == "Valeriana, gotas"
+    assert valeriana.stock_minimo == 0
+    assert valeriana.estado == "Activo"
+
+
+def test_importar_ndjson_actualiza_por_codigo_barras(db):
+    ImportadorProductos.importar(db, io.BytesIO(CSV_CATALOGO.encode()), "csv")
+    lineas = [
+        {
+            "codigo_barras": "770001",
+            "nombre_producto": "Manzanilla 50g",
+            "id_seccion": 1,
+            "id_laboratorio": 1,
+            "precio_compra": 3.0,
+        },
+        {
+            "codigo_barras": "770009",
+            "nombre_producto": "Caléndula",
+            "id_seccion": 1,
+            "id_laboratorio": 1,
+            "precio_compra": 4.0,
+        },
+    ]
+    contenido = "\n".join(json.dumps(linea) for linea in lineas) + "\n{no es json\n"
+
+    resumen = ImportadorProductos.importar(db, io.BytesIO(contenido.encode()), "ndjson")
+
+    assert (resumen["creados"], resumen["actualizados"], resumen["con_error"]) == (1, 1, 1)
+    assert resumen["errores"][0]["fila"] == 3
+    manzanilla = db.query(Producto).filter_by(codigo_barras="770001").one()
+    db.refresh(manzanilla)
+    assert manzanilla.nombre_producto == "Manzanilla 50g"
+    assert manzanilla.precio_compra == 3.0
+    # Columnas ausentes en el archivo no se sobrescriben
+    assert manzanilla.stock_minimo == 5
+
+
+def test_endpoint_importar_productos(_shared_db_session):
+    _shared_db_session.add_all(
+        [
+            Seccion(id_seccion=1, nombre_seccion="Hierbas", estado="Activo"),
+            Laboratorio(id_laboratorio=1, nombre_laboratorio="Lab Uno", estado="Activo"),
+        ]
+    )
+    _shared_db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'admin'})}"}
+
+    class _Rol:
+        nombre_rol = "admin"
+
+    class _Usuario:
+        id_usuario = 1
+        nombre_usuario = "admin"
+        estado = "Activo"
+        rol = _Rol()
+
+    with patch("app.core.auth_middleware.get_current_user_from_token", return_value=_Usuario()):
+        client = TestClient(app)
+        response = client.post(
+            "/api/v1/productos/importar",
+            files={"archivo": ("catalogo.csv", CSV_CATALOGO.encode(), "text/csv")},
+            headers=headers,
+        )
+        rechazado = client.post(
+            "/api/v1/productos/importar",
+            files={"archivo": ("catalogo.xlsx", b"PK", "application/octet-stream")},
+            headers=headers,
+        )
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["creados"] == 3
+    assert data["con_error"] == 2
+    assert rechazado.status_code == 415
+    # Síncrono: FastAPI lo corre en el threadpool y la importación no bloquea el event loop
+    assert not asyncio.iscoroutinefunction(importar_productos)
+
+
+def test_migracion_falla_con_duplicados_hasta_limpiarlos_con_el_script():
+    ruta = next(VERSIONES_ALEMBIC.glob("*_add_producto_codigo_barras_unique.py"))
+    spec = importlib.util.spec_from_file_location("migracion_codigo_barras", ruta)
+    migracion = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migracion)
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        # Tabla como la deja la migración inicial: codigo_barras sin UNIQUE
+        conn.execute(
+            text(
+                "CREATE TABLE producto (id_producto INTEGER PRIMARY KEY, codigo_barras VARCHAR(50))"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO producto VALUES (1, '770001'), (2, '770001'), (3, ''), (4, ''), (5, NULL)"
+            )
+        )
+        with Operations.context(MigrationContext.configure(conn)):
+            with pytest.raises(RuntimeError) as error:
+                migracion.upgrade()
+            # Nada se modificó: los datos solo cambian con el script, que es opt-in
+            assert conn.execute(text("SELECT COUNT(codigo_barras) FROM producto")).scalar() == 4
+
+            sesion = Session(bind=conn)
+            liberados = dedupe_codigo_barras.codigos_a_liberar(sesion)
+            dedupe_codigo_barras.liberar_codigos(sesion, liberados)
+            sesion.flush()
+            migracion.upgrade()
+        filas = conn.execute(text("SELECT id_producto, codigo_barras FROM producto")).all()
+        unicos = inspect(conn).get_unique_constraints("producto")
+
+    assert "3=''" in str(error.value) and "1='770001', 2='770001'" in str(error.value)
+    assert liberados == [(2, "770001"), (3, ""), (4, "")]
+    assert sorted(filas) == [(1, "770001"), (2, None), (3, None), (4, None), (5, None)]
+    assert [u["column_names"] for u in unicos] == [["codigo_barras"]]
+    engine.dispose()
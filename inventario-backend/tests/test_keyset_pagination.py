@@ -0,0 +1,106 @@
+"""Tests de la paginación por cursor (keyset) y de los cursores opacos."""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.models.models import Gasto
+from app.models.pagination import decode_cursor, encode_cursor, keyset_paginate
+from main import app
+
+BASE = datetime(2025, 3, 1, 12, 0)
+
+
+@pytest.fixture
+def db(memory_db):
+    # 7 gastos; los ids 3 y 4 comparten fecha para comprobar el desempate por id
+    for i in range(1, 8):
+        fecha = BASE + timedelta(days=min(i, 3) if i in (3, 4) else i)
+        memory_db.add(
+            Gasto(id_gasto=i, fecha_gasto=fecha, concepto=f"g{i}", categoria="Otros", monto=i)
+        )
+    memory_db.commit()
+    return memory_db
+
+
+def _columnas():
+    return (Gasto.fecha_gasto, Gasto.id_gasto)
+
+
+def test_cursor_round_trip_y_rechazo_de_cursores_invalidos():
+    cursor = encode_cursor([BASE, 42], "prev")
+    assert decode_cursor(cursor) == ([BASE, 42], "prev")
+    for invalido in ("no-es-base64!", encode_cursor([1], "lateral")):
+        with pytest.raises(ValueError):
+            decode_cursor(invalido)
+
+
+def test_keyset_recorre_adelante_y_atras_sin_saltos(db):
+    query = db.query(Gasto)
+    vistos = []
+    paginas = []
+    cursor = None
+    while True:
+        items, siguiente, anterior = keyset_paginate(query, _columnas(), 3, cursor)
+        paginas.append((items, anterior))
+        vistos.extend(g.id_gasto for g in items)
+        if siguiente is None:
+            break
+        cursor = siguiente
+
+    assert vistos == [7, 6, 5, 4, 3, 2, 1]
+    assert paginas[0][1] is None
+
+    # Volver desde la última página con prev_cursor reproduce la página anterior
+    items, siguiente, anterior = keyset_paginate(query, _columnas(), 3, paginas[-1][1])
+    assert [g.id_gasto for g in items] == [4, 3, 2]
+    assert siguiente is not None and anterior is not None
+
+
+def test_endpoint_gastos_en_modo_cursor(_shared_db_session):
+    for i in range(1, 6):
+        _shared_db_session.add(
+            Gasto(
+                fecha_gasto=BASE + timedelta(days=i),
+                concepto=f"g{i}",
+                categoria="Otros",
+                monto=i,
+                id_usuario=1,
+            )
+        )
+    _shared_db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'admin'})}"}
+
+    class _Rol:
+        nombre_rol = "admin"
+
+    class _Usuario:
+        id_usuario = 1
+        nombre_usuario = "admin"
+        estado = "Activo"
+        rol = _Rol()
+
+    with patch("app.core.auth_middleware.get_current_user_from_token", return_value=_Usuario()):
+        client = TestClient(app)
+        primera = client.get(
+            "/api/v1/gastos/?paginacion=cursor&limit=2&conteo=exact", headers=headers
+        ).json()
+        segunda = client.get(
+            f"/api/v1/gastos/?limit=2&cursor={primera['pagination']['next_cursor']}",
+            headers=headers,
+        ).json()
+        invalido = client.get("/api/v1/gastos/?cursor=xyz", headers=headers)
+        clasico = client.get("/api/v1/gastos/?limit=2", headers=headers).json()
+
+    assert [g["concepto"] for g in primera["data"]] == ["g5", "g4"]
+    assert primera["pagination"]["total"] == 5
+    assert primera["pagination"]["has_prev"] is False
+    assert [g["concepto"] for g in segunda["data"]] == ["g3", "g2"]
+    assert segunda["pagination"]["total"] is None
+    assert segunda["pagination"]["has_next"] and segunda["pagination"]["has_prev"]
+    assert invalido.status_code == 400
+    # Sin opt-in la respuesta sigue siendo una lista
+    assert isinstance(clasico, list) and len(clasico) == 2
@@ -0,0 +1,123 @@
+"""Tests del motor de KPIs de inventario en una sola consulta."""
+
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+
+from app.crud.kpis_inventario import calcular_kpis_inventario
+from app.crud.producto_advanced import get_productos_stats
+from app.models.filters import ProductoFilters
+from app.models.models import Laboratorio, Lote, Producto, Seccion, Venta
+
+HOY = date(2025, 6, 11)  # miércoles
+
+
+@pytest.fixture
+def db(memory_db):
+    memory_db.add_all(
+        [
+            Seccion(id_seccion=1, nombre_seccion="Hierbas"),
+            Seccion(id_seccion=2, nombre_seccion="Aceites"),
+            Laboratorio(id_laboratorio=1, nombre_laboratorio="Lab Uno"),
+        ]
+    )
+    # (id, sección, estado, stock, mínimo, precio)
+    for id_producto, id_seccion, estado, stock, minimo, precio in [
+        (1, 1, "Activo", 10, 2, 5.0),
+        (2, 1, "Activo", 1, 3, 10.0),
+        (3, 2, "Activo", 0, 0, 4.0),
+        (4, 2, "Inactivo", 50, 1, 100.0),
+    ]:
+        memory_db.add(
+            Producto(
+                id_producto=id_producto,
+                id_seccion=id_seccion,
+                id_laboratorio=1,
+                nombre_producto=f"P{id_producto}",
+                estado=estado,
+                stock_actual=stock,
+                stock_minimo=minimo,
+                precio_compra=precio,
+            )
+        )
+    medianoche = datetime.combine(HOY, datetime.min.time())
+    for id_lote, id_producto, vence in [
+        (1, 1, medianoche + timedelta(days=5)),
+        (2, 1, medianoche + timedelta(days=20)),
+        (3, 2, medianoche + timedelta(days=45)),
+        (4, 3, medianoche - timedelta(days=1)),
+        (5, 4, medianoche + timedelta(days=3)),
+    ]:
+        memory_db.add(
+            Lote(
+                id_lote=id_lote,
+                id_producto=id_producto,
+                cantidad_inicial=1,
+                cantidad_disponible=1,
+                precio_compra_lote=1,
+                fecha_vencimiento=vence,
+            )
+        )
+    for fecha, total in [
+        (medianoche + timedelta(hours=9), 30.0),
+        (medianoche + timedelta(hours=23, minutes=59), 20.0),
+        (medianoche - timedelta(days=2), 15.0),  # lunes
+        (medianoche - timedelta(days=3), 99.0),  # domingo anterior
+        (medianoche + timedelta(days=1), 7.0),
+    ]:
+        memory_db.add(
+            Venta(id_usuario=1, fecha_venta=fecha, subtotal=total, total=total, metodo_pago="E")
+        )
+    memory_db.commit()
+    return memory_db
+
+
+def test_kpis_en_una_sola_consulta(db):
+    sentencias = []
+    bind = db.get_bind()
+    escuchar = lambda *args: sentencias.append(args[2])  # noqa: E731
+    event.listen(bind, "before_cursor_execute", escuchar)
+    try:
+        kpis = calcular_kpis_inventario(db, dias_vencimiento=30, incluir_ventas=True, hoy=HOY)
+    finally:
+        event.remove(bind, "before_cursor_execute", escuchar)
+
+    assert len(sentencias) == 1
+    assert kpis == {
+        "total_productos": 4,
+        "productos_activos": 3,
+        "productos_inactivos": 1,
+        "productos_bajo_stock": 2,
+        "productos_sin_stock": 1,
+        "productos_proximos_vencer": 1,
+        "valor_total_inventario": 60.0,
+        "stock_total": 11,
+        "precio_promedio": 6.33,
+        "porcentaje_bajo_stock": 66.67,
+        "ventas_dia": 50.0,
+        "ventas_semana": 65.0,
+    }
+
+
+def test_stats_de_productos_respetan_los_filtros(db):
+    stats = get_productos_stats(db, ProductoFilters(id_seccion=2, estado=None))
+
+    assert stats["total_productos"] == 2
+    assert stats["productos_activos"] == 1
+    assert stats["productos_bajo_stock"] == 1
+    # El valor y el stock se calculan sobre los productos filtrados y activos
+    assert stats["valor_total_inventario"] == 0.0
+    assert stats["stock_total"] == 0
+
+
+def test_postgresql_usa_agregados_con_filter():
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    calcular_kpis_inventario(db)
+
+    sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "FILTER (WHERE producto.estado" in sql
+    assert "CASE" not in sql
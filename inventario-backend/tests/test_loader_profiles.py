@@ -0,0 +1,164 @@
+"""Tests de los perfiles de carga: validación contra el modelo y consultas por endpoint."""
+
+import re
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.models.loader_profiles import perfil
+from app.models.models import (
+    Alerta,
+    Cliente,
+    Cotizacion,
+    DetalleCotizacion,
+    DetalleVenta,
+    Entrada,
+    Laboratorio,
+    Lote,
+    Producto,
+    Seccion,
+    Venta,
+)
+from main import app
+
+
+class _Rol:
+    nombre_rol = "admin"
+
+
+class _Usuario:
+    id_usuario = 1
+    nombre_usuario = "admin"
+    estado = "Activo"
+    rol = _Rol()
+
+
+def _consultas(path: str) -> tuple[int, dict | list]:
+    """Consultas SQL que ejecutó el request (según Server-Timing) y cuerpo de la respuesta."""
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'admin'})}"}
+    with patch("app.core.auth_middleware.get_current_user_from_token", return_value=_Usuario()):
+        response = TestClient(app).get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    return int(re.search(r'desc="(\d+) queries"', response.headers["Server-Timing"])[1]), (
+        response.json()
+    )
+
+
+def _sembrar(db, ids: range) -> None:
+    """Ventas, cotizaciones, entradas y alertas `ids`; cada documento con 2 detalles."""
+    if ids.start == 1:
+        db.add_all(
+            [
+                Cliente(id_cliente=1, nombre_cliente="Ana", apellido_cliente="Gómez", cedula="1"),
+                Seccion(id_seccion=1, nombre_seccion="Hierbas"),
+                Laboratorio(id_laboratorio=1, nombre_laboratorio="Lab"),
+                Producto(
+                    id_producto=1,
+                    id_seccion=1,
+                    id_laboratorio=1,
+                    nombre_producto="P1",
+                    precio_compra=1.0,
+                ),
+                Lote(
+                    id_lote=1,
+                    id_producto=1,
+                    cantidad_inicial=100,
+                    cantidad_disponible=100,
+                    precio_compra_lote=1,
+                    fecha_vencimiento=datetime(2030, 1, 1),
+                ),
+            ]
+        )
+    for i in ids:
+        fecha = datetime(2025, 6, i)
+        db.add(
+            Venta(
+                id_venta=i,
+                id_usuario=1,
+                id_cliente=1,
+                fecha_venta=fecha,
+                subtotal=10,
+                total=10,
+                metodo_pago="Efectivo",
+            )
+        )
+        db.add(
+            Cotizacion(
+                id_cotizacion=i,
+                id_usuario=1,
+                id_cliente=1,
+                numero_cotizacion=f"COT-{i}",
+                fecha_cotizacion=fecha,
+                subtotal=10,
+                total=10,
+            )
+        )
+        for _ in range(2):
+            db.add(DetalleVenta(id_venta=i, id_lote=1, cantidad=1, precio_unitario=5, subtotal=5))
+            db.add(
+                DetalleCotizacion(
+                    id_cotizacion=i, id_producto=1, cantidad=1, precio_unitario=5, subtotal=5
+                )
+            )
+        db.add(
+            Entrada(
+                id_usuario=1,
+                id_lote=1,
+                cantidad=1,
+                fecha_entrada=fecha,
+                precio_compra_unitario=1,
+                precio_compra_total=1,
+            )
+        )
+        db.add(Alerta(id_producto=1, tipo_alerta="Stock bajo", fecha_creacion=fecha))
+    db.commit()
+    db.expire_all()
+
+
+def test_ruta_inexistente_falla_al_construir_el_perfil():
+    with pytest.raises(ValueError, match="Venta no tiene la relación 'alertas'"):
+        perfil(Venta, "alertas")
+    with pytest.raises(ValueError, match="Lote no tiene la relación 'seccion'"):
+        perfil(Venta, "detalles.lote.seccion")
+
+
+LISTADOS = [
+    "/api/v1/ventas/",
+    "/api/v1/ventas/?paginacion=cursor",
+    "/api/v1/cotizaciones/",
+    "/api/v1/entradas/",
+    "/api/v1/alertas?size=100",
+]
+
+
+@pytest.mark.parametrize("path", LISTADOS)
+def test_consultas_del_listado_no_crecen_con_las_filas(_shared_db_session, path):
+    _sembrar(_shared_db_session, range(1, 2))
+    con_una, _ = _consultas(path)
+
+    _sembrar(_shared_db_session, range(2, 9))
+    con_ocho, cuerpo = _consultas(path)
+
+    items = cuerpo if isinstance(cuerpo, list) else cuerpo.get("items", cuerpo.get("data"))
+    assert len(items) == 8
+    assert con_ocho == con_una
+
+
+@pytest.mark.parametrize(
+    "path,detalles",
+    [("/api/v1/ventas/3", 2), ("/api/v1/cotizaciones/3", 2), ("/api/v1/entradas/3", None)],
+)
+def test_detalle_carga_sus_detalles_en_dos_consultas(_shared_db_session, path, detalles):
+    _sembrar(_shared_db_session, range(1, 5))
+
+    consultas, cuerpo = _consultas(path)
+
+    if detalles is None:
+        assert consultas == 1
+    else:
+        # El documento y sus detalles (selectinload), sin lazy loads por detalle
+        assert consultas == 2
+        assert len(cuerpo["detalles"]) == detalles
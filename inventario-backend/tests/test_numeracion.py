@@ -0,0 +1,71 @@
+"""Tests de la numeración de documentos por serie con reserva de bloques."""
+
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.core.numeracion import NumeradorDocumentos
+from app.models.models import ContadorDocumento, Cotizacion
+from app.routers import cotizaciones
+
+
+def test_un_update_por_bloque_y_numeros_consecutivos(memory_db):
+    numerador = NumeradorDocumentos(tamano_bloque=5)
+    sentencias = []
+    bind = memory_db.get_bind()
+    escuchar = lambda *args: sentencias.append(args[2])  # noqa: E731
+    event.listen(bind, "before_cursor_execute", escuchar)
+    try:
+        numeros = [numerador.siguiente(memory_db, "COT-2025") for _ in range(7)]
+    finally:
+        event.remove(bind, "before_cursor_execute", escuchar)
+
+    assert numeros == [1, 2, 3, 4, 5, 6, 7]
+    # Primer bloque: UPDATE sin fila, INSERT del contador y UPDATE; segundo bloque: un UPDATE
+    assert [s.split()[0] for s in sentencias] == ["UPDATE", "INSERT", "UPDATE", "UPDATE"]
+    assert memory_db.get(ContadorDocumento, "COT-2025").ultimo == 10
+    assert numerador.siguiente(memory_db, "COT-2026") == 1
+
+
+def test_workers_reciben_bloques_disjuntos(memory_db):
+    worker_a = NumeradorDocumentos(tamano_bloque=3)
+    worker_b = NumeradorDocumentos(tamano_bloque=3)
+
+    numeros = []
+    for _ in range(4):
+        numeros.append(worker_a.siguiente(memory_db, "COT-2025"))
+        numeros.append(worker_b.siguiente(memory_db, "COT-2025"))
+
+    assert len(set(numeros)) == len(numeros)
+    assert sorted(numeros[::2]) == numeros[::2] and sorted(numeros[1::2]) == numeros[1::2]
+
+
+def test_numero_de_cotizacion_continua_la_serie_existente(memory_db, monkeypatch):
+    memory_db.add(
+        Cotizacion(
+            numero_cotizacion="COT-2025-00041",
+            fecha_cotizacion=datetime(2025, 5, 1),
+            subtotal=1,
+            total=1,
+        )
+    )
+    memory_db.commit()
+    monkeypatch.setattr(cotizaciones, "numerador_documentos", NumeradorDocumentos(tamano_bloque=10))
+
+    assert cotizaciones.generar_numero_cotizacion(memory_db, 2025) == "COT-2025-00042"
+    assert cotizaciones.generar_numero_cotizacion(memory_db, 2025) == "COT-2025-00043"
+    assert cotizaciones.generar_numero_cotizacion(memory_db, 2024) == "COT-2024-00001"
+
+
+def test_serie_existente_continua_por_el_mayor_sufijo_numerico(memory_db, monkeypatch):
+    for numero in ["COT-2025-9", "COT-2025-10", "COT-2025-ANULADA", "COT-2025-00007"]:
+        memory_db.add(
+            Cotizacion(
+                numero_cotizacion=numero, fecha_cotizacion=datetime(2025, 5, 1), subtotal=1, total=1
+            )
+        )
+    memory_db.commit()
+    monkeypatch.setattr(cotizaciones, "numerador_documentos", NumeradorDocumentos(tamano_bloque=10))
+
+    # Ni el orden de texto ("-9" > "-10") ni el sufijo no numérico reinician la serie
+    assert cotizaciones.generar_numero_cotizacion(memory_db, 2025) == "COT-2025-00011"
@@ -0,0 +1,144 @@
+"""Tests de los filtros de periodo como rangos semiabiertos (sargables)."""
+
+import os
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, extract, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.core.security import create_access_token
+from app.models.database import Base
+from app.models.filters import (
+    apply_period_filter,
+    month_range,
+    period_predicates,
+    week_range,
+)
+from app.models.models import Cotizacion, Entrada, Gasto, Venta
+from main import app
+
+# Prefijo común de los índices sobre la columna de fecha (simple o compuesto con el id)
+COLUMNAS_FECHA = [
+    (Venta, Venta.fecha_venta, "ix_venta_fecha_venta"),
+    (Gasto, Gasto.fecha_gasto, "ix_gasto_fecha_gasto"),
+    (Entrada, Entrada.fecha_entrada, "ix_entrada_fecha_entrada"),
+    (Cotizacion, Cotizacion.fecha_cotizacion, "ix_cotizacion_fecha_cotizacion"),
+]
+
+
+def _plan(db, query, prefijo: str = "EXPLAIN QUERY PLAN") -> str:
+    compilada = query.statement.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    filas = db.execute(text(f"{prefijo} {compilada}")).all()
+    return "\n".join(str(fila[-1]) for fila in filas)
+
+
+def test_rangos_de_periodo_son_semiabiertos():
+    assert month_range(2024, 12) == (datetime(2024, 12, 1), datetime(2025, 1, 1))
+    assert month_range(2024, 2) == (datetime(2024, 2, 1), datetime(2024, 3, 1))
+    # Miércoles: la semana empieza el lunes y termina al final del día consultado
+    assert week_range(date(2025, 6, 11)) == (datetime(2025, 6, 9), datetime(2025, 6, 12))
+
+    sql = str(
+        Venta.__table__.select()
+        .where(*period_predicates(Venta.fecha_venta, 3, 2025))
+        .compile(dialect=postgresql.dialect())
+    )
+    assert "EXTRACT" not in sql
+    assert "venta.fecha_venta >= " in sql and "venta.fecha_venta < " in sql
+    # Un mes sin año no es un único rango
+    assert "EXTRACT" in str(period_predicates(Venta.fecha_venta, mes=3)[0])
+    # Un año 0 no se descarta en silencio como si no hubiera filtro
+    with pytest.raises(ValueError):
+        period_predicates(Venta.fecha_venta, año=0)
+
+
+@pytest.mark.parametrize("modelo,columna,indice", COLUMNAS_FECHA)
+def test_filtro_de_periodo_usa_el_indice_de_fecha_en_sqlite(memory_db, modelo, columna, indice):
+    rango = apply_period_filter(memory_db.query(modelo), columna, 3, 2025)
+    con_extract = memory_db.query(modelo).filter(
+        extract('month', columna) == 3, extract('year', columna) == 2025
+    )
+
+    assert f"USING INDEX {indice}" in _plan(memory_db, rango)
+    assert "USING INDEX" not in _plan(memory_db, con_extract)
+
+
+def test_estadisticas_anuales_de_gastos_respetan_los_limites_del_año(_shared_db_session):
+    for fecha, categoria, monto in [
+        (datetime(2024, 12, 31, 23, 59), "Servicios", 1.0),
+        (datetime(2025, 1, 1, 0, 0), "Servicios", 10.0),
+        (datetime(2025, 1, 20), "Arriendo", 20.0),
+        (datetime(2025, 3, 5), "Servicios", 5.0),
+        (datetime(2026, 1, 1, 0, 0), "Servicios", 100.0),
+    ]:
+        _shared_db_session.add(
+            Gasto(fecha_gasto=fecha, concepto="g", categoria=categoria, monto=monto, id_usuario=1)
+        )
+    _shared_db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'admin'})}"}
+
+    class _Rol:
+        nombre_rol = "admin"
+
+    class _Usuario:
+        id_usuario = 1
+        nombre_usuario = "admin"
+        estado = "Activo"
+        rol = _Rol()
+
+    with patch("app.core.auth_middleware.get_current_user_from_token", return_value=_Usuario()):
+        client = TestClient(app)
+        anual = client.get("/api/v1/gastos/estadisticas/año?año=2025", headers=headers).json()
+        enero = client.get("/api/v1/gastos/estadisticas/mes?mes=1&año=2025", headers=headers).json()
+        # Años fuera de rango: 422 en vez de un 500 al construir el rango del año siguiente
+        fuera_de_rango = [
+            client.get(url, headers=headers).status_code
+            for url in (
+                "/api/v1/gastos/?año=9999",
+                "/api/v1/ventas/estadisticas/año?año=9999",
+                "/api/v1/cotizaciones/?año=9999",
+                "/api/v1/entradas/?año=0",
+                "/api/v1/entradas/estadisticas/año?año=-1",
+            )
+        ]
+
+    assert anual["total_gastos"] == 35.0
+    assert anual["cantidad_gastos"] == 3
+    assert [(m["mes"], m["por_categoria"]) for m in anual["meses"]] == [
+        (1, {"Servicios": 10.0, "Arriendo": 20.0}),
+        (3, {"Servicios": 5.0}),
+    ]
+    assert (enero["total_gastos"], enero["cantidad_gastos"]) == (30.0, 2)
+    assert fuera_de_rango == [422] * 5
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("modelo,columna,indice", COLUMNAS_FECHA)
+def test_explain_en_postgresql_usa_el_indice_de_fecha(modelo, columna, indice):
+    url = os.getenv("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL no está definido")
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        # Con tablas pequeñas el planificador prefiere Seq Scan; se desactiva para comprobar
+        # que el predicado *puede* usar el índice
+        session.execute(text("SET LOCAL enable_seqscan = off"))
+        rango = apply_period_filter(session.query(modelo), columna, 3, 2025)
+        con_extract = session.query(modelo).filter(
+            extract('month', columna) == 3, extract('year', columna) == 2025
+        )
+
+        assert indice in _plan(session, rango, "EXPLAIN")
+        assert indice not in _plan(session, con_extract, "EXPLAIN")
+    finally:
+        session.rollback()
+        session.close()
+        engine.dispose()
@@ -0,0 +1,74 @@
+"""Tests de la telemetría del pool de conexiones y del controlador de overflow."""
+
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.core.log_context import route_var
+from app.core.metrics import metrics_manager
+from app.core.pool_telemetry import (
+    InstrumentedQueuePool,
+    PoolOverflowController,
+    instrumentar,
+    normalizar_ruta,
+)
+
+
+@pytest.fixture
+def motor(tmp_path):
+    """Pool de 1 conexión + 1 de overflow con nombre único (metrics_manager es global)."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    instrumentar(engine, f"test-{uuid.uuid4().hex[:8]}")
+    yield engine
+    engine.dispose()
+
+
+def test_registra_espera_overflow_timeout_y_checkout_por_ruta(motor):
+    nombre = motor.pool.nombre
+    token = route_var.set("GET /api/v1/productos/{id}")
+    try:
+        primera, segunda = motor.connect(), motor.connect()
+        with pytest.raises(exc.TimeoutError):
+            motor.connect()
+        primera.close()
+        segunda.close()
+    finally:
+        route_var.reset(token)
+
+    stats = metrics_manager.db_pool_stats(nombre)
+    assert (stats["wait_count"], stats["overflow"], stats["timeout"]) == (3, 1, 1)
+    # El timeout esperó al menos pool_timeout
+    assert sum(n for b, n in stats["wait_buckets"].items() if b >= 0.05) >= 1
+
+    (checkout,) = [
+        c for c in metrics_manager.db_pool_summary()["checkouts"] if c["engine"] == nombre
+    ]
+    assert (checkout["route"], checkout["count"]) == ("GET /api/v1/productos/{id}", 2)
+    assert normalizar_ruta("/api/v1/ventas/15/detalles") == "/api/v1/ventas/{id}/detalles"
+
+
+def test_controlador_ajusta_overflow_segun_la_saturacion(motor):
+    controlador = PoolOverflowController(motor, minimo=0, maximo=3, paso=1)
+    assert controlador.ajustar() == "baseline"
+
+    # Pico en pool_size + max_overflow: el pool está saturado
+    conexiones = [motor.connect(), motor.connect()]
+    assert controlador.ajustar() == "grow"
+    assert motor.pool._max_overflow == 2
+    for conexion in conexiones:
+        conexion.close()
+
+    # El intervalo arranca con las 2 conexiones aún en uso; el siguiente ya queda ocioso
+    assert controlador.ajustar() == "keep"
+    assert controlador.ajustar() == "shrink"
+    assert motor.pool._max_overflow == 1
+
+    estado = controlador.estado()
+    assert (estado["adjustments"], estado["recommended_pool_size"]) == (2, 2)
@@ -0,0 +1,96 @@
+"""Tests del contador de consultas por request, la detección de N+1 y el modo estricto."""
+
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.query_counter import QueryBudgetExceeded, contar_consultas, forma_sentencia
+from app.core.query_optimizer import QueryOptimizer
+from app.core.security import create_access_token
+from app.models.models import Gasto, Laboratorio, Producto, Seccion
+from main import app
+
+
+class _Rol:
+    nombre_rol = "admin"
+
+
+class _Usuario:
+    id_usuario = 1
+    nombre_usuario = "admin"
+    estado = "Activo"
+    rol = _Rol()
+
+
+def _get(path: str):
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'admin'})}"}
+    with patch("app.core.auth_middleware.get_current_user_from_token", return_value=_Usuario()):
+        return TestClient(app).get(path, headers=headers)
+
+
+def _productos(db, cantidad: int) -> None:
+    for i in range(1, cantidad + 1):
+        db.add(Seccion(id_seccion=i, nombre_seccion=f"S{i}"))
+        db.add(Laboratorio(id_laboratorio=i, nombre_laboratorio=f"L{i}"))
+        db.add(
+            Producto(
+                id_producto=i,
+                id_seccion=i,
+                id_laboratorio=i,
+                nombre_producto=f"P{i}",
+                precio_compra=1.0,
+            )
+        )
+    db.commit()
+    db.expire_all()
+
+
+def test_detecta_n_mas_1_y_el_optimizador_lo_evita(_shared_db_session):
+    db = _shared_db_session
+    _productos(db, 6)
+
+    with contar_consultas() as perezoso:
+        [p.seccion.nombre_seccion for p in db.query(Producto)]
+    db.expire_all()
+    with contar_consultas() as optimizado:
+        productos = QueryOptimizer.optimize_producto_query(db.query(Producto)).all()
+        [(p.seccion.nombre_seccion, p.laboratorio.nombre_laboratorio, p.lotes) for p in productos]
+
+    assert perezoso.consultas == 7
+    ((forma, veces),) = perezoso.repetidas()
+    assert veces == 6 and "FROM seccion" in forma
+    # Producto con sección y laboratorio en un JOIN + lotes en un SELECT ... IN
+    assert optimizado.consultas == 2
+    assert optimizado.repetidas() == []
+
+
+def test_forma_de_sentencia_ignora_literales_y_listas_in():
+    assert forma_sentencia("SELECT *\n FROM lote WHERE id IN (1, 2, 3) AND x = 'a'") == (
+        forma_sentencia("SELECT * FROM lote WHERE id IN (?, ?) AND x = 7")
+    )
+
+
+def test_server_timing_y_modo_estricto(_shared_db_session):
+    _shared_db_session.add(
+        Gasto(
+            fecha_gasto=datetime(2025, 1, 10),
+            concepto="g",
+            categoria="Servicios",
+            monto=5.0,
+            id_usuario=1,
+        )
+    )
+    _shared_db_session.commit()
+
+    response = _get("/api/v1/gastos/estadisticas/mes?mes=1&año=2025")
+    assert response.status_code == 200
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert 'queries", db-repeat;desc="1"' in response.headers["Server-Timing"]
+
+
+@pytest.mark.max_queries(0)
+def test_el_marcador_max_queries_hace_fallar_el_request(_shared_db_session):
+    with pytest.raises(QueryBudgetExceeded, match="/api/v1/gastos/estadisticas/mes"):
+        _get("/api/v1/gastos/estadisticas/mes?mes=1&año=2025")
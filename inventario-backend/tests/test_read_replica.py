@@ -0,0 +1,83 @@
+"""Tests del enrutamiento de lecturas a la réplica con vuelta al primario por retraso."""
+
+import pytest
+from sqlalchemy import create_engine, select
+
+import app.models.database as db_module
+from app.models.database import Base, ReadSessionLocal, ReplicaMonitor, pool_status
+from app.models.models import Laboratorio
+
+
+@pytest.fixture
+def motores(tmp_path, monkeypatch):
+    """Primario y réplica en dos archivos SQLite distintos, con un laboratorio propio cada uno."""
+    primario = create_engine(f"sqlite:///{tmp_path / 'primario.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for motor, nombre in ((primario, "En primario"), (replica, "En réplica")):
+        Base.metadata.create_all(bind=motor)
+        with motor.begin() as conn:
+            conn.execute(Laboratorio.__table__.insert().values(nombre_laboratorio=nombre))
+
+    monitor = ReplicaMonitor(replica, max_lag=5, intervalo=0)
+    monkeypatch.setattr(db_module, "engine", primario)
+    monkeypatch.setattr(db_module, "replica_engine", replica)
+    monkeypatch.setattr(db_module, "replica_monitor", monitor)
+    yield primario, replica, monitor
+    primario.dispose()
+    replica.dispose()
+
+
+def _laboratorios() -> list[str]:
+    with ReadSessionLocal() as db:
+        return list(db.scalars(select(Laboratorio.nombre_laboratorio)))
+
+
+def test_lecturas_van_a_la_replica_y_escrituras_al_primario(motores):
+    primario, replica, monitor = motores
+
+    assert _laboratorios() == ["En réplica"]
+
+    with ReadSessionLocal() as db:
+        # La sesión ya leyó de la réplica, pero el flush del commit va al primario
+        assert db.query(Laboratorio).count() == 1
+        db.add(Laboratorio(nombre_laboratorio="Nuevo"))
+        db.commit()
+
+    with primario.connect() as conn:
+        assert conn.execute(select(Laboratorio.nombre_laboratorio)).scalars().all() == [
+            "En primario",
+            "Nuevo",
+        ]
+    assert monitor.estado()["available"] is True
+    assert set(pool_status()) == {"primary", "replica"}
+
+
+def test_retraso_excesivo_o_replica_caida_vuelve_al_primario(motores, tmp_path, monkeypatch):
+    _, _, monitor = motores
+
+    monkeypatch.setattr(monitor, "_medir_lag", lambda: 30.0)
+    assert _laboratorios() == ["En primario"]
+    assert monitor.estado()["lag_seconds"] == 30.0
+
+    caida = create_engine(f"sqlite:///{tmp_path / 'no-existe' / 'replica.db'}")
+    monitor_caido = ReplicaMonitor(caida, max_lag=5, intervalo=0)
+    monkeypatch.setattr(db_module, "replica_engine", caida)
+    monkeypatch.setattr(db_module, "replica_monitor", monitor_caido)
+
+    assert _laboratorios() == ["En primario"]
+    estado = monitor_caido.estado()
+    assert (estado["available"], estado["lag_seconds"], estado["fallbacks_to_primary"]) == (
+        False,
+        None,
+        1,
+    )
+
+
+def test_el_retraso_se_mide_una_vez_por_intervalo():
+    mediciones = []
+    monitor = ReplicaMonitor(create_engine("sqlite://"), max_lag=5, intervalo=60)
+    monitor._medir_lag = lambda: mediciones.append(1) or 0.0
+
+    assert all(monitor.disponible() for _ in range(3))
+    assert len(mediciones) == 1
+    assert ReplicaMonitor(None, max_lag=5, intervalo=0).disponible() is False
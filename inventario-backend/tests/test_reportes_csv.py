@@ -0,0 +1,135 @@
+"""Tests de los exports CSV en streaming (servicio, router y compresión al vuelo)."""
+
+import csv
+import importlib.util
+import io
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.models.filters import ProductoFilters
+from app.models.models import Laboratorio, Producto, Seccion
+from app.services import report_service
+from main import app
+
+
+class _Rol:
+    nombre_rol = "admin"
+
+
+class _Usuario:
+    id_usuario = 1
+    nombre_usuario = "admin"
+    estado = "Activo"
+    rol = _Rol()
+
+
+def _get(path: str, **headers):
+    headers["Authorization"] = f"Bearer {create_access_token(data={'sub': 'admin'})}"
+    with patch("app.core.auth_middleware.get_current_user_from_token", return_value=_Usuario()):
+        return TestClient(app).get(path, headers=headers)
+
+
+def _sembrar(db, cantidad: int) -> None:
+    db.add_all(
+        [
+            Laboratorio(id_laboratorio=1, nombre_laboratorio="Lab, S.A."),
+            Laboratorio(id_laboratorio=2, nombre_laboratorio="Sin productos"),
+            Seccion(id_seccion=1, nombre_seccion="Hierbas"),
+        ]
+    )
+    for i in range(1, cantidad + 1):
+        db.add(
+            Producto(
+                id_producto=i,
+                id_laboratorio=1,
+                id_seccion=1,
+                nombre_producto=f"Producto {i:03d}",
+                precio_compra=2.5,
+                stock_actual=i,
+                stock_minimo=3,
+            )
+        )
+    db.commit()
+
+
+def test_stream_de_productos_sale_por_bloques(_shared_db_session, monkeypatch):
+    _sembrar(_shared_db_session, 7)
+    monkeypatch.setattr(report_service, "FILAS_POR_BLOQUE", 3)
+
+    chunks = list(report_service.stream_productos_csv(_shared_db_session, ProductoFilters()))
+
+    # Cabeceras + 3 + 3 + 1 filas
+    assert len(chunks) == 4
+    filas = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert filas[0] == report_service.PRODUCTOS_CABECERAS
+    assert filas[1] == [
+        "1",
+        "Producto 001",
+        "",
+        "",
+        "",
+        "No",
+        "2.50",
+        "1",
+        "3",
+        "Activo",
+        "Lab, S.A.",
+        "Hierbas",
+    ]
+    assert len(filas) == 8
+
+
+def test_export_de_productos_en_streaming_con_filtros(_shared_db_session):
+    _sembrar(_shared_db_session, 5)
+
+    response = _get("/api/v1/reportes/productos_stock_bajo.csv", **{"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.headers["content-disposition"] == (
+        'attachment; filename="productos_stock_bajo.csv"'
+    )
+    assert "content-length" not in response.headers
+    filas = list(csv.reader(io.StringIO(response.text)))
+    assert [f[1] for f in filas[1:]] == ["Producto 001", "Producto 002", "Producto 003"]
+
+
+@pytest.mark.parametrize("encoding", ["br", "gzip"])
+def test_compresion_al_vuelo_de_respuestas_en_streaming(_shared_db_session, encoding):
+    _sembrar(_shared_db_session, 50)
+
+    response = _get("/api/v1/reportes/productos.csv", **{"Accept-Encoding": encoding})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert len(response.text.splitlines()) == 51
+
+
+def test_total_de_productos_por_laboratorio_y_seccion(_shared_db_session):
+    _sembrar(_shared_db_session, 4)
+
+    laboratorios = list(csv.reader(io.StringIO(_get("/api/v1/reportes/laboratorios.csv").text)))
+    secciones = list(csv.reader(io.StringIO(_get("/api/v1/reportes/secciones.csv").text)))
+
+    assert [(f[1], f[-1]) for f in laboratorios[1:]] == [("Lab, S.A.", "4"), ("Sin productos", "0")]
+    assert [(f[1], f[-1]) for f in secciones[1:]] == [("Hierbas", "4")]
+
+
+@pytest.mark.slow
+def test_el_export_en_streaming_no_crece_con_las_filas():
+    ruta = Path(__file__).resolve().parents[1] / "scripts" / "benchmark_export_csv.py"
+    spec = importlib.util.spec_from_file_location("benchmark_export_csv", ruta)
+    benchmark = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(benchmark)
+
+    materializado, streaming = benchmark.run(100_000)
+
+    assert streaming["bytes"] == materializado["bytes"]
+    # El export materializado crece cientos de MB con 100k productos
+    assert materializado["peak_rss_growth_mb"] > 50
+    assert streaming["peak_rss_growth_mb"] < 20
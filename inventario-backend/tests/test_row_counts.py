@@ -0,0 +1,113 @@
+"""Tests del proveedor de totales para paginación (exacto, cacheado y estimado)."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import text, update
+from sqlalchemy.dialects.postgresql import asyncpg, psycopg2
+
+from app.core.row_counts import CountProvider, TableVersions, estimate_count
+from app.models.models import Seccion
+from app.models.pagination import PaginationMeta
+from app.services import SeccionService
+
+
+@pytest.fixture
+def db(memory_db):
+    memory_db.add_all([Seccion(nombre_seccion=f"S{i}", estado="Activo") for i in range(3)])
+    memory_db.commit()
+    return memory_db
+
+
+def _activas(db):
+    return db.query(Seccion).filter(Seccion.estado == "Activo")
+
+
+def _insertar_sin_orm(db, nombre):
+    # Escritura que el proveedor no observa: solo la caché puede explicar un total viejo
+    with db.get_bind().begin() as conn:
+        conn.execute(
+            text("INSERT INTO seccion (nombre_seccion, estado) VALUES (:n, 'Activo')"),
+            {"n": nombre},
+        )
+
+
+def test_conteo_cacheado_se_invalida_al_escribir_la_tabla(db):
+    provider = CountProvider(ttl=60)
+    assert provider.count(db, _activas(db), "cached") == (3, True)
+
+    _insertar_sin_orm(db, "Externa")
+    assert provider.count(db, _activas(db), "cached") == (3, True)
+    assert provider.count(db, _activas(db), "exact") == (4, True)
+
+    db.add(Seccion(nombre_seccion="Nueva", estado="Activo"))
+    db.commit()
+    assert provider.count(db, _activas(db), "cached") == (5, True)
+
+    db.execute(update(Seccion).where(Seccion.nombre_seccion == "S0").values(estado="Inactivo"))
+    db.commit()
+    assert provider.count(db, _activas(db), "cached") == (4, True)
+
+
+def test_conteo_cacheado_expira_por_ttl_y_distingue_filtros(db):
+    provider = CountProvider(ttl=0, versiones=TableVersions())
+    assert provider.count(db, _activas(db), "cached")[0] == 3
+    _insertar_sin_orm(db, "Externa")
+    assert provider.count(db, _activas(db), "cached")[0] == 4
+
+    provider = CountProvider(ttl=60)
+    inactivas = db.query(Seccion).filter(Seccion.estado == "Inactivo")
+    assert provider.count(db, _activas(db), "cached")[0] == 4
+    assert provider.count(db, inactivas, "cached")[0] == 0
+
+
+def test_estimado_solo_en_postgresql_y_por_encima_del_umbral(db):
+    provider = CountProvider(umbral_exacto=1000)
+    # SQLite: sin planificador útil, el total es exacto
+    assert provider.count(db, _activas(db), "estimate") == (3, True)
+
+    pg = MagicMock()
+    pg.get_bind.return_value.dialect.name = "postgresql"
+    query = MagicMock()
+    query.order_by.return_value = query
+    query.count.return_value = 12
+    with patch("app.core.row_counts.estimate_count", return_value=250_000):
+        assert provider.count(pg, query, "estimate") == (250_000, False)
+    with patch("app.core.row_counts.estimate_count", return_value=10):
+        assert provider.count(pg, query, "estimate") == (12, True)
+
+
+@pytest.mark.parametrize(
+    ("dialecto", "marcador", "parametros"),
+    [
+        (asyncpg.dialect(), "$1", ("Activo", 1, 2)),
+        (
+            psycopg2.dialect(),
+            "%(estado_1)s",
+            {"estado_1": "Activo", "id_seccion_1_1": 1, "id_seccion_1_2": 2},
+        ),
+    ],
+)
+def test_estimado_pasa_los_parametros_con_el_estilo_del_driver(db, dialecto, marcador, parametros):
+    pg = MagicMock()
+    pg.get_bind.return_value.dialect = dialecto
+    ejecutar = pg.connection.return_value.exec_driver_sql
+    ejecutar.return_value.scalar.return_value = [{"Plan": {"Plan Rows": 1234}}]
+    query = _activas(db).filter(Seccion.id_seccion.in_([1, 2]))
+
+    assert estimate_count(pg, query) == 1234
+    sql, enviados = ejecutar.call_args.args
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT") and marcador in sql
+    assert enviados == parametros
+
+
+def test_servicio_y_metadata_exponen_si_el_total_es_exacto(db):
+    secciones, total, exacto = SeccionService.listar(db, 1, 2, {"estado": "Activo"}, "cached")
+    assert (len(secciones), total, exacto) == (2, 3, True)
+
+    meta = PaginationMeta.create(page=1, size=50, total=250_000, total_exact=False)
+    assert meta.model_dump()["total_exact"] is False
+    assert (
+        PaginationMeta.create_keyset(size=10, next_cursor=None, prev_cursor=None).total_exact
+        is False
+    )
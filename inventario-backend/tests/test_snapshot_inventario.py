@@ -0,0 +1,215 @@
+"""Tests del snapshot de KPIs de inventario mantenido de forma incremental."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.crud import snapshot_inventario
+from app.crud.kpis_inventario import calcular_kpis_inventario
+from app.crud.producto import upsert_productos
+from app.crud.producto_advanced import get_productos_por_laboratorio_stats
+from app.crud.snapshot_inventario import (
+    AMBITO_LABORATORIO,
+    METRICAS,
+    estadisticas_por_ambito,
+    leer_snapshot,
+    reconstruir_snapshot,
+)
+from app.models.database import Base
+from app.models.models import (
+    Cliente,
+    InventoryExpirySnapshot,
+    InventorySnapshot,
+    Laboratorio,
+    Lote,
+    Producto,
+    Seccion,
+)
+from app.models.schemas import (
+    DetalleVentaCreate,
+    EntradaFacturaCreate,
+    EntradaLineaCreate,
+    VentaCreate,
+)
+from app.services.entrada_service import EntradaService
+from app.services.producto_service import ProductoService
+from app.services.venta_service import VentaService
+
+HOY = date(2025, 6, 11)
+
+
+@pytest.fixture
+def db(memory_db, monkeypatch):
+    """Base propia: las ventas y entradas hacen commit/rollback reales."""
+    monkeypatch.setattr(snapshot_inventario, "_inicializado", False)
+    memory_db.add_all(
+        [
+            Seccion(id_seccion=1, nombre_seccion="Hierbas"),
+            Seccion(id_seccion=2, nombre_seccion="Aceites"),
+            Laboratorio(id_laboratorio=1, nombre_laboratorio="Lab Uno"),
+            Laboratorio(id_laboratorio=2, nombre_laboratorio="Lab Dos"),
+            Cliente(id_cliente=1, nombre_cliente="Ana", apellido_cliente="Gómez", cedula="1001"),
+        ]
+    )
+    # (id, sección, laboratorio, estado, stock, mínimo, precio)
+    for id_producto, id_seccion, id_lab, estado, stock, minimo, precio in [
+        (1, 1, 1, "Activo", 8, 2, 5.0),
+        (2, 1, 2, "Activo", 3, 3, 10.0),
+        (3, 2, 1, "Activo", 0, 0, 4.0),
+        (4, 2, 2, "Inactivo", 50, 1, 100.0),
+    ]:
+        memory_db.add(
+            Producto(
+                id_producto=id_producto,
+                id_seccion=id_seccion,
+                id_laboratorio=id_lab,
+                nombre_producto=f"P{id_producto}",
+                codigo_barras=f"77{id_producto}",
+                estado=estado,
+                stock_actual=stock,
+                stock_minimo=minimo,
+                precio_compra=precio,
+            )
+        )
+    medianoche = datetime.combine(HOY, datetime.min.time())
+    # (id, producto, disponible, días hasta el vencimiento)
+    for id_lote, id_producto, disponible, dias in [
+        (1, 1, 5, 5),
+        (2, 1, 3, 20),
+        (3, 2, 3, 45),
+        (4, 3, 0, 10),
+        (5, 4, 50, 3),
+    ]:
+        memory_db.add(
+            Lote(
+                id_lote=id_lote,
+                id_producto=id_producto,
+                cantidad_inicial=max(disponible, 1),
+                cantidad_disponible=disponible,
+                precio_compra_lote=1,
+                fecha_vencimiento=medianoche + timedelta(days=dias),
+            )
+        )
+    memory_db.commit()
+    return memory_db
+
+
+def _contenido(db) -> tuple[dict, dict]:
+    """Filas no vacías de ambas tablas, comparables entre mantenimiento y reconstrucción."""
+    db.expire_all()
+    kpis = {
+        (fila.ambito, fila.id_ambito): tuple(round(getattr(fila, m), 6) for m in METRICAS)
+        for fila in db.query(InventorySnapshot)
+        if fila.ambito == "global" or any(getattr(fila, m) for m in METRICAS)
+    }
+    lotes = {
+        (fila.ambito, fila.id_ambito, fila.fecha_vencimiento): fila.lotes
+        for fila in db.query(InventoryExpirySnapshot)
+        if fila.lotes
+    }
+    return kpis, lotes
+
+
+def test_reconstruccion_coincide_con_los_kpis_calculados(db):
+    assert leer_snapshot(db) is None
+
+    resumen = reconstruir_snapshot(db)
+    assert resumen["productos"] == 4
+
+    snapshot = leer_snapshot(db, hoy=HOY)
+    kpis = calcular_kpis_inventario(db, hoy=HOY)
+    for clave in kpis.keys() - {"productos_proximos_vencer"}:
+        assert snapshot[clave] == kpis[clave], clave
+    # Lotes con stock por vencer en 30 días de productos activos (el lote 4 no tiene stock)
+    assert snapshot["lotes_proximos_vencer"] == 2
+    assert leer_snapshot(db, "seccion", 2, hoy=HOY)["productos_inactivos"] == 1
+    assert estadisticas_por_ambito(db, AMBITO_LABORATORIO) == get_productos_por_laboratorio_stats(
+        db
+    )
+
+
+def test_escrituras_mantienen_el_snapshot_igual_a_una_reconstruccion(db):
+    reconstruir_snapshot(db)
+
+    # Venta que agota el lote 1 y deja al producto 1 en bajo stock
+    VentaService.crear_venta(
+        db,
+        VentaCreate(
+            id_cliente=1,
+            metodo_pago="Efectivo",
+            detalles=[DetalleVentaCreate(id_lote=1, cantidad=5, precio_unitario=7.0)],
+        ),
+        id_usuario=1,
+    )
+    # Entrada que repone el lote 4 (cruza de cero a positivo) y el lote 3
+    EntradaService.registrar_factura(
+        db,
+        EntradaFacturaCreate(
+            numero_factura_compra="F-1",
+            proveedor="Distribuidora",
+            lineas=[
+                EntradaLineaCreate(id_lote=4, cantidad=6, precio_compra_unitario=4.0),
+                EntradaLineaCreate(id_lote=3, cantidad=2, precio_compra_unitario=10.0),
+            ],
+        ),
+        id_usuario=1,
+    )
+    # Cambio de sección, laboratorio y precio; alta; baja lógica; importación con upsert
+    ProductoService.actualizar(db, 2, {"id_seccion": 2, "id_laboratorio": 1, "precio_compra": 12.0})
+    ProductoService.crear(
+        db,
+        {
+            "id_seccion": 1,
+            "id_laboratorio": 2,
+            "nombre_producto": "Nuevo",
+            "stock_actual": 4,
+            "stock_minimo": 5,
+            "precio_compra": 3.0,
+        },
+    )
+    ProductoService.eliminar(db, 3, modo="logico")
+    upsert_productos(
+        db,
+        [
+            {
+                "codigo_barras": "771",
+                "nombre_producto": "P1",
+                "id_seccion": 1,
+                "id_laboratorio": 1,
+                "estado": "Activo",
+                "stock_actual": 30,
+                "precio_compra": 6.0,
+            },
+            {
+                "codigo_barras": "999",
+                "nombre_producto": "Importado",
+                "id_seccion": 2,
+                "id_laboratorio": 2,
+                "stock_actual": 1,
+                "precio_compra": 2.0,
+            },
+        ],
+    )
+    db.commit()
+
+    mantenido = _contenido(db)
+    reconstruir_snapshot(db)
+    assert mantenido == _contenido(db)
+    assert leer_snapshot(db, hoy=HOY)["total_productos"] == 6
+
+
+def test_sin_reconstruccion_las_escrituras_no_crean_filas(db):
+    ProductoService.actualizar(db, 1, {"precio_compra": 9.0})
+    VentaService.crear_venta(
+        db,
+        VentaCreate(
+            id_cliente=1,
+            metodo_pago="Efectivo",
+            detalles=[DetalleVentaCreate(id_lote=2, cantidad=1, precio_unitario=7.0)],
+        ),
+        id_usuario=1,
+    )
+
+    assert db.query(InventorySnapshot).count() == 0
+    assert db.query(InventoryExpirySnapshot).count() == 0
+    assert leer_snapshot(db) is None
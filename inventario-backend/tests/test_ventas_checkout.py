@@ -0,0 +1,233 @@
+"""Tests del checkout de ventas: descuento atómico de stock y concurrencia entre cajas."""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.exceptions import NotFoundError, StockInsuficienteException
+from app.models.database import Base
+from app.models.models import (
+    Cliente,
+    Cotizacion,
+    DetalleCotizacion,
+    DetalleVenta,
+    Laboratorio,
+    Lote,
+    Producto,
+    Seccion,
+)
+from app.models.schemas import DetalleVentaCreate, VentaCreate
+from app.services.venta_service import VentaService
+
+
+def _seed(db, cantidades_lotes: list[int], vencimientos: list[datetime | None] | None = None) -> dict:
+    seccion = Seccion(nombre_seccion="Seccion Ventas", estado="Activo")
+    laboratorio = Laboratorio(nombre_laboratorio="Lab Ventas", estado="Activo")
+    db.add_all([seccion, laboratorio])
+    db.flush()
+    producto = Producto(
+        id_seccion=seccion.id_seccion,
+        id_laboratorio=laboratorio.id_laboratorio,
+        nombre_producto="Manzanilla",
+        precio_compra=1.0,
+        stock_actual=sum(cantidades_lotes),
+    )
+    cliente = Cliente(nombre_cliente="Ana", apellido_cliente="Gómez", cedula="1001")
+    db.add_all([producto, cliente])
+    db.flush()
+    lotes = [
+        Lote(
+            id_producto=producto.id_producto,
+            numero_lote=f"L{i}",
+            cantidad_inicial=cantidad,
+            cantidad_disponible=cantidad,
+            precio_compra_lote=1.0,
+            fecha_vencimiento=vencimientos[i] if vencimientos else None,
+        )
+        for i, cantidad in enumerate(cantidades_lotes)
+    ]
+    db.add_all(lotes)
+    db.commit()
+    return {
+        "id_cliente": cliente.id_cliente,
+        "id_producto": producto.id_producto,
+        "lotes": [lote.id_lote for lote in lotes],
+    }
+
+
+def _venta(id_cliente: int, lineas: list[tuple[int, int]], por_producto: bool = False) -> VentaCreate:
+    campo = "id_producto" if por_producto else "id_lote"
+    return VentaCreate(
+        id_cliente=id_cliente,
+        metodo_pago="Efectivo",
+        detalles=[
+            DetalleVentaCreate(**{campo: id_ref}, cantidad=cantidad, precio_unitario=2.5)
+            for id_ref, cantidad in lineas
+        ],
+    )
+
+
+def test_crear_venta_descuenta_lotes_y_producto(memory_db):
+    datos = _seed(memory_db, [10, 5])
+    lote_a, lote_b = datos["lotes"]
+
+    venta = VentaService.crear_venta(
+        memory_db,
+        _venta(datos["id_cliente"], [(lote_a, 3), (lote_b, 5), (lote_a, 2)]),
+        id_usuario=1,
+    )
+
+    assert venta.subtotal == pytest.approx(25.0)
+    assert len(venta.detalles) == 3
+    memory_db.expire_all()
+    assert memory_db.get(Lote, lote_a).cantidad_disponible == 5
+    assert memory_db.get(Lote, lote_b).cantidad_disponible == 0
+    assert memory_db.get(Producto, datos["id_producto"]).stock_actual == 5
+
+
+def test_crear_venta_stock_insuficiente_no_modifica_nada(memory_db):
+    datos = _seed(memory_db, [4, 5])
+    lote_a, lote_b = datos["lotes"]
+
+    with pytest.raises(StockInsuficienteException):
+        VentaService.crear_venta(
+            memory_db,
+            _venta(datos["id_cliente"], [(lote_b, 1), (lote_a, 3), (lote_a, 2)]),
+            id_usuario=1,
+        )
+
+    memory_db.expire_all()
+    assert memory_db.get(Lote, lote_a).cantidad_disponible == 4
+    assert memory_db.get(Lote, lote_b).cantidad_disponible == 5
+    assert memory_db.query(DetalleVenta).count() == 0
+
+
+def test_crear_venta_lote_inexistente(memory_db):
+    datos = _seed(memory_db, [4])
+
+    with pytest.raises(NotFoundError):
+        VentaService.crear_venta(memory_db, _venta(datos["id_cliente"], [(999, 1)]), id_usuario=1)
+
+
+def test_lote_eliminado_antes_del_descuento_se_reporta_como_no_encontrado(memory_db):
+    datos = _seed(memory_db, [4])
+
+    with pytest.raises(NotFoundError) as error:
+        VentaService._descontar_lotes(memory_db, {datos["lotes"][0]: 1, 999: 1})
+
+    assert error.value.details["identifier"] == "999"
+
+
+def test_crear_venta_por_producto_reparte_fefo(memory_db):
+    hoy = datetime.now()
+    datos = _seed(memory_db, [4, 3, 6], [hoy + timedelta(days=200), hoy + timedelta(days=20), None])
+    tardio, proximo, sin_fecha = datos["lotes"]
+
+    venta = VentaService.crear_venta(
+        memory_db, _venta(datos["id_cliente"], [(datos["id_producto"], 5)], por_producto=True), id_usuario=1
+    )
+
+    assert sorted((d.id_lote, d.cantidad) for d in venta.detalles) == sorted([(proximo, 3), (tardio, 2)])
+    assert venta.subtotal == pytest.approx(12.5)
+    memory_db.expire_all()
+    assert memory_db.get(Lote, proximo).cantidad_disponible == 0
+    assert memory_db.get(Lote, tardio).cantidad_disponible == 2
+    assert memory_db.get(Lote, sin_fecha).cantidad_disponible == 6
+    assert memory_db.get(Producto, datos["id_producto"]).stock_actual == 8
+
+
+def test_convertir_cotizacion_asigna_varios_lotes(memory_db):
+    hoy = datetime.now()
+    datos = _seed(memory_db, [2, 2], [hoy + timedelta(days=30), hoy + timedelta(days=10)])
+    cotizacion = Cotizacion(
+        id_cliente=datos["id_cliente"],
+        numero_cotizacion="COT-2025-00001",
+        fecha_cotizacion=hoy,
+        subtotal=7.5,
+        total=7.5,
+        estado="Pendiente",
+    )
+    memory_db.add(cotizacion)
+    memory_db.flush()
+    memory_db.add(
+        DetalleCotizacion(
+            id_cotizacion=cotizacion.id_cotizacion,
+            id_producto=datos["id_producto"],
+            cantidad=3,
+            precio_unitario=2.5,
+            subtotal=7.5,
+        )
+    )
+    memory_db.commit()
+
+    venta = VentaService.convertir_cotizacion(memory_db, cotizacion, "Efectivo", id_usuario=1)
+
+    assert [(d.id_lote, d.cantidad) for d in venta.detalles] == [
+        (datos["lotes"][1], 2),
+        (datos["lotes"][0], 1),
+    ]
+    assert cotizacion.estado == "Convertida"
+    assert cotizacion.id_venta_relacionada == venta.id_venta
+
+
+def test_ventas_concurrentes_nunca_dejan_stock_negativo(tmp_path):
+    """Varias cajas venden el mismo lote a la vez: el stock final cuadra y nunca es negativo."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'checkout.sqlite'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+
+    @event.listens_for(engine, "connect")
+    def _modo_inmediato(dbapi_connection, _record):
+        # BEGIN IMMEDIATE emula el bloqueo de fila: un solo escritor por transacción
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    stock_inicial = 25
+    with Session() as db:
+        datos = _seed(db, [stock_inicial])
+    id_lote = datos["lotes"][0]
+
+    vendidas: list[int] = []
+    rechazadas: list[int] = []
+    lock = threading.Lock()
+    barrera = threading.Barrier(8)
+
+    def caja(cantidades: list[int]) -> None:
+        barrera.wait()
+        for cantidad in cantidades:
+            with Session() as db:
+                try:
+                    VentaService.crear_venta(
+                        db, _venta(datos["id_cliente"], [(id_lote, cantidad)]), id_usuario=1
+                    )
+                    with lock:
+                        vendidas.append(cantidad)
+                except StockInsuficienteException:
+                    with lock:
+                        rechazadas.append(cantidad)
+
+    hilos = [threading.Thread(target=caja, args=([1, 2, 3],)) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    with Session() as db:
+        lote = db.get(Lote, id_lote)
+        producto = db.get(Producto, datos["id_producto"])
+        assert lote.cantidad_disponible >= 0
+        assert lote.cantidad_disponible == stock_inicial - sum(vendidas)
+        assert producto.stock_actual == lote.cantidad_disponible
+        assert db.query(DetalleVenta).count() == len(vendidas)
+    assert rechazadas
+    assert len(vendidas) + len(rechazadas) == 24
+    engine.dispose()
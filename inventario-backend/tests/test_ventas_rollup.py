@@ -0,0 +1,189 @@
+"""Tests del rollup diario de ventas y de las estadísticas por rango de fechas."""
+
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.security import create_access_token
+from app.crud.ventas_rollup import (
+    estadisticas_por_mes,
+    estadisticas_rango,
+    reconstruir_rollup_ventas,
+)
+from app.models.database import Base
+from app.models.models import Cliente, Laboratorio, Lote, Producto, Seccion, VentaDailyRollup
+from app.models.schemas import DetalleVentaCreate, VentaCreate
+from app.services.venta_service import VentaService
+from main import app
+
+
+@pytest.fixture
+def db(memory_db):
+    """Base propia: las ventas hacen commit/rollback reales."""
+    memory_db.add_all(
+        [
+            Seccion(id_seccion=1, nombre_seccion="Hierbas"),
+            Laboratorio(id_laboratorio=1, nombre_laboratorio="Lab Uno"),
+            Cliente(id_cliente=1, nombre_cliente="Ana", apellido_cliente="Gómez", cedula="1001"),
+            Producto(
+                id_producto=1,
+                id_seccion=1,
+                id_laboratorio=1,
+                nombre_producto="Manzanilla",
+                stock_actual=100,
+                precio_compra=1.0,
+            ),
+            Lote(
+                id_lote=1,
+                id_producto=1,
+                cantidad_inicial=100,
+                cantidad_disponible=100,
+                precio_compra_lote=1.0,
+            ),
+        ]
+    )
+    memory_db.commit()
+    return memory_db
+
+
+def _vender(db, fecha: datetime, cantidad: int, metodo: str = "Efectivo"):
+    return VentaService.crear_venta(
+        db,
+        VentaCreate(
+            id_cliente=1,
+            metodo_pago=metodo,
+            fecha_venta=fecha,
+            detalles=[DetalleVentaCreate(id_lote=1, cantidad=cantidad, precio_unitario=10.0)],
+        ),
+        id_usuario=1,
+    )
+
+
+def _filas(db) -> dict:
+    db.expire_all()
+    return {
+        (f.fecha, f.metodo_pago): (f.cantidad_ventas, round(f.total_ventas, 2))
+        for f in db.query(VentaDailyRollup)
+        if f.cantidad_ventas
+    }
+
+
+def test_rollup_se_mantiene_al_registrar_y_anular_ventas(db):
+    _vender(db, datetime(2025, 1, 31, 23, 59), 1)
+    _vender(db, datetime(2025, 2, 1, 0, 0), 2, "Tarjeta")
+    anulada = _vender(db, datetime(2025, 2, 1, 12, 0), 3)
+    _vender(db, datetime(2025, 2, 28, 18, 0), 4)
+
+    VentaService.cambiar_estado(db, anulada.id_venta, "Inactivo")
+    # Repetir el mismo estado no vuelve a restar
+    VentaService.cambiar_estado(db, anulada.id_venta, "Inactivo")
+
+    assert _filas(db) == {
+        (date(2025, 1, 31), "Efectivo"): (1, 10.0),
+        (date(2025, 2, 1), "Tarjeta"): (1, 20.0),
+        (date(2025, 2, 28), "Efectivo"): (1, 40.0),
+    }
+    mantenido = _filas(db)
+    assert reconstruir_rollup_ventas(db) == 3
+    assert _filas(db) == mantenido
+
+    VentaService.cambiar_estado(db, anulada.id_venta, "Activo")
+    assert _filas(db)[(date(2025, 2, 1), "Efectivo")] == (1, 30.0)
+
+
+def test_estadisticas_por_rango_semiabierto_en_una_consulta(db):
+    for fecha, cantidad, metodo in [
+        (datetime(2025, 1, 31, 23, 59), 1, "Efectivo"),
+        (datetime(2025, 2, 1, 0, 0), 2, "Tarjeta"),
+        (datetime(2025, 2, 15, 9, 0), 4, "Efectivo"),
+        (datetime(2025, 3, 1, 0, 0), 8, "Efectivo"),
+    ]:
+        _vender(db, fecha, cantidad, metodo)
+
+    sentencias = []
+    bind = db.get_bind()
+    escuchar = lambda *args: sentencias.append(args[2])  # noqa: E731
+    event.listen(bind, "before_cursor_execute", escuchar)
+    try:
+        febrero = estadisticas_rango(db, date(2025, 2, 1), date(2025, 3, 1))
+    finally:
+        event.remove(bind, "before_cursor_execute", escuchar)
+
+    assert len(sentencias) == 1
+    assert "venta_daily_rollup" in sentencias[0] and "FROM venta " not in sentencias[0]
+    assert febrero == {
+        "total_ventas": 60.0,
+        "cantidad_ventas": 2,
+        "promedio_venta": 30.0,
+        "por_metodo_pago": [
+            {
+                "metodo_pago": "Efectivo",
+                "total_ventas": 40.0,
+                "cantidad_ventas": 1,
+                "promedio_venta": 40.0,
+            },
+            {
+                "metodo_pago": "Tarjeta",
+                "total_ventas": 20.0,
+                "cantidad_ventas": 1,
+                "promedio_venta": 20.0,
+            },
+        ],
+    }
+    assert [
+        (m["mes"], m["cantidad_ventas"], m["total_ventas"]) for m in estadisticas_por_mes(db, 2025)
+    ] == [(1, 1, 10.0), (2, 2, 60.0), (3, 1, 80.0)]
+
+
+def test_endpoints_de_estadisticas_leen_el_rollup(_shared_db_session):
+    _shared_db_session.add_all(
+        [
+            VentaDailyRollup(
+                fecha=date(2025, 2, 1), metodo_pago="Efectivo", cantidad_ventas=2, total_ventas=50
+            ),
+            VentaDailyRollup(
+                fecha=date(2025, 2, 28), metodo_pago="", cantidad_ventas=1, total_ventas=10
+            ),
+            VentaDailyRollup(
+                fecha=date(2025, 3, 1), metodo_pago="Efectivo", cantidad_ventas=1, total_ventas=5
+            ),
+        ]
+    )
+    _shared_db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'admin'})}"}
+
+    class _Rol:
+        nombre_rol = "admin"
+
+    class _Usuario:
+        id_usuario = 1
+        nombre_usuario = "admin"
+        estado = "Activo"
+        rol = _Rol()
+
+    with patch("app.core.auth_middleware.get_current_user_from_token", return_value=_Usuario()):
+        client = TestClient(app)
+        mes = client.get("/api/v1/ventas/estadisticas/mes?mes=2&año=2025", headers=headers)
+        anual = client.get("/api/v1/ventas/estadisticas/año?año=2025", headers=headers)
+        rango = client.get(
+            "/api/v1/ventas/estadisticas/rango?desde=2025-02-28&hasta=2025-03-01", headers=headers
+        )
+        invertido = client.get(
+            "/api/v1/ventas/estadisticas/rango?desde=2025-03-01&hasta=2025-02-28", headers=headers
+        )
+
+    assert mes.json() == {
+        "mes": 2,
+        "año": 2025,
+        "total_ventas": 60.0,
+        "cantidad_ventas": 3,
+        "promedio_venta": 20.0,
+    }
+    assert anual.json()["cantidad_ventas"] == 4
+    assert [m["mes"] for m in anual.json()["meses"]] == [2, 3]
+    assert rango.json()["total_ventas"] == 15.0
+    assert {m["metodo_pago"] for m in rango.json()["por_metodo_pago"]} == {"Efectivo", None}
+    assert invertido.status_code == 400